@@ -45,6 +45,8 @@ if data_access_approach == RemoteState.REMOTE:
     import httpx
     import dotenv
 
+    from ${{ carnate.project_name }} import api  # per-endpoint deadlines
+
     # Grab secrets from .env
     client_id = dotenv.get_key("../.env", "PAGERDUTY_SUPPORT_OKTA_CLIENT_ID")
     client_secret = dotenv.get_key("../.env", "PAGERDUTY_SUPPORT_OKTA_CLIENT_SECRET")
@@ -82,7 +84,10 @@ if data_access_approach == RemoteState.REMOTE:
     ## POST Authorization Code in exchange for a Bearer Access Token
     with httpx.Client() as client:
         getbearer_response = client.post(
-            okta_base_url, headers=headers_okta, params=okta_params, timeout=None
+            okta_base_url,
+            headers=headers_okta,
+            params=okta_params,
+            timeout=api.deadline_for(okta_base_url).timeout,
         )
     print(f"POST  ../token: {getbearer_response}\n")
 
@@ -125,7 +130,10 @@ import json
 if data_access_approach == RemoteState.REMOTE:
     with httpx.Client() as client:
         getzenqprod_response = client.get(
-            zenq_base_url, headers=headers_zenq, params=zenq_params, timeout=None
+            zenq_base_url,
+            headers=headers_zenq,
+            params=zenq_params,
+            timeout=api.deadline_for(zenq_base_url).timeout,
         )
     print(f"GET ../tickets: {getzenqprod_response}\n")
 
@@ -148,3 +148,18 @@ print(lic_allocs_df.select("license"))
 
 # %%
 print(lic_allocs_df.select("user"))
+
+# %% [markdown]
+# ## All accounts at once
+# Rather than switching `headers` by hand, pull every account configured in `.env` concurrently.
+# (Same as `pd snapshot` from the CLI.)  Rows are tagged with their `account`.
+
+# %%
+from pathlib import Path
+
+from ${{ carnate.project_name }} import pagerduty
+
+accounts = list(pagerduty.load_accounts(Path("../.env")).values())
+snap = pagerduty.snapshot(accounts)
+print(snap.errors)
+snap.frames["users"].group_by("account").len()
@@ -52,6 +52,23 @@ irisodes = pl.read_csv("../data/iris.csv")
 irisodes.sample(3)
 irisodes.plot.scatter(x="sepal.length", y="sepal.width", by="variety")
 
+# %% [markdown]
+# ### Binned scatter plots for large data
+# Plotting every point stops being useful (and stops being responsive) at millions of rows.
+# `bin2d` rasterises the points into a fixed grid of counts first, so only the grid is sent to hvplot.
+# It takes eager frames, lazy frames (e.g. `pl.scan_csv`), or chunks (e.g. `pl.read_csv_batched`).
+
+# %%
+from ${{ carnate.project_name }}.binning import bin2d
+
+bin2d(
+    pl.scan_csv("../data/penguins.csv", null_values="NA"),
+    x="bill_length_mm",
+    y="bill_depth_mm",
+    by="species",
+    bins=40,
+).plot()
+
 # %% [markdown]
 # ## Plotting Temporal Data
 
@@ -0,0 +1,281 @@
+"""Shared async HTTP plumbing for the API clients (PagerDuty, Zenq).
+
+Each credential (account) gets its own `httpx.AsyncClient`, hence its own
+connection pool, and its own `RateBudget`, so accounts never queue behind
+each other and each stays inside its own API rate limit.
+
+Every call also runs against a `Deadline`, looked up by endpoint in `DEADLINES`:
+connect / read / pool timeouts for each request, and a total budget for the
+call, retries included, so one stalled request can't hang a run.
+Endpoints that allow it are *hedged*: if a GET hasn't answered by the
+endpoint's recent p95 latency, an identical request is sent and whichever
+answers first wins, bounding the tail latency of long pulls.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+import httpx
+
+if TYPE_CHECKING:
+    from . import progress
+
+DEFAULT_MAX_CONNECTIONS = 8
+MAX_RETRIES = 5
+LATENCY_WINDOW = 200
+"""Recent responses per endpoint that the hedging threshold is computed from."""
+MIN_LATENCY_SAMPLES = 20
+"""Responses an endpoint needs before it is hedged (until then its p95 is unknown)."""
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """Time limits for calls to one endpoint, and whether to hedge them."""
+
+    connect: float = 5.0
+    read: float = 30.0
+    pool: float = 10.0
+    """Longest wait for a free connection from the pool."""
+    total: float = 120.0
+    """Longest a whole call may take, retries and back-off included."""
+    hedge: bool = False
+    hedge_quantile: float = 0.95
+    min_hedge_delay: float = 0.05
+
+    @property
+    def timeout(self) -> httpx.Timeout:
+        """The per-request timeouts, for httpx."""
+        return httpx.Timeout(
+            connect=self.connect, read=self.read, write=self.read, pool=self.pool
+        )
+
+
+DEFAULT_DEADLINE = Deadline()
+DEADLINES: dict[str, Deadline] = {
+    # PagerDuty list endpoints: small, idempotent pages; the tail is worth hedging
+    "/users": Deadline(hedge=True),
+    "/licenses": Deadline(hedge=True),
+    "/license_allocations": Deadline(hedge=True),
+    "/oncalls": Deadline(hedge=True),
+    "/incidents": Deadline(hedge=True),
+    "/log_entries": Deadline(read=60.0, total=300.0, hedge=True),
+    # Zenq answers with every matching ticket at once: slow, and too big to send twice
+    "/tickets": Deadline(read=120.0, total=600.0),
+    # Okta token exchange
+    "/token": Deadline(connect=5.0, read=15.0, total=30.0),
+}
+"""Deadlines by endpoint (the last path segment(s) of the URL)."""
+DEFAULT_TIMEOUT = DEFAULT_DEADLINE.timeout
+
+
+def deadline_for(url: str) -> Deadline:
+    """Return the deadline of the endpoint `url` points at.
+
+    >>> deadline_for("https://x/api/v2/tickets").read
+    120.0
+    >>> deadline_for("/users").hedge, deadline_for("/schedules").hedge
+    (True, False)
+    """
+    path = httpx.URL(url).path.rstrip("/")
+    for endpoint, deadline in DEADLINES.items():
+        if path == endpoint or path.endswith(endpoint):
+            return deadline
+    return DEFAULT_DEADLINE
+
+
+class LatencyWindow:
+    """Recent response times of one endpoint, and how often it was hedged."""
+
+    def __init__(self, size: int = LATENCY_WINDOW) -> None:
+        """Keep the latest `size` response times."""
+        self.seconds: deque[float] = deque(maxlen=size)
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def add(self, seconds: float) -> None:
+        """Record one response time."""
+        self.seconds.append(seconds)
+
+    def quantile(self, q: float) -> float | None:
+        """Return the `q` quantile of recent response times, if there are enough.
+
+        >>> window = LatencyWindow()
+        >>> for ms in range(1, 101):
+        ...     window.add(ms / 1000)
+        >>> window.quantile(0.95)
+        0.095
+        """
+        if len(self.seconds) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self.seconds)
+        return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+LATENCIES: dict[str, LatencyWindow] = {}
+"""Recent latencies by endpoint (host and path), shared by every client in the process."""
+
+
+def window_for(url: httpx.URL) -> LatencyWindow:
+    """Return the latency window of the endpoint `url` (an absolute URL) points at.
+
+    >>> window_for(httpx.URL("https://api.example.com/users?offset=100")) is (
+    ...     LATENCIES["api.example.com/users"]
+    ... )
+    True
+    """
+    return LATENCIES.setdefault(f"{url.host}{url.path}", LatencyWindow())
+
+
+class RateBudget:
+    """Token bucket: at most `rate` requests per second, in bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int | None = None) -> None:
+        """Allow `rate` requests/second on average, `burst` (default: `rate`) at once."""
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent, then spend a token on it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def make_client(
+    base_url: str,
+    headers: dict[str, str],
+    *,
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    timeout: httpx.Timeout = DEFAULT_TIMEOUT,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> httpx.AsyncClient:
+    """Return a client with its own, bounded, keep-alive connection pool."""
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers,
+        limits=httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections
+        ),
+        timeout=timeout,
+        transport=transport,
+    )
+
+
+async def get_json(  # noqa: PLR0913
+    client: httpx.AsyncClient,
+    url: str,
+    budget: RateBudget,
+    params: dict[str, Any] | None = None,
+    task: progress.Task | None = None,
+    deadline: Deadline | None = None,
+) -> Any:  # noqa: ANN401
+    """GET `url` within `budget`, retrying (with back-off) when rate limited.
+
+    The call is bounded by `deadline` (default: the endpoint's, see `DEADLINES`):
+    each request by its timeouts, and the whole call, retries included, by its
+    total (raising `TimeoutError`). Hedged endpoints send a second request once
+    the first has taken longer than their recent p95.
+    The size of the final response body is counted towards `task`, if given.
+    """
+    deadline = deadline or deadline_for(url)
+    try:
+        async with asyncio.timeout(deadline.total):
+            for attempt in range(MAX_RETRIES):
+                await budget.acquire()
+                response = await _get(client, url, params, budget, deadline)
+                if (
+                    response.status_code == httpx.codes.TOO_MANY_REQUESTS
+                    and attempt < MAX_RETRIES - 1
+                ):
+                    await asyncio.sleep(retry_delay(response, attempt))
+                    continue
+                response.raise_for_status()
+                if task is not None:
+                    task.advance(0, nbytes=len(response.content))
+                return response.json()
+    except TimeoutError:
+        msg = f"GET {url} exceeded its {deadline.total:g}s deadline"
+        raise TimeoutError(msg) from None
+    return None  # unreachable: the last attempt either returns or raises
+
+
+async def _get(
+    client: httpx.AsyncClient,
+    url: str,
+    params: dict[str, Any] | None,
+    budget: RateBudget,
+    deadline: Deadline,
+) -> httpx.Response:
+    """Send one GET, hedged if the endpoint allows it and its p95 is known."""
+    window = window_for(client.build_request("GET", url).url)
+    threshold = window.quantile(deadline.hedge_quantile) if deadline.hedge else None
+
+    async def timed() -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            response = await client.get(url, params=params, timeout=deadline.timeout)
+        except asyncio.CancelledError:
+            # a hedge's loser took at least this long: leaving it out would drop
+            # the slow tail from the window, pulling p95 (and the threshold) down
+            window.add(time.perf_counter() - started)
+            raise
+        window.add(time.perf_counter() - started)
+        return response
+
+    primary = asyncio.create_task(timed())
+    if threshold is None:
+        return await primary
+    hedge: asyncio.Task[httpx.Response] | None = None
+    pending: set[asyncio.Task[httpx.Response]] = {primary}
+    try:
+        done, pending = await asyncio.wait(
+            pending, timeout=max(threshold, deadline.min_hedge_delay)
+        )
+        if not done:
+            await budget.acquire()
+            window.hedged += 1
+            hedge = asyncio.create_task(timed())
+            pending.add(hedge)
+        while True:
+            # prefer a response to an error; settle for an error once both failed
+            for finished in sorted(done, key=lambda t: t.exception() is not None):
+                if finished.exception() is None or not pending:
+                    window.hedge_wins += finished is hedge
+                    return finished.result()
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+    finally:
+        for unfinished in pending:
+            unfinished.cancel()
+
+
+def retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Seconds to wait before retrying: the server's `Retry-After`, else back-off.
+
+    >>> retry_delay(httpx.Response(429, headers={"Retry-After": "3"}), 0)
+    3.0
+    >>> retry_delay(httpx.Response(429), 2)
+    4.0
+    """
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return 2.0**attempt
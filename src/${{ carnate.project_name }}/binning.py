@@ -0,0 +1,247 @@
+"""Server-side 2D binning (rasterising) for scatter plots too large to draw point-wise.
+
+Rather than handing millions of points to the plotting backend we bin `x`/`y` into a
+fixed grid of counts (and, optionally, sums of a value column so cell means fall out),
+split by an optional category column (e.g. `species`, `variety`).
+The grid is tiny regardless of input size and plots as an image via hvplot.
+
+Binning is a single vectorised pass per chunk:
+each row is turned into a flat cell index and `numpy.bincount` does the histogramming.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import polars as pl
+
+from . import memory
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+DEFAULT_BINS = 200
+DEFAULT_CHUNK_ROWS = 1_000_000
+COLUMN_BYTES = 8
+"""Bytes per value assumed when sizing chunks to the memory budget."""
+
+
+@dataclass
+class Grid2D:
+    """Counts (and optional value sums) of points falling in each `x`/`y` cell.
+
+    `counts`, `sums` and `value_counts` are shaped `(n_categories, y_bins, x_bins)`;
+    without a category column there is a single, unnamed category.
+    (`value_counts` only counts rows with a non-null value, so it backs the mean.)
+    """
+
+    x: str
+    y: str
+    x_edges: np.ndarray
+    y_edges: np.ndarray
+    by: str | None = None
+    value: str | None = None
+    categories: list[str] = field(default_factory=list)
+    counts: np.ndarray = field(default_factory=lambda: np.zeros((0, 0, 0), np.int64))
+    sums: np.ndarray | None = None
+    value_counts: np.ndarray | None = None
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Return `(y_bins, x_bins)`."""
+        return len(self.y_edges) - 1, len(self.x_edges) - 1
+
+    def mean(self) -> np.ndarray:
+        """Return per-cell mean of the value column (NaN where a cell is empty)."""
+        if self.sums is None or self.value_counts is None:
+            msg = "Grid was binned without a `value` column; there is no mean."
+            raise ValueError(msg)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.sums / self.value_counts
+
+    def to_frame(self) -> pl.DataFrame:
+        """Return the grid in long form: one row per (category, cell), at cell centres."""
+        y_bins, x_bins = self.shape
+        x_centres = (self.x_edges[:-1] + self.x_edges[1:]) / 2
+        y_centres = (self.y_edges[:-1] + self.y_edges[1:]) / 2
+        n_cats = self.counts.shape[0]
+        columns: dict[str, Any] = {
+            self.x: np.tile(x_centres, y_bins * n_cats),
+            self.y: np.tile(np.repeat(y_centres, x_bins), n_cats),
+            "count": self.counts.ravel(),
+        }
+        if self.sums is not None:
+            columns[f"mean_{self.value}"] = self.mean().ravel()
+        frame = pl.DataFrame(columns).with_columns(pl.col("^mean_.*$").fill_nan(None))
+        if self.by is not None:
+            frame = frame.with_columns(
+                pl.Series(self.by, np.repeat(self.categories, y_bins * x_bins))
+            )
+        return frame
+
+    def plot(self, **kwargs: Any) -> Any:  # noqa: ANN401
+        """Hand the grid to hvplot as an image-like heatmap.
+
+        Colours by count, or by mean value when a `value` column was binned.
+        With a category column each category becomes a selectable frame.
+        (requires hvplot, which is a notebook dependency)
+        """
+        colour = "count" if self.value is None else f"mean_{self.value}"
+        options: dict[str, Any] = {"x": self.x, "y": self.y, "C": colour}
+        if self.by is not None:
+            options["groupby"] = self.by
+        return self.to_frame().plot.heatmap(**(options | kwargs))
+
+
+def bin2d(  # noqa: PLR0913
+    source: pl.DataFrame | pl.LazyFrame | Iterable[pl.DataFrame],
+    x: str,
+    y: str,
+    *,
+    by: str | None = None,
+    value: str | None = None,
+    bins: int | tuple[int, int] = DEFAULT_BINS,
+    x_range: tuple[float, float] | None = None,
+    y_range: tuple[float, float] | None = None,
+    chunk_rows: int | None = None,
+) -> Grid2D:
+    """Bin `x`/`y` of `source` into a 2D grid of counts (and `value` sums).
+
+    `source` may be an eager frame, a lazy frame, or any iterable of eager chunks
+    (e.g. batches from `pl.read_csv_batched`).
+    Lazy frames are projected down to the needed columns and run once, the way
+    the memory budget says suits them (see `memory.collect`: eagerly, streamed,
+    or spilled to a memory-mapped file), then binned `chunk_rows` rows at a time.
+    `chunk_rows` defaults to `DEFAULT_CHUNK_ROWS`, or to a slice of the budget.
+
+    Ranges default to the data's extent; this costs an extra (aggregate-only) pass
+    for frames and so must be given explicitly for plain iterables of chunks.
+    Points outside the ranges, or with a null/NaN coordinate, are dropped.
+
+    >>> frame = pl.DataFrame({"a": [0.0, 0.1, 0.9, 1.0], "b": [0.0, 0.0, 1.0, 1.0]})
+    >>> bin2d(frame, "a", "b", bins=2).counts[0].tolist()
+    [[2, 0], [0, 2]]
+    """
+    columns = [c for c in (x, y, by, value) if c is not None]
+    if chunk_rows is None:
+        chunk_rows = memory.chunk_rows(
+            COLUMN_BYTES * len(columns), default=DEFAULT_CHUNK_ROWS
+        )
+    if x_range is None or y_range is None:
+        if not isinstance(source, pl.DataFrame | pl.LazyFrame):
+            msg = "`x_range` and `y_range` are required when binning an iterable of chunks."
+            raise ValueError(msg)
+        extent = _extent(source, x, y)
+        x_range = x_range or extent[0]
+        y_range = y_range or extent[1]
+
+    x_bins, y_bins = (bins, bins) if isinstance(bins, int) else bins
+    shape = (0 if by else 1, y_bins, x_bins)
+    grid = Grid2D(
+        x=x,
+        y=y,
+        x_edges=np.linspace(*x_range, x_bins + 1),
+        y_edges=np.linspace(*y_range, y_bins + 1),
+        by=by,
+        value=value,
+        counts=np.zeros(shape, np.int64),
+        sums=None if value is None else np.zeros(shape),
+        value_counts=None if value is None else np.zeros(shape, np.int64),
+    )
+    for chunk in _chunks(source, columns, chunk_rows):
+        _accumulate(grid, chunk)
+    return grid
+
+
+def _extent(
+    source: pl.DataFrame | pl.LazyFrame, x: str, y: str
+) -> tuple[tuple[float, float], tuple[float, float]]:
+    """Return the `(min, max)` of `x` and `y`, computed lazily."""
+    bounds = (
+        source.lazy()
+        .select(
+            pl.col(x).min().alias("x_min"),
+            pl.col(x).max().alias("x_max"),
+            pl.col(y).min().alias("y_min"),
+            pl.col(y).max().alias("y_max"),
+        )
+        .collect()
+        .row(0)
+    )
+    if any(bound is None for bound in bounds):
+        msg = f"Cannot infer a range for `{x}`/`{y}` from empty data."
+        raise ValueError(msg)
+    return (bounds[0], bounds[1]), (bounds[2], bounds[3])
+
+
+def _chunks(
+    source: pl.DataFrame | pl.LazyFrame | Iterable[pl.DataFrame],
+    columns: list[str],
+    chunk_rows: int,
+) -> Iterator[pl.DataFrame]:
+    """Yield eager chunks holding only `columns`, at most `chunk_rows` rows each."""
+    if isinstance(source, pl.LazyFrame):
+        # one run of the plan: slicing it instead would re-run it per slice,
+        # and a plan without a fixed row order may hand out overlapping slices
+        source = memory.collect(source.select(columns))
+    if isinstance(source, pl.DataFrame):
+        yield from source.select(columns).iter_slices(chunk_rows)
+        return
+    for chunk in source:
+        yield from chunk.select(columns).iter_slices(chunk_rows)
+
+
+def _accumulate(grid: Grid2D, chunk: pl.DataFrame) -> None:
+    """Add one chunk's points into `grid` in place (single vectorised pass)."""
+    y_bins, x_bins = grid.shape
+    xs = chunk[grid.x].cast(pl.Float64).to_numpy()
+    ys = chunk[grid.y].cast(pl.Float64).to_numpy()
+    x_lo, x_hi = grid.x_edges[0], grid.x_edges[-1]
+    y_lo, y_hi = grid.y_edges[0], grid.y_edges[-1]
+    keep = (xs >= x_lo) & (xs <= x_hi) & (ys >= y_lo) & (ys <= y_hi)
+
+    # scale into [0, bins]; the closed upper edge is folded into the last bin
+    ix = ((xs[keep] - x_lo) * (x_bins / ((x_hi - x_lo) or 1.0))).astype(np.int64)
+    iy = ((ys[keep] - y_lo) * (y_bins / ((y_hi - y_lo) or 1.0))).astype(np.int64)
+    cell = np.minimum(iy, y_bins - 1) * x_bins + np.minimum(ix, x_bins - 1)
+
+    if grid.by is not None:
+        codes = _category_codes(grid, chunk[grid.by])[keep]
+        cell = codes * (y_bins * x_bins) + cell
+    n_cells = grid.counts.size
+
+    grid.counts += np.bincount(cell, minlength=n_cells).reshape(grid.counts.shape)
+    if grid.sums is not None and grid.value_counts is not None and grid.value:
+        values = chunk[grid.value].cast(pl.Float64).fill_null(np.nan).to_numpy()[keep]
+        present = ~np.isnan(values)
+        grid.value_counts += np.bincount(cell[present], minlength=n_cells).reshape(
+            grid.counts.shape
+        )
+        grid.sums += np.bincount(
+            cell[present], weights=values[present], minlength=n_cells
+        ).reshape(grid.counts.shape)
+
+
+def _category_codes(grid: Grid2D, categories: pl.Series) -> np.ndarray:
+    """Map a chunk's categories to stable grid-wide codes, growing the grid as needed."""
+    # by name, not physical code: under a global string cache codes aren't local
+    names = categories.cast(pl.Utf8).fill_null("null")
+    local_names = names.unique(maintain_order=True).to_list()
+    known = {name: code for code, name in enumerate(grid.categories)}
+    for name in local_names:
+        if name not in known:
+            known[name] = len(grid.categories)
+            grid.categories.append(name)
+
+    extra = len(grid.categories) - grid.counts.shape[0]
+    if extra:
+        pad = ((0, extra), (0, 0), (0, 0))
+        grid.counts = np.pad(grid.counts, pad)
+        if grid.sums is not None and grid.value_counts is not None:
+            grid.sums = np.pad(grid.sums, pad)
+            grid.value_counts = np.pad(grid.value_counts, pad)
+
+    lookup = {name: known[name] for name in local_names}
+    return names.replace(lookup, return_dtype=pl.Int64).to_numpy()
@@ -0,0 +1,222 @@
+"""Result cache for lazy pipelines, keyed by *what* is computed over *which* data.
+
+The key is a hash of the serialized query plan plus a fingerprint
+(path, size, mtime) of every file the plan scans.
+So the same query hits the cache until one of its inputs changes; then the key
+changes and the stale entry simply ages out.
+The plan is hashed serialized rather than as printed by `LazyFrame.explain`:
+the printed plan elides literals (an `is_in` list prints as `[Series]`), so
+different queries would share a key.
+
+Results are stored as Parquet under `data/no_sync/cache/`, with an index tracking
+sizes, last use, and hit/miss counts.
+When the cache outgrows its byte budget the least-recently-used results are evicted.
+Every update of the index holds a lock on it, so CLIs running at once don't
+lose each other's entries; results are computed outside the lock.
+
+Plans over in-memory frames can't be fingerprinted and are never cached.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import polars as pl
+
+from . import memory, paths
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+DEFAULT_DIR = paths.NO_SYNC_DIR / "cache"
+DEFAULT_BUDGET_BYTES = 512 * 1024**2
+
+_SCAN_LINE = re.compile(
+    r"^\s*(?:csv|parquet|ipc|ndjson|json) SCAN (?:(?P<many>\d+) files: first file: )?(?P<path>.+?)\s*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+_IN_MEMORY_LINE = re.compile(r"^\s*DF \[", re.MULTILINE)
+
+
+def scanned_files(plan_text: str) -> list[Path]:
+    """Return every file a (printed) plan scans.
+
+    Multi-file scans only print their first file, so every file with the same
+    suffix in that file's directory is included (a glob over a partition).
+
+    >>> scanned_files("  Csv SCAN data/iris.csv")
+    [PosixPath('data/iris.csv')]
+    """
+    files: set[Path] = set()
+    for match in _SCAN_LINE.finditer(plan_text):
+        path = Path(match["path"])
+        if match["many"] is not None:
+            files.update(path.parent.glob(f"*{path.suffix}"))
+        else:
+            files.add(path)
+    return sorted(files)
+
+
+def reads_frames(plan_text: str) -> bool:
+    """Whether a (printed) plan reads frames already in memory, not files.
+
+    >>> reads_frames('DF ["a", "b"]; PROJECT */2 COLUMNS; SELECTION: None')
+    True
+    """
+    return _IN_MEMORY_LINE.search(plan_text) is not None
+
+
+def plan_key(plan: pl.LazyFrame, extra_inputs: tuple[Path, ...] = ()) -> str | None:
+    """Hash the plan and its inputs' fingerprints; `None` if uncacheable.
+
+    Plans over in-memory frames, or with Python functions that can't be
+    pickled, can't be keyed.
+    """
+    text = plan.explain(optimized=True)
+    if reads_frames(text):
+        return None
+    try:
+        serialized = plan.serialize()
+    except ValueError:  # an unpicklable `map_batches` function, say
+        return None
+    digest = hashlib.sha256(serialized.encode())
+    for path in sorted({*scanned_files(text), *extra_inputs}):
+        stat = path.stat()
+        digest.update(
+            f"\0{path.resolve()}\0{stat.st_size}\0{stat.st_mtime_ns}".encode()
+        )
+    return digest.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Counters and footprint of a `ResultCache`."""
+
+    hits: int
+    misses: int
+    uncacheable: int
+    evictions: int
+    entries: int
+    size_bytes: int
+    budget_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of cacheable lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResultCache:
+    """Plan-keyed Parquet result store with LRU eviction to a byte budget."""
+
+    def __init__(
+        self, root: Path = DEFAULT_DIR, budget_bytes: int = DEFAULT_BUDGET_BYTES
+    ) -> None:
+        """Cache results under `root`, keeping at most `budget_bytes` of them."""
+        self.root = root
+        self.budget_bytes = budget_bytes
+        self._index_path = root / "index.json"
+
+    def collect(
+        self, plan: pl.LazyFrame, extra_inputs: tuple[Path, ...] = ()
+    ) -> pl.DataFrame:
+        """Return the plan's result, from the cache if possible, else computing it.
+
+        `extra_inputs` are files the plan depends on that don't show up as scans
+        (e.g. a file read eagerly to build a filter list).
+        """
+        key = plan_key(plan, extra_inputs)
+        if key is None:
+            with self._locked_index() as index:
+                index["stats"]["uncacheable"] += 1
+            return memory.collect(plan)
+
+        result_path = self.root / f"{key}.parquet"
+        with self._locked_index() as index:
+            entry = index["entries"].get(key)
+            if entry is not None and result_path.exists():
+                entry["last_used"] = time.time()
+                index["stats"]["hits"] += 1
+                return pl.read_parquet(result_path, memory_map=True)
+            index["stats"]["misses"] += 1
+
+        result = memory.collect(plan)
+        tmp = result_path.with_name(f"{result_path.name}.{os.getpid()}.tmp")
+        result.write_parquet(tmp)
+        tmp.replace(result_path)
+        with self._locked_index() as index:
+            now = time.time()
+            index["entries"][key] = {
+                "bytes": result_path.stat().st_size,
+                "rows": result.height,
+                "created": now,
+                "last_used": now,
+            }
+            self._evict(index)
+        return result
+
+    def stats(self) -> CacheStats:
+        """Return hit/miss counters and the cache's current footprint."""
+        index = self._load_index()
+        return CacheStats(
+            **index["stats"],
+            entries=len(index["entries"]),
+            size_bytes=sum(e["bytes"] for e in index["entries"].values()),
+            budget_bytes=self.budget_bytes,
+        )
+
+    def clear(self) -> None:
+        """Delete every cached result and reset the counters."""
+        with self._locked_index() as index:
+            for path in self.root.glob("*.parquet"):
+                path.unlink()
+            index.clear()
+            index.update(self._empty_index())
+
+    def _evict(self, index: dict) -> None:
+        """Drop least-recently-used entries until within budget."""
+        entries: dict[str, dict] = index["entries"]
+        total = sum(e["bytes"] for e in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]["last_used"]):
+            if total <= self.budget_bytes:
+                break
+            total -= entries.pop(key)["bytes"]
+            (self.root / f"{key}.parquet").unlink(missing_ok=True)
+            index["stats"]["evictions"] += 1
+
+    @contextlib.contextmanager
+    def _locked_index(self) -> Iterator[dict]:
+        """Hold the index lock; yield the index, and save it if the block succeeds."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with (self.root / "index.lock").open("a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # released when the file is closed
+            index = self._load_index()
+            yield index
+            self._save_index(index)
+
+    def _load_index(self) -> dict:
+        if self._index_path.exists():
+            return json.loads(self._index_path.read_text())
+        return self._empty_index()
+
+    @staticmethod
+    def _empty_index() -> dict:
+        return {
+            "entries": {},
+            "stats": {"hits": 0, "misses": 0, "uncacheable": 0, "evictions": 0},
+        }
+
+    def _save_index(self, index: dict) -> None:
+        tmp = self._index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(index))
+        tmp.replace(self._index_path)
@@ -0,0 +1,230 @@
+"""Catalog of the project's datasets, served from memory-mapped Arrow IPC files.
+
+Each dataset is built once from its sources (CSVs read with their registered schema,
+cached API pulls, ...) into an *uncompressed* Arrow IPC file under
+`data/no_sync/catalog/`.
+Opening a dataset then memory-maps that file instead of parsing anything:
+it takes the same (small) time whatever the dataset's size, reads are zero-copy,
+and every notebook kernel and CLI process that opens it shares the same
+page-cache pages.
+
+A dataset is rebuilt automatically when any source it reads is newer than its
+IPC file (or the set of sources changed). Some datasets read only part of what
+their globs match (e.g. the latest snapshot); they say which (`Dataset.reads`),
+and only those are read and sized for the build.
+
+    >>> pengs = catalog.open("penguins")  # doctest: +SKIP
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import polars as pl
+
+from . import memory, paths, schemas
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+STORE_SUBDIR = Path("no_sync") / "catalog"
+
+
+def _scan_csvs(sources: list[Path]) -> pl.LazyFrame:
+    """Read CSVs with their registered schemas, stacked into one frame."""
+    return pl.concat([schemas.scan(source) for source in sources], how="vertical")
+
+
+def _scan_json(sources: list[Path]) -> pl.LazyFrame:
+    """Read JSON arrays-of-records (as dumped by the notebooks' API pulls)."""
+    return pl.concat(
+        [pl.read_json(source).lazy() for source in sources], how="diagonal_relaxed"
+    )
+
+
+def _every(sources: list[Path]) -> list[Path]:
+    return sources
+
+
+def latest(sources: list[Path]) -> list[Path]:
+    """Read only the last source (the newest, for timestamp-named snapshots)."""
+    return sources[-1:]
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """A named dataset: which files (globs, relative to the data dir) and how to read them."""
+
+    name: str
+    patterns: tuple[str, ...]
+    loader: Callable[[list[Path]], pl.LazyFrame] = _scan_csvs
+    description: str = ""
+    reads: Callable[[list[Path]], list[Path]] = _every
+    """Which of the matched sources `loader` is given (all of them, by default)."""
+
+    def sources(self, data_dir: Path) -> list[Path]:
+        """Return the dataset's source files, in a stable order."""
+        return sorted({p for pattern in self.patterns for p in data_dir.glob(pattern)})
+
+    def read_sources(self, data_dir: Path) -> list[Path]:
+        """Return the source files the dataset is actually built from."""
+        return self.reads(self.sources(data_dir))
+
+
+DATASETS: dict[str, Dataset] = {}
+"""Every dataset the catalog knows about, by name (see `register`)."""
+
+
+def register(dataset: Dataset) -> Dataset:
+    """Add (or replace) a dataset in the catalog."""
+    DATASETS[dataset.name] = dataset
+    return dataset
+
+
+for _dataset in (
+    Dataset("penguins", ("penguins.csv",), description="Palmer penguins"),
+    Dataset("iris", ("iris.csv",), description="Fisher's irises"),
+    Dataset("insurance", ("insurance.csv",), description="Medical insurance charges"),
+    Dataset("taxi_zones", ("taxi+_zone_lookup.csv",), description="NYC taxi zones"),
+    Dataset("stocks", ("stocks/stock_*.csv",), description="Daily prices, all tickers"),
+    Dataset(
+        "zenq_tickets",
+        ("no_sync/zenqueue_json_dict.json",),
+        loader=_scan_json,
+        description="Last Zenq ticket pull",
+    ),
+):
+    register(_dataset)
+
+
+def _store_dir(data_dir: Path) -> Path:
+    return data_dir / STORE_SUBDIR
+
+
+def _lookup(name: str) -> Dataset:
+    try:
+        return DATASETS[name]
+    except KeyError:
+        msg = f"Unknown dataset {name!r}; known datasets: {', '.join(sorted(DATASETS))}"
+        raise KeyError(msg) from None
+
+
+def is_stale(name: str, data_dir: Path = paths.DATA_DIR) -> bool:
+    """Whether the dataset's IPC file is missing or older than its sources."""
+    dataset = _lookup(name)
+    ipc = _store_dir(data_dir) / f"{name}.arrow"
+    meta = _read_meta(name, data_dir)
+    if not ipc.exists() or meta is None:
+        return True
+    sources = dataset.sources(data_dir)
+    if [str(s) for s in sources] != meta["sources"]:
+        return True
+    built = ipc.stat().st_mtime_ns
+    return any(source.stat().st_mtime_ns > built for source in dataset.reads(sources))
+
+
+def build(name: str, data_dir: Path = paths.DATA_DIR, *, force: bool = False) -> Path:
+    """(Re)build the dataset's IPC file if stale (or `force`d); return its path."""
+    dataset = _lookup(name)
+    ipc = _store_dir(data_dir) / f"{name}.arrow"
+    if not force and not is_stale(name, data_dir):
+        return ipc
+    sources = dataset.sources(data_dir)
+    if not sources:
+        msg = f"Dataset {name!r} has no source files under {data_dir} ({dataset.patterns})"
+        raise FileNotFoundError(msg)
+
+    ipc.parent.mkdir(parents=True, exist_ok=True)
+    read = dataset.reads(sources)
+    frame = memory.collect(dataset.loader(read), memory.estimate_bytes(read))
+    # uncompressed, so the file can be memory-mapped and read without a copy
+    tmp = _tmp_path(ipc)
+    frame.write_ipc(tmp, compression="uncompressed")
+    tmp.replace(ipc)
+    meta = _meta_path(name, data_dir)
+    tmp = _tmp_path(meta)
+    tmp.write_text(
+        json.dumps(
+            {
+                "sources": [str(s) for s in sources],
+                "rows": frame.height,
+                "columns": frame.width,
+                "built_at": time.time(),
+            }
+        )
+    )
+    tmp.replace(meta)
+    return ipc
+
+
+def open(name: str, data_dir: Path = paths.DATA_DIR) -> pl.DataFrame:  # noqa: A001
+    """Return the dataset as a frame backed by its memory-mapped IPC file."""
+    return pl.read_ipc(build(name, data_dir), memory_map=True)
+
+
+def scan(
+    name: str, data_dir: Path = paths.DATA_DIR, *, build_stale: bool = True
+) -> pl.LazyFrame:
+    """Return the dataset as a lazy frame over its memory-mapped IPC file.
+
+    With `build_stale=False` a stale dataset is scanned straight from its sources
+    instead of being rebuilt first (for one-off queries that touch few columns).
+    """
+    if not build_stale and is_stale(name, data_dir):
+        dataset = _lookup(name)
+        return dataset.loader(dataset.read_sources(data_dir))
+    return pl.scan_ipc(build(name, data_dir), memory_map=True)
+
+
+def ls(data_dir: Path = paths.DATA_DIR) -> pl.DataFrame:
+    """Summarise every dataset: size, row count and freshness of its IPC file.
+
+    Reads only file metadata; nothing is built.
+    """
+    rows = []
+    now = time.time()
+    for name, dataset in sorted(DATASETS.items()):
+        ipc = _store_dir(data_dir) / f"{name}.arrow"
+        meta = _read_meta(name, data_dir) if ipc.exists() else None
+        rows.append(
+            {
+                "name": name,
+                "description": dataset.description,
+                "sources": len(dataset.sources(data_dir)),
+                "rows": None if meta is None else meta["rows"],
+                "bytes": ipc.stat().st_size if ipc.exists() else None,
+                "age_s": None if meta is None else round(now - meta["built_at"]),
+                "stale": is_stale(name, data_dir),
+            }
+        )
+    return pl.DataFrame(
+        rows,
+        schema={
+            "name": pl.Utf8,
+            "description": pl.Utf8,
+            "sources": pl.Int64,
+            "rows": pl.Int64,
+            "bytes": pl.Int64,
+            "age_s": pl.Int64,
+            "stale": pl.Boolean,
+        },
+    )
+
+
+def _tmp_path(path: Path) -> Path:
+    """Return a temporary sibling of `path` that no other process writes to."""
+    return path.with_name(f"{path.name}.{os.getpid()}.tmp")
+
+
+def _meta_path(name: str, data_dir: Path) -> Path:
+    return _store_dir(data_dir) / f"{name}.json"
+
+
+def _read_meta(name: str, data_dir: Path) -> dict | None:
+    path = _meta_path(name, data_dir)
+    return json.loads(path.read_text()) if path.exists() else None
@@ -0,0 +1,476 @@
+"""Nearest-neighbour classification of measurements against a reference set.
+
+A reference set (e.g. `iris.csv`: four measurements and a `variety`) is indexed
+once in a KD-tree, saved under `data/no_sync/classify/<name>/` as plain NumPy
+arrays (memory-mapped on load, like the other persisted indexes), and rebuilt
+only when its source changes.
+New measurements are then classified by the majority label of their `k`
+nearest references, a whole batch at a time.
+The index also records what it was built from (features, label, leaf size), so
+asking for it with different ones rebuilds it too.
+
+The tree is *implicit*: a complete binary tree in heap order (node `i`'s
+children are `2i + 1` and `2i + 2`), each split at the median of the widest
+dimension, so every array has a fixed shape and queries never chase pointers:
+
+- `split_dims`, `split_values`: each internal node's split.
+- `lower`, `upper`: each node's bounding box.
+- `leaf_points`, `leaf_rows`: each leaf's points (and their rows in the
+  reference set), padded with `inf` (and `-1`) to the same `leaf_size`.
+
+A batch of queries walks the tree level by level with array operations:
+each query first descends to its own leaf, whose `k` nearest points bound the
+search; then every (query, node) pair whose box is closer than that bound is
+expanded, and the surviving leaves are scanned, nearest box first, tightening
+the bound as they go.
+Measurements are standardised (z-scores of the reference set) first, so grams
+of body mass don't drown out millimetres of bill depth.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import polars as pl
+
+from . import paths, schemas
+from .indexes import ArrayIndex
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+STORE_DIR = paths.NO_SYNC_DIR / "classify"
+DEFAULT_K = 5
+DEFAULT_LEAF_SIZE = 32
+"""Points per leaf: scanned by brute force once a query reaches it."""
+TREE_ARRAYS = (
+    "split_dims",
+    "split_values",
+    "lower",
+    "upper",
+    "leaf_points",
+    "leaf_rows",
+)
+QUERY_CHUNK = 16_384
+"""Queries searched together; bounds the (query, node) pairs held at once."""
+
+
+@dataclass(frozen=True)
+class Reference:
+    """A labelled reference set: which file, which measurements, which label."""
+
+    name: str
+    source: str
+    """CSV, relative to the data dir."""
+    features: tuple[str, ...]
+    label: str
+
+
+REFERENCES: dict[str, Reference] = {}
+"""Every reference set `classify` knows about, by name (see `register`)."""
+
+
+def register(reference: Reference) -> Reference:
+    """Add (or replace) a reference set."""
+    REFERENCES[reference.name] = reference
+    return reference
+
+
+for _reference in (
+    Reference(
+        "iris",
+        "iris.csv",
+        ("sepal.length", "sepal.width", "petal.length", "petal.width"),
+        "variety",
+    ),
+    Reference(
+        "penguins",
+        "penguins.csv",
+        ("bill_length_mm", "bill_depth_mm", "flipper_length_mm", "body_mass_g"),
+        "species",
+    ),
+):
+    register(_reference)
+
+
+def _box_distances(
+    points: np.ndarray, lower: np.ndarray, upper: np.ndarray
+) -> np.ndarray:
+    """Return each point's squared distance to the matching box (0 inside it)."""
+    gap = np.maximum(lower - points, 0.0) + np.maximum(points - upper, 0.0)
+    return np.einsum("ij,ij->i", gap, gap)
+
+
+def build_tree(
+    points: np.ndarray, leaf_size: int = DEFAULT_LEAF_SIZE
+) -> dict[str, Any]:
+    """Return the arrays of a KD-tree over `points` (`n x d`, `n >= 1`)."""
+    if leaf_size < 1:
+        msg = f"leaf_size must be at least 1, not {leaf_size}"
+        raise ValueError(msg)
+    count, dims = points.shape
+    depth = max(0, math.ceil(math.log2(count / leaf_size)))
+    internal = 2**depth - 1
+    nodes = 2 * internal + 1
+    starts = np.zeros(nodes, dtype=np.int64)
+    ends = np.zeros(nodes, dtype=np.int64)
+    ends[0] = count
+    split_dims = np.zeros(internal, dtype=np.int64)
+    split_values = np.zeros(internal)
+    order = np.arange(count)
+    for node in range(internal):  # parents before children
+        start, end = starts[node], ends[node]
+        block = points[order[start:end]]
+        dim = int(np.argmax(block.max(axis=0) - block.min(axis=0)))
+        middle = (end - start) // 2
+        order[start:end] = order[start:end][
+            np.argpartition(block[:, dim], middle, kind="introselect")
+        ]
+        split_dims[node] = dim
+        split_values[node] = points[order[start + middle], dim]
+        left, right = 2 * node + 1, 2 * node + 2
+        starts[left], ends[left] = start, start + middle
+        starts[right], ends[right] = start + middle, end
+
+    leaf_points = np.full((internal + 1, leaf_size, dims), np.inf)
+    leaf_rows = np.full((internal + 1, leaf_size), -1, dtype=np.int64)
+    lower = np.full((nodes, dims), np.inf)
+    upper = np.full((nodes, dims), -np.inf)
+    for leaf in range(internal + 1):
+        node = internal + leaf
+        rows = order[starts[node] : ends[node]]
+        leaf_rows[leaf, : len(rows)] = rows
+        leaf_points[leaf, : len(rows)] = points[rows]
+        if len(rows):
+            lower[node], upper[node] = (
+                points[rows].min(axis=0),
+                points[rows].max(axis=0),
+            )
+    for node in range(internal - 1, -1, -1):  # children before parents
+        lower[node] = np.minimum(lower[2 * node + 1], lower[2 * node + 2])
+        upper[node] = np.maximum(upper[2 * node + 1], upper[2 * node + 2])
+    return {
+        "split_dims": split_dims,
+        "split_values": split_values,
+        "lower": lower,
+        "upper": upper,
+        "leaf_points": leaf_points,
+        "leaf_rows": leaf_rows,
+    }
+
+
+def _merge(
+    best: tuple[np.ndarray, np.ndarray],
+    chosen: np.ndarray,
+    queries: np.ndarray,
+    points: np.ndarray,
+    rows: np.ndarray,
+) -> None:
+    """Fold one leaf's points into the `chosen` queries' `k` best, in place."""
+    best_distances, best_rows = best
+    k = best_distances.shape[1]
+    candidates = np.einsum(
+        "ijk,ijk->ij", points - queries[:, None], points - queries[:, None]
+    )
+    distances = np.concatenate([best_distances[chosen], candidates], axis=1)
+    merged_rows = np.concatenate([best_rows[chosen], rows], axis=1)
+    keep = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    best_distances[chosen] = np.take_along_axis(distances, keep, axis=1)
+    best_rows[chosen] = np.take_along_axis(merged_rows, keep, axis=1)
+
+
+def _query_chunk(
+    arrays: dict[str, np.ndarray], queries: np.ndarray, k: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return the squared distances and rows of each query's `k` nearest points."""
+    split_dims, split_values = arrays["split_dims"], arrays["split_values"]
+    lower, upper = arrays["lower"], arrays["upper"]
+    leaf_points, leaf_rows = arrays["leaf_points"], arrays["leaf_rows"]
+    internal = len(split_dims)
+    depth = internal.bit_length()
+    count = len(queries)
+    every = np.arange(count)
+    best = (np.full((count, k), np.inf), np.full((count, k), -1, dtype=np.int64))
+
+    # the leaf each query falls in bounds its search
+    home = np.zeros(count, dtype=np.int64)
+    for _ in range(depth):
+        dims = split_dims[home]
+        home = 2 * home + 1 + (queries[every, dims] >= split_values[home])
+    home_leaf = home - internal
+    _merge(best, every, queries, leaf_points[home_leaf], leaf_rows[home_leaf])
+
+    # expand (query, node) pairs whose box may hold something nearer
+    owner, node = every, np.zeros(count, dtype=np.int64)
+    for _ in range(depth):
+        owner = np.repeat(owner, 2)
+        node = (2 * node[:, None] + np.array([1, 2])).ravel()
+        near = _box_distances(queries[owner], lower[node], upper[node]) < best[0][
+            owner
+        ].max(axis=1)
+        owner, node = owner[near], node[near]
+    away = node != home[owner]
+    owner, node = owner[away], node[away]
+
+    # scan the surviving leaves, each query's nearest box first
+    box = _box_distances(queries[owner], lower[node], upper[node])
+    order = np.lexsort((box, owner))
+    owner, node, box = owner[order], node[order], box[order]
+    rank = np.arange(len(owner)) - np.searchsorted(owner, owner)
+    for turn in range(int(rank.max(initial=-1)) + 1):
+        due = rank == turn
+        due[due] = box[due] < best[0][owner[due]].max(axis=1)
+        chosen, leaf = owner[due], node[due] - internal
+        _merge(best, chosen, queries[chosen], leaf_points[leaf], leaf_rows[leaf])
+
+    order = np.argsort(best[0], axis=1)
+    return np.take_along_axis(best[0], order, axis=1), np.take_along_axis(
+        best[1], order, axis=1
+    )
+
+
+def query_tree(
+    arrays: dict[str, np.ndarray],
+    queries: np.ndarray,
+    k: int = DEFAULT_K,
+    chunk: int = QUERY_CHUNK,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return the distances and rows of each query's `k` nearest points, nearest first.
+
+    >>> points = np.array([[0.0, 0.0], [1.0, 0.0], [5.0, 5.0]])
+    >>> distances, rows = query_tree(build_tree(points, 1), np.array([[0.9, 0.0]]), 2)
+    >>> rows.tolist(), distances.round(2).tolist()
+    ([[1, 0]], [[0.1, 0.9]])
+    """
+    size = int((np.asarray(arrays["leaf_rows"]) >= 0).sum())
+    if not 1 <= k <= size:
+        msg = f"k must be between 1 and the {size} reference points, not {k}"
+        raise ValueError(msg)
+    queries = np.asarray(queries, dtype=np.float64)
+    distances = np.empty((len(queries), k))
+    rows = np.empty((len(queries), k), dtype=np.int64)
+    for start in range(0, len(queries), chunk):
+        part = slice(start, start + chunk)
+        distances[part], rows[part] = _query_chunk(arrays, queries[part], k)
+    return np.sqrt(distances), rows
+
+
+def brute_force(
+    points: np.ndarray, queries: np.ndarray, k: int = DEFAULT_K, chunk: int = 256
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return each query's `k` nearest points from the full distance matrix."""
+    norms = np.einsum("ij,ij->i", points, points)
+    distances = np.empty((len(queries), k))
+    rows = np.empty((len(queries), k), dtype=np.int64)
+    for start in range(0, len(queries), chunk):
+        part = queries[start : start + chunk]
+        squared = (
+            np.einsum("ij,ij->i", part, part)[:, None] - 2 * part @ points.T + norms
+        )
+        nearest = np.argpartition(squared, k - 1, axis=1)[:, :k]
+        found = np.take_along_axis(squared, nearest, axis=1)
+        order = np.argsort(found, axis=1)
+        distances[start : start + chunk] = np.take_along_axis(found, order, axis=1)
+        rows[start : start + chunk] = np.take_along_axis(nearest, order, axis=1)
+    return np.sqrt(np.maximum(distances, 0.0)), rows
+
+
+def vote(labels: np.ndarray, classes: int) -> tuple[np.ndarray, np.ndarray]:
+    """Return each row's majority label and its votes; ties go to the nearer label.
+
+    `labels` holds each query's neighbours' label codes, nearest first.
+
+    >>> winners, votes = vote(np.array([[1, 0, 0], [2, 1, 0]]), 3)
+    >>> winners.tolist(), votes.tolist()
+    ([0, 2], [2, 1])
+    """
+    k = labels.shape[1]
+    is_class = labels[:, :, None] == np.arange(classes)
+    counts = is_class.sum(axis=1)
+    first = np.where(is_class, np.arange(k)[None, :, None], k).min(axis=1)
+    winners = np.argmax(counts * (k + 1) - first, axis=1)
+    return winners, np.take_along_axis(counts, winners[:, None], axis=1)[:, 0]
+
+
+def _without_own(
+    distances: np.ndarray, rows: np.ndarray, own: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Drop each query's own row from its `k + 1` neighbours (else its farthest)."""
+    keep = rows != own[:, None]
+    keep[keep.all(axis=1), -1] = False
+    k = rows.shape[1] - 1
+    return distances[keep].reshape(-1, k), rows[keep].reshape(-1, k)
+
+
+class Classifier(ArrayIndex):
+    """A reference set's KD-tree, labels and scaling, saved under `root`."""
+
+    names = (
+        *TREE_ARRAYS,
+        "labels",
+        "classes",
+        "features",
+        "label",
+        "leaf_size",
+        "mean",
+        "scale",
+    )
+
+    def fit(
+        self,
+        frame: pl.DataFrame,
+        reference: Reference,
+        leaf_size: int = DEFAULT_LEAF_SIZE,
+    ) -> int:
+        """Index `frame`'s labelled measurements; return how many were indexed."""
+        complete = frame.select(*reference.features, reference.label).drop_nulls()
+        if complete.is_empty():
+            msg = f"No complete rows of {', '.join(reference.features)} in {reference.name}"
+            raise ValueError(msg)
+        points = complete.select(reference.features).to_numpy().astype(np.float64)
+        mean, scale = points.mean(axis=0), points.std(axis=0)
+        scale[scale == 0] = 1.0
+        label = complete[reference.label].cast(pl.Utf8)
+        classes = label.unique().sort()
+        self._save(
+            build_tree((points - mean) / scale, leaf_size)
+            | {
+                "labels": classes.search_sorted(label).to_numpy().astype(np.int64),
+                "classes": classes.to_numpy().astype(str),
+                "features": np.array(reference.features, dtype=str),
+                "label": np.array(reference.label, dtype=str),
+                "leaf_size": np.array(leaf_size, dtype=np.int64),
+                "mean": mean,
+                "scale": scale,
+            }
+        )
+        return complete.height
+
+    def built_at(self) -> float:
+        """When the index was last built (0 if never)."""
+        return (self.root / "labels.npy").stat().st_mtime if self.exists() else 0.0
+
+    def built_with(self, reference: Reference, leaf_size: int) -> bool:
+        """Whether the index was built from these features and label, in these leaves."""
+        arrays = self.arrays
+        return (
+            tuple(arrays["features"].tolist()) == reference.features
+            and str(arrays["label"]) == reference.label
+            and int(arrays["leaf_size"]) == leaf_size
+        )
+
+    def predict(
+        self, frame: pl.DataFrame, k: int = DEFAULT_K, *, leave_one_out: bool = False
+    ) -> pl.DataFrame:
+        """Return the predicted label, the share of neighbours agreeing, and distance.
+
+        Rows missing a measurement get nulls.
+        With `leave_one_out`, `frame` is the reference set itself and no row is
+        its own neighbour, so the predictions score the classifier honestly.
+        """
+        arrays = self.arrays
+        measured = frame.select(arrays["features"].tolist()).cast(pl.Float64)
+        points = measured.to_numpy()
+        complete = ~np.isnan(points).any(axis=1)
+        scaled = (points[complete] - arrays["mean"]) / arrays["scale"]
+        if leave_one_out:
+            indexed = complete & frame[str(arrays["label"])].is_not_null().to_numpy()
+            own = np.where(indexed, np.cumsum(indexed) - 1, -1)[complete]
+            distances, rows = _without_own(*query_tree(arrays, scaled, k + 1), own)
+        else:
+            distances, rows = query_tree(arrays, scaled, k)
+        winners, votes = vote(arrays["labels"][rows], len(arrays["classes"]))
+        predicted = np.full(len(points), None, dtype=object)
+        predicted[complete] = arrays["classes"][winners]
+        agreement = np.full(len(points), np.nan)
+        agreement[complete] = votes / k
+        nearest = np.full(len(points), np.nan)
+        nearest[complete] = distances[:, 0]
+        return pl.DataFrame(
+            {"predicted": predicted, "agreement": agreement, "distance": nearest},
+            schema={
+                "predicted": pl.Utf8,
+                "agreement": pl.Float64,
+                "distance": pl.Float64,
+            },
+        ).fill_nan(None)
+
+    def empty(self) -> dict[str, np.ndarray]:
+        """Refuse: a classifier must be built (see `load`) before it is used."""
+        msg = f"No classifier built in {self.root}"
+        raise FileNotFoundError(msg)
+
+
+def load(
+    reference: Reference,
+    data_dir: Path = paths.DATA_DIR,
+    store_dir: Path = STORE_DIR,
+    *,
+    leaf_size: int = DEFAULT_LEAF_SIZE,
+    rebuild: bool = False,
+) -> tuple[Classifier, int | None]:
+    """Return the reference set's classifier, and the rows indexed if (re)built now.
+
+    The index is (re)built when missing, older than its source, built with other
+    features, label or leaf size, or on `rebuild`.
+    """
+    source = data_dir / reference.source
+    classifier = Classifier(store_dir / reference.name)
+    if (
+        not rebuild
+        and classifier.built_at() >= source.stat().st_mtime
+        and classifier.built_with(reference, leaf_size)
+    ):
+        return classifier, None
+    indexed = classifier.fit(schemas.scan(source).collect(), reference, leaf_size)
+    return classifier, indexed
+
+
+def benchmark(
+    references: int = 100_000, queries: int = 5_000, dims: int = 4, k: int = DEFAULT_K
+) -> pl.DataFrame:
+    """Time batched k-NN queries: KD-tree vs the full distance matrix.
+
+    Clustered synthetic measurements (like species) stand in for a large
+    reference set; both methods' neighbours are checked to agree.
+    """
+    rng = np.random.default_rng(0)
+    centres = rng.normal(0, 3, size=(8, dims))
+    points = centres[rng.integers(0, 8, references)] + rng.normal(
+        size=(references, dims)
+    )
+    batch = centres[rng.integers(0, 8, queries)] + rng.normal(size=(queries, dims))
+    timings: list[dict[str, Any]] = []
+
+    def record(method: str, started: float, answered: int | None) -> None:
+        seconds = time.perf_counter() - started
+        timings.append(
+            {
+                "method": method,
+                "seconds": seconds,
+                "queries_per_s": None if answered is None else answered / seconds,
+            }
+        )
+
+    started = time.perf_counter()
+    tree = build_tree(points)
+    record("build KD-tree (once)", started, None)
+    started = time.perf_counter()
+    from_tree, _ = query_tree(tree, batch, k)
+    record("KD-tree", started, queries)
+    started = time.perf_counter()
+    from_matrix, _ = brute_force(points, batch, k)
+    record("brute force", started, queries)
+    if not np.allclose(from_tree, from_matrix, atol=1e-6):
+        msg = "KD-tree and brute-force neighbours differ"
+        raise RuntimeError(msg)
+    baseline = timings[-1]["queries_per_s"]
+    return pl.DataFrame(timings).with_columns(
+        (pl.col("queries_per_s") / baseline).round(1).alias("speedup"),
+        pl.col("seconds").round(4),
+        pl.col("queries_per_s").round(0),
+    )
@@ -7,16 +7,54 @@ the typer framework and decorators.
 
 from __future__ import annotations
 
+import sys
+import tempfile
 import time
 from importlib import metadata
-from typing import Optional
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
 
+import click
+import polars as pl
+import rich
 import typer
 from rich import print as rprint
-from rich.progress import Progress, SpinnerColumn, TextColumn, track
+from rich.console import Console
+from rich.progress import track
 from rich.prompt import Prompt
+from rich.table import Table
 
-from . import __name__
+from . import (
+    __name__,
+    catalog,
+    classify,
+    completion,
+    diff,
+    formats,
+    indicators,
+    jobs,
+    licenses,
+    loadtest,
+    memory,
+    metrics,
+    mockserver,
+    notebooks,
+    oncall,
+    pagerduty,
+    paths,
+    progress,
+    query,
+    schemas,
+    stocks,
+    tickets,
+    timeutil,
+    zenq,
+)
+from .cache import ResultCache
+from .ingest import DEFAULT_CHUNK_ROWS, IngestResult, discover, ingest_dir, summarize
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
 
 # ^ uses parent's `__name__` to dynamically get the name of the app
 # note: this may be separate from the name used to call the app via cli
@@ -24,6 +62,31 @@ from . import __name__
 
 # generate CLI app object
 app = typer.Typer(rich_markup_mode="rich", add_completion=False)
+# sub-command groups (e.g. `catalog ls`)
+catalog_app = typer.Typer(
+    rich_markup_mode="rich", help="Memory-mapped dataset catalog."
+)
+app.add_typer(catalog_app, name="catalog", rich_help_panel="Data")
+cache_app = typer.Typer(rich_markup_mode="rich", help="Query result cache.")
+app.add_typer(cache_app, name="cache", rich_help_panel="Data")
+pd_app = typer.Typer(rich_markup_mode="rich", help="PagerDuty REST API pulls.")
+app.add_typer(pd_app, name="pd", rich_help_panel="PagerDuty")
+licenses_app = typer.Typer(rich_markup_mode="rich", help="PagerDuty license seats.")
+pd_app.add_typer(licenses_app, name="licenses")
+tickets_app = typer.Typer(rich_markup_mode="rich", help="Zenq support tickets.")
+app.add_typer(tickets_app, name="tickets", rich_help_panel="Zenq")
+bench_app = typer.Typer(rich_markup_mode="rich", help="Performance benchmarks.")
+app.add_typer(bench_app, name="bench", rich_help_panel="Data")
+stocks_app = typer.Typer(rich_markup_mode="rich", help="Daily prices across tickers.")
+app.add_typer(stocks_app, name="stocks", rich_help_panel="Data")
+notebooks_app = typer.Typer(rich_markup_mode="rich", help="Jupytext notebooks.")
+app.add_typer(notebooks_app, name="notebooks", rich_help_panel="Data")
+mock_app = typer.Typer(rich_markup_mode="rich", help="Local stand-in for the APIs.")
+app.add_typer(mock_app, name="mock", rich_help_panel="PagerDuty")
+completion_app = typer.Typer(
+    rich_markup_mode="rich", help="Static (Python-free) shell completion."
+)
+app.add_typer(completion_app, name="completion")
 
 ##################################################################################
 # Version Call Boilerplate
@@ -31,17 +94,19 @@ app = typer.Typer(rich_markup_mode="rich", add_completion=False)
 
 # get version from pyproject.toml
 __version__ = metadata.version(__package__)
+CLI_NAME = "${{ carnate.cli_app_name }}"
 
 
 def version_callback(version: bool) -> None:
     """Print app version and exit."""
     if version:
-        rprint(f"{__name__} ('${{ carnate.cli_app_name }}') Version: {__version__}")
+        rprint(f"{__name__} ('{CLI_NAME}') Version: {__version__}")
         raise typer.Exit(code=0)
 
 
 @app.callback(help="[bold]${{ carnate.project_name }}[/bold] CLI App for [green]PagerDuty[/green]")
 def app_options(
+    ctx: typer.Context,
     _: bool = typer.Option(
         None,
         "--version",
@@ -49,6 +114,20 @@ def app_options(
         callback=version_callback,
         is_eager=True,
     ),
+    memory_budget: Optional[str] = typer.Option(
+        None,
+        "--memory-budget",
+        metavar="SIZE",
+        help="Fit data commands in this much memory, e.g. 512M or 2G: they pick "
+        "eager, streaming or spill-to-disk execution to suit, and report peak RSS.",
+    ),
+    fmt: str = typer.Option(
+        formats.TABLE,
+        "--format",
+        click_type=click.Choice(formats.FORMATS),
+        help="How data commands write results: rich tables, or streamed to stdout "
+        "as ndjson, csv, parquet or arrow (IPC stream); messages then go to stderr.",
+    ),
 ) -> None:
     """Make a callback to get version.
 
@@ -60,6 +139,62 @@ def app_options(
     (Side Note: Yes, I agree this is slightly awkward for something as standard as
     `--version`, but it does seem to be the best way to do it in this framework.)
     """
+    if memory_budget is not None:
+        try:
+            memory.configure(memory.parse_size(memory_budget))
+        except ValueError as error:
+            raise typer.BadParameter(str(error), param_hint="--memory-budget") from None
+        ctx.call_on_close(lambda: Console(stderr=True).print(memory.report()))
+    if fmt in formats.BINARY_FORMATS and sys.stdout.isatty():
+        msg = f"{fmt} is binary; redirect or pipe stdout"
+        raise typer.BadParameter(msg, param_hint="--format")
+    formats.configure(fmt)
+    rich.reconfigure(stderr=not formats.is_table())  # stdout is for the data
+
+
+##################################################################################
+# Shell Completion
+##################################################################################
+
+
+@completion_app.command("show")
+def completion_show(
+    shell: str = typer.Argument(
+        ..., help=f"One of: {', '.join(completion.SHELLS)}, or json for the table."
+    ),
+    prog: str = typer.Option(CLI_NAME, help="Command name to complete."),
+) -> None:
+    """Print the completion script for SHELL (or the command table as JSON)."""
+    root = completion.app_tree(app)
+    if shell == "json":
+        typer.echo(completion.to_json(root))
+        return
+    try:
+        typer.echo(completion.script(shell, root, prog))
+    except ValueError as error:
+        rprint(f"[red]{error}[/red]")
+        raise typer.Exit(code=1) from None
+
+
+@completion_app.command("install")
+def completion_install(
+    shell: str = typer.Argument(..., help=f"One of: {', '.join(completion.SHELLS)}."),
+    prog: str = typer.Option(CLI_NAME, help="Command name to complete."),
+    path: Optional[Path] = typer.Option(
+        None, help="Write the script here. (default: where SHELL looks for it)"
+    ),
+) -> None:
+    """Write SHELL's completion script; re-run after upgrading to pick up new commands.
+
+    Tab completion then runs in the shell alone, without starting Python.
+    """
+    if shell not in completion.SHELLS:
+        rprint(f"[red]SHELL must be one of:[/red] {', '.join(completion.SHELLS)}")
+        raise typer.Exit(code=1)
+    written = completion.install(shell, completion.app_tree(app), prog, path)
+    rprint(f"Wrote [blue]{written}[/blue]; open a new {shell} to use it.")
+    if shell == "zsh" and path is None:
+        rprint("(zsh: make sure `fpath+=(~/.zfunc)` comes before `compinit`.)")
 
 
 ##################################################################################
@@ -120,21 +255,76 @@ def adding_tags() -> None:
 
 
 @app.command(rich_help_panel="Visual")
-def spin(seconds: int = typer.Argument(5, min=0, max=36)) -> None:
-    """Generate Spinners.
+def spin(
+    specs: Optional[list[str]] = typer.Argument(
+        None,
+        metavar="JOB...",
+        help="Shell commands, or @name for a registered Python task.",
+        show_default=False,
+    ),
+    file: Optional[Path] = typer.Option(
+        None,
+        "--file",
+        "-f",
+        exists=True,
+        dir_okay=False,
+        help="Also run the jobs in this file, one per line (# for comments).",
+    ),
+    workers: int = typer.Option(4, min=1, help="Jobs run at once."),
+    processes: bool = typer.Option(
+        False, "--processes", help="Run Python tasks in their own processes."
+    ),
+    list_tasks: bool = typer.Option(
+        False, "--list", help="List the registered Python tasks and exit."
+    ),
+) -> None:
+    """Run jobs concurrently, a spinner each, then show how long each one took.
 
-    For the unknowably long and asynchronous.
+    Ctrl-C cancels the jobs not yet started and stops the running ones.
     """
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}", justify="right"),
-        transient=True,
-    ) as progress:
-        progress.add_task("Task A...", total=seconds)
-        task = progress.add_task("Task B...", total=seconds)
-        for _ in range(seconds):
-            time.sleep(1)
-            progress.advance(task)
+    if list_tasks:
+        print_frame(
+            pl.DataFrame(
+                [
+                    {
+                        "task": f"{jobs.TASK_PREFIX}{t.name}",
+                        "description": t.description,
+                    }
+                    for t in jobs.tasks().values()
+                ]
+            ),
+            title="Python tasks",
+        )
+        return
+    specs = list(specs or [])
+    if file is not None:
+        specs += [
+            line
+            for line in file.read_text().splitlines()
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+    try:
+        parsed = jobs.parse_jobs(specs)
+    except KeyError as error:
+        rprint(f"[red]{error.args[0]}[/red]")
+        raise typer.Exit(code=1) from None
+    started = time.perf_counter()
+    with progress.Reporter() as reporter:
+        runner = jobs.Runner(workers, processes=processes, reporter=reporter)
+        results = runner.run(parsed)
+    elapsed = time.perf_counter() - started
+    for result in results:
+        if result.output:
+            rprint(f"[red]{result.job} failed:[/red]\n{result.output}")
+    busy = sum(result.seconds for result in results)
+    print_frame(
+        jobs.timings(results),
+        title=f"{len(results)} job(s) in {elapsed:.2f}s ({busy:.2f}s of work)",
+    )
+    if runner.cancelled:
+        raise typer.Exit(code=130)
+    if any(result.status != "ok" for result in results):
+        raise typer.Exit(code=1)
 
 
 @app.command(rich_help_panel="Visual")
@@ -158,6 +348,38 @@ def progbar(
         rprint(f"Done sleeping for {total_so_far_2} seconds")
 
 
+@app.command(rich_help_panel="Visual")
+def count_lines(
+    directory: Path = typer.Argument(
+        paths.DATA_DIR, exists=True, file_okay=False, help="Directory to read."
+    ),
+    pattern: str = typer.Option("*.csv", help="Glob for the files to read."),
+    ndjson: bool = typer.Option(
+        False, "--ndjson", help="Report progress as NDJSON lines, even on a terminal."
+    ),
+    chunk_size: int = typer.Option(1024**2, min=1, help="Bytes read at a time."),
+) -> None:
+    """Count the lines of data files, showing lines/s, bytes/s and ETA as it goes."""
+    files = discover(directory, pattern)
+    sizes = [path.stat().st_size for path in files]
+    counts: list[dict[str, object]] = []
+    with progress.Reporter("ndjson" if ndjson else "auto") as reporter:
+        overall = reporter.task(
+            f"{len(files)} file(s)", total_bytes=sum(sizes), unit="lines"
+        )
+        for path, size in zip(files, sizes, strict=True):
+            task = reporter.task(path.name, total_bytes=size, unit="lines")
+            with path.open("rb") as file:
+                while chunk := file.read(chunk_size):
+                    lines = chunk.count(b"\n")
+                    task.advance(lines, nbytes=len(chunk))
+                    overall.advance(lines, nbytes=len(chunk))
+            task.finish()
+            counts.append({"file": str(path), "bytes": size, "lines": task.units})
+    if counts:
+        print_frame(pl.DataFrame(counts), title=f"{overall.elapsed:.2f}s")
+
+
 ##################################################################################
 # Additional Validations
 ##################################################################################
@@ -171,3 +393,904 @@ def numeric_intake(
     """Take in `min` and `max`, with restrictions."""
     rprint(f"[blue]X[/blue]: {x_int}, [green]Y[/green]: {y_int}")
     return x_int + y_int
+
+
+##################################################################################
+# Data
+##################################################################################
+
+
+def print_frame(
+    frame: pl.DataFrame, title: str | None = None, *, data: bool = True
+) -> None:
+    """Print a (small) data frame as a rich table, or write it in `--format`.
+
+    Frames that only summarise a command's result (`data=False`) are always
+    tables (on stderr, when stdout is taken by data).
+    """
+    if data and not formats.is_table():
+        formats.write(frame)
+        return
+    table = Table(title=title)
+    for column in frame.columns:
+        table.add_column(column)
+    for row in frame.iter_rows():
+        table.add_row(*("" if value is None else str(value) for value in row))
+    rprint(table)
+
+
+@app.command(rich_help_panel="Data")
+def ingest(  # noqa: PLR0913
+    directory: Path = typer.Argument(
+        ..., exists=True, file_okay=False, help="Directory to search for CSVs."
+    ),
+    out: Path = typer.Option(
+        paths.NO_SYNC_DIR / "parquet", help="Root of the partitioned Parquet output."
+    ),
+    pattern: str = typer.Option("*.csv", help="Glob for the files to convert."),
+    workers: Optional[int] = typer.Option(
+        None, min=1, help="Worker processes. (default: one per core)"
+    ),
+    chunk_rows: Optional[int] = typer.Option(
+        None,
+        min=1,
+        help=f"Rows held per streaming batch, per worker. (default: {DEFAULT_CHUNK_ROWS}"
+        ", or what fits --memory-budget)",
+    ),
+    force: bool = typer.Option(False, help="Re-convert files already converted."),
+) -> None:
+    """Convert a directory of CSVs to partitioned Parquet, in parallel.
+
+    Re-running skips files that were already converted and haven't changed since.
+    """
+    sources = discover(directory, pattern)
+    with progress.Reporter() as reporter:
+        task = reporter.task(
+            "Ingesting",
+            total=len(sources),
+            total_bytes=sum(source.stat().st_size for source in sources),
+            unit="files",
+        )
+
+        def advance(result: IngestResult) -> None:
+            task.advance(nbytes=Path(result.source).stat().st_size)
+
+        results = ingest_dir(
+            directory,
+            out,
+            pattern=pattern,
+            workers=workers,
+            chunk_rows=chunk_rows,
+            force=force,
+            on_result=advance,
+        )
+    print_frame(summarize(results).drop("output"), title=f"Ingested into {out}")
+    if any(result.status == "failed" for result in results):
+        raise typer.Exit(code=1)
+
+
+@app.command("query", rich_help_panel="Data")
+def query_cmd(  # noqa: PLR0913
+    sql: str = typer.Argument(
+        ...,
+        help='e.g. "SELECT species, AVG(body_mass_g) FROM penguins GROUP BY species"',
+    ),
+    output: Optional[Path] = typer.Option(
+        None, "--output", "-o", help="Stream the result to this Parquet file instead."
+    ),
+    explain: bool = typer.Option(False, help="Show the optimised plan; don't run it."),
+    max_rows: int = typer.Option(50, min=1, help="Rows to display."),
+    cache: bool = typer.Option(
+        True, help="Reuse results of identical earlier queries."
+    ),
+    data_dir: Path = typer.Option(paths.DATA_DIR, help="Project data directory."),
+    parquet_dir: Optional[Path] = typer.Option(
+        None, help="Ingested Parquet root. (default: <data-dir>/no_sync/parquet)"
+    ),
+) -> None:
+    """Run SQL over the project's datasets (lazily, on the streaming engine).
+
+    Tables: every catalog dataset, plus every dataset ingested to Parquet.
+    """
+    try:
+        if explain:
+            plan = query.compile_sql(sql, data_dir, parquet_dir)
+            rprint(plan.explain())
+        elif output is not None:
+            query.sink(sql, output, data_dir, parquet_dir)
+            rprint(f"Wrote [green]{output}[/green]")
+        else:
+            result_cache = result_cache_for(data_dir) if cache else None
+            result = query.run(sql, data_dir, parquet_dir, result_cache)
+            shown = result.head(max_rows) if formats.is_table() else result
+            print_frame(shown, title=f"{result.height} rows")
+    except pl.PolarsError as err:
+        rprint(f"[red]Query failed:[/red] {err}")
+        raise typer.Exit(code=1) from err
+
+
+@app.command("classify", rich_help_panel="Data")
+def classify_cmd(  # noqa: PLR0913
+    reference: str = typer.Argument(
+        ...,
+        click_type=click.Choice(sorted(classify.REFERENCES)),
+        help="Labelled reference set to classify against.",
+    ),
+    measurements: Optional[Path] = typer.Argument(
+        None,
+        exists=True,
+        dir_okay=False,
+        help="CSV of new measurements (same columns). (default: the reference set)",
+    ),
+    k: int = typer.Option(classify.DEFAULT_K, "-k", min=1, help="Neighbours voting."),
+    leaf_size: int = typer.Option(
+        classify.DEFAULT_LEAF_SIZE, min=1, help="Points per KD-tree leaf."
+    ),
+    rebuild: bool = typer.Option(False, help="Rebuild the index even if current."),
+    max_rows: int = typer.Option(50, min=1, help="Rows to display."),
+    data_dir: Path = typer.Option(paths.DATA_DIR, help="Project data directory."),
+    store: Path = typer.Option(classify.STORE_DIR, help="Where indexes are kept."),
+) -> None:
+    """Label measurements by their k nearest neighbours in a reference set.
+
+    The reference set's KD-tree is built on first use (and whenever its CSV
+    changes), then every row of MEASUREMENTS is classified in one batch.
+    """
+    spec = classify.REFERENCES[reference]
+    try:
+        classifier, indexed = classify.load(
+            spec, data_dir, store, leaf_size=leaf_size, rebuild=rebuild
+        )
+        if indexed is not None:
+            rprint(f"Indexed {indexed} {reference} rows")
+        frame = schemas.scan(measurements or data_dir / spec.source).collect()
+        # the reference set against itself: leave each row out of its own vote
+        leave_one_out = measurements is None
+        result = frame.hstack(classifier.predict(frame, k, leave_one_out=leave_one_out))
+    except (FileNotFoundError, ValueError, pl.PolarsError) as err:
+        rprint(f"[red]{err}[/red]")
+        raise typer.Exit(code=1) from err
+    if spec.label in result.columns:
+        known = result.drop_nulls([spec.label, "predicted"])
+        matched = (known[spec.label].cast(pl.Utf8) == known["predicted"]).sum()
+        rprint(
+            f"{matched} of {known.height} predictions match `{spec.label}`"
+            + (" (leave-one-out)" if leave_one_out else "")
+        )
+    shown = result.head(max_rows) if formats.is_table() else result
+    print_frame(shown, title=f"{result.height} rows, k={k}")
+
+
+def result_cache_for(data_dir: Path) -> ResultCache:
+    """Return the result cache living in `data_dir`."""
+    return ResultCache(data_dir / "no_sync" / "cache")
+
+
+@cache_app.command("stats")
+def cache_stats(
+    data_dir: Path = typer.Option(paths.DATA_DIR, help="Project data directory."),
+) -> None:
+    """Show cache hit/miss counts and size."""
+    stats = result_cache_for(data_dir).stats()
+    rprint(
+        f"hits: {stats.hits}  misses: {stats.misses}  "
+        f"(hit rate {stats.hit_rate:.0%}; {stats.uncacheable} uncacheable)\n"
+        f"entries: {stats.entries}  size: {stats.size_bytes / 1024**2:.2f} "
+        f"of {stats.budget_bytes / 1024**2:.0f} MiB  evictions: {stats.evictions}"
+    )
+
+
+@cache_app.command("clear")
+def cache_clear(
+    data_dir: Path = typer.Option(paths.DATA_DIR, help="Project data directory."),
+) -> None:
+    """Delete every cached result."""
+    result_cache_for(data_dir).clear()
+    rprint("Cache cleared.")
+
+
+@catalog_app.command("ls")
+def catalog_ls(
+    data_dir: Path = typer.Option(paths.DATA_DIR, help="Project data directory."),
+) -> None:
+    """List datasets with their size, row count and freshness."""
+    listing = catalog.ls(data_dir).with_columns(
+        (pl.col("bytes") / 1024**2).round(2).alias("MiB"),
+    )
+    print_frame(listing.drop("bytes"), title="Catalog")
+
+
+@catalog_app.command("build")
+def catalog_build(
+    names: Optional[list[str]] = typer.Argument(
+        None, help="Datasets to build. (default: all)"
+    ),
+    data_dir: Path = typer.Option(paths.DATA_DIR, help="Project data directory."),
+    force: bool = typer.Option(False, help="Rebuild even if fresh."),
+) -> None:
+    """Build (or refresh) the memory-mapped files backing datasets."""
+    for name in names or sorted(catalog.DATASETS):
+        try:
+            path = catalog.build(name, data_dir, force=force)
+        except (KeyError, FileNotFoundError) as err:
+            rprint(f"[yellow]Skipping[/yellow] {name}: {err}")
+            continue
+        rprint(f"[green]{name}[/green] -> {path}")
+
+
+@bench_app.command("timestamps")
+def bench_timestamps(
+    rows: int = typer.Option(1_000_000, min=1, help="Timestamps to parse."),
+    baseline_rows: int = typer.Option(
+        20_000, min=1, help="Timestamps to parse row by row (the slow baseline)."
+    ),
+) -> None:
+    """Parse ISO-8601 columns to UTC: vectorised polars vs `arrow.get` per row."""
+    print_frame(timeutil.benchmark(rows, baseline_rows), title="Timestamp parsing")
+
+
+@stocks_app.command("corr")
+def stocks_corr(  # noqa: PLR0913
+    data_dir: Path = typer.Option(
+        stocks.STOCKS_DIR, file_okay=False, help="Directory of stock_*.csv files."
+    ),
+    column: str = typer.Option("Close", help="Price column to take returns of."),
+    window: Optional[int] = typer.Option(
+        None,
+        min=2,
+        help="Rolling window, in returns; the latest is shown. (default: whole period)",
+    ),
+    step: int = typer.Option(1, min=1, help="Days between rolling windows."),
+    cov: bool = typer.Option(False, "--cov", help="Show covariance, not correlation."),
+    min_periods: int = typer.Option(
+        stocks.MIN_PERIODS, min=2, help="Fewest shared returns a pair needs."
+    ),
+    block: int = typer.Option(
+        stocks.DEFAULT_BLOCK, min=1, help="Tickers per block of the matrix products."
+    ),
+    output: Optional[Path] = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="Write every pair (and window) as rows to this Parquet file.",
+    ),
+) -> None:
+    """Correlate the daily log returns of every ticker with every other."""
+    try:
+        returns = stocks.load(data_dir, column)
+    except (FileNotFoundError, pl.ColumnNotFoundError) as err:
+        rprint(f"[red]{err}[/red]")
+        raise typer.Exit(code=1) from err
+    if window is not None and window > len(returns.dates):
+        rprint(f"[red]Only {len(returns.dates)} returns; window {window} too long.")
+        raise typer.Exit(code=1)
+    streaming = output is None and not formats.is_table()
+    if window is None:
+        results = iter(
+            [
+                (
+                    returns.dates[-1],
+                    stocks.moments(
+                        returns.values,
+                        returns.tickers,
+                        block=block,
+                        min_periods=min_periods,
+                    ),
+                )
+            ]
+        )
+        span = f"{returns.dates[0]} to {returns.dates[-1]}"
+    else:
+        results = stocks.rolling(
+            returns,
+            window,
+            # a table shows only the latest window; every one is worth writing
+            step=step if output is not None or streaming else len(returns.dates),
+            block=block,
+            min_periods=min(min_periods, window),
+        )
+        span = f"{window} returns to {returns.dates[-1]}"
+    if streaming:  # every pair of every window, written as each is computed
+        formats.write(stocks.long_frame(result, date) for date, result in results)
+        return
+    if output is None:  # only the latest window was computed
+        ((_, latest),) = results
+    else:
+        latest_only: list[stocks.Moments] = []
+        windows = 0
+
+        def long_frames() -> Iterator[pl.DataFrame]:
+            """Yield each window's pairs as it is computed, keeping the latest window."""
+            nonlocal windows
+            for date, result in results:
+                latest_only[:] = [result]
+                windows += 1
+                yield stocks.long_frame(result, date)
+
+        with output.open("wb") as file:  # row groups written as windows arrive
+            formats.write(long_frames(), "parquet", stream=file)
+        latest = latest_only[-1]
+        rprint(f"Wrote {windows} matrices to [blue]{output}[/blue]")
+    print_frame(
+        stocks.matrix_frame(
+            latest.cov if cov else latest.corr,
+            latest.tickers,
+            decimals=6 if cov else 3,  # daily covariances are ~1e-4
+        ),
+        title=f"{'Covariance' if cov else 'Correlation'} of log returns ({span})",
+    )
+
+
+@stocks_app.command("indicators")
+def stocks_indicators(  # noqa: PLR0913
+    data_dir: Path = typer.Option(
+        stocks.STOCKS_DIR, file_okay=False, help="Directory of stock_*.csv files."
+    ),
+    store: Path = typer.Option(
+        indicators.STORE_DIR, help="Where indicator rows and running state are kept."
+    ),
+    window: int = typer.Option(
+        indicators.DEFAULT_WINDOW, min=2, help="Days in the SMA, volatility and VWAP."
+    ),
+    span: int = typer.Option(indicators.DEFAULT_SPAN, min=1, help="EMA span, in days."),
+    full: bool = typer.Option(
+        False, "--full", help="Recompute from scratch instead of adding new days."
+    ),
+    verify: bool = typer.Option(
+        False,
+        "--verify",
+        help="Compare the stored rows with a full recompute instead of updating.",
+    ),
+) -> None:
+    """Add new days to each ticker's SMA, EMA, volatility and VWAP."""
+    indicator_store = indicators.IndicatorStore(store)
+    sources = sorted(data_dir.glob(stocks.PATTERN))
+    if not sources:
+        rprint(f"[red]No {stocks.PATTERN} files in {data_dir}[/red]")
+        raise typer.Exit(code=1)
+    if verify:
+        gaps = {
+            indicators.ticker_of(path): indicator_store.verify(path) for path in sources
+        }
+        print_frame(
+            pl.DataFrame(
+                [
+                    {"ticker": ticker}
+                    | {name: f"{gap:.1e}" for name, gap in ticker_gaps.items()}
+                    for ticker, ticker_gaps in gaps.items()
+                ]
+            ),
+            title="Largest relative gap to a full recompute",
+        )
+        worst = max(
+            gap for ticker_gaps in gaps.values() for gap in ticker_gaps.values()
+        )
+        if worst > indicators.TOLERANCE:
+            rprint(f"[red]Stored indicators are off by up to {worst:.3g}.[/red]")
+            raise typer.Exit(code=1)
+        return
+    started = time.perf_counter()
+    results = indicator_store.update_all(data_dir, window=window, span=span, full=full)
+    elapsed = time.perf_counter() - started
+    summary = pl.DataFrame(
+        [
+            {
+                "ticker": result.ticker,
+                "new_rows": result.new_rows,
+                "rows": result.rows,
+                "mode": "full" if result.recomputed else "incremental",
+                "date": result.last_date,
+            }
+            | {
+                name: None if value is None else round(value, 4)
+                for name, value in indicator_store.state(result.ticker)
+                .current()
+                .items()
+            }
+            for result in results
+        ]
+    )
+    print_frame(summary, title=f"Indicators ({elapsed:.2f}s)")
+
+
+@notebooks_app.command("run")
+def notebooks_run(
+    paths_: Optional[list[Path]] = typer.Argument(
+        None,
+        metavar="NOTEBOOK...",
+        exists=True,
+        dir_okay=False,
+        help=f"Notebooks to run. (default: {notebooks.NOTEBOOKS_DIR}/{notebooks.PATTERN})",
+        show_default=False,
+    ),
+    workers: Optional[int] = typer.Option(
+        None, min=1, help="Notebooks run at once. (default: one per core)"
+    ),
+    out: Path = typer.Option(
+        notebooks.STORE_DIR, help="Where the executed .ipynb files are written."
+    ),
+    cache_dir: Path = typer.Option(
+        notebooks.STORE_DIR / "cache", help="Cell output and namespace cache."
+    ),
+    force: bool = typer.Option(
+        False, "--force", help="Run every cell, ignoring cached outputs."
+    ),
+) -> None:
+    """Execute notebooks headlessly, re-running only cells whose inputs changed."""
+    selected = paths_ or sorted(notebooks.NOTEBOOKS_DIR.glob(notebooks.PATTERN))
+    if not selected:
+        rprint(f"[red]No notebooks in {notebooks.NOTEBOOKS_DIR}[/red]")
+        raise typer.Exit(code=1)
+    with progress.Reporter() as reporter:
+        task = reporter.task("notebooks", total=len(selected), unit="notebooks")
+        results = notebooks.run(
+            selected,
+            workers=workers,
+            cache_root=cache_dir,
+            out_dir=out,
+            force=force,
+            on_done=lambda _: task.advance(),
+        )
+    print_frame(
+        pl.DataFrame(
+            [
+                {
+                    "notebook": result.notebook,
+                    "status": result.status,
+                    "cells": result.cells,
+                    "cached": result.cached,
+                    "executed": result.executed,
+                    "replayed": result.replayed,
+                    "seconds": round(result.seconds, 2),
+                }
+                for result in results
+            ]
+        ),
+        title=f"Notebooks (outputs in {out})",
+    )
+    failed = [result for result in results if result.status != "ok"]
+    for result in failed:
+        rprint(f"[red]{result.notebook} failed:[/red]\n{result.error}")
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@bench_app.command("corr")
+def bench_corr(
+    tickers: int = typer.Option(2_000, min=2, help="Synthetic tickers."),
+    days: int = typer.Option(252, min=3, help="Returns per ticker."),
+    baseline_pairs: int = typer.Option(
+        2_000, min=1, help="Pairs to correlate one at a time (the slow baseline)."
+    ),
+) -> None:
+    """Correlate every pair of tickers: blocked matrix products vs a loop over pairs."""
+    print_frame(
+        stocks.benchmark(tickers, days, baseline_pairs),
+        title="Cross-ticker correlation",
+    )
+
+
+@bench_app.command("knn")
+def bench_knn(
+    references: int = typer.Option(100_000, min=1, help="Synthetic reference points."),
+    queries: int = typer.Option(5_000, min=1, help="Points to classify."),
+    dims: int = typer.Option(4, min=1, help="Measurements per point."),
+    k: int = typer.Option(classify.DEFAULT_K, "-k", min=1, help="Neighbours."),
+) -> None:
+    """Find k nearest neighbours of a batch: KD-tree vs the full distance matrix."""
+    print_frame(
+        classify.benchmark(references, queries, dims, min(k, references)),
+        title="Batched k-nearest neighbours",
+    )
+
+
+##################################################################################
+# PagerDuty
+##################################################################################
+
+
+def select_accounts(
+    names: Optional[list[str]], env_file: Path
+) -> list[pagerduty.Account]:
+    """Resolve `--accounts` (repeatable and/or comma-separated; default: all)."""
+    configured = pagerduty.load_accounts(env_file)
+    if not names:
+        wanted = list(configured)
+    else:
+        wanted = [n.strip() for name in names for n in name.split(",") if n.strip()]
+    missing = [name for name in wanted if name not in configured]
+    if missing or not wanted:
+        rprint(
+            f"[red]No API key configured for:[/red] {', '.join(missing) or '(any account)'}"
+            f"\nConfigured in {env_file}: {', '.join(configured) or 'none'}"
+        )
+        raise typer.Exit(code=1)
+    return [configured[name] for name in wanted]
+
+
+@pd_app.command("snapshot")
+def pd_snapshot(
+    accounts: Optional[list[str]] = typer.Option(
+        None,
+        "--accounts",
+        "-a",
+        help="Accounts to pull, e.g. personal,example. (default: all)",
+    ),
+    endpoints: list[str] = typer.Option(
+        list(pagerduty.DEFAULT_ENDPOINTS), "--endpoint", "-e", help="Endpoints to pull."
+    ),
+    env_file: Path = typer.Option(paths.ENV_FILE, help="Where API keys are declared."),
+    out: Path = typer.Option(pagerduty.SNAPSHOT_DIR, help="Snapshot root directory."),
+) -> None:
+    """Pull the same endpoints for many accounts concurrently into one snapshot."""
+    selected = select_accounts(accounts, env_file)
+    started = time.perf_counter()
+    with progress.Reporter() as reporter:
+        result = pagerduty.snapshot(selected, tuple(endpoints), reporter=reporter)
+    elapsed = time.perf_counter() - started
+    for account, error in result.errors.items():
+        rprint(f"[red]{account} failed:[/red] {error}")
+    if not result.frames:
+        raise typer.Exit(code=1)
+    directory = pagerduty.save_snapshot(result.frames, out)
+    summary = pl.DataFrame(
+        [
+            {"endpoint": endpoint, "account": account, "rows": rows}
+            for endpoint, frame in result.frames.items()
+            for account, rows in frame.group_by("account")
+            .len()
+            .sort("account")
+            .iter_rows()
+        ]
+    )
+    print_frame(summary, title=f"{directory} ({elapsed:.1f}s)")
+
+
+@pd_app.command("diff")
+def pd_diff(  # noqa: PLR0913
+    old: Optional[Path] = typer.Option(
+        None, help="Earlier snapshot directory. (default: second latest)"
+    ),
+    new: Optional[Path] = typer.Option(
+        None, help="Later snapshot directory. (default: latest)"
+    ),
+    endpoints: Optional[list[str]] = typer.Option(
+        None, "--endpoint", "-e", help="Endpoints to compare. (default: all shared)"
+    ),
+    output: Optional[Path] = typer.Option(
+        None, "--output", "-o", help="Write every change to this NDJSON file."
+    ),
+    max_rows: int = typer.Option(20, help="Show at most this many changes."),
+    snapshots: Path = typer.Option(
+        pagerduty.SNAPSHOT_DIR, help="Snapshot root directory."
+    ),
+) -> None:
+    """Show added, removed and changed records between two stored snapshots."""
+    stored = pagerduty.list_snapshots(snapshots)
+    if old is None or new is None:
+        if len(stored) < 2:  # noqa: PLR2004
+            rprint("[red]Need two stored snapshots;[/red] run `pd snapshot` again.")
+            raise typer.Exit(code=1)
+        old, new = old or stored[-2], new or stored[-1]
+    try:
+        diffs = diff.diff_snapshots(old, new, tuple(endpoints) if endpoints else None)
+    except (FileNotFoundError, pl.PolarsError) as err:
+        rprint(f"[red]Diff failed:[/red] {err}")
+        raise typer.Exit(code=1) from err
+    if not diffs:
+        rprint(f"No endpoints stored in both {old.name} and {new.name}.")
+        return
+    summary = pl.DataFrame(
+        [
+            {
+                "endpoint": d.endpoint,
+                **d.counts,
+                "schema": ", ".join(
+                    [f"+{c}" for c in d.columns_added]
+                    + [f"-{c}" for c in d.columns_removed]
+                    + [f"~{c}" for c in d.columns_retyped]
+                ),
+            }
+            for d in diffs
+        ]
+    )
+    print_frame(summary, title=f"{old.name} -> {new.name}", data=False)
+    changes = pl.concat([d.changes() for d in diffs], how="diagonal_relaxed")
+    if output is not None:
+        changes.write_ndjson(output)
+    if not changes.is_empty():
+        print_frame(
+            (changes.head(max_rows) if formats.is_table() else changes).with_columns(
+                pl.col(diff.CHANGED_COLUMNS_COLUMN).list.join(", ")
+            ),
+            title=f"Changes (first {min(max_rows, changes.height)} of {changes.height})",
+        )
+
+
+@pd_app.command("oncall")
+def pd_oncall(  # noqa: PLR0913
+    account: str = typer.Option(
+        ..., "--account", "-a", help="Account to query (see `pd snapshot`)."
+    ),
+    since: Optional[str] = typer.Option(
+        None, help="Window start (ISO-8601). (default: 30 days ago)"
+    ),
+    until: Optional[str] = typer.Option(None, help="Window end. (default: now)"),
+    by: str = typer.Option(
+        "schedule", help=f"Group timelines by: {', '.join(oncall.GROUP_COLUMNS)}."
+    ),
+    at: Optional[str] = typer.Option(None, help="Show who was on call at this time."),
+    gaps: bool = typer.Option(False, "--gaps", help="List uncovered spans."),
+    env_file: Path = typer.Option(paths.ENV_FILE, help="Where API keys are declared."),
+) -> None:
+    """On-call coverage per schedule or escalation policy: who, when, and gaps."""
+    if by not in oncall.GROUP_COLUMNS:
+        rprint(f"[red]--by must be one of:[/red] {', '.join(oncall.GROUP_COLUMNS)}")
+        raise typer.Exit(code=1)
+    (selected,) = select_accounts([account], env_file)
+    window = timeutil.window(since, until, days=30)
+    with progress.Reporter() as reporter:
+        entries = oncall.pull(
+            selected, *window, task=reporter.task(f"{selected.name}/oncalls")
+        )
+    coverage = oncall.Coverage.build(entries, *window, by=by)
+    title = f"{window[0]:%Y-%m-%d %H:%M} -> {window[1]:%Y-%m-%d %H:%M} UTC"
+    if at is not None:
+        moment = timeutil.parse_arg(at)
+        print_frame(
+            coverage.at(moment).select(
+                "schedule",
+                "escalation_policy",
+                "escalation_level",
+                "user",
+                "start",
+                "end",
+            ),
+            title=f"On call at {moment:%Y-%m-%d %H:%M} UTC",
+        )
+    elif gaps:
+        print_frame(coverage.gaps(), title=f"Coverage gaps, {title}")
+    else:
+        print_frame(coverage.summary(), title=f"Coverage by {by}, {title}")
+
+
+METRICS_BY_HELP = f"Group by (repeatable): {', '.join(metrics.GROUPINGS)}."
+
+
+@pd_app.command("metrics")
+def pd_metrics(  # noqa: PLR0913
+    account: str = typer.Option(
+        ..., "--account", "-a", help="Account to query (see `pd snapshot`)."
+    ),
+    since: Optional[str] = typer.Option(
+        None, help="Window start (ISO-8601). (default: 12 weeks ago)"
+    ),
+    until: Optional[str] = typer.Option(None, help="Window end. (default: now)"),
+    by: list[str] = typer.Option(
+        ["service"],
+        "--by",
+        help=METRICS_BY_HELP,
+    ),
+    output: Optional[Path] = typer.Option(
+        None, "--output", "-o", help="Write the metrics to this Parquet file instead."
+    ),
+    env_file: Path = typer.Option(paths.ENV_FILE, help="Where API keys are declared."),
+) -> None:
+    """Weekly time-to-acknowledge / time-to-resolve, from streamed log entries."""
+    unknown = [b for b in by if b not in metrics.GROUPINGS]
+    if unknown:
+        rprint(f"[red]--by must be one of:[/red] {', '.join(metrics.GROUPINGS)}")
+        raise typer.Exit(code=1)
+    (selected,) = select_accounts([account], env_file)
+    start, end = timeutil.window(since, until, weeks=12)
+    with tempfile.TemporaryDirectory(prefix="log_entries_") as spool_dir:
+        with progress.Reporter() as reporter:
+            count, plan = metrics.collect(
+                selected,
+                start,
+                end,
+                Path(spool_dir),
+                tuple(dict.fromkeys(by)),
+                task=reporter.task("log_entries"),
+            )
+        result = memory.collect(plan)
+    if output is not None:
+        result.write_parquet(output)
+        rprint(f"{count} log entries -> {result.height} rows in {output}")
+        return
+    print_frame(
+        result.with_columns(pl.col("week").dt.date()),
+        title=f"Response times in minutes ({count} log entries)",
+    )
+
+
+@mock_app.command("serve")
+def mock_serve(  # noqa: PLR0913
+    port: int = typer.Option(mockserver.DEFAULT_PORT, help="Port to listen on."),
+    users: int = typer.Option(mockserver.MockConfig.users, help="Synthetic users."),
+    incidents: int = typer.Option(
+        mockserver.MockConfig.incidents, help="Synthetic incidents."
+    ),
+    tickets_count: int = typer.Option(
+        mockserver.MockConfig.tickets, "--tickets", help="Synthetic Zenq tickets."
+    ),
+    latency_ms: float = typer.Option(0.0, help="Delay before every response."),
+    jitter_ms: float = typer.Option(0.0, help="Up to this much extra random delay."),
+    rate_limited: float = typer.Option(
+        0.0, min=0.0, max=1.0, help="Fraction of requests answered with 429."
+    ),
+) -> None:
+    """Serve synthetic PagerDuty / Zenq endpoints locally until Ctrl-C."""
+    config = mockserver.MockConfig(
+        users=users,
+        license_allocations=users,
+        incidents=incidents,
+        tickets=tickets_count,
+        latency_ms=latency_ms,
+        jitter_ms=jitter_ms,
+        rate_limited=rate_limited,
+    )
+    rprint(
+        f"Mock API on [blue]http://{mockserver.DEFAULT_HOST}:{port}[/blue] "
+        f"(PagerDuty at /, Zenq at {mockserver.ZENQ_PREFIX}); Ctrl-C to stop"
+    )
+    mockserver.serve(config, port=port)
+
+
+@bench_app.command("load")
+def bench_load(  # noqa: PLR0913
+    endpoint: str = typer.Option("users", help="Endpoint to page through."),
+    pages: int = typer.Option(10_000, min=1, help="Pages to fetch."),
+    concurrency: int = typer.Option(16, min=1, help="Concurrent requests."),
+    latency_ms: float = typer.Option(0.0, help="Mock server delay per response."),
+    rate_limited: float = typer.Option(
+        0.0, min=0.0, max=1.0, help="Fraction of mock responses that are 429s."
+    ),
+    url: Optional[str] = typer.Option(
+        None, help="Load-test this server instead of starting a mock one."
+    ),
+) -> None:
+    """Measure the API client's requests/sec, p99 latency and memory on a mock API."""
+    config = mockserver.MockConfig(latency_ms=latency_ms, rate_limited=rate_limited)
+    with progress.Reporter() as reporter:
+        result = loadtest.run(
+            endpoint,
+            pages,
+            concurrency=concurrency,
+            config=config,
+            url=url,
+            task=reporter.task(endpoint, total=pages, unit="pages"),
+        )
+    print_frame(pl.DataFrame([result.summary()]), title="API client load test")
+
+
+@licenses_app.command("report")
+def licenses_report(
+    snapshot: Optional[Path] = typer.Option(
+        None, help="Snapshot directory. (default: latest)"
+    ),
+    output: Optional[Path] = typer.Option(
+        None, "--output", "-o", help="Also write the report to this Parquet file."
+    ),
+    cache: bool = typer.Option(True, help="Reuse the report of an unchanged snapshot."),
+    snapshots: Path = typer.Option(
+        pagerduty.SNAPSHOT_DIR, help="Snapshot root directory."
+    ),
+) -> None:
+    """License utilisation per account and license type, from a stored snapshot."""
+    snapshot = snapshot or licenses.latest_snapshot(snapshots)
+    if snapshot is None or not (snapshot / "license_allocations.parquet").exists():
+        rprint(
+            "[red]No license allocations stored.[/red] "
+            "Run `pd snapshot` (with the license_allocations endpoint) first."
+        )
+        raise typer.Exit(code=1)
+    plan = licenses.report(snapshot)
+    report = (
+        result_cache_for(paths.DATA_DIR).collect(plan)
+        if cache
+        else memory.collect(plan)
+    )
+    if output is not None:
+        report.write_parquet(output)
+    print_frame(
+        report.drop("license_id", "users", strict=False),
+        title=f"License utilisation ({snapshot.name})",
+    )
+
+
+##################################################################################
+# Zenq
+##################################################################################
+
+
+@tickets_app.command("sync")
+def tickets_sync(
+    reconcile: bool = typer.Option(
+        False,
+        help="Also close out tickets that left the open queue (pulls all open ids).",
+    ),
+    env_file: Path = typer.Option(
+        paths.ENV_FILE, help="Where Okta credentials are declared."
+    ),
+    store: Path = typer.Option(tickets.STORE_DIR, help="Local ticket store directory."),
+) -> None:
+    """Fetch only tickets changed since the last sync and merge them into the store."""
+    try:
+        credentials = zenq.Credentials.from_env(env_file)
+    except OSError as err:
+        rprint(f"[red]{err}[/red]")
+        raise typer.Exit(code=1) from err
+    ticket_store = tickets.TicketStore(store)
+    rprint(
+        f"Syncing tickets modified since: {ticket_store.watermark or '(first sync)'}"
+    )
+    with progress.Reporter() as reporter:
+        result = tickets.sync(
+            ticket_store, credentials, reconcile=reconcile, reporter=reporter
+        )
+    rprint(
+        f"fetched {result.fetched}: [green]{result.inserted} new[/green], "
+        f"[blue]{result.updated} updated[/blue], {result.unchanged} unchanged, "
+        f"[yellow]{result.closed} closed out[/yellow]; watermark now {result.watermark}"
+    )
+
+
+@tickets_app.command("search")
+def tickets_search(
+    query_text: str = typer.Argument(..., metavar="QUERY", help="Words to look for."),
+    limit: int = typer.Option(10, help="Show at most this many tickets."),
+    reindex: bool = typer.Option(
+        False, help="Rebuild the index from the stored tickets first."
+    ),
+    store: Path = typer.Option(tickets.STORE_DIR, help="Local ticket store directory."),
+) -> None:
+    """Rank stored tickets by subject, description and latest comment (BM25)."""
+    ticket_store = tickets.TicketStore(store)
+    if reindex:
+        rprint(f"Indexed {ticket_store.reindex()} tickets")
+    found = ticket_store.search(query_text, limit)
+    if found.is_empty():
+        rprint(f"[yellow]No tickets match {query_text!r}[/yellow]")
+        raise typer.Exit(code=1)
+    columns = [
+        c
+        for c in (tickets.ID_COLUMN, "score", tickets.STATUS_COLUMN, "subject")
+        if c in found.columns
+    ]
+    print_frame(
+        found.select(columns).with_columns(pl.col("score").round(2)),
+        title=f"Tickets matching {query_text!r}",
+    )
+
+
+@tickets_app.command("lookup")
+def tickets_lookup(
+    email: Optional[list[str]] = typer.Option(
+        None, "--email", "-e", help="Requester email (repeatable)."
+    ),
+    since: Optional[str] = typer.Option(
+        None, help="Modified at or after this ISO-8601 time."
+    ),
+    until: Optional[str] = typer.Option(
+        None, help="Modified before this ISO-8601 time."
+    ),
+    store: Path = typer.Option(tickets.STORE_DIR, help="Local ticket store directory."),
+) -> None:
+    """Find stored tickets by requester and/or modification time, via the indexes."""
+    found = tickets.TicketStore(store).lookup(email or (), since=since, until=until)
+    if found.is_empty():
+        rprint("[yellow]No matching tickets[/yellow]")
+        raise typer.Exit(code=1)
+    columns = [
+        c
+        for c in (
+            tickets.ID_COLUMN,
+            tickets.STATUS_COLUMN,
+            tickets.EMAIL_COLUMN,
+            tickets.MODIFIED_COLUMN,
+            "subject",
+        )
+        if c in found.columns
+    ]
+    print_frame(found.select(columns), title=f"Matching tickets: {found.height}")
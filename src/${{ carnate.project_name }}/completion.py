@@ -0,0 +1,374 @@
+"""Static shell completion: the command tree, dumped once into a shell script.
+
+Typer's own completion calls back into the app on every Tab press, which means
+starting Python and importing everything (polars, httpx, ...) each time.
+Instead, `tree` walks the app's commands once, at install time, recording
+every (sub)command, option and `rich_help_panel` group, and the generators
+below write that table into a plain bash, zsh or fish script.
+Tab completion is then the shell alone: no Python at all.
+
+Commands are addressed by their path: `/` for the top level, `/pd/licenses`
+for `... pd licenses`. Each script walks the words typed so far to find the
+current path (skipping options and the values of options that take one),
+then offers that path's subcommands (grouped by panel, in zsh and fish),
+its options, or an option's choices.
+
+Re-generate after adding commands (`completion install`).
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import shlex
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import click
+import typer
+from rich.text import Text
+
+SHELLS = ("bash", "zsh", "fish")
+DEFAULT_PANEL = "Commands"
+ROOT = "/"
+
+INSTALL_PATHS = {
+    "bash": Path("~/.local/share/bash-completion/completions/{prog}"),
+    "zsh": Path("~/.zfunc/_{prog}"),
+    "fish": Path("~/.config/fish/completions/{prog}.fish"),
+}
+"""Where each shell looks for per-command completion scripts (zsh: add ~/.zfunc to fpath)."""
+
+
+@dataclass
+class Option:
+    """One option of a command, as completion needs it."""
+
+    names: list[str]
+    description: str = ""
+    takes_value: bool = False
+    choices: list[str] = field(default_factory=list)
+
+
+@dataclass
+class Node:
+    """One command (or group), with its options and subcommands."""
+
+    name: str
+    description: str = ""
+    panel: str = DEFAULT_PANEL
+    options: list[Option] = field(default_factory=list)
+    commands: dict[str, Node] = field(default_factory=dict)
+
+
+def _plain(text: str | None) -> str:
+    r"""Return the first line of a help text, without rich markup.
+
+    >>> _plain("[bold]Pull[/bold] tickets.\n\nMore detail.")
+    'Pull tickets.'
+    """
+    first = (text or "").strip().split("\n", 1)[0]
+    return Text.from_markup(first).plain.strip()
+
+
+def tree(command: click.Command, name: str = "") -> Node:
+    """Walk a click (Typer) command into a `Node` tree, skipping hidden commands."""
+    options = [
+        Option(
+            names=[*param.opts, *param.secondary_opts],
+            description=_plain(param.help),
+            takes_value=not param.is_flag and not param.count,
+            choices=list(param.type.choices)
+            if isinstance(param.type, click.Choice)
+            else [],
+        )
+        for param in command.params
+        if isinstance(param, click.Option) and not param.hidden
+    ]
+    options.append(Option(["--help"], "Show this message and exit."))
+    node = Node(
+        name=name,
+        description=_plain(command.short_help or command.help),
+        panel=getattr(command, "rich_help_panel", None) or DEFAULT_PANEL,
+        options=options,
+    )
+    if isinstance(command, click.Group):
+        for sub_name, sub in sorted(command.commands.items()):
+            if not sub.hidden:
+                node.commands[sub_name] = tree(sub, sub_name)
+    return node
+
+
+def app_tree(app: typer.Typer) -> Node:
+    """Return the command tree of a Typer app."""
+    return tree(typer.main.get_command(app))
+
+
+def paths(node: Node, path: str = ROOT) -> list[tuple[str, Node]]:
+    """Return every `(path, node)` in the tree, parents before children."""
+    found = [(path, node)]
+    for name, child in node.commands.items():
+        found += paths(child, f"{path.rstrip('/')}/{name}")
+    return found
+
+
+def to_json(root: Node) -> str:
+    """Serialise the tree (the cached table) as JSON, keyed by path."""
+    return json.dumps(
+        {
+            path: {**asdict(node), "commands": sorted(node.commands)}
+            for path, node in paths(root)
+        },
+        indent=1,
+    )
+
+
+def _function_name(prog: str) -> str:
+    return "_" + re.sub(r"\W", "_", prog) + "_completion"
+
+
+def _value_options(node: Node) -> list[str]:
+    return [
+        name for option in node.options if option.takes_value for name in option.names
+    ]
+
+
+def bash(root: Node, prog: str) -> str:
+    """Return a bash completion script for `prog`."""
+    func = _function_name(prog)
+    commands, options, valued, choices = [], [], [], []
+    for path, node in paths(root):
+        key = shlex.quote(path)
+        commands.append(f"[{key}]={shlex.quote(' '.join(node.commands))}")
+        names = [name for option in node.options for name in option.names]
+        options.append(f"[{key}]={shlex.quote(' '.join(names))}")
+        valued.append(f"[{key}]={shlex.quote(' '.join(_value_options(node)))}")
+        choices += [
+            f"[{shlex.quote(path + ' ' + name)}]={shlex.quote(' '.join(option.choices))}"
+            for option in node.options
+            if option.choices
+            for name in option.names
+        ]
+    body = "\n".join(
+        f"    local -A {name}=("
+        + "".join(f"\n        {e}" for e in entries)
+        + "\n    )"
+        for name, entries in (
+            ("commands", commands),
+            ("options", options),
+            ("valued", valued),
+            ("choices", choices),
+        )
+    )
+    return f"""# bash completion for {prog}; generated by `{prog} completion show bash`.
+{func}() {{
+{body}
+    local cur="${{COMP_WORDS[COMP_CWORD]}}" cmd_path=/ word option="" i
+    for ((i = 1; i < COMP_CWORD; i++)); do
+        word="${{COMP_WORDS[i]}}"
+        if [[ -n $option ]]; then option=""; continue; fi
+        if [[ $word == -* ]]; then
+            [[ " ${{valued[$cmd_path]}} " == *" $word "* ]] && option="$word"
+            continue
+        fi
+        if [[ " ${{commands[$cmd_path]}} " == *" $word "* ]]; then
+            cmd_path="${{cmd_path%/}}/$word"
+        fi
+    done
+    if [[ -n $option ]]; then
+        if [[ -n ${{choices["$cmd_path $option"]}} ]]; then
+            COMPREPLY=($(compgen -W "${{choices["$cmd_path $option"]}}" -- "$cur"))
+        else
+            COMPREPLY=($(compgen -f -- "$cur"))
+        fi
+    elif [[ $cur == -* ]]; then
+        COMPREPLY=($(compgen -W "${{options[$cmd_path]}}" -- "$cur"))
+    elif [[ -n ${{commands[$cmd_path]}} ]]; then
+        COMPREPLY=($(compgen -W "${{commands[$cmd_path]}}" -- "$cur"))
+    else
+        COMPREPLY=($(compgen -f -- "$cur"))
+    fi
+}}
+complete -o default -F {func} {prog}
+"""
+
+
+def _described(name: str, help_: str) -> str:
+    """Return one `name:description` entry for zsh's `_describe`, quoted."""
+    escaped = name.replace(":", "\\:")
+    return shlex.quote(f"{escaped}:{help_}")
+
+
+def _zsh_case(path: str, node: Node) -> str:
+    """Return the `case` branch completing a word at `path`."""
+    option_specs = " ".join(
+        _described(name, option.description)
+        for option in node.options
+        for name in option.names
+    )
+    lines = [
+        f"        {shlex.quote(path)})",
+        "            if [[ $PREFIX == -* ]]; then",
+        f"                local -a opts=({option_specs})",
+        "                _describe -t options option opts",
+        "            else",
+    ]
+    panels: dict[str, list[str]] = {}
+    for name, child in node.commands.items():
+        panels.setdefault(child.panel, []).append(_described(name, child.description))
+    for i, (panel, specs) in enumerate(sorted(panels.items())):
+        tag = shlex.quote(panel.lower().replace(" ", "-"))
+        lines += [
+            f"                local -a group{i}=({' '.join(specs)})",
+            f"                _describe -t {tag} {shlex.quote(panel)} group{i}",
+        ]
+    if not panels:
+        lines.append("                _files")
+    lines += ["            fi", "            ;;"]
+    return "\n".join(lines)
+
+
+def zsh(root: Node, prog: str) -> str:
+    """Return a zsh completion script (`_<prog>`, for `fpath`) for `prog`."""
+    func = _function_name(prog)
+    commands, valued, cases, choice_cases = [], [], [], []
+    for path, node in paths(root):
+        key = shlex.quote(path)
+        commands.append(f"        {key} {shlex.quote(' '.join(node.commands))}")
+        valued.append(f"        {key} {shlex.quote(' '.join(_value_options(node)))}")
+        cases.append(_zsh_case(path, node))
+        choice_cases += [
+            f"        {shlex.quote(f'{path} {name}')}) compadd -- "
+            + " ".join(shlex.quote(choice) for choice in option.choices)
+            + " ;;"
+            for option in node.options
+            if option.choices
+            for name in option.names
+        ]
+    newline = "\n"
+    return f"""#compdef {prog}
+# zsh completion for {prog}; generated by `{prog} completion show zsh`.
+{func}() {{
+    local -A commands valued
+    commands=(
+{newline.join(commands)}
+    )
+    valued=(
+{newline.join(valued)}
+    )
+    local cmd_path=/ word option="" i
+    for ((i = 2; i < CURRENT; i++)); do
+        word="${{words[i]}}"
+        if [[ -n $option ]]; then option=""; continue; fi
+        if [[ $word == -* ]]; then
+            [[ " ${{valued[$cmd_path]}} " == *" $word "* ]] && option="$word"
+            continue
+        fi
+        if [[ " ${{commands[$cmd_path]}} " == *" $word "* ]]; then
+            cmd_path="${{cmd_path%/}}/$word"
+        fi
+    done
+    if [[ -n $option ]]; then
+        case "$cmd_path $option" in
+{newline.join(choice_cases)}
+        *) _files ;;
+        esac
+        return
+    fi
+    case $cmd_path in
+{newline.join(cases)}
+    esac
+}}
+# Autoloaded from fpath, this file's body *is* `_{prog}`: complete right away.
+# Sourced instead, register the function for later.
+if [[ ${{funcstack[1]}} == _{prog} ]]; then
+    {func} "$@"
+else
+    compdef {func} {prog}
+fi
+"""
+
+
+def fish(root: Node, prog: str) -> str:
+    """Return a fish completion script for `prog`."""
+    func = _function_name(prog)
+    commands, valued, lines = [], [], []
+    for path, node in paths(root):
+        commands += [shlex.quote(f"{path}|{name}") for name in node.commands]
+        valued += [shlex.quote(f"{path}|{name}") for name in _value_options(node)]
+        at = shlex.quote(f"{func}_at {shlex.quote(path)}")
+        for name, child in node.commands.items():
+            description = (
+                f"[{child.panel}] {child.description}"
+                if child.description
+                else child.panel
+            )
+            lines.append(
+                f"complete -c {prog} -f -n {at} -a {shlex.quote(name)}"
+                f" -d {shlex.quote(description)}"
+            )
+        for option in node.options:
+            flags = " ".join(
+                f"-l {shlex.quote(name[2:])}"
+                if name.startswith("--")
+                else f"-s {shlex.quote(name[1:])}"
+                for name in option.names
+            )
+            extra = " -r" if option.takes_value else ""
+            if option.choices:
+                extra += f" -f -a {shlex.quote(' '.join(option.choices))}"
+            lines.append(
+                f"complete -c {prog} -n {at} {flags}{extra}"
+                f" -d {shlex.quote(option.description)}"
+            )
+    return f"""# fish completion for {prog}; generated by `{prog} completion show fish`.
+set -g {func}_commands {" ".join(commands)}
+set -g {func}_valued {" ".join(valued)}
+
+function {func}_path
+    set -l cmd_path /
+    set -l option 0
+    for word in (commandline -opc)[2..-1]
+        if test $option = 1
+            set option 0
+            continue
+        end
+        if string match -q -- '-*' $word
+            contains -- "$cmd_path|$word" ${func}_valued; and set option 1
+            continue
+        end
+        if contains -- "$cmd_path|$word" ${func}_commands
+            set cmd_path (string replace -r '/$' '' -- $cmd_path)/$word
+        end
+    end
+    echo $cmd_path
+end
+
+function {func}_at
+    test ({func}_path) = $argv[1]
+end
+
+{chr(10).join(lines)}
+"""
+
+
+GENERATORS = {"bash": bash, "zsh": zsh, "fish": fish}
+
+
+def script(shell: str, root: Node, prog: str) -> str:
+    """Return the completion script for `shell` (see `SHELLS`)."""
+    if shell not in GENERATORS:
+        msg = f"Unsupported shell {shell!r}; choose one of {', '.join(SHELLS)}"
+        raise ValueError(msg)
+    return GENERATORS[shell](root, prog)
+
+
+def install(shell: str, root: Node, prog: str, path: Path | None = None) -> Path:
+    """Write the completion script where `shell` picks it up; return the path."""
+    path = (path or INSTALL_PATHS[shell]).expanduser()
+    path = Path(str(path).format(prog=prog))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(script(shell, root, prog))
+    tmp.replace(path)
+    return path
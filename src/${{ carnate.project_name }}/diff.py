@@ -0,0 +1,219 @@
+"""What changed between two stored PagerDuty snapshots, endpoint by endpoint.
+
+Rows are matched by key (`account` plus the record's id) and compared by content
+hash instead of value by value: each column is hashed vectorised in polars
+(nested columns through their JSON encoding, which polars can hash),
+so a changed row is one whose hashes differ and its changed columns are those
+whose hashes differ. One hash join plus one pass over the columns makes the whole
+diff linear in the number of rows.
+
+Columns present in only one snapshot are reported as schema changes.
+Columns whose type changed (e.g. all-null `Null` to `String`, `Int64` to
+`Float64`) are reported too, and still compared: both sides are cast to their
+common supertype first (text, failing that), so an unchanged `1` still equals
+`1.0` and only the values that changed are found.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import polars as pl
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+CHANGE_COLUMN = "change"
+CHANGED_COLUMNS_COLUMN = "changed_columns"
+HASH_SEED = 0
+
+KEYS: dict[str, tuple[pl.Expr, ...]] = {
+    "users": (pl.col("account"), pl.col("id")),
+    "licenses": (pl.col("account"), pl.col("id")),
+    "license_allocations": (
+        pl.col("account"),
+        pl.col("license").struct.field("id").alias("license_id"),
+        pl.col("user").struct.field("id").alias("user_id"),
+    ),
+}
+"""Identity of a record per endpoint; anything else is keyed by account and id."""
+
+DEFAULT_KEY = (pl.col("account"), pl.col("id"))
+
+
+@dataclass
+class EndpointDiff:
+    """Added, removed and changed records of one endpoint."""
+
+    endpoint: str
+    key: list[str]
+    added: pl.DataFrame
+    removed: pl.DataFrame
+    changed: pl.DataFrame
+    columns_added: list[str] = field(default_factory=list)
+    columns_removed: list[str] = field(default_factory=list)
+    columns_retyped: list[str] = field(default_factory=list)
+
+    @property
+    def counts(self) -> dict[str, int]:
+        """Number of added, removed and changed records."""
+        return {
+            "added": self.added.height,
+            "removed": self.removed.height,
+            "changed": self.changed.height,
+        }
+
+    def changes(self) -> pl.DataFrame:
+        """Return one row per change: its kind, the record's key and any changed columns."""
+        schema = {
+            CHANGE_COLUMN: pl.Utf8,
+            **dict.fromkeys(self.key, pl.Utf8),
+            CHANGED_COLUMNS_COLUMN: pl.List(pl.Utf8),
+        }
+        parts = [
+            frame.select(
+                pl.lit(kind).alias(CHANGE_COLUMN),
+                *(pl.col(k).cast(pl.Utf8) for k in self.key),
+                (
+                    pl.col(CHANGED_COLUMNS_COLUMN)
+                    if CHANGED_COLUMNS_COLUMN in frame.columns
+                    else pl.lit(None, pl.List(pl.Utf8)).alias(CHANGED_COLUMNS_COLUMN)
+                ),
+            )
+            for kind, frame in (
+                ("added", self.added),
+                ("removed", self.removed),
+                ("changed", self.changed),
+            )
+        ]
+        return pl.concat([pl.DataFrame(schema=schema), *parts]).with_columns(
+            pl.lit(self.endpoint).alias("endpoint")
+        )
+
+
+def _column_hash(
+    name: str, dtype: pl.DataType, cast: pl.DataType | None = None
+) -> pl.Expr:
+    """Hash a column's values; nested values (lists, structs) via their JSON text.
+
+    Scalar values are `cast` first, if given, so columns of different types can
+    be compared (see `_common_type`).
+    """
+    if dtype.is_nested():
+        column = pl.struct(name).struct.json_encode()
+    elif cast is not None:
+        column = pl.col(name).cast(cast)
+    else:
+        column = pl.col(name)
+    return column.hash(HASH_SEED)
+
+
+def _common_type(old: pl.DataType, new: pl.DataType) -> pl.DataType:
+    """Return the type both versions of a retyped column are compared as.
+
+    >>> _common_type(pl.Int64, pl.Float64)
+    Float64
+    >>> _common_type(pl.Null, pl.Utf8)
+    String
+    """
+    try:
+        return pl.concat(
+            [pl.DataFrame(schema={"c": old}), pl.DataFrame(schema={"c": new})],
+            how="vertical_relaxed",
+        ).schema["c"]
+    except pl.PolarsError:
+        return pl.Utf8
+
+
+def _keyed(frame: pl.LazyFrame, key: tuple[pl.Expr, ...]) -> pl.LazyFrame:
+    return frame.with_columns(*key)
+
+
+def diff_frames(
+    old: pl.LazyFrame,
+    new: pl.LazyFrame,
+    key: tuple[pl.Expr, ...] = DEFAULT_KEY,
+    endpoint: str = "",
+) -> EndpointDiff:
+    """Diff two versions of a table whose records are identified by `key`."""
+    key_names = [k.meta.output_name() for k in key]
+    old, new = _keyed(old, key), _keyed(new, key)
+    old_schema, new_schema = old.schema, new.schema
+    compared = [c for c in old_schema if c in new_schema and c not in key_names]
+    retyped = [c for c in compared if old_schema[c] != new_schema[c]]
+    common = {c: _common_type(old_schema[c], new_schema[c]) for c in retyped}
+
+    def hashed(frame: pl.LazyFrame, suffix: str) -> pl.LazyFrame:
+        schema = frame.schema
+        return frame.select(
+            *key_names,
+            *(
+                _column_hash(c, schema[c], common.get(c)).alias(f"{c}{suffix}")
+                for c in compared
+            ),
+            pl.lit(True).alias(f"_present{suffix}"),  # noqa: FBT003
+        )
+
+    joined = (
+        hashed(old, "_old")
+        .join(hashed(new, "_new"), on=key_names, how="full", coalesce=True)
+        .collect()
+    )
+    is_added = pl.col("_present_old").is_null()
+    is_removed = pl.col("_present_new").is_null()
+    differs = [
+        pl.when(pl.col(f"{c}_old") != pl.col(f"{c}_new")).then(pl.lit(c))
+        for c in compared
+    ]
+    changed = (
+        joined.filter(~is_added & ~is_removed)
+        .select(
+            *key_names,
+            (
+                pl.concat_list(differs).list.drop_nulls()
+                if differs
+                else pl.lit([], pl.List(pl.Utf8))
+            ).alias(CHANGED_COLUMNS_COLUMN),
+        )
+        .filter(pl.col(CHANGED_COLUMNS_COLUMN).list.len() > 0)
+    )
+    # full records for additions/removals; the new version of changed ones
+    added_keys = joined.filter(is_added).select(key_names)
+    removed_keys = joined.filter(is_removed).select(key_names)
+    return EndpointDiff(
+        endpoint=endpoint,
+        key=key_names,
+        added=new.join(added_keys.lazy(), on=key_names, how="semi").collect(),
+        removed=old.join(removed_keys.lazy(), on=key_names, how="semi").collect(),
+        changed=new.join(changed.lazy(), on=key_names, how="inner").collect(),
+        columns_added=[c for c in new_schema if c not in old_schema],
+        columns_removed=[c for c in old_schema if c not in new_schema],
+        columns_retyped=retyped,
+    )
+
+
+def diff_snapshots(
+    old: Path, new: Path, endpoints: tuple[str, ...] | None = None
+) -> list[EndpointDiff]:
+    """Diff every endpoint stored in both snapshot directories (or just `endpoints`).
+
+    Raises `FileNotFoundError` for a requested endpoint missing from either one.
+    """
+    shared = {p.stem for p in old.glob("*.parquet")} & {
+        p.stem for p in new.glob("*.parquet")
+    }
+    names = endpoints or tuple(sorted(shared))
+    missing = [name for name in names if name not in shared]
+    if missing:
+        msg = f"not stored in both snapshots: {', '.join(missing)}"
+        raise FileNotFoundError(msg)
+    return [
+        diff_frames(
+            pl.scan_parquet(old / f"{name}.parquet"),
+            pl.scan_parquet(new / f"{name}.parquet"),
+            KEYS.get(name, DEFAULT_KEY),
+            endpoint=name,
+        )
+        for name in names
+    ]
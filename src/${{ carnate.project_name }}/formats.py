@@ -0,0 +1,199 @@
+"""Write data commands' results to stdout as tables or machine-readable streams.
+
+The CLI's global `--format` is recorded here with `configure`:
+
+- `table` (default): a rich table for people.
+- `ndjson`, `csv`: text, one row per line.
+- `parquet`: one row group per batch.
+- `arrow`: an Arrow IPC *stream*, written record batch by record batch from
+  the frame's own Arrow buffers (polars -> Arrow is zero-copy).
+
+In every format but `table`, results are written in batches of `BATCH_ROWS`
+rows (zero-copy slices) and flushed as they go, so a consumer can start on
+the first rows while later ones are still being produced or encoded, and
+nothing is held twice. Commands that produce results in pieces (e.g. one
+frame per rolling window) pass an iterable of frames, which are written as
+each one arrives.
+
+The machine-readable formats own stdout: everything else the CLI prints
+(messages, progress, summary tables) goes to stderr instead.
+
+    $ cli --format arrow query "SELECT * FROM stocks" | consumer
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import sys
+from typing import IO, TYPE_CHECKING
+
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+TABLE = "table"
+FORMATS = (TABLE, "ndjson", "csv", "parquet", "arrow")
+BINARY_FORMATS = ("parquet", "arrow")
+BATCH_ROWS = 65_536
+
+_format = TABLE
+
+
+def configure(fmt: str) -> None:
+    """Set the process-wide output format (one of `FORMATS`)."""
+    global _format  # noqa: PLW0603 -- one setting for the whole process
+    if fmt not in FORMATS:
+        msg = f"format must be one of {', '.join(FORMATS)}, not {fmt!r}"
+        raise ValueError(msg)
+    _format = fmt
+
+
+def current() -> str:
+    """Return the output format in use."""
+    return _format
+
+
+def is_table() -> bool:
+    """Whether results are shown as rich tables (rather than streamed as data)."""
+    return _format == TABLE
+
+
+class _Position:
+    """Pass writes through, counting bytes, so a pipe can report `tell()`.
+
+    The Parquet writer records offsets with `tell()`, which pipes don't support.
+    """
+
+    def __init__(self, stream: IO[bytes]) -> None:
+        self.stream = stream
+        self.position = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        self.stream.write(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def close(self) -> None:
+        self.closed = True  # never close stdout itself
+
+    def writable(self) -> bool:
+        return True
+
+
+def _batches(
+    frames: pl.DataFrame | Iterable[pl.DataFrame], rows: int
+) -> Iterable[pl.DataFrame]:
+    """Yield `frames` as slices of at most `rows` rows (zero-copy).
+
+    An empty frame is yielded as is: it still carries the schema, which the
+    CSV header and the Parquet/Arrow writers need even for a result with no rows.
+    """
+    for frame in [frames] if isinstance(frames, pl.DataFrame) else frames:
+        if frame.is_empty():
+            yield frame
+        else:
+            yield from frame.iter_slices(rows)
+
+
+def _write_text(batches: Iterable[pl.DataFrame], stream: IO[bytes], fmt: str) -> int:
+    written = 0
+    header = True
+    for batch in batches:
+        encoded = io.BytesIO()  # one batch at a time; the pipe's errors stay ours
+        if fmt == "ndjson":
+            batch.write_ndjson(encoded)
+        else:
+            batch.write_csv(encoded, include_header=header)
+            header = False
+        stream.write(encoded.getbuffer())
+        stream.flush()
+        written += batch.height
+    return written
+
+
+def _write_parquet(batches: Iterable[pl.DataFrame], stream: IO[bytes]) -> int:
+    writer: pq.ParquetWriter | None = None
+    schema = None
+    written = 0
+    try:
+        for batch in batches:
+            table = batch.to_arrow()
+            if writer is None:
+                schema = table.schema
+                writer = pq.ParquetWriter(_Position(stream), schema)
+            if batch.height:
+                writer.write_table(table.cast(schema))
+            stream.flush()
+            written += batch.height
+    finally:
+        if writer is not None:
+            writer.close()
+    stream.flush()
+    return written
+
+
+def _write_arrow(batches: Iterable[pl.DataFrame], stream: IO[bytes], rows: int) -> int:
+    writer: pa.ipc.RecordBatchStreamWriter | None = None
+    schema = None
+    written = 0
+    try:
+        for batch in batches:
+            table = batch.to_arrow()
+            if writer is None:
+                schema = table.schema
+                writer = pa.ipc.new_stream(_Position(stream), schema)
+            for record_batch in table.cast(schema).to_batches(max_chunksize=rows):
+                writer.write_batch(record_batch)
+            stream.flush()
+            written += batch.height
+    finally:
+        if writer is not None:
+            writer.close()
+    stream.flush()
+    return written
+
+
+def write(
+    frames: pl.DataFrame | Iterable[pl.DataFrame],
+    fmt: str | None = None,
+    *,
+    stream: IO[bytes] | None = None,
+    batch_rows: int = BATCH_ROWS,
+) -> int:
+    """Write frames (one, or an iterable of same-schema pieces) as data; return rows.
+
+    `fmt` defaults to the configured format, `stream` to stdout.
+    A reader closing the pipe early (e.g. `| head`) ends the output quietly.
+    """
+    fmt = fmt or _format
+    if fmt == TABLE or fmt not in FORMATS:
+        msg = f"not a data format: {fmt!r}"
+        raise ValueError(msg)
+    if stream is None:
+        sys.stdout.flush()
+        stream = sys.stdout.buffer
+    batches = _batches(frames, batch_rows)
+    writers: dict[str, Callable[[], int]] = {
+        "ndjson": lambda: _write_text(batches, stream, fmt),
+        "csv": lambda: _write_text(batches, stream, fmt),
+        "parquet": lambda: _write_parquet(batches, stream),
+        "arrow": lambda: _write_arrow(batches, stream, batch_rows),
+    }
+    try:
+        return writers[fmt]()
+    except BrokenPipeError:
+        # the reader has gone; don't let the interpreter's final flush complain too
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 0
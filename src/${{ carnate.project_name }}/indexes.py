@@ -0,0 +1,223 @@
+"""Persisted secondary indexes: point lookups and range queries without a scan.
+
+Both kinds map column values to *row ids* (positions in the indexed table) and are
+stored as plain NumPy arrays, memory-mapped on load, like the search index:
+
+- `HashIndex` (equality): distinct keys with their rows grouped in CSR form
+  (`keys`, `offsets`, `rows`), plus a hash table in the same form: the keys'
+  positions grouped by hash bucket (`slots`, delimited by `buckets`).
+  Building it is one argsort of the buckets; a lookup hashes the key and compares
+  it with the one or two keys in its bucket: O(1), whatever the table size.
+- `SortedIndex` (time ranges): the column's instants, normalised to UTC and sorted,
+  with the row each came from.
+  A range is two binary searches and a contiguous slice: O(log n + matches).
+
+Hashes are CRC-32 of the UTF-8 key, so an index built by one process (or Python
+version) is valid in every other.
+"""
+
+from __future__ import annotations
+
+import shutil
+import zlib
+from abc import ABC, abstractmethod
+from datetime import UTC
+from typing import TYPE_CHECKING
+
+import numpy as np
+import polars as pl
+
+from . import timeutil
+
+if TYPE_CHECKING:
+    from datetime import datetime
+    from pathlib import Path
+
+
+def key_hash(key: str) -> int:
+    """Stable hash of a key (unlike `hash`, the same in every process).
+
+    >>> key_hash("ops@example.com") == key_hash("ops@example.com")
+    True
+    """
+    return zlib.crc32(key.encode())
+
+
+class ArrayIndex(ABC):
+    """Named NumPy arrays saved together under `root`, memory-mapped on load.
+
+    Subclasses name their arrays in `names` and say what an unbuilt index holds.
+    """
+
+    names: tuple[str, ...] = ()
+
+    def __init__(self, root: Path) -> None:
+        """Open (or prepare) the index stored under `root`."""
+        self.root = root
+        self._arrays: dict[str, np.ndarray] | None = None
+
+    def exists(self) -> bool:
+        """Whether the index has been built."""
+        return all((self.root / f"{name}.npy").exists() for name in self.names)
+
+    @property
+    def arrays(self) -> dict[str, np.ndarray]:
+        """The index's arrays (memory-mapped; empty before it is built)."""
+        if self._arrays is None:
+            if self.exists():
+                self._arrays = {
+                    name: np.load(self.root / f"{name}.npy", mmap_mode="r")
+                    for name in self.names
+                }
+            else:
+                self._arrays = self.empty()
+        return self._arrays
+
+    @abstractmethod
+    def empty(self) -> dict[str, np.ndarray]:
+        """Return the arrays served before the index is built."""
+
+    def _save(self, arrays: dict[str, np.ndarray]) -> None:
+        """Write all arrays to a fresh directory and swap it in."""
+        tmp = self.root.with_name(self.root.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        for name, array in arrays.items():
+            np.save(tmp / f"{name}.npy", array)
+        self._arrays = None  # drop maps of the old files before replacing them
+        shutil.rmtree(self.root, ignore_errors=True)
+        tmp.rename(self.root)
+
+
+class HashIndex(ArrayIndex):
+    """Equality index: key -> row ids, in O(1) per key."""
+
+    names = ("keys", "offsets", "rows", "slots", "buckets")
+
+    def build(self, values: pl.Series) -> None:
+        """Index `values` (row id = position); nulls are not indexed."""
+        grouped = (
+            values.cast(pl.Utf8)
+            .to_frame("key")
+            .with_row_index("row")
+            .drop_nulls("key")
+            .group_by("key", maintain_order=True)
+            .agg("row")
+        )
+        keys = grouped["key"].to_numpy().astype(str)
+        counts = grouped["row"].list.len().to_numpy()
+        rows = grouped["row"].explode().to_numpy().astype(np.int64)
+
+        # a power-of-two number of buckets, about one key each
+        n_buckets = max(8, 1 << len(keys).bit_length())
+        hashes = np.fromiter(
+            (key_hash(key) for key in keys.tolist()), dtype=np.int64, count=len(keys)
+        )
+        bucket = hashes & (n_buckets - 1)
+        self._save(
+            {
+                "keys": keys,
+                "offsets": _offsets(counts),
+                "rows": rows,
+                "slots": np.argsort(bucket, kind="stable").astype(np.int64),
+                "buckets": _offsets(np.bincount(bucket, minlength=n_buckets)),
+            }
+        )
+
+    def lookup(self, key: str) -> np.ndarray:
+        """Return the row ids holding `key` (empty if none)."""
+        arrays = self.arrays
+        keys, buckets = arrays["keys"], arrays["buckets"]
+        bucket = key_hash(key) & (len(buckets) - 2)  # n_buckets - 1
+        for position in arrays["slots"][buckets[bucket] : buckets[bucket + 1]]:
+            if keys[position] == key:
+                offsets = arrays["offsets"]
+                return np.asarray(
+                    arrays["rows"][offsets[position] : offsets[position + 1]]
+                )
+        return np.array([], dtype=np.int64)
+
+    def lookup_many(self, keys: list[str]) -> np.ndarray:
+        """Return the (sorted, distinct) row ids holding any of `keys`."""
+        found = [self.lookup(key) for key in keys]
+        return np.unique(np.concatenate([np.array([], dtype=np.int64), *found]))
+
+    def empty(self) -> dict[str, np.ndarray]:
+        """Return an index with no keys."""
+        return {
+            "keys": np.array([], dtype=str),
+            "offsets": np.zeros(1, dtype=np.int64),
+            "rows": np.array([], dtype=np.int64),
+            "slots": np.array([], dtype=np.int64),
+            "buckets": np.zeros(9, dtype=np.int64),
+        }
+
+
+class SortedIndex(ArrayIndex):
+    """Range index: rows whose timestamp lies in `[low, high)`, by binary search.
+
+    Values are normalised to UTC (`timeutil.column_to_utc`) before sorting, so
+    timestamps written with different UTC offsets (or none) order as instants.
+    """
+
+    names = ("instants", "rows")
+
+    def build(self, values: pl.Series) -> None:
+        """Index `values` (row id = position); nulls are not indexed."""
+        frame = values.to_frame("value")
+        ordered = (
+            frame.select(timeutil.column_to_utc(frame, "value"))
+            .with_row_index("row")
+            .drop_nulls("value")
+            .sort("value", "row")
+        )
+        self._save(
+            {
+                "instants": _naive_utc(ordered["value"]),
+                "rows": ordered["row"].to_numpy().astype(np.int64),
+            }
+        )
+
+    def between(
+        self, low: str | datetime | None = None, high: str | datetime | None = None
+    ) -> np.ndarray:
+        """Return the (sorted) row ids with `low <= value < high`; bounds optional.
+
+        Bounds are ISO-8601 strings (naive ones in UTC) or aware datetimes.
+        """
+        instants = self.arrays["instants"]
+        start = (
+            0 if low is None else int(np.searchsorted(instants, _instant(low), "left"))
+        )
+        stop = (
+            len(instants)
+            if high is None
+            else int(np.searchsorted(instants, _instant(high)))
+        )
+        return np.sort(self.arrays["rows"][start:stop])
+
+    def empty(self) -> dict[str, np.ndarray]:
+        """Return an index with no values."""
+        return {
+            "instants": np.array([], dtype=f"datetime64[{timeutil.TIME_UNIT}]"),
+            "rows": np.array([], dtype=np.int64),
+        }
+
+
+def _offsets(counts: np.ndarray) -> np.ndarray:
+    """Return the CSR offsets delimiting runs of `counts` items."""
+    return np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+
+def _naive_utc(stamps: pl.Series) -> np.ndarray:
+    """Return UTC timestamps as NumPy `datetime64` (which has no time zones)."""
+    return stamps.dt.replace_time_zone(None).to_numpy()
+
+
+def _instant(bound: str | datetime) -> np.datetime64:
+    """Return a range bound as UTC `datetime64`, comparable with the instants."""
+    stamp = timeutil.parse_arg(bound) if isinstance(bound, str) else bound
+    return np.datetime64(
+        stamp.astimezone(UTC).replace(tzinfo=None),
+        timeutil.TIME_UNIT,
+    )
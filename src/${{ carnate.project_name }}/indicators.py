@@ -0,0 +1,393 @@
+"""Rolling indicators of daily prices, maintained incrementally as days are added.
+
+For every ticker the store keeps the indicators' running state: the last
+`window` closes, log returns and traded values, their running sums (and sums
+of squares), and the EMA so far.
+New days are added to the *top* of each `stock_*.csv` (newest first), so an
+update reads the file only down to the last date already processed and folds
+each new row into the state: O(new rows), not O(history).
+
+- `sma`: mean of the last `window` closes.
+- `ema`: exponential moving average of closes, `alpha = 2 / (span + 1)`,
+  seeded with the first close (polars' `ewm_mean(adjust=False)`).
+- `volatility`: sample standard deviation of the last `window` daily log returns.
+- `vwap`: volume-weighted average typical price `(high + low + close) / 3`
+  over the last `window` days (null where any volume in the window is missing,
+  as for indices).
+
+Each indicator is null until its window is full.
+
+Layout under `data/no_sync/indicators/<ticker>/`:
+
+- `state.json`: parameters, the last date and close folded in, and the state.
+- `parts/*.parquet`: append-only indicator rows, one file per update
+  (merged into one once there are more than `COMPACT_PARTS_AFTER`).
+
+If a file's history changes under the state (the close stored for the last
+date no longer matches) or the parameters change, the ticker is recomputed
+from scratch. `verify` recomputes everything with polars' own rolling
+expressions and reports how far the stored rows are from it.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import math
+import shutil
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Any
+
+import polars as pl
+
+from . import paths, schemas, stocks
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+STORE_DIR = paths.NO_SYNC_DIR / "indicators"
+DEFAULT_WINDOW = 20
+DEFAULT_SPAN = 20
+INDICATORS = ("sma", "ema", "volatility", "vwap")
+COMPACT_PARTS_AFTER = 24
+"""Merge a ticker's part files into one once there are more than this many."""
+TOLERANCE = 1e-9
+"""Largest relative difference from a full recompute that `verify` accepts."""
+DATE_FORMAT = "%m/%d/%Y"
+
+SCHEMA = {
+    "Date": pl.Date,
+    "Ticker": pl.Utf8,
+    "Close": pl.Float64,
+    **dict.fromkeys(INDICATORS, pl.Float64),
+}
+
+
+@dataclass
+class State:
+    """Running state of one ticker's indicators, after its latest folded-in day."""
+
+    window: int = DEFAULT_WINDOW
+    span: int = DEFAULT_SPAN
+    rows: int = 0
+    last_date: str | None = None
+    last_close: float | None = None
+    ema: float | None = None
+    closes: deque[float] = field(default_factory=deque)
+    returns: deque[float] = field(default_factory=deque)
+    values: deque[float] = field(default_factory=deque)
+    """Typical price x volume of each day in the window (0 if volume missing)."""
+    volumes: deque[float] = field(default_factory=deque)
+    missing_volumes: int = 0
+    """Days in the window without a volume."""
+    sum_close: float = 0.0
+    sum_return: float = 0.0
+    sum_squared_return: float = 0.0
+    sum_value: float = 0.0
+    sum_volume: float = 0.0
+
+    def add(  # noqa: PLR0913
+        self,
+        day: date,
+        high: float,
+        low: float,
+        close: float,
+        volume: float | None,
+    ) -> dict[str, float | None]:
+        """Fold in the next day; return its indicators.
+
+        >>> state = State(window=2, span=3)
+        >>> state.add(date(2024, 1, 2), 2.0, 1.0, 1.5, 100)["sma"] is None
+        True
+        >>> state.add(date(2024, 1, 3), 3.0, 2.0, 2.5, 100)
+        {'sma': 2.0, 'ema': 2.0, 'volatility': None, 'vwap': 2.0}
+        """
+        self._push(self.closes, close, "sum_close")
+        if self.last_close is not None:
+            change = math.log(close / self.last_close)
+            if len(self.returns) == self.window:
+                oldest = self.returns[0]
+                self.sum_squared_return -= oldest * oldest
+            self.sum_squared_return += change * change
+            self._push(self.returns, change, "sum_return")
+        if len(self.volumes) == self.window and math.isnan(self.volumes[0]):
+            self.missing_volumes -= 1
+        if volume is None:
+            self.missing_volumes += 1
+            self._push(self.values, 0.0, "sum_value")
+            self._push(self.volumes, math.nan, "sum_volume")
+        else:
+            self._push(self.values, (high + low + close) / 3 * volume, "sum_value")
+            self._push(self.volumes, float(volume), "sum_volume")
+        alpha = 2 / (self.span + 1)
+        self.ema = close if self.ema is None else alpha * close + (1 - alpha) * self.ema
+        self.last_close = close
+        self.last_date = day.isoformat()
+        self.rows += 1
+        return self.current()
+
+    def current(self) -> dict[str, float | None]:
+        """Return the indicators as of the latest day."""
+        full = len(self.closes) == self.window
+        volatility = None
+        if len(self.returns) == self.window and self.window > 1:
+            n = self.window
+            variance = (self.sum_squared_return - self.sum_return**2 / n) / (n - 1)
+            volatility = math.sqrt(max(variance, 0.0))
+        vwap = None
+        if full and not self.missing_volumes and self.sum_volume:
+            vwap = self.sum_value / self.sum_volume
+        return {
+            "sma": self.sum_close / self.window if full else None,
+            "ema": self.ema,
+            "volatility": volatility,
+            "vwap": vwap,
+        }
+
+    def _push(self, values: deque[float], value: float, total: str) -> None:
+        """Append to a window, dropping its oldest value from the running sum."""
+        if len(values) == self.window:
+            oldest = values.popleft()
+            if not math.isnan(oldest):
+                setattr(self, total, getattr(self, total) - oldest)
+        values.append(value)
+        if not math.isnan(value):
+            setattr(self, total, getattr(self, total) + value)
+
+    def to_json(self) -> str:
+        """Serialise the state (NaN, for missing volumes, as null)."""
+        state = asdict(self)
+        state["volumes"] = [None if math.isnan(v) else v for v in self.volumes]
+        for name in ("closes", "returns", "values"):
+            state[name] = list(state[name])
+        return json.dumps(state)
+
+    @classmethod
+    def from_json(cls, text: str) -> State:
+        """Load a state saved with `to_json`."""
+        state: dict[str, Any] = json.loads(text)
+        for name in ("closes", "returns", "values"):
+            state[name] = deque(state[name])
+        state["volumes"] = deque(math.nan if v is None else v for v in state["volumes"])
+        return cls(**state)
+
+
+@dataclass
+class UpdateResult:
+    """What one update did to a ticker's indicators."""
+
+    ticker: str
+    new_rows: int = 0
+    rows: int = 0
+    recomputed: bool = False
+    last_date: str | None = None
+
+
+def ticker_of(path: Path) -> str:
+    """Return the ticker a stocks file holds.
+
+    >>> from pathlib import Path
+    >>> ticker_of(Path("data/stocks/stock_pagerduty.csv"))
+    'pagerduty'
+    """
+    return path.stem.removeprefix("stock_")
+
+
+def read_since(path: Path, since: date | None = None) -> pl.DataFrame:
+    """Return the rows of a newest-first stocks file from `since` on, oldest first.
+
+    The file is read only down to the first line dated `since` or earlier;
+    that line is kept, so `update` can check it still matches the state.
+    """
+    lines = []
+    with path.open(newline="") as file:
+        header = file.readline()
+        for line in file:
+            if not line.strip():
+                continue
+            if since is not None:
+                stamp = datetime.strptime(line.split(",", 1)[0], DATE_FORMAT)  # noqa: DTZ007 -- a calendar date
+                day = stamp.date()
+                if day <= since:
+                    lines.append(line)  # the last day already folded in
+                    break
+            lines.append(line)
+    schema = schemas.schema_for(path) or schemas.SCHEMAS["stocks"]
+    columns = next(csv.reader([header]))
+    frame = pl.read_csv(
+        io.StringIO(header + "".join(lines)),
+        schema_overrides={c: t for c, t in schema.dtypes.items() if c in columns},
+    )
+    if schema.transforms is not None:
+        frame = frame.with_columns(schema.transforms(path, columns))
+    return frame.reverse()
+
+
+class IndicatorStore:
+    """Per-ticker indicator rows and the running state that extends them."""
+
+    def __init__(self, root: Path = STORE_DIR) -> None:
+        """Open (or prepare) the store rooted at `root`."""
+        self.root = root
+
+    def state_path(self, ticker: str) -> Path:
+        """Where a ticker's running state is kept."""
+        return self.root / ticker / "state.json"
+
+    def parts_dir(self, ticker: str) -> Path:
+        """Where a ticker's indicator rows are kept."""
+        return self.root / ticker / "parts"
+
+    def state(self, ticker: str) -> State | None:
+        """Return a ticker's running state, if it has been computed."""
+        path = self.state_path(ticker)
+        return State.from_json(path.read_text()) if path.exists() else None
+
+    def history(self, ticker: str) -> pl.DataFrame:
+        """Return every stored indicator row of a ticker, oldest first."""
+        parts = sorted(self.parts_dir(ticker).glob("*.parquet"))
+        if not parts:
+            return pl.DataFrame(schema=SCHEMA)
+        return pl.concat([pl.read_parquet(part) for part in parts]).sort("Date")
+
+    def update(
+        self,
+        path: Path,
+        *,
+        window: int = DEFAULT_WINDOW,
+        span: int = DEFAULT_SPAN,
+        full: bool = False,
+    ) -> UpdateResult:
+        """Fold a stocks file's new days into its ticker's indicators.
+
+        Recomputes from scratch when asked (`full`), on first sight, when the
+        parameters changed, or when the file no longer agrees with the state.
+        """
+        ticker = ticker_of(path)
+        state = None if full else self.state(ticker)
+        if state is not None and (state.window, state.span) != (window, span):
+            state = None
+        since = (
+            date.fromisoformat(state.last_date) if state and state.last_date else None
+        )
+        frame = read_since(path, since)
+        if since is not None:
+            known = frame.filter(pl.col("Date") == since)
+            if known.is_empty() or not math.isclose(
+                known["Close"][0], state.last_close, rel_tol=1e-12
+            ):
+                state, since = None, None  # history changed under us
+                frame = read_since(path)
+            frame = frame.filter(pl.col("Date") > since) if since else frame
+        recomputed = state is None
+        if recomputed:
+            state = State(window=window, span=span)
+            shutil.rmtree(self.parts_dir(ticker), ignore_errors=True)
+        rows = [
+            {"Date": day, "Ticker": ticker, "Close": close}
+            | state.add(day, high, low, close, volume)
+            for day, high, low, close, volume in frame.select(
+                "Date", "High", "Low", "Close", "Volume"
+            ).iter_rows()
+        ]
+        if rows:
+            self._append(ticker, pl.DataFrame(rows, schema=SCHEMA))
+        self._save_state(ticker, state)
+        return UpdateResult(
+            ticker=ticker,
+            new_rows=len(rows),
+            rows=state.rows,
+            recomputed=recomputed,
+            last_date=state.last_date,
+        )
+
+    def update_all(
+        self,
+        data_dir: Path = stocks.STOCKS_DIR,
+        *,
+        window: int = DEFAULT_WINDOW,
+        span: int = DEFAULT_SPAN,
+        full: bool = False,
+    ) -> list[UpdateResult]:
+        """Update every ticker in `data_dir`."""
+        return [
+            self.update(path, window=window, span=span, full=full)
+            for path in sorted(data_dir.glob(stocks.PATTERN))
+        ]
+
+    def verify(self, path: Path) -> dict[str, float]:
+        """Return, per indicator, the largest relative gap to a full recompute.
+
+        Missing rows, or a value null on one side only, count as `inf`.
+        """
+        ticker = ticker_of(path)
+        state = self.state(ticker)
+        if state is None:
+            return dict.fromkeys(INDICATORS, math.inf)
+        expected = recompute(schemas.scan(path).collect(), state.window, state.span)
+        stored = self.history(ticker)
+        if stored.height != expected.height:
+            return dict.fromkeys(INDICATORS, math.inf)
+        joined = expected.join(
+            stored, on="Date", how="left", suffix="_stored", coalesce=True
+        )
+        gaps = {}
+        for name in INDICATORS:
+            want, got = joined[name], joined[f"{name}_stored"]
+            if (want.is_null() != got.is_null()).any():
+                gaps[name] = math.inf
+                continue
+            scale = want.abs().clip(lower_bound=1e-12)
+            gap = ((want - got).abs() / scale).max()
+            gaps[name] = float(gap) if gap is not None else 0.0
+        return gaps
+
+    def _append(self, ticker: str, rows: pl.DataFrame) -> None:
+        parts_dir = self.parts_dir(ticker)
+        parts_dir.mkdir(parents=True, exist_ok=True)
+        last = rows["Date"].max()
+        rows.write_parquet(parts_dir / f"{last:%Y%m%d}.parquet")
+        parts = sorted(parts_dir.glob("*.parquet"))
+        if len(parts) > COMPACT_PARTS_AFTER:
+            merged = pl.concat([pl.read_parquet(part) for part in parts])
+            # named after the newest part so files keep sorting chronologically
+            tmp = parts_dir / "compacting.tmp"
+            merged.write_parquet(tmp)
+            for part in parts:
+                part.unlink()
+            tmp.replace(parts[-1])
+
+    def _save_state(self, ticker: str, state: State) -> None:
+        path = self.state_path(ticker)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(state.to_json())
+        tmp.replace(path)
+
+
+def recompute(
+    frame: pl.DataFrame, window: int = DEFAULT_WINDOW, span: int = DEFAULT_SPAN
+) -> pl.DataFrame:
+    """Compute every indicator over a whole (schema-cleaned) stocks frame at once."""
+    typical = (pl.col("High") + pl.col("Low") + pl.col("Close")) / 3
+    volume = pl.col("Volume").cast(pl.Float64)
+    return (
+        frame.sort("Date")
+        .select(
+            "Date",
+            "Ticker",
+            "Close",
+            pl.col("Close").rolling_mean(window).alias("sma"),
+            pl.col("Close")
+            .ewm_mean(span=span, adjust=False, ignore_nulls=False)
+            .alias("ema"),
+            pl.col("Close").log().diff().rolling_std(window).alias("volatility"),
+            ((typical * volume).rolling_sum(window) / volume.rolling_sum(window)).alias(
+                "vwap"
+            ),
+        )
+        .cast(SCHEMA)
+    )
@@ -0,0 +1,241 @@
+"""Convert a directory of CSV drops into a partitioned Parquet layout.
+
+Files are converted in parallel worker *processes*, each streaming its file through
+polars' streaming engine so a worker only ever holds about `chunk_rows` rows,
+however large the file.
+The output is partitioned by dataset (hive-style, so `pl.scan_parquet` can read a
+whole dataset with a glob and filter on `dataset`):
+
+    <out>/dataset=stocks/stock_zoom.parquet
+    <out>/dataset=penguins/penguins.parquet
+    <out>/dataset=stocks/stock_zoom-<hash of its directory>.parquet  (from a subdirectory)
+
+Row groups are written with min/max statistics so later scans can skip them.
+
+Runs are resumable: each finished file is recorded in a manifest alongside the
+output, keyed by the source's size and modification time.
+Outputs are written to a temporary name and renamed into place,
+so an interrupted run never leaves a half-written file that looks finished.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING
+
+import polars as pl
+
+from . import memory, schemas
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from pathlib import Path
+
+MANIFEST_NAME = "_ingest_manifest.json"
+DEFAULT_CHUNK_ROWS = 50_000
+DEFAULT_ROW_GROUP_ROWS = 128 * 1024
+
+
+@dataclass(frozen=True)
+class IngestResult:
+    """Outcome of converting (or skipping) one source file."""
+
+    source: str
+    output: str
+    status: str  # "converted" | "skipped" | "failed"
+    rows: int | None = None
+    error: str | None = None
+
+
+def discover(root: Path, pattern: str = "*.csv") -> list[Path]:
+    """Return every file under `root` matching `pattern`, largest first.
+
+    (Largest first so the longest conversions start early and don't trail the run.)
+    """
+    files = [p for p in root.rglob(pattern) if p.is_file()]
+    return sorted(files, key=lambda p: p.stat().st_size, reverse=True)
+
+
+def output_path(source: Path, out_dir: Path, root: Path | None = None) -> Path:
+    """Where `source` (found under `root`) lands in the partitioned layout.
+
+    Files in subdirectories of `root` get a hash of their directory in the
+    name, so same-named files from different directories don't collide.
+
+    >>> from pathlib import Path
+    >>> output_path(Path("data/stocks/stock_zoom.csv"), Path("out")).as_posix()
+    'out/dataset=stocks/stock_zoom.parquet'
+    >>> output_path(Path("in/2024/stock_zoom.csv"), Path("out"), Path("in")).name
+    'stock_zoom-6557739a.parquet'
+    """
+    dataset = schemas.dataset_name(source)
+    name = source.stem
+    if root is not None and source.parent != root:
+        directory = source.parent.relative_to(root).as_posix()
+        name += f"-{hashlib.sha256(directory.encode()).hexdigest()[:8]}"
+    return out_dir / f"dataset={dataset}" / f"{name}.parquet"
+
+
+def ingest_dir(  # noqa: PLR0913
+    root: Path,
+    out_dir: Path,
+    *,
+    pattern: str = "*.csv",
+    workers: int | None = None,
+    chunk_rows: int | None = None,
+    row_group_rows: int = DEFAULT_ROW_GROUP_ROWS,
+    force: bool = False,
+    on_result: Callable[[IngestResult], None] | None = None,
+) -> list[IngestResult]:
+    """Convert every matching file under `root` into Parquet under `out_dir`.
+
+    Files already recorded in the manifest with an unchanged size and mtime
+    (and whose output still exists) are skipped unless `force` is set.
+    `on_result` is called in the parent process as each file finishes.
+    `chunk_rows` defaults to `DEFAULT_CHUNK_ROWS`, or under a memory budget to
+    what fits the budget's slice for the widest rows among the files.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = _Manifest(out_dir / MANIFEST_NAME)
+    results: list[IngestResult] = []
+
+    def record(result: IngestResult) -> None:
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    pending: list[tuple[Path, Path]] = []
+    for source in discover(root, pattern):
+        dest = output_path(source, out_dir, root)
+        if not force and manifest.is_current(source, dest):
+            record(IngestResult(str(source), str(dest), "skipped"))
+        else:
+            pending.append((source, dest))
+    if not pending:
+        return results
+
+    if chunk_rows is None:
+        widest = max(memory.row_bytes(source) for source, _ in pending)
+        chunk_rows = memory.chunk_rows(widest, default=DEFAULT_CHUNK_ROWS)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pending)))
+    # one polars thread pool per worker process; divide the cores between them
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    with (
+        _environ(POLARS_MAX_THREADS=str(threads)),
+        ProcessPoolExecutor(
+            max_workers=workers,
+            # polars' thread pool does not survive `fork`
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(chunk_rows,),
+        ) as pool,
+    ):
+        futures: dict[Future[int], tuple[Path, Path]] = {
+            pool.submit(convert, source, dest, row_group_rows): (source, dest)
+            for source, dest in pending
+        }
+        for future in as_completed(futures):
+            source, dest = futures[future]
+            try:
+                rows = future.result()
+            except Exception as err:  # noqa: BLE001 -- one bad file shouldn't stop the run
+                record(IngestResult(str(source), str(dest), "failed", error=str(err)))
+                continue
+            manifest.mark_done(source, dest, rows)
+            record(IngestResult(str(source), str(dest), "converted", rows=rows))
+    return results
+
+
+def convert(
+    source: Path, dest: Path, row_group_rows: int = DEFAULT_ROW_GROUP_ROWS
+) -> int:
+    """Convert one CSV to Parquet, streaming; return the number of rows written."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_suffix(".parquet.tmp")
+    frame = schemas.scan(source)
+    try:
+        frame.sink_parquet(tmp, statistics=True, row_group_size=row_group_rows)
+    except pl.InvalidOperationError:
+        # not every plan is supported by the streaming sink; fall back to a
+        # streaming collect, which still bounds memory for the scan itself
+        frame.collect(streaming=True).write_parquet(
+            tmp, statistics=True, row_group_size=row_group_rows
+        )
+    rows = pl.scan_parquet(tmp).select(pl.len()).collect().item()
+    tmp.replace(dest)
+    return rows
+
+
+def _init_worker(chunk_rows: int) -> None:
+    """Bound how many rows each streaming batch in this worker holds."""
+    pl.Config.set_streaming_chunk_size(chunk_rows)
+
+
+@contextmanager
+def _environ(**values: str) -> Iterator[None]:
+    """Temporarily set environment variables (inherited by spawned workers)."""
+    previous = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+class _Manifest:
+    """Record of which sources have been converted, and from which version of them."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.entries: dict[str, dict[str, str | int]] = (
+            json.loads(path.read_text()) if path.exists() else {}
+        )
+
+    @staticmethod
+    def _stamp(source: Path) -> dict[str, str | int]:
+        stat = source.stat()
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def is_current(self, source: Path, dest: Path) -> bool:
+        entry = self.entries.get(str(source))
+        return (
+            entry is not None
+            and dest.exists()
+            and entry.get("output") == str(dest)
+            and all(entry.get(k) == v for k, v in self._stamp(source).items())
+        )
+
+    def mark_done(self, source: Path, dest: Path, rows: int) -> None:
+        self.entries[str(source)] = {
+            **self._stamp(source),
+            "output": str(dest),
+            "rows": rows,
+        }
+        # rewrite atomically after every file so an interruption loses at most one
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.entries, indent=2, sort_keys=True))
+        tmp.replace(self.path)
+
+
+def summarize(results: list[IngestResult]) -> pl.DataFrame:
+    """Tabulate ingest results (one row per file)."""
+    return pl.DataFrame(
+        [asdict(r) for r in results],
+        schema={
+            "source": pl.Utf8,
+            "output": pl.Utf8,
+            "status": pl.Utf8,
+            "rows": pl.Int64,
+            "error": pl.Utf8,
+        },
+    )
@@ -0,0 +1,380 @@
+"""Run many jobs at once: shell commands and registered Python tasks.
+
+A job spec is either a shell command (`"just jups"`) or `@<name>` for a Python
+task registered here (`@catalog:penguins`, `@ingest`; see `tasks`).
+Jobs run on a bounded pool of `workers` threads.
+Each shell command is its own subprocess; Python tasks run in the worker thread,
+or, with `processes=True`, in their own (spawned) process, which lets them use
+another core and be killed.
+
+On Ctrl-C, jobs not yet started are cancelled and running subprocesses and
+task processes are terminated; Python tasks running in threads can't be
+interrupted, so they finish first.
+Each job's output is captured (so it can't garble the progress display)
+and the tail of it kept for jobs that fail, traceback included.
+Task processes write theirs to a temporary file; tasks in threads write to
+`sys.stdout` / `sys.stderr`, which route each thread's writes to its own buffer
+while jobs run (output written straight to the file descriptors isn't caught).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import io
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any
+
+import polars as pl
+
+from . import catalog, ingest, paths, progress
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from multiprocessing.process import BaseProcess
+
+TASK_PREFIX = "@"
+OUTPUT_TAIL_LINES = 20
+_SHELL_OPTIONS: dict[str, Any] = {
+    "stdout": subprocess.PIPE,
+    "stderr": subprocess.STDOUT,
+    "stdin": subprocess.DEVNULL,
+    "text": True,
+    "start_new_session": True,  # Ctrl-C is ours to handle, see `cancel`
+}
+
+
+@dataclass(frozen=True)
+class PythonTask:
+    """A named Python callable that can be run as a job."""
+
+    name: str
+    func: Callable[[], Any]
+    description: str = ""
+
+
+TASKS: dict[str, PythonTask] = {}
+"""Python tasks registered by name (see `register`; and `tasks` for all of them)."""
+CATALOG_TASK_PREFIX = "catalog:"
+
+
+def register(task: PythonTask) -> PythonTask:
+    """Add (or replace) a Python task."""
+    TASKS[task.name] = task
+    return task
+
+
+def tasks() -> dict[str, PythonTask]:
+    """Return every task jobs can refer to as `@<name>`.
+
+    That is one `catalog:<name>` task per dataset in the catalog as it is now
+    (modules register datasets as they're imported), plus the `TASKS` registry.
+    """
+    rebuilds = {
+        f"{CATALOG_TASK_PREFIX}{name}": PythonTask(
+            f"{CATALOG_TASK_PREFIX}{name}",
+            functools.partial(catalog.build, name),
+            description=f"Rebuild the catalog's {dataset.description or name}",
+        )
+        for name, dataset in catalog.DATASETS.items()
+    }
+    return rebuilds | TASKS
+
+
+register(
+    PythonTask(
+        "ingest",
+        functools.partial(
+            ingest.ingest_dir, paths.DATA_DIR, paths.NO_SYNC_DIR / "parquet", workers=1
+        ),
+        description="Convert the data directory's CSVs to Parquet",
+    )
+)
+
+
+@dataclass(frozen=True)
+class Job:
+    """One job to run: a shell command, or a registered Python task."""
+
+    spec: str
+
+    @property
+    def task(self) -> PythonTask | None:
+        """The Python task this job runs, if it is one."""
+        if not self.spec.startswith(TASK_PREFIX):
+            return None
+        name = self.spec.removeprefix(TASK_PREFIX)
+        known = tasks()
+        if name not in known:
+            msg = f"Unknown task {name!r}; known tasks: {', '.join(sorted(known))}"
+            raise KeyError(msg)
+        return known[name]
+
+
+@dataclass
+class JobResult:
+    """How one job went."""
+
+    job: str
+    status: str  # "ok" | "failed" | "cancelled"
+    returncode: int | None = None
+    started_s: float | None = None
+    """Seconds after the run started that this job started."""
+    seconds: float = 0.0
+    output: str = ""
+    """Tail of the job's output (failed jobs only)."""
+
+
+def parse_jobs(specs: list[str]) -> list[Job]:
+    """Return jobs for `specs`, checking every `@task` exists before any run."""
+    jobs = [Job(spec.strip()) for spec in specs if spec.strip()]
+    for job in jobs:
+        _ = job.task
+    return jobs
+
+
+def _tail(text: str) -> str:
+    return "\n".join(text.rstrip().splitlines()[-OUTPUT_TAIL_LINES:])
+
+
+def _run_in_process(func: Callable[[], Any], output: str) -> None:
+    """Run `func` with stdout and stderr (the descriptors, so children's too) in `output`.
+
+    An exception's traceback is printed to stderr by `multiprocessing` itself.
+    """
+    with Path(output).open("w") as file:
+        os.dup2(file.fileno(), 1)
+        os.dup2(file.fileno(), 2)
+    func()
+
+
+_capture = threading.local()
+"""`buffer`: where the current thread's writes to stdout / stderr go, if set."""
+
+
+class _Routed:
+    """Stand-in for stdout / stderr: capturing threads write to their buffer."""
+
+    def __init__(self, stream: IO[str]) -> None:
+        self.stream = stream
+
+    def _target(self) -> IO[str]:
+        buffer = getattr(_capture, "buffer", None)
+        return self.stream if buffer is None else buffer
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def isatty(self) -> bool:
+        return self._target().isatty()
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        return getattr(self.stream, name)
+
+
+@contextlib.contextmanager
+def _routed_output() -> Iterator[None]:
+    """Let threads capture their own stdout / stderr for the `with` block."""
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = _Routed(stdout), _Routed(stderr)
+    try:
+        yield
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+
+
+class Runner:
+    """Runs jobs on a bounded pool; `cancel` stops them from any thread."""
+
+    def __init__(
+        self,
+        workers: int = 4,
+        *,
+        processes: bool = False,
+        reporter: progress.Reporter | None = None,
+    ) -> None:
+        """Run up to `workers` jobs at a time (Python tasks in processes, optionally)."""
+        self.workers = workers
+        self.processes = processes
+        self.reporter = reporter
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._running: set[subprocess.Popen[str] | BaseProcess] = set()
+
+    def run(self, jobs: list[Job]) -> list[JobResult]:
+        """Run every job; return their results in job order.
+
+        Ctrl-C while waiting cancels the rest (see the module docstring); their
+        results say so, and `cancelled` is set.
+        """
+        started = time.perf_counter()
+        with _routed_output(), ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures: list[Future[JobResult]] = [
+                pool.submit(self._run_one, job, started) for job in jobs
+            ]
+            try:
+                wait(futures)
+            except KeyboardInterrupt:
+                self.cancel()
+                wait(futures)
+        return [
+            future.result()
+            if not future.cancelled()
+            else JobResult(job.spec, "cancelled")
+            for job, future in zip(jobs, futures, strict=True)
+        ]
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the run was cancelled."""
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """Cancel jobs not yet started and terminate the running ones that can be."""
+        self._cancelled.set()
+        with self._lock:
+            running = list(self._running)
+        for handle in running:
+            if isinstance(handle, subprocess.Popen):
+                # the whole session: the shell *and* whatever it started
+                with contextlib.suppress(ProcessLookupError):
+                    os.killpg(handle.pid, signal.SIGTERM)
+            else:
+                handle.terminate()
+
+    def _run_one(self, job: Job, run_started: float) -> JobResult:
+        if self._cancelled.is_set():
+            return JobResult(job.spec, "cancelled")
+        tracker = (
+            self.reporter.task(job.spec, total=1, unit="job")
+            if self.reporter is not None
+            else None
+        )
+        started = time.perf_counter()
+        returncode, output = (
+            self._shell(job.spec) if job.task is None else self._python(job.task)
+        )
+        seconds = time.perf_counter() - started
+        if tracker is not None:
+            tracker.advance()
+            tracker.finish()
+        if returncode == 0:
+            status = "ok"
+        elif self._cancelled.is_set():
+            status = "cancelled"
+        else:
+            status = "failed"
+        return JobResult(
+            job=job.spec,
+            status=status,
+            returncode=returncode,
+            started_s=started - run_started,
+            seconds=seconds,
+            output=_tail(output) if status == "failed" else "",
+        )
+
+    def _shell(self, command: str) -> tuple[int, str]:
+        process = subprocess.Popen(command, shell=True, **_SHELL_OPTIONS)  # noqa: S602 -- running shell commands is the point
+        with self._lock:
+            self._running.add(process)
+        try:
+            output, _ = process.communicate()
+        finally:
+            with self._lock:
+                self._running.discard(process)
+        return process.returncode, output
+
+    def _python(self, task: PythonTask) -> tuple[int, str]:
+        if not self.processes:
+            return self._python_in_thread(task)
+        with tempfile.NamedTemporaryFile("r", suffix=".log") as output:
+            process = multiprocessing.get_context("spawn").Process(
+                target=_run_in_process, args=(task.func, output.name), name=task.name
+            )
+            with self._lock:
+                if self._cancelled.is_set():
+                    return 1, ""
+                try:
+                    process.start()
+                except Exception:  # noqa: BLE001 -- a task that can't be pickled, say
+                    return 1, traceback.format_exc()
+                self._running.add(process)
+            try:
+                process.join()
+            finally:
+                with self._lock:
+                    self._running.discard(process)
+            text = output.read()
+        code = process.exitcode or 0
+        if code == 0:
+            return 0, text
+        return code, f"{text.rstrip()}\nprocess exited with {code}".lstrip()
+
+    @staticmethod
+    def _python_in_thread(task: PythonTask) -> tuple[int, str]:
+        _capture.buffer = buffer = io.StringIO()
+        try:
+            task.func()
+        except SystemExit as err:  # exits with its status, as the process would
+            code = err.code if isinstance(err.code, int) else int(err.code is not None)
+            if code:
+                traceback.print_exc(file=buffer)
+            return code, buffer.getvalue()
+        except Exception:  # noqa: BLE001 -- reported as the job's failure
+            traceback.print_exc(file=buffer)
+            return 1, buffer.getvalue()
+        finally:
+            _capture.buffer = None
+        return 0, buffer.getvalue()
+
+
+def run(
+    specs: list[str],
+    workers: int = 4,
+    *,
+    processes: bool = False,
+    reporter: progress.Reporter | None = None,
+) -> list[JobResult]:
+    """Run `specs` (see the module docstring) concurrently; return their results."""
+    return Runner(workers, processes=processes, reporter=reporter).run(
+        parse_jobs(specs)
+    )
+
+
+def timings(results: list[JobResult]) -> pl.DataFrame:
+    """Return one row per job: status, exit code, start offset and duration."""
+    return pl.DataFrame(
+        [
+            {
+                "job": result.job,
+                "status": result.status,
+                "exit": result.returncode,
+                "started_s": None
+                if result.started_s is None
+                else round(result.started_s, 2),
+                "seconds": round(result.seconds, 2),
+            }
+            for result in results
+        ],
+        schema={
+            "job": pl.Utf8,
+            "status": pl.Utf8,
+            "exit": pl.Int64,
+            "started_s": pl.Float64,
+            "seconds": pl.Float64,
+        },
+    )
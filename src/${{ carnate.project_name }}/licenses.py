@@ -0,0 +1,125 @@
+"""License utilisation, from a stored PagerDuty snapshot.
+
+`license_allocations` records hold nested `license` and `user` objects
+(stored as struct columns); `licenses` hold each license's remaining capacity
+(`allocations_available`, null when unlimited) and `users` the people themselves.
+Everything here is one lazy polars plan: struct fields are pulled out as
+expressions, the three endpoints are joined on their ids, and nothing is
+processed a row at a time in Python, so 100k-seat accounts stay fast.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import polars as pl
+
+from . import pagerduty
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+USER_FIELDS = ("id", "name", "email", "role")
+LICENSE_FIELDS = ("id", "name", "role_group")
+
+
+def latest_snapshot(root: Path = pagerduty.SNAPSHOT_DIR) -> Path | None:
+    """Return the most recent snapshot directory, if any."""
+    snapshots = pagerduty.list_snapshots(root)
+    return snapshots[-1] if snapshots else None
+
+
+def _scan(snapshot: Path, endpoint: str) -> pl.LazyFrame:
+    return pl.scan_parquet(snapshot / f"{endpoint}.parquet")
+
+
+def _present(frame: pl.LazyFrame, columns: tuple[str, ...]) -> list[str]:
+    """Return the `columns` that `frame` has (API objects omit empty fields)."""
+    schema = frame.schema
+    return [c for c in columns if c in schema]
+
+
+def _struct_fields(
+    frame: pl.LazyFrame, column: str, fields: tuple[str, ...]
+) -> list[pl.Expr]:
+    """Pull `fields` out of struct `column` as `<column>_<field>` columns."""
+    dtype = frame.schema[column]
+    present = {f.name for f in dtype.fields} if isinstance(dtype, pl.Struct) else set()
+    return [
+        pl.col(column).struct.field(f).alias(f"{column}_{f}")
+        if f in present
+        else pl.lit(None, pl.Utf8).alias(f"{column}_{f}")
+        for f in fields
+    ]
+
+
+def allocations(snapshot: Path) -> pl.LazyFrame:
+    """Return one row per allocation, with its license and user details as columns.
+
+    Users missing from the `users` pull (e.g. deactivated since) keep null details.
+    """
+    allocs = _scan(snapshot, "license_allocations")
+    flat = allocs.select(
+        "account",
+        *_struct_fields(allocs, "license", LICENSE_FIELDS),
+        *_struct_fields(allocs, "user", ("id", "summary")),
+        *_present(allocs, ("allocated_at",)),
+    )
+    users_path = snapshot / "users.parquet"
+    if not users_path.exists():
+        return flat
+    users = _scan(snapshot, "users")
+    user_columns = _present(users, USER_FIELDS)
+    return flat.join(
+        users.select(
+            "account",
+            *(pl.col(c).alias(f"user_{c}") for c in user_columns if c != "id"),
+            pl.col("id").alias("user_id"),
+        ),
+        on=["account", "user_id"],
+        how="left",
+        coalesce=True,
+    )
+
+
+def report(snapshot: Path) -> pl.LazyFrame:
+    """Utilisation per account and license type.
+
+    `allocated` counts allocations in the snapshot; `capacity` adds what's still
+    available (null for unlimited licenses), and `utilisation` is their ratio.
+    """
+    used = (
+        allocations(snapshot)
+        .group_by("account", "license_id")
+        .agg(
+            pl.len().alias("allocated"),
+            pl.col("user_id").n_unique().alias("users"),
+        )
+    )
+    licenses_path = snapshot / "licenses.parquet"
+    if not licenses_path.exists():
+        return used.sort("account", "license_id")
+    licenses = _scan(snapshot, "licenses")
+    available = (
+        pl.col("allocations_available").cast(pl.Int64)
+        if "allocations_available" in licenses.schema
+        else pl.lit(None, pl.Int64)
+    )
+    return (
+        licenses.select(
+            "account",
+            pl.col("id").alias("license_id"),
+            *(
+                pl.col(c).alias(f"license_{c}")
+                for c in _present(licenses, ("name", "role_group"))
+            ),
+            available.alias("available"),
+        )
+        .join(used, on=["account", "license_id"], how="full", coalesce=True)
+        .with_columns(pl.col("allocated", "users").fill_null(0))
+        .with_columns((pl.col("allocated") + pl.col("available")).alias("capacity"))
+        .with_columns(
+            (pl.col("allocated") / pl.col("capacity")).round(3).alias("utilisation")
+        )
+        .sort("account", "utilisation", descending=[False, True], nulls_last=True)
+    )
@@ -0,0 +1,226 @@
+"""Load-test the API client code against the local mock API (`mockserver`).
+
+Pages of one endpoint are fetched by `concurrency` workers through the same
+`api.make_client` / `api.get_json` path the real pulls use (pooling, rate budget,
+429 retries), and every request's latency is recorded.
+Hedged requests are real requests too: the transport counts every response
+that comes back, including the losers of a hedge that weren't cancelled in time.
+Records are counted and dropped, so what's measured is the client, not a pile of
+results.
+
+By default the mock server runs in its own process, so the reported peak memory
+is the client's alone.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import socket
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import httpx
+import numpy as np
+
+from . import api, memory, mockserver, pagerduty, progress
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+STARTUP_TIMEOUT_S = 10.0
+
+
+@dataclass
+class LoadResult:
+    """Throughput and latency of one load test."""
+
+    endpoint: str
+    pages: int
+    records: int
+    requests: int
+    rate_limited: int
+    hedged: int
+    """Pages that also sent a hedge request (see `api.Deadline`)."""
+    seconds: float
+    latencies_s: np.ndarray
+    peak_rss_bytes: int
+
+    @property
+    def requests_per_s(self) -> float:
+        """HTTP requests (including retried ones) per second."""
+        return self.requests / self.seconds if self.seconds else 0.0
+
+    def latency_ms(self, quantile: float) -> float:
+        """Page latency (including any retries) at `quantile`, in milliseconds."""
+        if not len(self.latencies_s):
+            return 0.0
+        return float(np.quantile(self.latencies_s, quantile) * 1000)
+
+    def summary(self) -> dict[str, float | int | str]:
+        """Headline numbers, one per column."""
+        return {
+            "endpoint": self.endpoint,
+            "pages": self.pages,
+            "records": self.records,
+            "requests": self.requests,
+            "429s": self.rate_limited,
+            "hedged": self.hedged,
+            "seconds": round(self.seconds, 2),
+            "req_per_s": round(self.requests_per_s, 1),
+            "p50_ms": round(self.latency_ms(0.5), 2),
+            "p99_ms": round(self.latency_ms(0.99), 2),
+            "peak_rss_mib": round(self.peak_rss_bytes / 1024**2, 1),
+        }
+
+
+class _CountingTransport(httpx.AsyncBaseTransport):
+    """Pass requests through, counting responses (and 429s) on the way back."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport) -> None:
+        self.inner = inner
+        self.requests = 0
+        self.rate_limited = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.inner.handle_async_request(request)
+        self.requests += 1
+        if response.status_code == httpx.codes.TOO_MANY_REQUESTS:
+            self.rate_limited += 1
+        return response
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+async def load(  # noqa: PLR0913
+    base_url: str,
+    endpoint: str = "users",
+    pages: int = 1_000,
+    *,
+    concurrency: int = 16,
+    rate: float | None = None,
+    task: progress.Task | None = None,
+) -> LoadResult:
+    """Fetch `pages` pages of `endpoint` with `concurrency` workers; time each one.
+
+    Pages and bytes are counted towards `task`, if given.
+    """
+    transport = _CountingTransport(
+        httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=concurrency, max_keepalive_connections=concurrency
+            )
+        )
+    )
+    budget = api.RateBudget(rate) if rate else api.RateBudget(1e9, burst=concurrency)
+    offsets: asyncio.Queue[int] = asyncio.Queue()
+    for page in range(pages):
+        offsets.put_nowait(page * pagerduty.PAGE_LIMIT)
+    latencies: list[float] = []
+    records = 0
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal records
+        while not offsets.empty():
+            offset = offsets.get_nowait()
+            started = time.perf_counter()
+            body = await api.get_json(
+                client,
+                f"/{endpoint}",
+                budget,
+                params={"limit": pagerduty.PAGE_LIMIT, "offset": offset},
+                task=task,
+            )
+            latencies.append(time.perf_counter() - started)
+            records += len(body.get(endpoint, []))
+            if task is not None:
+                task.advance(1)
+
+    started = time.perf_counter()
+    async with api.make_client(base_url, {}, transport=transport) as client:
+        window = api.window_for(client.build_request("GET", f"/{endpoint}").url)
+        hedged_before = window.hedged
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    seconds = time.perf_counter() - started
+    return LoadResult(
+        endpoint=endpoint,
+        pages=len(latencies),
+        records=records,
+        requests=transport.requests,
+        rate_limited=transport.rate_limited,
+        hedged=window.hedged - hedged_before,
+        seconds=seconds,
+        latencies_s=np.asarray(latencies),
+        peak_rss_bytes=memory.peak_rss_bytes(),
+    )
+
+
+def _free_port(host: str) -> int:
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def mock_server_process(
+    config: mockserver.MockConfig, host: str = mockserver.DEFAULT_HOST
+) -> Iterator[str]:
+    """Run the mock API in a child process; yield its base URL."""
+    port = _free_port(host)
+    process = multiprocessing.get_context("spawn").Process(
+        target=mockserver.serve, args=(config, host, port), daemon=True
+    )
+    process.start()
+    try:
+        deadline = time.monotonic() + STARTUP_TIMEOUT_S
+        while True:
+            try:
+                socket.create_connection((host, port), timeout=0.1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline or not process.is_alive():
+                    msg = f"mock server did not start on {host}:{port}"
+                    raise RuntimeError(msg) from None
+                time.sleep(0.05)
+        yield f"http://{host}:{port}"
+    finally:
+        process.terminate()
+        process.join()
+
+
+def run(  # noqa: PLR0913
+    endpoint: str = "users",
+    pages: int = 10_000,
+    *,
+    concurrency: int = 16,
+    config: mockserver.MockConfig | None = None,
+    url: str | None = None,
+    rate: float | None = None,
+    task: progress.Task | None = None,
+) -> LoadResult:
+    """Blocking: load-test `url`, or a mock server sized for `pages` if none given."""
+    if url is not None:
+        return asyncio.run(
+            load(url, endpoint, pages, concurrency=concurrency, rate=rate, task=task)
+        )
+    config = config or mockserver.MockConfig()
+    if endpoint in ("users", "license_allocations", "incidents"):
+        setattr(
+            config,
+            endpoint,
+            max(getattr(config, endpoint), pages * pagerduty.PAGE_LIMIT),
+        )
+    with mock_server_process(config) as mock_url:
+        return asyncio.run(
+            load(
+                mock_url,
+                endpoint,
+                pages,
+                concurrency=concurrency,
+                rate=rate,
+                task=task,
+            )
+        )
@@ -0,0 +1,214 @@
+"""Memory budget: pick how a pipeline runs from the size of what it reads.
+
+The CLI's global `--memory-budget` (e.g. `512M`, `2G`) is recorded here with
+`configure`. Data commands then ask `strategy` how to execute a lazy plan,
+given an estimate of its inputs' in-memory size (`estimate_bytes`).
+The estimate is read from file metadata only: Parquet footers carry the
+uncompressed size of every row group; other files are taken at their size on
+disk, scaled by how much bigger text becomes once parsed.
+Frames already in memory (an opened catalog dataset, say) are sized from their
+buffers, but a lazy plan over one doesn't show that size: such plans run on the
+streaming engine unless the caller passes their size (`plan_strategy`).
+
+- `in-memory`: inputs fit comfortably; collect eagerly (fastest).
+- `streaming`: inputs don't fit, the result should; run on the streaming
+  engine, with batches sized (`chunk_rows`) to a slice of the budget.
+- `spill`: not even a result of the inputs' size would fit; stream the result
+  to an uncompressed IPC file on disk and memory-map it, so the OS pages it in
+  and out instead of it being held.
+
+Without a budget, nothing changes: plans run on the streaming engine as before.
+`peak_rss_bytes` reports what the process actually used.
+"""
+
+from __future__ import annotations
+
+import re
+import resource
+import sys
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import polars as pl
+import pyarrow.parquet as pq
+
+from . import cache, paths
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+IN_MEMORY = "in-memory"
+STREAMING = "streaming"
+SPILL = "spill"
+
+IN_MEMORY_FRACTION = 0.25
+"""Inputs up to this fraction of the budget are collected eagerly (room to work)."""
+SPILL_FRACTION = 1.0
+"""Inputs larger than this fraction of the budget spill their result to disk."""
+CHUNK_FRACTION = 0.05
+"""Each streaming batch may hold this fraction of the budget."""
+TEXT_EXPANSION = 1.5
+"""Parsed CSV / JSON takes about this many times its size on disk."""
+SPILL_DIR = paths.NO_SYNC_DIR / "spill"
+MIN_CHUNK_ROWS = 1_000
+TYPICAL_ROW_BYTES = 512
+"""Row size assumed when sizing the streaming engine's batches globally."""
+ROW_SAMPLE_BYTES = 64 * 1024
+
+_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?\s*$", re.IGNORECASE)
+
+_budget_bytes: int | None = None
+
+
+def parse_size(text: str) -> int:
+    """Parse a size such as `512M`, `2GiB` or `1.5g` into bytes.
+
+    >>> parse_size("512M"), parse_size("2GiB"), parse_size("100")
+    (536870912, 2147483648, 100)
+    """
+    match = _SIZE.match(text)
+    if match is None:
+        msg = f"Not a size: {text!r} (try e.g. 512M or 2G)"
+        raise ValueError(msg)
+    return int(float(match[1]) * _UNITS[match[2].upper()])
+
+
+def configure(budget_bytes: int | None) -> None:
+    """Set (or, with `None`, clear) the process-wide memory budget."""
+    global _budget_bytes  # noqa: PLW0603 -- one setting for the whole process
+    _budget_bytes = budget_bytes
+    if budget_bytes is not None:
+        pl.Config.set_streaming_chunk_size(chunk_rows(TYPICAL_ROW_BYTES))
+
+
+def budget() -> int | None:
+    """Return the memory budget in bytes, if one was set."""
+    return _budget_bytes
+
+
+def file_bytes(path: Path) -> int:
+    """Estimate how many bytes `path` takes once read into memory."""
+    if path.suffix == ".parquet":
+        metadata = pq.ParquetFile(path).metadata
+        return sum(
+            metadata.row_group(i).total_byte_size
+            for i in range(metadata.num_row_groups)
+        )
+    size = path.stat().st_size
+    if path.suffix in (".arrow", ".ipc", ".feather"):
+        return size
+    return int(size * TEXT_EXPANSION)
+
+
+def estimate_bytes(sources: Iterable[Path] | pl.LazyFrame | pl.DataFrame) -> int:
+    """Estimate the in-memory size of some files, a frame, or every file a plan scans."""
+    if isinstance(sources, pl.DataFrame):
+        return int(sources.estimated_size())
+    if isinstance(sources, pl.LazyFrame):
+        sources = cache.scanned_files(sources.explain(optimized=True))
+    return sum(file_bytes(path) for path in sources if path.exists())
+
+
+def strategy(input_bytes: int, budget_bytes: int | None = None) -> str:
+    """Choose how to run a plan over `input_bytes` of input within the budget.
+
+    >>> strategy(10 * 1024**2, budget_bytes=1024**3)
+    'in-memory'
+    >>> strategy(600 * 1024**2, budget_bytes=1024**3)
+    'streaming'
+    >>> strategy(4 * 1024**3, budget_bytes=1024**3)
+    'spill'
+    """
+    budget_bytes = budget_bytes if budget_bytes is not None else _budget_bytes
+    if budget_bytes is None:
+        return STREAMING
+    if input_bytes <= budget_bytes * IN_MEMORY_FRACTION:
+        return IN_MEMORY
+    if input_bytes <= budget_bytes * SPILL_FRACTION:
+        return STREAMING
+    return SPILL
+
+
+def plan_strategy(plan: pl.LazyFrame, input_bytes: int | None = None) -> str:
+    """Choose how to run `plan`, estimating its inputs' size if not given.
+
+    A plan reading frames already in memory can't be sized from its files, so
+    it streams rather than being taken for small.
+    """
+    if _budget_bytes is None:
+        return STREAMING
+    if input_bytes is None:
+        text = plan.explain(optimized=True)
+        if cache.reads_frames(text):
+            return STREAMING
+        input_bytes = estimate_bytes(cache.scanned_files(text))
+    return strategy(input_bytes)
+
+
+def row_bytes(path: Path) -> float:
+    """Estimate the in-memory bytes per row of a text file from its first lines."""
+    with path.open("rb") as file:
+        sample = file.read(ROW_SAMPLE_BYTES)
+    lines = max(sample.count(b"\n"), 1)
+    return len(sample) / lines * TEXT_EXPANSION
+
+
+def chunk_rows(row_bytes: float, default: int = 50_000) -> int:
+    """Rows per batch so a batch of `row_bytes`-byte rows fits the budget's slice.
+
+    >>> chunk_rows(1024, default=50_000)  # no budget set
+    50000
+    """
+    if _budget_bytes is None:
+        return default
+    return max(MIN_CHUNK_ROWS, int(_budget_bytes * CHUNK_FRACTION / max(row_bytes, 1)))
+
+
+def collect(plan: pl.LazyFrame, input_bytes: int | None = None) -> pl.DataFrame:
+    """Run `plan` the way `plan_strategy` says suits its inputs."""
+    chosen = plan_strategy(plan, input_bytes)
+    if chosen == IN_MEMORY:
+        return plan.collect()
+    if chosen == STREAMING:
+        return plan.collect(streaming=True)
+    return spill(plan)
+
+
+def spill(plan: pl.LazyFrame, spill_dir: Path = SPILL_DIR) -> pl.DataFrame:
+    """Stream `plan`'s result to disk and return it memory-mapped from there.
+
+    The file is unlinked once mapped (on POSIX the mapping keeps it readable),
+    so nothing is left behind.
+    """
+    spill_dir.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=spill_dir, suffix=".arrow", delete=False
+    ) as file:
+        path = Path(file.name)
+    try:
+        try:
+            plan.sink_ipc(path, compression=None)
+        except pl.InvalidOperationError:
+            # a step the streaming sink can't do yet: collect it, then spill that
+            plan.collect(streaming=True).write_ipc(path, compression="uncompressed")
+        frame = pl.read_ipc(path, memory_map=True)
+    finally:
+        if sys.platform != "win32":
+            path.unlink(missing_ok=True)
+    return frame
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident memory of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux reports KiB
+
+
+def report() -> str:
+    """One line on peak memory use, against the budget if there is one."""
+    line = f"peak RSS {peak_rss_bytes() / 1024**2:.1f} MiB"
+    if _budget_bytes is not None:
+        line += f" (budget {_budget_bytes / 1024**2:.0f} MiB)"
+    return line
@@ -0,0 +1,232 @@
+"""Incident response metrics (MTTA / MTTR) from PagerDuty log entries.
+
+Log entries are streamed, never held: each page from `/log_entries` is flattened
+to the few columns the metrics need and spooled to its own small Parquet file,
+so memory stays at about two pages however much history is pulled.
+A page is flattened and written on a worker thread while the next one is
+fetched, so disk and network overlap instead of taking turns.
+The window is requested a week at a time, which keeps offset pagination inside
+PagerDuty's limits (offsets stop at 10,000).
+
+The metrics are then a lazy plan over the spooled pages, run on the streaming
+engine: each incident's first trigger, first acknowledgement and last resolve
+give its time to acknowledge (TTA) and to resolve (TTR), summarised per week
+and per service and/or team.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
+
+import polars as pl
+import polars.selectors as cs
+
+from . import api, pagerduty, progress, timeutil
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import httpx
+
+TRIGGER = "trigger_log_entry"
+ACKNOWLEDGE = "acknowledge_log_entry"
+RESOLVE = "resolve_log_entry"
+WINDOW = timedelta(days=7)
+GROUPINGS = ("service", "team")
+
+SPOOL_SCHEMA = {
+    "incident_id": pl.Utf8,
+    "type": pl.Utf8,
+    "created_at": pl.Datetime("us", "UTC"),
+    "service": pl.Utf8,
+    "team": pl.Utf8,
+}
+
+
+def flatten(records: list[dict[str, Any]]) -> pl.DataFrame:
+    """Reduce one page of log entries to `SPOOL_SCHEMA` (one row per team)."""
+    if not records:
+        return pl.DataFrame(schema=SPOOL_SCHEMA)
+    raw = pl.DataFrame(records, infer_schema_length=None)
+
+    def ref(column: str, field: str) -> pl.Expr:
+        if column not in raw.columns or not isinstance(raw.schema[column], pl.Struct):
+            return pl.lit(None, pl.Utf8)
+        return pl.col(column).struct.field(field)
+
+    teams = (
+        pl.col("teams").list.eval(pl.element().struct.field("summary"))
+        if isinstance(raw.schema.get("teams"), pl.List)
+        and isinstance(raw.schema["teams"].inner, pl.Struct)
+        else pl.lit(None, pl.List(pl.Utf8))
+    )
+    return (
+        raw.select(
+            ref("incident", "id").alias("incident_id"),
+            pl.col("type"),
+            timeutil.column_to_utc(raw, "created_at"),
+            ref("service", "summary").alias("service"),
+            teams.alias("team"),
+        )
+        .explode("team")
+        .cast(SPOOL_SCHEMA)
+        .filter(pl.col("type").is_in([TRIGGER, ACKNOWLEDGE, RESOLVE]))
+    )
+
+
+async def spool(  # noqa: PLR0913
+    account: pagerduty.Account,
+    since: datetime,
+    until: datetime,
+    spool_dir: Path,
+    *,
+    base_url: str = pagerduty.BASE_URL,
+    transport: httpx.AsyncBaseTransport | None = None,
+    task: progress.Task | None = None,
+) -> int:
+    """Stream the log entries of `[since, until)` to Parquet pages; return the count.
+
+    Entries and bytes received are counted towards `task`, if given.
+    Each page is spooled in the background while the next is fetched; at most
+    one write is in flight.
+    """
+    await asyncio.to_thread(spool_dir.mkdir, parents=True, exist_ok=True)
+    budget = api.RateBudget(account.rate_per_second)
+    pages = entries = 0
+    writing: asyncio.Task[None] | None = None
+    async with api.make_client(
+        base_url,
+        account.headers,
+        max_connections=account.max_connections,
+        transport=transport,
+    ) as client:
+        start = since
+        while start < until:
+            end = min(start + WINDOW, until)
+            params = {
+                "since": start.isoformat(),
+                "until": end.isoformat(),
+                "time_zone": "UTC",
+                "is_overview": "true",  # only the entry types that matter here
+                "include[]": "teams",
+            }
+            async for page in pagerduty.paginate(
+                client, "log_entries", budget, params, task=task
+            ):
+                if writing is not None:
+                    await writing
+                writing = asyncio.create_task(
+                    asyncio.to_thread(
+                        _spool_page, page, spool_dir / f"page-{pages:06d}.parquet"
+                    )
+                )
+                pages += 1
+                entries += len(page)
+            start = end
+        if writing is not None:
+            await writing
+    return entries
+
+
+def _spool_page(records: list[dict[str, Any]], path: Path) -> None:
+    """Flatten one page of log entries and write it to `path` (unless empty)."""
+    flat = flatten(records)
+    if not flat.is_empty():
+        flat.write_parquet(path)
+
+
+def _spooled(spool_dir: Path) -> pl.LazyFrame:
+    if not any(spool_dir.glob("*.parquet")):
+        return pl.LazyFrame(schema=SPOOL_SCHEMA)
+    return pl.scan_parquet(spool_dir / "*.parquet")
+
+
+def incidents(spool_dir: Path) -> pl.LazyFrame:
+    """Return per-incident trigger, acknowledge and resolve times (lazily)."""
+
+    def when(kind: str) -> pl.Expr:
+        return pl.col("created_at").filter(pl.col("type") == kind)
+
+    return (
+        _spooled(spool_dir)
+        .group_by("incident_id")
+        .agg(
+            pl.col("service").drop_nulls().first(),
+            when(TRIGGER).min().alias("triggered_at"),
+            when(ACKNOWLEDGE).min().alias("acknowledged_at"),
+            when(RESOLVE).max().alias("resolved_at"),
+        )
+        .filter(pl.col("triggered_at").is_not_null())
+        .with_columns(
+            (
+                (pl.col("acknowledged_at") - pl.col("triggered_at")).dt.total_seconds()
+                / 60
+            ).alias("tta_min"),
+            (
+                (pl.col("resolved_at") - pl.col("triggered_at")).dt.total_seconds() / 60
+            ).alias("ttr_min"),
+            pl.col("triggered_at").dt.truncate("1w").alias("week"),
+        )
+    )
+
+
+def report(spool_dir: Path, by: tuple[str, ...] = ("service",)) -> pl.LazyFrame:
+    """Return TTA / TTR distributions per week and `by` (service and/or team).
+
+    An incident owned by several teams counts towards each of them.
+    """
+    per_incident = incidents(spool_dir)
+    if "team" in by:
+        teams = _spooled(spool_dir).select("incident_id", "team").drop_nulls().unique()
+        per_incident = per_incident.join(
+            teams, on="incident_id", how="left", coalesce=True
+        )
+
+    def spread(column: str) -> list[pl.Expr]:
+        prefix = column.removesuffix("_min")
+        return [
+            pl.col(column).mean().alias(f"{prefix}_mean"),
+            pl.col(column).median().alias(f"{prefix}_p50"),
+            pl.col(column).quantile(0.9).alias(f"{prefix}_p90"),
+        ]
+
+    return (
+        per_incident.group_by("week", *by)
+        .agg(
+            pl.len().alias("incidents"),
+            pl.col("acknowledged_at").count().alias("acknowledged"),
+            pl.col("resolved_at").count().alias("resolved"),
+            *spread("tta_min"),
+            *spread("ttr_min"),
+        )
+        .with_columns(cs.float().round(1))
+        .sort("week", *by)
+    )
+
+
+def collect(  # noqa: PLR0913
+    account: pagerduty.Account,
+    since: datetime,
+    until: datetime,
+    spool_dir: Path,
+    by: tuple[str, ...] = ("service",),
+    *,
+    base_url: str = pagerduty.BASE_URL,
+    transport: httpx.AsyncBaseTransport | None = None,
+    task: progress.Task | None = None,
+) -> tuple[int, pl.LazyFrame]:
+    """Blocking: spool the window's log entries, then return the report plan."""
+    count = asyncio.run(
+        spool(
+            account,
+            since,
+            until,
+            spool_dir,
+            base_url=base_url,
+            transport=transport,
+            task=task,
+        )
+    )
+    return count, report(spool_dir, by)
@@ -0,0 +1,274 @@
+"""Local stand-in for the PagerDuty and Zenq APIs, for tests and load tests.
+
+A small asyncio HTTP/1.1 server (keep-alive, GET only, plus the Okta token POST)
+serving synthetic data in the same shapes as the real APIs:
+
+- PagerDuty: `/users`, `/licenses`, `/license_allocations`, `/incidents`,
+  with classic `offset` / `limit` / `more` / `total` pagination;
+- Zenq: `/api/v2/tickets` (one JSON list) and the Okta `/oauth2/token` exchange.
+
+Records are generated from their index on demand, so a million-user account costs
+no memory, and the same index always yields the same record.
+Each response can be delayed (`latency_ms` plus up to `jitter_ms`), and a
+fraction of requests (`rate_limited`) answered with `429 Too Many Requests`
+and a `Retry-After`, to exercise the clients' retry paths.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_LIMIT = 100
+LICENSE_NAMES = ("Full User", "Stakeholder", "Responder", "Observer")
+DEFAULT_LICENSES = len(LICENSE_NAMES)
+ZENQ_PREFIX = "/api/v2"
+
+
+@dataclass
+class MockConfig:
+    """Dataset sizes and misbehaviour of the mock API."""
+
+    users: int = 10_000
+    licenses: int = DEFAULT_LICENSES
+    license_allocations: int = 10_000
+    incidents: int = 10_000
+    tickets: int = 1_000
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    rate_limited: float = 0.0
+    """Fraction of requests answered with 429."""
+    retry_after: float = 0.05
+    seed: int = 0
+
+
+@dataclass
+class ServerStats:
+    """What the server has answered so far."""
+
+    requests: int = 0
+    rate_limited: int = 0
+    by_path: dict[str, int] = field(default_factory=dict)
+
+
+def _user(i: int) -> dict[str, Any]:
+    return {
+        "id": f"PU{i:07d}",
+        "type": "user",
+        "name": f"User {i}",
+        "email": f"user{i}@example.com",
+        "role": ("admin", "user", "limited_user", "observer")[i % 4],
+        "time_zone": ("UTC", "America/New_York", "Europe/London")[i % 3],
+        "teams": [{"id": f"PT{i % 20:03d}", "type": "team_reference"}],
+    }
+
+
+def _license(i: int) -> dict[str, Any]:
+    return {
+        "id": f"PL{i:04d}",
+        "type": "license",
+        "name": LICENSE_NAMES[i % len(LICENSE_NAMES)],
+        "role_group": LICENSE_NAMES[i % len(LICENSE_NAMES)].replace(" ", ""),
+        "current_value": 0,
+        "allocations_available": None if i % len(LICENSE_NAMES) == 1 else 50 + i,
+    }
+
+
+def _allocation(config: MockConfig) -> Callable[[int], dict[str, Any]]:
+    def allocation(i: int) -> dict[str, Any]:
+        license_ = _license(i % config.licenses)
+        return {
+            "license": {k: license_[k] for k in ("id", "type", "name", "role_group")},
+            "user": {
+                "id": _user(i % config.users)["id"],
+                "type": "user_reference",
+                "summary": f"User {i % config.users}",
+            },
+            "allocated_at": f"2024-01-{1 + i % 28:02d}T00:00:00Z",
+        }
+
+    return allocation
+
+
+def _incident(i: int) -> dict[str, Any]:
+    return {
+        "id": f"PI{i:07d}",
+        "type": "incident",
+        "incident_number": i + 1,
+        "title": f"Synthetic incident {i}",
+        "status": ("triggered", "acknowledged", "resolved")[i % 3],
+        "urgency": "high" if i % 5 == 0 else "low",
+        "created_at": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:00:00Z",
+        "service": {"id": f"PS{i % 50:03d}", "summary": f"Service {i % 50}"},
+    }
+
+
+def _ticket(i: int) -> dict[str, Any]:
+    return {
+        "id": f"ZQ{i:07d}",
+        "status": "Open" if i % 4 else "Closed",
+        "subject": f"Ticket {i}: webhook retries failing",
+        "description": "Synthetic ticket body " * 8,
+        "user_email": f"user{i % 500}@example.com",
+        "last_modified_date": f"2024-01-{1 + i % 28:02d}T{i % 24:02d}:00:00.000+0000",
+    }
+
+
+class MockServer:
+    """The mock API, served on `host:port` until stopped (or its context exits)."""
+
+    def __init__(
+        self,
+        config: MockConfig | None = None,
+        host: str = DEFAULT_HOST,
+        port: int = 0,
+    ) -> None:
+        """Serve `config`'s data on `host:port` (port 0: any free port)."""
+        self.config = config or MockConfig()
+        self.host = host
+        self.port = port
+        self.stats = ServerStats()
+        self._random = np.random.default_rng(self.config.seed)
+        self._server: asyncio.base_events.Server | None = None
+        self._collections: dict[str, tuple[int, Callable[[int], dict[str, Any]]]] = {
+            "users": (self.config.users, _user),
+            "licenses": (self.config.licenses, _license),
+            "license_allocations": (
+                self.config.license_allocations,
+                _allocation(self.config),
+            ),
+            "incidents": (self.config.incidents, _incident),
+        }
+
+    @property
+    def url(self) -> str:
+        """Base URL to point a client at."""
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        """Start listening (and learn the port, if it was 0)."""
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Stop listening and close open connections."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self) -> None:
+        """Start and serve until cancelled."""
+        await self.start()
+        if self._server is None:  # stopped by another task in the meantime
+            msg = "Mock server was stopped before it could serve"
+            raise RuntimeError(msg)
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def __aenter__(self) -> MockServer:  # noqa: PYI034
+        """Start serving for the duration of an `async with` block."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        """Stop serving."""
+        await self.stop()
+
+    def respond(self, method: str, target: str) -> tuple[int, dict[str, str], Any]:
+        """Return the status, extra headers and JSON body for one request."""
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        self.stats.requests += 1
+        self.stats.by_path[path] = self.stats.by_path.get(path, 0) + 1
+        if (
+            self.config.rate_limited
+            and self._random.random() < self.config.rate_limited
+        ):
+            self.stats.rate_limited += 1
+            return (
+                429,
+                {"Retry-After": str(self.config.retry_after)},
+                {"error": {"message": "Rate Limit Exceeded", "code": 2020}},
+            )
+        if method == "POST" and path.endswith("/token"):
+            return 200, {}, {"access_token": "mock-token", "token_type": "Bearer"}
+        if method != "GET":
+            return 405, {}, {"error": f"{method} not supported"}
+        if path == f"{ZENQ_PREFIX}/tickets":
+            return 200, {}, [_ticket(i) for i in range(self.config.tickets)]
+        name = path.lstrip("/")
+        if name not in self._collections:
+            return 404, {}, {"error": f"no such endpoint: {path}"}
+        total, make = self._collections[name]
+        limit = min(int(params.get("limit", 25)), MAX_LIMIT)
+        offset = int(params.get("offset", 0))
+        stop = min(offset + limit, total)
+        return (
+            200,
+            {},
+            {
+                name: [make(i) for i in range(offset, stop)],
+                "limit": limit,
+                "offset": offset,
+                "total": total,
+                "more": stop < total,
+            },
+        )
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Answer requests on one keep-alive connection until the client closes it."""
+        try:
+            while request_line := await reader.readline():
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers: dict[str, str] = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                if length := int(headers.get("content-length", 0)):
+                    await reader.readexactly(length)
+
+                delay = (
+                    self.config.latency_ms
+                    + self._random.random() * self.config.jitter_ms
+                )
+                if delay:
+                    await asyncio.sleep(delay / 1000)
+                status, extra, body = self.respond(method, target)
+                payload = json.dumps(body).encode()
+                head = [
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}",  # noqa: PLR2004
+                    "Content-Type: application/json",
+                    f"Content-Length: {len(payload)}",
+                    *(f"{k}: {v}" for k, v in extra.items()),
+                ]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + payload)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # client went away mid-request, or sent something we don't speak
+        finally:
+            writer.close()
+
+
+def serve(
+    config: MockConfig, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT
+) -> None:
+    """Blocking: serve the mock API until interrupted."""
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(MockServer(config, host, port).serve_forever())
@@ -0,0 +1,502 @@
+"""Run the jupytext notebooks headlessly, re-executing only cells whose inputs changed.
+
+Each `notebooks/*.ju.py` (jupytext "percent" format) is split into cells and
+its code cells run in order, in a fresh namespace, from the notebook's own
+directory (so `"../data/..."` paths work as they do in Jupyter Lab).
+Notebooks run in parallel, each in its own (spawned) process.
+
+Every code cell gets a key: the hash of its source, the key of the code cell
+before it, and the fingerprints (size and modification time) of the files its
+string literals name (`"../data/iris.csv"`, globs like `"stocks/*.csv"`).
+The first cell's "upstream" is the project package's own source, so editing
+the package re-runs the notebooks that use it.
+A cell whose key is cached isn't run: its outputs are replayed.
+Because keys chain, a changed cell invalidates every cell below it, never above.
+
+To run a changed cell without re-running the ones above it, the namespace is
+checkpointed after each executed cell: every variable pickled on its own,
+stored once by content. If any variable can't be pickled (a function defined in
+the notebook, an open client) the checkpoint is incomplete and the cells above
+are replayed (quietly, their outputs are cached) instead.
+After every run the least-recently-used checkpoints are dropped until their
+variables fit a byte budget, and so is every variable no checkpoint still uses.
+
+Outputs (streams, the last expression's value, errors) are written as an
+`.ipynb` per notebook, which Jupyter Lab opens as usual.
+"""
+
+from __future__ import annotations
+
+import ast
+import builtins
+import contextlib
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import pickle
+import re
+import sys
+import time
+import traceback
+import types
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from . import paths
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+NOTEBOOKS_DIR = Path("notebooks")
+PATTERN = "*.ju.py"
+STORE_DIR = paths.NO_SYNC_DIR / "notebooks"
+CELL_MARKER = re.compile(r"^# %%(?P<rest>.*)$")
+GLOB_CHARS = re.compile(r"[*?[]")
+PACKAGE_DIR = Path(__file__).parent
+DEFAULT_BUDGET_BYTES = 2 * 1024**3
+"""How much pickled namespace the checkpoints may keep (see `CellCache.prune`)."""
+
+Output = dict[str, Any]
+"""One output, as an `.ipynb` output dict (`stream`, `execute_result`, `error`)."""
+
+
+@dataclass
+class Cell:
+    """One cell of a percent-format notebook."""
+
+    kind: str  # "code" | "markdown"
+    source: str
+    key: str = ""
+    """Cache key (code cells only; see the module docstring)."""
+    outputs: list[Output] = field(default_factory=list)
+
+
+@dataclass
+class NotebookResult:
+    """How one notebook run went."""
+
+    notebook: str
+    status: str = "ok"  # "ok" | "failed"
+    cells: int = 0
+    cached: int = 0
+    executed: int = 0
+    replayed: int = 0
+    """Cached cells run again (outputs discarded) to rebuild the namespace."""
+    seconds: float = 0.0
+    output: Path | None = None
+    error: str = ""
+
+
+def parse(text: str) -> list[Cell]:
+    r"""Split a percent-format notebook into cells (without the YAML header).
+
+    >>> cells = parse("# %% [markdown]\n# # Title\n\n# %%\nx = 1\nx\n")
+    >>> [(cell.kind, cell.source) for cell in cells]
+    [('markdown', '# Title'), ('code', 'x = 1\nx')]
+    """
+    cells: list[Cell] = []
+    lines: list[str] = []
+    kind: str | None = None
+
+    def flush() -> None:
+        if kind is None:
+            return
+        body = "\n".join(lines).strip("\n")
+        if kind == "markdown":
+            body = "\n".join(re.sub(r"^# ?", "", line) for line in body.splitlines())
+        cells.append(Cell(kind, body))
+
+    for line in text.splitlines():
+        marker = CELL_MARKER.match(line)
+        if marker is None:
+            lines.append(line)
+            continue
+        flush()
+        lines = []
+        kind = "markdown" if "[markdown]" in marker["rest"] else "code"
+    flush()
+    return cells
+
+
+def data_inputs(source: str, base_dir: Path) -> list[Path]:
+    """Return the existing files named by `source`'s string literals (globs expanded).
+
+    Paths are taken relative to `base_dir`, where the notebook runs.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return []
+    found: set[Path] = set()
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Constant) and isinstance(node.value, str)):
+            continue
+        literal = node.value
+        if not literal or "\n" in literal or len(literal) > 4096:  # noqa: PLR2004
+            continue
+        if GLOB_CHARS.search(literal):
+            with contextlib.suppress(ValueError, OSError):
+                found.update(p for p in base_dir.glob(literal) if p.is_file())
+            continue
+        with contextlib.suppress(OSError):
+            path = base_dir / literal
+            if path.is_file():
+                found.add(path)
+    return sorted(found)
+
+
+def fingerprint(files: list[Path]) -> str:
+    """Return a short digest of some files' paths, sizes and modification times."""
+    digest = hashlib.sha256()
+    for path in files:
+        stat = path.stat()
+        digest.update(
+            f"{path.resolve()}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode()
+        )
+    return digest.hexdigest()
+
+
+def package_fingerprint() -> str:
+    """Fingerprint of the project package's source (the notebooks import it)."""
+    return fingerprint(sorted(PACKAGE_DIR.glob("*.py")))
+
+
+def assign_keys(cells: list[Cell], base_dir: Path, seed: str = "") -> None:
+    """Give every code cell its chained cache key."""
+    upstream = seed
+    for cell in cells:
+        if cell.kind != "code":
+            continue
+        digest = hashlib.sha256()
+        for part in (
+            upstream,
+            cell.source,
+            fingerprint(data_inputs(cell.source, base_dir)),
+        ):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        cell.key = upstream = digest.hexdigest()
+
+
+class CellCache:
+    """Cell outputs and namespace checkpoints, by cell key."""
+
+    def __init__(self, root: Path = STORE_DIR / "cache") -> None:
+        """Open (or prepare) the cache rooted at `root`."""
+        self.root = root
+
+    def outputs(self, key: str) -> list[Output] | None:
+        """Return a cell's cached outputs, if any."""
+        path = self.root / "outputs" / f"{key}.json"
+        return json.loads(path.read_text()) if path.exists() else None
+
+    def put_outputs(self, key: str, outputs: list[Output]) -> None:
+        """Cache a cell's outputs."""
+        self._write(self.root / "outputs" / f"{key}.json", json.dumps(outputs).encode())
+
+    def checkpoint(self, key: str, namespace: dict[str, Any]) -> bool:
+        """Save the namespace after cell `key`; return whether all of it could be."""
+        entries: dict[str, list[str]] = {}
+        complete = True
+        for name, value in namespace.items():
+            if name.startswith("_"):
+                continue
+            if isinstance(value, types.ModuleType):
+                entries[name] = ["module", value.__name__]
+                continue
+            try:
+                blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:  # noqa: BLE001 -- anything unpicklable, however it fails
+                complete = False
+                break
+            digest = hashlib.sha256(blob).hexdigest()
+            blob_path = self.root / "blobs" / f"{digest}.pickle"
+            if not blob_path.exists():
+                self._write(blob_path, blob)
+            entries[name] = ["pickle", digest]
+        if complete:
+            self._write(
+                self.root / "checkpoints" / f"{key}.json", json.dumps(entries).encode()
+            )
+        return complete
+
+    def restore(self, key: str) -> dict[str, Any] | None:
+        """Return the namespace saved after cell `key`, if it was saved whole."""
+        path = self.root / "checkpoints" / f"{key}.json"
+        if not path.exists():
+            return None
+        namespace: dict[str, Any] = {"__name__": "__main__"}
+        try:
+            for name, (kind, ref) in json.loads(path.read_text()).items():
+                if kind == "module":
+                    __import__(ref)
+                    namespace[name] = sys.modules[ref]
+                else:
+                    blob = (self.root / "blobs" / f"{ref}.pickle").read_bytes()
+                    namespace[name] = pickle.loads(blob)  # noqa: S301
+        except Exception:  # noqa: BLE001 -- a stale or partial checkpoint: replay instead
+            return None
+        path.touch()  # recently used, as far as `prune` is concerned
+        return namespace
+
+    def prune(self, budget_bytes: int = DEFAULT_BUDGET_BYTES) -> int:
+        """Drop checkpoints, oldest first, until their blobs fit; return bytes freed.
+
+        Blobs no remaining checkpoint refers to are deleted.
+        """
+        blobs = {path.stem: path for path in (self.root / "blobs").glob("*.pickle")}
+        kept: set[str] = set()
+        used = 0
+        checkpoints = sorted(
+            (self.root / "checkpoints").glob("*.json"),
+            key=lambda path: path.stat().st_mtime_ns,
+            reverse=True,
+        )
+        for path in checkpoints:
+            refs = {
+                ref
+                for kind, ref in json.loads(path.read_text()).values()
+                if kind == "pickle" and ref in blobs
+            } - kept
+            size = sum(blobs[ref].stat().st_size for ref in refs)
+            if used + size > budget_bytes:
+                path.unlink(missing_ok=True)
+                continue
+            kept |= refs
+            used += size
+        freed = 0
+        for digest, path in blobs.items():
+            if digest not in kept:
+                freed += path.stat().st_size
+                path.unlink(missing_ok=True)
+        return freed
+
+    def _write(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+
+
+def _display(value: object) -> Output:
+    """Return the `execute_result` output showing `value` (plain text, plus HTML)."""
+    data = {"text/plain": repr(value)}
+    html = getattr(value, "_repr_html_", None)
+    if callable(html):
+        with contextlib.suppress(Exception):
+            rendered = html()
+            if isinstance(rendered, str):
+                data["text/html"] = rendered
+    return {"output_type": "execute_result", "data": data, "metadata": {}}
+
+
+def _error(err: BaseException) -> Output:
+    """Return the `error` output for `err`, being handled."""
+    return {
+        "output_type": "error",
+        "ename": type(err).__name__,
+        "evalue": str(err),
+        "traceback": traceback.format_exc().splitlines(),
+    }
+
+
+def execute_cell(source: str, namespace: dict[str, Any]) -> tuple[list[Output], bool]:
+    r"""Run one cell in `namespace`; return its outputs and whether it succeeded.
+
+    As in Jupyter, a final bare expression's value is shown (unless it is None).
+
+    >>> outputs, ok = execute_cell("print('hi')\n1 + 1", {})
+    >>> ok, outputs[0]["text"], outputs[1]["data"]["text/plain"]
+    (True, 'hi\n', '2')
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    outputs: list[Output] = []
+    ok = True
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            tree = ast.parse(source)
+            last = (
+                tree.body.pop()
+                if tree.body and isinstance(tree.body[-1], ast.Expr)
+                else None
+            )
+            exec(compile(tree, "<cell>", "exec"), namespace)  # noqa: S102
+            if last is not None:
+                value = builtins.eval(  # noqa: S307
+                    compile(ast.Expression(last.value), "<cell>", "eval"), namespace
+                )
+                if value is not None:
+                    outputs.append(_display(value))
+        except SystemExit as err:  # a cell's `sys.exit` mustn't end the worker
+            ok = False
+            outputs.append(_error(err))
+        except Exception as err:  # noqa: BLE001 -- reported as the cell's error
+            ok = False
+            outputs.append(_error(err))
+    streams = [
+        {"output_type": "stream", "name": name, "text": text}
+        for name, text in (("stdout", stdout.getvalue()), ("stderr", stderr.getvalue()))
+        if text
+    ]
+    return streams + outputs, ok
+
+
+@contextlib.contextmanager
+def _working_dir(directory: Path) -> Iterator[None]:
+    """Run from `directory`, with it importable, as a Jupyter kernel would."""
+    previous = Path.cwd()
+    os.chdir(directory)
+    sys.path.insert(0, str(directory))
+    try:
+        yield
+    finally:
+        sys.path.remove(str(directory))
+        os.chdir(previous)
+
+
+def run_notebook(
+    path: Path,
+    *,
+    cache_root: Path = STORE_DIR / "cache",
+    out_dir: Path = STORE_DIR,
+    force: bool = False,
+) -> NotebookResult:
+    """Run one notebook (see the module docstring); write its `.ipynb`."""
+    started = time.perf_counter()
+    path = path.resolve()
+    cache = CellCache(cache_root.resolve())
+    out_dir = out_dir.resolve()
+    cells = parse(path.read_text())
+    assign_keys(cells, path.parent, seed=package_fingerprint())
+    code = [cell for cell in cells if cell.kind == "code"]
+    result = NotebookResult(notebook=path.name, cells=len(code))
+    namespace: dict[str, Any] | None = None
+    with _working_dir(path.parent):
+        for position, cell in enumerate(code):
+            cached = None if force else cache.outputs(cell.key)
+            if cached is not None:
+                cell.outputs = cached
+                result.cached += 1
+                namespace = None  # now stale, should a later cell need running
+                continue
+            if namespace is None:
+                namespace = _namespace_before(code, position, cache, result)
+            cell.outputs, ok = execute_cell(cell.source, namespace)
+            result.executed += 1
+            if not ok:
+                result.status = "failed"
+                result.error = "\n".join(cell.outputs[-1]["traceback"][-3:])
+                break
+            cache.put_outputs(cell.key, cell.outputs)
+            cache.checkpoint(cell.key, namespace)
+    result.output = write_ipynb(cells, out_dir / path.name.replace(".ju.py", ".ipynb"))
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def _namespace_before(
+    code: list[Cell], position: int, cache: CellCache, result: NotebookResult
+) -> dict[str, Any]:
+    """Return the namespace as it was before code cell `position` ran."""
+    if position == 0:
+        return {"__name__": "__main__"}
+    restored = cache.restore(code[position - 1].key)
+    if restored is not None:
+        return restored
+    namespace: dict[str, Any] = {"__name__": "__main__"}
+    for cell in code[:position]:
+        execute_cell(cell.source, namespace)
+        result.replayed += 1
+    return namespace
+
+
+def write_ipynb(cells: list[Cell], path: Path) -> Path:
+    """Write cells and their outputs as a (v4) Jupyter notebook."""
+    count = 0
+    notebook_cells = []
+    for cell in cells:
+        entry: dict[str, Any] = {
+            "cell_type": cell.kind,
+            "metadata": {},
+            "source": cell.source.splitlines(keepends=True),
+        }
+        if cell.kind == "code":
+            count += 1
+            entry["execution_count"] = count if cell.outputs else None
+            entry["outputs"] = [
+                {**output, "execution_count": count}
+                if output["output_type"] == "execute_result"
+                else output
+                for output in cell.outputs
+            ]
+        notebook_cells.append(entry)
+    notebook = {
+        "cells": notebook_cells,
+        "metadata": {
+            "kernelspec": {
+                "display_name": "Python 3 (ipykernel)",
+                "language": "python",
+                "name": "python3",
+            },
+            "language_info": {"name": "python"},
+        },
+        "nbformat": 4,
+        "nbformat_minor": 5,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(notebook, indent=1) + "\n")
+    tmp.replace(path)
+    return path
+
+
+def _run_headless(
+    path: Path, cache_root: Path, out_dir: Path, *, force: bool
+) -> NotebookResult:
+    os.environ.setdefault("MPLBACKEND", "Agg")  # no windows from plotting cells
+    return run_notebook(path, cache_root=cache_root, out_dir=out_dir, force=force)
+
+
+def run(  # noqa: PLR0913
+    notebooks: list[Path],
+    *,
+    workers: int | None = None,
+    cache_root: Path = STORE_DIR / "cache",
+    out_dir: Path = STORE_DIR,
+    force: bool = False,
+    on_done: Callable[[NotebookResult], None] | None = None,
+    budget_bytes: int = DEFAULT_BUDGET_BYTES,
+) -> list[NotebookResult]:
+    """Run notebooks in parallel processes; return their results in order.
+
+    A notebook whose process died is reported failed; the others still run.
+    The cell cache is pruned to `budget_bytes` afterwards.
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers or min(len(notebooks), os.cpu_count() or 1) or 1,
+        mp_context=context,
+    ) as pool:
+        futures = {
+            pool.submit(_run_headless, path, cache_root, out_dir, force=force): path
+            for path in notebooks
+        }
+        results = {}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = future.result()
+            except Exception as err:  # noqa: BLE001 -- BrokenProcessPool, say
+                results[path] = NotebookResult(
+                    notebook=path.name,
+                    status="failed",
+                    error=f"{type(err).__name__}: {err}",
+                )
+            if on_done is not None:
+                on_done(results[path])
+    CellCache(cache_root).prune(budget_bytes)
+    return [results[path] for path in notebooks]
@@ -0,0 +1,314 @@
+"""On-call coverage: who was on call when, and where nobody was.
+
+On-call entries come from PagerDuty's `/oncalls` endpoint for a time window:
+one record per (escalation policy, level, user, start, end), with the schedule
+that put the user there (none for users assigned to a policy directly).
+
+Each schedule (or escalation policy) becomes a `Timeline` of sorted interval
+arrays: every entry's start and end, together, cut time into elementary
+segments, and each segment lists the entries covering all of it (CSR arrays,
+built vectorised with NumPy). Then:
+
+- a point query ("who was on call at T") is one binary search for T's segment;
+- a range query is two binary searches and the segments between them;
+- gaps are the segments nobody covers, found once at build time.
+
+So queries cost O(log n) (plus the size of the answer) over months of rotations.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import polars as pl
+
+from . import api, pagerduty, progress, timeutil
+
+if TYPE_CHECKING:
+    import httpx
+
+GROUP_COLUMNS = {"schedule": "schedule", "policy": "escalation_policy"}
+"""How entries can be grouped into timelines (CLI name -> column prefix)."""
+
+ENTRY_SCHEMA = {
+    "escalation_policy_id": pl.Utf8,
+    "escalation_policy": pl.Utf8,
+    "escalation_level": pl.Int64,
+    "schedule_id": pl.Utf8,
+    "schedule": pl.Utf8,
+    "user_id": pl.Utf8,
+    "user": pl.Utf8,
+    "start": pl.Datetime("us", "UTC"),
+    "end": pl.Datetime("us", "UTC"),
+}
+
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+async def fetch_oncalls(  # noqa: PLR0913
+    account: pagerduty.Account,
+    since: datetime,
+    until: datetime,
+    *,
+    base_url: str = pagerduty.BASE_URL,
+    transport: httpx.AsyncBaseTransport | None = None,
+    task: progress.Task | None = None,
+) -> list[dict[str, Any]]:
+    """GET every on-call entry overlapping `[since, until)`, page by page.
+
+    Entries and bytes are counted towards `task`, if given.
+    """
+    budget = api.RateBudget(account.rate_per_second)
+    params = {
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "time_zone": "UTC",
+    }
+    async with api.make_client(
+        base_url,
+        account.headers,
+        max_connections=account.max_connections,
+        transport=transport,
+    ) as client:
+        return [
+            record
+            async for page in pagerduty.paginate(
+                client, "oncalls", budget, params, task=task
+            )
+            for record in page
+        ]
+
+
+def entries(
+    records: list[dict[str, Any]], since: datetime, until: datetime
+) -> pl.DataFrame:
+    """Flatten `/oncalls` records into one row per entry, clipped to the window.
+
+    Entries without a start or end (permanently on call) span the whole window.
+    """
+    if not records:
+        return pl.DataFrame(schema=ENTRY_SCHEMA)
+    raw = pl.DataFrame(records, infer_schema_length=None)
+
+    def ref(column: str, field: str) -> pl.Expr:
+        if column not in raw.columns or not isinstance(raw.schema[column], pl.Struct):
+            return pl.lit(None, pl.Utf8)
+        return pl.col(column).struct.field(field)
+
+    window_start = pl.lit(since).dt.convert_time_zone(timeutil.UTC)
+    window_end = pl.lit(until).dt.convert_time_zone(timeutil.UTC)
+
+    def stamp(column: str, default: pl.Expr) -> pl.Expr:
+        if column not in raw.columns:
+            return default
+        return timeutil.column_to_utc(raw, column).fill_null(default)
+
+    return (
+        raw.select(
+            ref("escalation_policy", "id").alias("escalation_policy_id"),
+            ref("escalation_policy", "summary").alias("escalation_policy"),
+            (
+                pl.col("escalation_level")
+                if "escalation_level" in raw.columns
+                else pl.lit(None)
+            ).cast(pl.Int64),
+            ref("schedule", "id").alias("schedule_id"),
+            ref("schedule", "summary").alias("schedule"),
+            ref("user", "id").alias("user_id"),
+            ref("user", "summary").alias("user"),
+            pl.max_horizontal(stamp("start", window_start), window_start).alias(
+                "start"
+            ),
+            pl.min_horizontal(stamp("end", window_end), window_end).alias("end"),
+        )
+        .cast({"start": ENTRY_SCHEMA["start"], "end": ENTRY_SCHEMA["end"]})
+        .filter(pl.col("start") < pl.col("end"))
+    )
+
+
+def _micros(values: pl.Series | datetime) -> np.ndarray | int:
+    """Return timestamps as integer microseconds since the epoch (UTC).
+
+    >>> _micros(datetime(2024, 1, 1, 0, 0, 0, 1, tzinfo=UTC))
+    1704067200000001
+    """
+    if isinstance(values, datetime):  # exact, unlike a float `timestamp()`
+        return (values - EPOCH) // timedelta(microseconds=1)
+    return values.dt.epoch("us").to_numpy()
+
+
+class Timeline:
+    """Entries of one schedule / policy, as segments of constant coverage."""
+
+    def __init__(self, frame: pl.DataFrame, since: datetime, until: datetime) -> None:
+        """Index `frame`'s entries (each `[start, end)`) over the window."""
+        self.frame = frame
+        self.since, self.until = _micros(since), _micros(until)
+        starts, ends = _micros(frame["start"]), _micros(frame["end"])
+        self.bounds = np.unique(
+            np.concatenate([starts, ends, [self.since, self.until]])
+        )
+        # entry i covers segments [first[i], last[i]) of `bounds`
+        first = np.searchsorted(self.bounds, starts)
+        last = np.searchsorted(self.bounds, ends)
+        spans = last - first
+        entry_ids = np.repeat(np.arange(len(frame)), spans)
+        segment_ids = np.repeat(first - np.cumsum(spans) + spans, spans) + np.arange(
+            spans.sum()
+        )
+        order = np.argsort(segment_ids, kind="stable")
+        self.entries = entry_ids[order]
+        counts = np.bincount(segment_ids, minlength=len(self.bounds) - 1)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        empty = np.flatnonzero(counts == 0)
+        self.gap_starts = self.bounds[empty]
+        self.gap_ends = self.bounds[empty + 1]
+
+    def at(self, moment: datetime) -> pl.DataFrame:
+        """Return the entries covering `moment`."""
+        t = _micros(moment)
+        if not self.since <= t < self.until:
+            return self.frame.clear()
+        segment = int(np.searchsorted(self.bounds, t, side="right")) - 1
+        return self.frame[
+            self.entries[self.offsets[segment] : self.offsets[segment + 1]]
+        ]
+
+    def during(self, start: datetime, end: datetime) -> pl.DataFrame:
+        """Return the entries overlapping `[start, end)`."""
+        lo = max(int(np.searchsorted(self.bounds, _micros(start), side="right")) - 1, 0)
+        hi = min(
+            int(np.searchsorted(self.bounds, _micros(end), side="left")),
+            len(self.bounds) - 1,
+        )
+        found = np.unique(self.entries[self.offsets[lo] : self.offsets[hi]])
+        return self.frame[found]
+
+    def gaps(
+        self, start: datetime | None = None, end: datetime | None = None
+    ) -> list[tuple[int, int]]:
+        """Return uncovered `[start, end)` spans (microseconds), clipped to a range."""
+        lo = self.since if start is None else max(self.since, _micros(start))
+        hi = self.until if end is None else min(self.until, _micros(end))
+        first = int(np.searchsorted(self.gap_ends, lo, side="right"))
+        last = int(np.searchsorted(self.gap_starts, hi, side="left"))
+        return [
+            (max(int(s), lo), min(int(e), hi))
+            for s, e in zip(
+                self.gap_starts[first:last], self.gap_ends[first:last], strict=True
+            )
+        ]
+
+    @property
+    def covered(self) -> float:
+        """Fraction of the window with someone on call."""
+        total = self.until - self.since
+        uncovered = int((self.gap_ends - self.gap_starts).sum())
+        return 1 - uncovered / total if total else 0.0
+
+
+@dataclass
+class Coverage:
+    """One `Timeline` per schedule or escalation policy, keyed by its id."""
+
+    timelines: dict[str, Timeline]
+    names: dict[str, str]
+    """Display name of each group (its summary; ids are what tell groups apart)."""
+
+    @classmethod
+    def build(
+        cls, frame: pl.DataFrame, since: datetime, until: datetime, by: str = "schedule"
+    ) -> Coverage:
+        """Group entries by `by` (see `GROUP_COLUMNS`) and index each group."""
+        column = GROUP_COLUMNS[by]
+        grouped = frame.filter(pl.col(f"{column}_id").is_not_null()).partition_by(
+            [f"{column}_id"], as_dict=True, maintain_order=True
+        )
+        return cls(
+            {
+                str(key[0]): Timeline(group.sort("start"), since, until)
+                for key, group in grouped.items()
+            },
+            {
+                str(key[0]): next(
+                    (str(name) for name in group[column] if name is not None),
+                    str(key[0]),
+                )
+                for key, group in grouped.items()
+            },
+        )
+
+    def at(self, moment: datetime) -> pl.DataFrame:
+        """Return who was on call at `moment`, in every group."""
+        return pl.concat(
+            [pl.DataFrame(schema=ENTRY_SCHEMA)]
+            + [timeline.at(moment) for timeline in self.timelines.values()]
+        )
+
+    def gaps(
+        self, start: datetime | None = None, end: datetime | None = None
+    ) -> pl.DataFrame:
+        """Return every uncovered span in every group."""
+        rows = [
+            {"group_id": key, "group": self.names[key], "gap_start": s, "gap_end": e}
+            for key, timeline in self.timelines.items()
+            for s, e in timeline.gaps(start, end)
+        ]
+        frame = pl.DataFrame(
+            rows,
+            schema={
+                "group_id": pl.Utf8,
+                "group": pl.Utf8,
+                "gap_start": pl.Int64,
+                "gap_end": pl.Int64,
+            },
+        )
+        return frame.with_columns(
+            pl.col("gap_start", "gap_end").cast(pl.Datetime("us", "UTC")),
+        ).with_columns((pl.col("gap_end") - pl.col("gap_start")).alias("duration"))
+
+    def summary(self) -> pl.DataFrame:
+        """Return entries, distinct users, coverage and gap count per group."""
+        return pl.DataFrame(
+            [
+                {
+                    "group_id": key,
+                    "group": self.names[key],
+                    "entries": timeline.frame.height,
+                    "users": timeline.frame["user_id"].n_unique(),
+                    "covered": round(timeline.covered, 4),
+                    "gaps": len(timeline.gap_starts),
+                }
+                for key, timeline in self.timelines.items()
+            ],
+            schema={
+                "group_id": pl.Utf8,
+                "group": pl.Utf8,
+                "entries": pl.Int64,
+                "users": pl.Int64,
+                "covered": pl.Float64,
+                "gaps": pl.Int64,
+            },
+        )
+
+
+def pull(  # noqa: PLR0913
+    account: pagerduty.Account,
+    since: datetime,
+    until: datetime,
+    *,
+    base_url: str = pagerduty.BASE_URL,
+    transport: httpx.AsyncBaseTransport | None = None,
+    task: progress.Task | None = None,
+) -> pl.DataFrame:
+    """Blocking: fetch and flatten the on-call entries of `[since, until)`."""
+    records = asyncio.run(
+        fetch_oncalls(
+            account, since, until, base_url=base_url, transport=transport, task=task
+        )
+    )
+    return entries(records, since, until)
@@ -0,0 +1,242 @@
+"""PagerDuty REST API pulls, across any number of accounts at once.
+
+Accounts are API keys declared in `.env` (see `data/template.env`):
+the two keys the notebooks use, plus any number of extra accounts as
+`PAGERDUTY_REST_API_KEY_<NAME>=...` (available as account `<name>`, lower-cased).
+
+A snapshot pulls the same endpoints for every account concurrently:
+each account has its own connection pool and rate budget,
+so the whole pull takes about as long as the slowest account, not the sum of them.
+Rows are tagged with their `account` and merged into one frame per endpoint,
+then stored under `data/no_sync/pagerduty/snapshots/<timestamp>/<endpoint>.parquet`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
+
+import dotenv
+import polars as pl
+
+from . import api, catalog, paths, progress
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+    from pathlib import Path
+
+    import httpx
+
+BASE_URL = "https://api.pagerduty.com"
+TOKEN_REQUEST_PREFIX = "Token token="  # nosec CWE-259  # noqa: S105
+PAGE_LIMIT = 100
+DEFAULT_RATE_PER_SECOND = 15.0
+"""Per-account requests/second; PagerDuty allows ~960 requests/minute per key."""
+
+DEFAULT_ENDPOINTS = ("users", "licenses", "license_allocations")
+SNAPSHOT_DIR = paths.NO_SYNC_DIR / "pagerduty" / "snapshots"
+
+ACCOUNT_ENV_KEYS = {
+    "personal": "PAGERDUTY_REST_API_KEY",
+    "example": "PAGERDUTY_API_CONCEPTS_EXAMPLE_KEY",
+}
+EXTRA_ACCOUNT_PREFIX = "PAGERDUTY_REST_API_KEY_"
+
+
+@dataclass(frozen=True)
+class Account:
+    """One PagerDuty API key, and how hard we may use it."""
+
+    name: str
+    api_key: str = field(repr=False)
+    rate_per_second: float = DEFAULT_RATE_PER_SECOND
+    max_connections: int = api.DEFAULT_MAX_CONNECTIONS
+
+    @property
+    def headers(self) -> dict[str, str]:
+        """Request headers authenticating as this account."""
+        return {
+            "Accept": "application/json",
+            "Authorization": TOKEN_REQUEST_PREFIX + self.api_key,
+            "Content-Type": "application/json",
+        }
+
+
+def load_accounts(env_file: Path = paths.ENV_FILE) -> dict[str, Account]:
+    """Return every account with a non-empty key in `env_file`, by name."""
+    values = dotenv.dotenv_values(env_file)
+    keys = {name: values.get(env_key) for name, env_key in ACCOUNT_ENV_KEYS.items()}
+    keys |= {
+        env_key.removeprefix(EXTRA_ACCOUNT_PREFIX).lower(): value
+        for env_key, value in values.items()
+        if env_key.startswith(EXTRA_ACCOUNT_PREFIX)
+    }
+    return {name: Account(name, key) for name, key in keys.items() if key}
+
+
+async def paginate(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    budget: api.RateBudget,
+    params: dict[str, Any] | None = None,
+    task: progress.Task | None = None,
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """Yield the records of `endpoint` a page at a time (classic offset pagination).
+
+    Records and bytes are counted towards `task`, if given; when the API sends a
+    `total`, the task's total becomes what it has counted so far plus that.
+    """
+    offset = 0
+    while True:
+        page = await api.get_json(
+            client,
+            f"/{endpoint}",
+            budget,
+            params={**(params or {}), "limit": PAGE_LIMIT, "offset": offset},
+            task=task,
+        )
+        records = page.get(endpoint, [])
+        if task is not None:
+            if offset == 0 and isinstance(page.get("total"), int):
+                task.total = task.units + page["total"]
+            task.advance(len(records))
+        yield records
+        if not page.get("more") or not records:
+            return
+        offset += len(records)
+
+
+async def pull_account(
+    account: Account,
+    endpoints: tuple[str, ...],
+    *,
+    base_url: str = BASE_URL,
+    transport: httpx.AsyncBaseTransport | None = None,
+    reporter: progress.Reporter | None = None,
+) -> dict[str, list[dict[str, Any]]]:
+    """Pull every endpoint for one account (concurrently, within its own budget).
+
+    Each endpoint reports its progress as a task of `reporter`, if given.
+    """
+    budget = api.RateBudget(account.rate_per_second)
+    async with api.make_client(
+        base_url,
+        account.headers,
+        max_connections=account.max_connections,
+        transport=transport,
+    ) as client:
+
+        async def pull(endpoint: str) -> list[dict[str, Any]]:
+            task = (
+                reporter.task(f"{account.name}/{endpoint}")
+                if reporter is not None
+                else None
+            )
+            records = [
+                record
+                async for page in paginate(client, endpoint, budget, task=task)
+                for record in page
+            ]
+            if task is not None:
+                task.finish()
+            return records
+
+        pulled = await asyncio.gather(*(pull(endpoint) for endpoint in endpoints))
+    return dict(zip(endpoints, pulled, strict=True))
+
+
+@dataclass
+class Snapshot:
+    """Merged frames per endpoint, plus any accounts that failed to pull."""
+
+    frames: dict[str, pl.DataFrame]
+    errors: dict[str, str]
+
+
+def snapshot(
+    accounts: list[Account],
+    endpoints: tuple[str, ...] = DEFAULT_ENDPOINTS,
+    *,
+    base_url: str = BASE_URL,
+    transport: httpx.AsyncBaseTransport | None = None,
+    reporter: progress.Reporter | None = None,
+) -> Snapshot:
+    """Pull `endpoints` for every account concurrently; merge rows tagged by account.
+
+    An account that fails (bad key, outage) is reported in `errors`
+    rather than failing the others.
+    """
+
+    async def pull_all() -> list[dict[str, list[dict[str, Any]]] | BaseException]:
+        return await asyncio.gather(
+            *(
+                pull_account(
+                    a,
+                    endpoints,
+                    base_url=base_url,
+                    transport=transport,
+                    reporter=reporter,
+                )
+                for a in accounts
+            ),
+            return_exceptions=True,
+        )
+
+    frames: dict[str, list[pl.DataFrame]] = {endpoint: [] for endpoint in endpoints}
+    errors: dict[str, str] = {}
+    for account, pulled in zip(accounts, asyncio.run(pull_all()), strict=True):
+        if isinstance(pulled, BaseException):
+            errors[account.name] = f"{type(pulled).__name__}: {pulled}"
+            continue
+        for endpoint, records in pulled.items():
+            if records:
+                frames[endpoint].append(
+                    pl.DataFrame(records, infer_schema_length=None).with_columns(
+                        pl.lit(account.name).alias("account")
+                    )
+                )
+    return Snapshot(
+        frames={
+            endpoint: pl.concat(parts, how="diagonal_relaxed")
+            for endpoint, parts in frames.items()
+            if parts
+        },
+        errors=errors,
+    )
+
+
+def save_snapshot(frames: dict[str, pl.DataFrame], root: Path = SNAPSHOT_DIR) -> Path:
+    """Store one Parquet file per endpoint in a new, timestamped snapshot directory.
+
+    Names have microsecond resolution, and a name already taken is never reused.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    while True:
+        directory = root / f"{datetime.now(UTC):%Y%m%dT%H%M%S%fZ}"
+        try:
+            directory.mkdir()
+            break
+        except FileExistsError:
+            continue
+    for endpoint, frame in frames.items():
+        frame.write_parquet(directory / f"{endpoint}.parquet")
+    return directory
+
+
+def list_snapshots(root: Path = SNAPSHOT_DIR) -> list[Path]:
+    """Return stored snapshot directories, oldest first."""
+    return sorted(p for p in root.glob("*") if p.is_dir()) if root.exists() else []
+
+
+for _endpoint in DEFAULT_ENDPOINTS:
+    catalog.register(
+        catalog.Dataset(
+            f"pd_{_endpoint}",
+            (f"no_sync/pagerduty/snapshots/*/{_endpoint}.parquet",),
+            loader=pl.scan_parquet,
+            reads=catalog.latest,
+            description=f"Latest PagerDuty {_endpoint} snapshot",
+        )
+    )
@@ -0,0 +1,18 @@
+"""Default locations of the project's data, relative to the repo root.
+
+The CLI is expected to be run from the repo root (as the `justfile` does);
+every command that touches these also accepts an explicit path.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+DATA_DIR = Path("data")
+"""Version-controlled sample data (`penguins.csv`, `stocks/`, ...)."""
+
+NO_SYNC_DIR = DATA_DIR / "no_sync"
+"""Local-only data: API pulls, caches, derived files. Not for committing."""
+
+ENV_FILE = Path(".env")
+"""Secrets; copied from `data/template.env` by `just init`."""
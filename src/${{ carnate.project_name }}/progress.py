@@ -0,0 +1,311 @@
+"""Progress reporting fed by real work: units, bytes, rates and ETAs.
+
+Work code holds a `Task` and calls `task.advance(units, nbytes)` as it goes;
+that is two integer additions, cheap enough for hot loops and page callbacks.
+Rendering is someone else's job: a `Reporter` samples every task's counters
+on its own thread, at most `refresh_per_second` times a second, smoothing
+rows/s and bytes/s over the samples and deriving an ETA from whichever total
+is known (bytes first, then units).
+
+On a terminal the tasks are drawn as a live table (on stderr);
+anywhere else (CI logs, pipes) the reporter writes one NDJSON line per task
+every `ndjson_interval` seconds, plus a final line per task when it closes.
+
+    with progress.Reporter() as reporter:
+        task = reporter.task("users", total=10_000, unit="rows")
+        for page in pages:
+            task.advance(len(page), nbytes=len(raw))
+
+A task should be advanced from one thread (or one event loop) only.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import IO, Any
+
+from rich.console import Console
+from rich.live import Live
+from rich.table import Table
+
+MODES = ("auto", "tty", "ndjson", "off")
+DEFAULT_REFRESH_PER_SECOND = 8.0
+DEFAULT_NDJSON_INTERVAL = 1.0
+SPINNER_FRAMES = "⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"
+SMOOTHING = 0.3
+"""Weight of the newest sample in the exponentially smoothed rates."""
+
+
+class Task:
+    """Counters for one piece of work; advanced by the worker, read by the reporter."""
+
+    __slots__ = (
+        "done",
+        "finished_at",
+        "name",
+        "nbytes",
+        "started_at",
+        "total",
+        "total_bytes",
+        "unit",
+        "units",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        total: int | None = None,
+        total_bytes: int | None = None,
+        unit: str = "rows",
+    ) -> None:
+        """Start counting `unit`s (and bytes) of `name` towards optional totals."""
+        self.name = name
+        self.total = total
+        self.total_bytes = total_bytes
+        self.unit = unit
+        self.units = 0
+        self.nbytes = 0
+        self.done = False
+        self.started_at = time.perf_counter()
+        self.finished_at: float | None = None
+
+    def advance(self, units: int = 1, nbytes: int = 0) -> None:
+        """Count `units` more units and `nbytes` more bytes of work done."""
+        self.units += units
+        self.nbytes += nbytes
+
+    def finish(self) -> None:
+        """Mark the task complete (its rates and elapsed time freeze)."""
+        if not self.done:
+            self.done = True
+            self.finished_at = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the task started (until it finished)."""
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+
+@dataclass
+class _Rates:
+    """Smoothed throughput of one task, updated once per sample."""
+
+    units: int = 0
+    nbytes: int = 0
+    sampled_at: float = 0.0
+    units_per_s: float = 0.0
+    bytes_per_s: float = 0.0
+
+
+def _smooth(previous: float, latest: float) -> float:
+    return latest if not previous else SMOOTHING * latest + (1 - SMOOTHING) * previous
+
+
+def eta(task: Task, units_per_s: float, bytes_per_s: float) -> float | None:
+    """Seconds left for `task` at the given rates, if a total is known.
+
+    >>> task = Task("t", total=100, total_bytes=1_000)
+    >>> task.advance(50, nbytes=250)
+    >>> eta(task, units_per_s=10.0, bytes_per_s=25.0)
+    30.0
+    """
+    if task.done:
+        return 0.0
+    if task.total_bytes and bytes_per_s:
+        return max(task.total_bytes - task.nbytes, 0) / bytes_per_s
+    if task.total and units_per_s:
+        return max(task.total - task.units, 0) / units_per_s
+    return None
+
+
+def human_bytes(n: float) -> str:
+    """Format a byte count (or rate) with a binary prefix.
+
+    >>> human_bytes(512), human_bytes(3 * 1024**2)
+    ('512 B', '3.0 MiB')
+    """
+    for prefix in ("", "Ki", "Mi", "Gi"):
+        if abs(n) < 1024 or prefix == "Gi":  # noqa: PLR2004
+            return f"{n:.0f} B" if not prefix else f"{n:.1f} {prefix}B"
+        n /= 1024
+    return f"{n:.1f} TiB"  # unreachable
+
+
+class Reporter:
+    """Owns a set of tasks and shows their progress from a background thread."""
+
+    def __init__(
+        self,
+        mode: str = "auto",
+        *,
+        stream: IO[str] | None = None,
+        refresh_per_second: float = DEFAULT_REFRESH_PER_SECOND,
+        ndjson_interval: float = DEFAULT_NDJSON_INTERVAL,
+    ) -> None:
+        """Report to `stream` (default stderr) as a live table, NDJSON, or not at all.
+
+        `auto` picks the table on a terminal and NDJSON anywhere else.
+        """
+        if mode not in MODES:
+            msg = f"mode must be one of {MODES}, not {mode!r}"
+            raise ValueError(msg)
+        self.stream = stream or sys.stderr
+        if mode == "auto":
+            mode = "tty" if self.stream.isatty() else "ndjson"
+        self.mode = mode
+        self.interval = (
+            1 / refresh_per_second if mode == "tty" else max(ndjson_interval, 0.05)
+        )
+        self.tasks: list[Task] = []
+        self._rates: dict[int, _Rates] = {}
+        self._lock = threading.Lock()  # guards `tasks` (not the counters)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._live: Live | None = None
+
+    def task(
+        self,
+        name: str,
+        total: int | None = None,
+        total_bytes: int | None = None,
+        unit: str = "rows",
+    ) -> Task:
+        """Add and return a new task to advance."""
+        task = Task(name, total, total_bytes, unit)
+        with self._lock:
+            self.tasks.append(task)
+            self._rates[id(task)] = _Rates(sampled_at=task.started_at)
+        return task
+
+    def start(self) -> Reporter:
+        """Start the render thread."""
+        if self.mode == "off" or self._thread is not None:
+            return self
+        if self.mode == "tty":
+            self._live = Live(
+                self.table(),
+                console=Console(file=self.stream),
+                auto_refresh=False,
+                transient=True,
+            )
+            self._live.start()
+        self._thread = threading.Thread(target=self._run, name="progress", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Finish every task, render a last time and stop the render thread."""
+        with self._lock:
+            tasks = list(self.tasks)
+        for task in tasks:
+            task.finish()
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._sample()
+        if self._live is not None:
+            self._live.update(self.table(), refresh=True)
+            self._live.stop()
+            self._live = None
+        elif self.mode == "ndjson":
+            self._emit()
+
+    def __enter__(self) -> Reporter:  # noqa: PYI034
+        """Start reporting for the duration of a `with` block."""
+        return self.start()
+
+    def __exit__(self, *_: object) -> None:
+        """Stop reporting."""
+        self.stop()
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """Return every task's counters, rates and ETA as plain dicts."""
+        with self._lock:
+            tasks = list(self.tasks)
+        rows = []
+        for task in tasks:
+            rates = self._rates[id(task)]
+            if task.done:  # whole-run averages once there is nothing left to smooth
+                seconds = task.elapsed or float("inf")
+                units_per_s, bytes_per_s = task.units / seconds, task.nbytes / seconds
+            else:
+                units_per_s, bytes_per_s = rates.units_per_s, rates.bytes_per_s
+            rows.append(
+                {
+                    "task": task.name,
+                    "unit": task.unit,
+                    "done": task.done,
+                    "units": task.units,
+                    "total": task.total,
+                    "bytes": task.nbytes,
+                    "total_bytes": task.total_bytes,
+                    "units_per_s": round(units_per_s, 1),
+                    "bytes_per_s": round(bytes_per_s, 1),
+                    "elapsed_s": round(task.elapsed, 3),
+                    "eta_s": _round(eta(task, units_per_s, bytes_per_s)),
+                }
+            )
+        return rows
+
+    def table(self) -> Table:
+        """Render the current snapshot as a rich table."""
+        table = Table(box=None, header_style="bold")
+        for column in ("task", "progress", "rate", "bytes/s", "elapsed", "eta"):
+            table.add_column(column, justify="left" if column == "task" else "right")
+        spinner = SPINNER_FRAMES[int(time.monotonic() * 10) % len(SPINNER_FRAMES)]
+        for row in self.snapshot():
+            done = f"{row['units']:,}"
+            if row["total"] is not None:
+                done += f"/{row['total']:,}"
+            eta_s = row["eta_s"]
+            table.add_row(
+                ("[green]✓[/green] " if row["done"] else f"[cyan]{spinner}[/cyan] ")
+                + row["task"],
+                f"{done} {row['unit']}",
+                f"{row['units_per_s']:,.0f} {row['unit']}/s",
+                f"{human_bytes(row['bytes_per_s'])}/s" if row["bytes"] else "",
+                f"{row['elapsed_s']:.1f}s",
+                "" if eta_s is None else f"{eta_s:.0f}s",
+            )
+        return table
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+            if self._live is not None:
+                self._live.update(self.table(), refresh=True)
+            else:
+                self._emit()
+
+    def _sample(self) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            tasks = list(self.tasks)
+        for task in tasks:
+            rates = self._rates[id(task)]
+            units, nbytes = task.units, task.nbytes
+            seconds = now - rates.sampled_at
+            if seconds <= 0 or task.done:
+                continue
+            rates.units_per_s = _smooth(
+                rates.units_per_s, (units - rates.units) / seconds
+            )
+            rates.bytes_per_s = _smooth(
+                rates.bytes_per_s, (nbytes - rates.nbytes) / seconds
+            )
+            rates.units, rates.nbytes, rates.sampled_at = units, nbytes, now
+
+    def _emit(self) -> None:
+        for row in self.snapshot():
+            self.stream.write(json.dumps(row) + "\n")
+        self.stream.flush()
+
+
+def _round(value: float | None) -> float | None:
+    return None if value is None else round(value, 1)
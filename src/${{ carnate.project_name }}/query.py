@@ -0,0 +1,91 @@
+"""SQL over the project's datasets, executed lazily with polars.
+
+Every catalog dataset, and every dataset ingested to Parquet (see `ingest`),
+is registered as a *lazy* table in a polars `SQLContext`.
+A query is therefore compiled into a lazy plan: the optimiser pushes column
+selections and filters down into the file scans (only the needed columns and,
+for Parquet, row groups are read) and the plan is run on the streaming engine,
+so queries over larger-than-memory Parquet inputs run in bounded memory.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import polars as pl
+
+from . import catalog, memory, paths
+
+if TYPE_CHECKING:
+    from .cache import ResultCache
+
+PARQUET_SUBDIR = Path("no_sync") / "parquet"
+"""Where `ingest` writes by default, relative to the data dir."""
+
+
+def tables(
+    data_dir: Path = paths.DATA_DIR, parquet_dir: Path | None = None
+) -> dict[str, pl.LazyFrame]:
+    """Return every queryable table, by name, as a lazy frame.
+
+    Ingested Parquet datasets (`<parquet_dir>/dataset=<name>/`) take precedence
+    over catalog datasets of the same name: they are the production-sized copies.
+    """
+    frames: dict[str, pl.LazyFrame] = {}
+    for name, dataset in catalog.DATASETS.items():
+        if dataset.sources(data_dir):
+            frames[name] = catalog.scan(name, data_dir, build_stale=False)
+
+    parquet_dir = parquet_dir or data_dir / PARQUET_SUBDIR
+    for partition in sorted(parquet_dir.glob("dataset=*")):
+        if any(partition.glob("*.parquet")):
+            name = partition.name.removeprefix("dataset=")
+            frames[name] = pl.scan_parquet(partition / "*.parquet")
+    return frames
+
+
+def compile_sql(
+    sql: str, data_dir: Path = paths.DATA_DIR, parquet_dir: Path | None = None
+) -> pl.LazyFrame:
+    """Compile `sql` against the project's tables into a lazy (unexecuted) plan."""
+    context = pl.SQLContext(frames=tables(data_dir, parquet_dir))
+    return context.execute(sql, eager=False)
+
+
+def run(
+    sql: str,
+    data_dir: Path = paths.DATA_DIR,
+    parquet_dir: Path | None = None,
+    cache: ResultCache | None = None,
+) -> pl.DataFrame:
+    """Run `sql` on the streaming engine and return the result.
+
+    With a `cache`, a query whose optimised plan and inputs are unchanged since
+    it last ran is answered from the cache instead.
+    Under a memory budget the plan may run eagerly or spill (see `memory`).
+
+    >>> run("SELECT variety, COUNT(*) AS n FROM iris GROUP BY variety ORDER BY variety")  # doctest: +SKIP
+    """
+    plan = compile_sql(sql, data_dir, parquet_dir)
+    if cache is not None:
+        return cache.collect(plan)
+    return memory.collect(plan)
+
+
+def sink(
+    sql: str,
+    output: Path,
+    data_dir: Path = paths.DATA_DIR,
+    parquet_dir: Path | None = None,
+) -> None:
+    """Run `sql` and stream its result straight into a Parquet file.
+
+    The result never has to fit in memory, as long as the plan is streamable.
+    """
+    plan = compile_sql(sql, data_dir, parquet_dir)
+    try:
+        plan.sink_parquet(output)
+    except pl.InvalidOperationError:
+        # e.g. a sort or join the streaming sink can't do yet
+        plan.collect(streaming=True).write_parquet(output)
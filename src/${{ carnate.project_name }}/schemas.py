@@ -0,0 +1,128 @@
+"""Registered schemas for the project's CSV inputs.
+
+A schema pins the dtypes polars should use when reading a family of files
+(rather than inferring from a sample of rows) and the clean-up every notebook would
+otherwise repeat: e.g. the stocks files store dates as `%m/%d/%Y` strings and volumes
+and prices as pretty-printed `"9,337,395"`/`"6,803.56"` strings.
+
+Files that match no registered schema are read with polars' own inference.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from typing import TYPE_CHECKING
+
+import polars as pl
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+
+@dataclass(frozen=True)
+class Schema:
+    """How to read (and clean) every CSV whose name matches `pattern`."""
+
+    name: str
+    pattern: str
+    dtypes: dict[str, type[pl.DataType] | pl.DataType] = field(default_factory=dict)
+    null_values: tuple[str, ...] = ()
+    transforms: Callable[[Path, list[str]], list[pl.Expr]] | None = None
+    """Given the file and its header, the expressions that clean it up."""
+
+    def matches(self, path: Path) -> bool:
+        """Whether `path` belongs to this schema's family of files."""
+        return fnmatch(path.name, self.pattern)
+
+
+def _stock_transforms(path: Path, columns: list[str]) -> list[pl.Expr]:
+    """Parse dates, prices and volumes, and tag rows with the file's ticker.
+
+    Index files have no `Volume`; it is added as null so every ticker shares a schema.
+    """
+    volume = (
+        pl.col("Volume").str.replace_all(",", "").cast(pl.UInt64)
+        if "Volume" in columns
+        else pl.lit(None, pl.UInt64).alias("Volume")
+    )
+    return [
+        pl.col("Date").str.strptime(pl.Date, "%m/%d/%Y"),
+        pl.col("Open", "High", "Low", "Close")
+        .str.replace_all(",", "")
+        .cast(pl.Float64),
+        volume,
+        pl.lit(path.stem.removeprefix("stock_")).alias("Ticker"),
+    ]
+
+
+SCHEMAS: dict[str, Schema] = {
+    schema.name: schema
+    for schema in (
+        Schema(
+            name="stocks",
+            pattern="stock_*.csv",
+            dtypes=dict.fromkeys(
+                ("Date", "Open", "High", "Low", "Close", "Volume"), pl.Utf8
+            ),
+            transforms=_stock_transforms,
+        ),
+        Schema(
+            name="penguins",
+            pattern="penguins.csv",
+            dtypes={"species": pl.Categorical, "island": pl.Categorical},
+            null_values=("NA",),
+        ),
+        Schema(
+            name="iris",
+            pattern="iris.csv",
+            dtypes={"variety": pl.Categorical},
+        ),
+        Schema(
+            name="insurance",
+            pattern="insurance.csv",
+            dtypes={"sex": pl.Categorical, "smoker": pl.Categorical},
+        ),
+        Schema(
+            name="taxi_zones",
+            pattern="taxi+_zone_lookup.csv",
+            dtypes={"LocationID": pl.UInt16},
+        ),
+    )
+}
+"""All registered schemas, by name."""
+
+
+def schema_for(path: Path) -> Schema | None:
+    """Return the registered schema matching `path`, if any."""
+    return next((s for s in SCHEMAS.values() if s.matches(path)), None)
+
+
+def dataset_name(path: Path) -> str:
+    """Name of the dataset `path` belongs to: its schema's name, else its stem.
+
+    >>> from pathlib import Path
+    >>> dataset_name(Path("data/stocks/stock_zoom.csv"))
+    'stocks'
+    >>> dataset_name(Path("data/no_sync/other.csv"))
+    'other'
+    """
+    schema = schema_for(path)
+    return schema.name if schema is not None else path.stem
+
+
+def scan(path: Path, schema: Schema | None = None) -> pl.LazyFrame:
+    """Lazily read a CSV, applying its registered (or the given) schema."""
+    schema = schema or schema_for(path)
+    if schema is None:
+        return pl.scan_csv(path, infer_schema_length=10_000)
+    frame = pl.scan_csv(
+        path,
+        schema_overrides=schema.dtypes,
+        null_values=list(schema.null_values) or None,
+        infer_schema_length=10_000,
+    )
+    if schema.transforms is not None:
+        frame = frame.with_columns(schema.transforms(path, frame.columns))
+    return frame
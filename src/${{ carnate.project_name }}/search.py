@@ -0,0 +1,211 @@
+"""Persistent inverted index for ranked full-text search over ticket text.
+
+The index is stored in compressed-sparse-row form, as plain NumPy arrays:
+
+- `vocab.npy`: every term, sorted (so a term is found by binary search);
+- `offsets.npy`: term `t`'s postings are `docs[offsets[t]:offsets[t + 1]]`;
+- `docs.npy` / `tfs.npy`: document numbers and term frequencies, per posting;
+- `doc_ids.npy` / `doc_lengths.npy`: the ticket id and token count of each document.
+
+Arrays are memory-mapped on load, so opening the index costs the same however
+large it is, and a query only touches the postings of its own terms.
+Results are ranked with BM25.
+
+Building and updating are vectorised: tokenising runs as polars string
+expressions, and an update re-tokenises only the changed tickets, sorts just
+their postings, and merges them into the existing (already sorted) arrays.
+That merge is one linear copy of the arrays, with no re-sort of the postings
+kept; the index is then rewritten whole, as every `indexes.ArrayIndex` is.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+import polars as pl
+
+from .indexes import ArrayIndex
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+TOKEN_PATTERN = r"[a-z0-9]{2,}"  # noqa: S105
+STOP_WORDS = frozenset(
+    {
+        "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in",
+        "is", "it", "of", "on", "or", "our", "that", "the", "this", "to", "was", "we",
+        "were", "will", "with", "you", "your",
+    }
+)  # fmt: skip
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+def tokenize(text: str) -> list[str]:
+    """Split text into index terms (lower-cased, alphanumeric, no stop words).
+
+    >>> tokenize("The pager didn't fire for SEV-1!")
+    ['pager', 'didn', 'fire', 'sev']
+    """
+    terms = re.findall(TOKEN_PATTERN, text.lower())
+    return [term for term in terms if term not in STOP_WORDS]
+
+
+def _tokens(text: pl.Expr) -> pl.Expr:
+    """Tokenise like `tokenize` does, but as a (vectorised) expression."""
+    return text.str.to_lowercase().str.extract_all(TOKEN_PATTERN).alias("term")
+
+
+@dataclass(frozen=True)
+class Hit:
+    """One ranked search result."""
+
+    doc_id: str
+    score: float
+
+
+class SearchIndex(ArrayIndex):
+    """Inverted index over the text `fields` of documents keyed by `id_column`."""
+
+    names = ("vocab", "offsets", "docs", "tfs", "doc_ids", "doc_lengths")
+
+    def __init__(self, root: Path, id_column: str, fields: tuple[str, ...]) -> None:
+        """Open (or prepare) the index stored under `root`."""
+        super().__init__(root)
+        self.id_column = id_column
+        self.fields = fields
+
+    def empty(self) -> dict[str, np.ndarray]:
+        """Return an index of no documents."""
+        return {
+            "vocab": np.array([], dtype=str),
+            "offsets": np.zeros(1, dtype=np.int64),
+            "docs": np.array([], dtype=np.uint32),
+            "tfs": np.array([], dtype=np.uint32),
+            "doc_ids": np.array([], dtype=str),
+            "doc_lengths": np.array([], dtype=np.float64),
+        }
+
+    def __len__(self) -> int:
+        """Return the number of indexed documents."""
+        return len(self.arrays["doc_ids"])
+
+    def search(self, query: str, limit: int = 10) -> list[Hit]:
+        """Return up to `limit` documents matching any query term, best first (BM25)."""
+        arrays = self.arrays
+        vocab, offsets = arrays["vocab"], arrays["offsets"]
+        n_docs = len(arrays["doc_ids"])
+        if n_docs == 0:
+            return []
+        lengths = arrays["doc_lengths"]
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(lengths.mean(), 1.0))
+        scores = np.zeros(n_docs)
+        for term in set(tokenize(query)):
+            t = int(np.searchsorted(vocab, term))
+            if t == len(vocab) or vocab[t] != term:
+                continue
+            docs = arrays["docs"][offsets[t] : offsets[t + 1]]
+            tfs = arrays["tfs"][offsets[t] : offsets[t + 1]].astype(np.float64)
+            idf = np.log1p((n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * tfs * (BM25_K1 + 1) / (tfs + norm[docs])
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > limit:
+            matched = matched[np.argpartition(-scores[matched], limit)[:limit]]
+        ranked = matched[np.argsort(-scores[matched], kind="stable")]
+        return [Hit(str(arrays["doc_ids"][d]), float(scores[d])) for d in ranked]
+
+    def rebuild(self, frame: pl.DataFrame) -> None:
+        """Index `frame` from scratch."""
+        self._arrays = self.empty()
+        self.update(frame)
+
+    def update(self, changed: pl.DataFrame) -> None:
+        """Re-index the documents in `changed` (new or modified), keeping the rest."""
+        fields = [f for f in self.fields if f in changed.columns]
+        if changed.is_empty() or not fields:
+            return
+        old = self.arrays
+
+        # stable document numbers: known ids keep theirs, new ids are appended
+        changed_ids = changed[self.id_column].cast(pl.Utf8).to_numpy().astype(str)
+        doc_ids = np.asarray(old["doc_ids"], dtype=str)
+        known = dict(zip(doc_ids.tolist(), range(len(doc_ids)), strict=True))
+        new_ids = [i for i in dict.fromkeys(changed_ids.tolist()) if i not in known]
+        doc_ids = np.concatenate([doc_ids, np.asarray(new_ids, dtype=str)])
+        known.update(
+            zip(new_ids, range(len(doc_ids) - len(new_ids), len(doc_ids)), strict=True)
+        )
+
+        postings = (
+            changed.select(
+                pl.col(self.id_column).cast(pl.Utf8).alias("id"),
+                _tokens(
+                    pl.concat_str(
+                        [pl.col(f).cast(pl.Utf8) for f in fields],
+                        separator=" ",
+                        ignore_nulls=True,
+                    )
+                ),
+            )
+            .explode("term")
+            .drop_nulls("term")
+            .filter(~pl.col("term").is_in(list(STOP_WORDS)))
+            .group_by("id", "term")
+            .len()
+        )
+        new_docs = np.array(
+            [known[i] for i in postings["id"].to_list()], dtype=np.int64
+        )
+        new_terms = postings["term"].to_numpy().astype(str)
+        new_tfs = postings["len"].to_numpy().astype(np.int64)
+
+        # terms not seen before are inserted into the sorted vocabulary;
+        # an old term's number moves up by the number inserted before it
+        old_vocab = np.asarray(old["vocab"], dtype=str)
+        unique_terms = np.unique(new_terms)
+        at = np.searchsorted(old_vocab, unique_terms)
+        seen = at < len(old_vocab)
+        seen[seen] = old_vocab[at[seen]] == unique_terms[seen]
+        vocab = np.insert(
+            old_vocab.astype(np.result_type(old_vocab, unique_terms)),
+            at[~seen],
+            unique_terms[~seen],
+        )
+        shift = np.cumsum(np.bincount(at[~seen], minlength=len(old_vocab) + 1))
+        renumbered = np.arange(len(old_vocab)) + shift[:-1]
+
+        # the old postings, minus those of the changed documents, stay sorted
+        changed_docs = np.array([known[i] for i in changed_ids.tolist()])
+        old_docs = np.asarray(old["docs"], dtype=np.int64)
+        keep = ~np.isin(old_docs, changed_docs)
+        old_terms = np.repeat(renumbered, np.diff(old["offsets"]))[keep]
+        old_docs = old_docs[keep]
+        old_tfs = np.asarray(old["tfs"], dtype=np.int64)[keep]
+
+        # sort only the new postings, then merge them in by (term, doc)
+        terms = np.searchsorted(vocab, new_terms)
+        order = np.lexsort((new_docs, terms))
+        terms, new_docs, new_tfs = terms[order], new_docs[order], new_tfs[order]
+        n_docs = len(doc_ids)
+        at = np.searchsorted(old_terms * n_docs + old_docs, terms * n_docs + new_docs)
+        terms = np.insert(old_terms, at, terms)
+
+        lengths = np.zeros(n_docs, dtype=np.float64)
+        lengths[: len(old["doc_lengths"])] = old["doc_lengths"]
+        lengths[changed_docs] = 0
+        np.add.at(lengths, new_docs, new_tfs)
+        self._save(
+            {
+                "vocab": vocab,
+                "offsets": np.concatenate(
+                    [[0], np.cumsum(np.bincount(terms, minlength=len(vocab)))]
+                ),
+                "docs": np.insert(old_docs, at, new_docs).astype(np.uint32),
+                "tfs": np.insert(old_tfs, at, new_tfs).astype(np.uint32),
+                "doc_ids": doc_ids,
+                "doc_lengths": lengths,
+            }
+        )
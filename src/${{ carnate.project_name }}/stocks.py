@@ -0,0 +1,280 @@
+"""Cross-ticker returns, covariance and correlation, on one dense NumPy array.
+
+Every `stock_*.csv` is read with its registered schema and the tickers are
+aligned on `Date` into a days x tickers array of prices (NaN where a ticker
+didn't trade, or wasn't listed yet).
+Log returns are one `np.diff` of the log of that array.
+
+The covariance and correlation of every pair of tickers come out of a handful
+of matrix products, never a Python loop over pairs.
+Missing values are handled pairwise (as pandas does): each pair uses the days
+on which *both* tickers have a return.
+With `M` the 0/1 mask of valid returns and `X` the returns with NaN set to 0,
+everything a pair needs is a sum over those shared days:
+
+    n = M^T M    sum x = X^T M    sum xy = X^T X    sum x^2 = (X^2)^T M
+
+For thousands of tickers the products are computed a block of `block` tickers
+against another at a time, so the intermediates stay `block x block` and
+only the result matrices are full size.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import polars as pl
+
+from . import paths, schemas
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from pathlib import Path
+
+STOCKS_DIR = paths.DATA_DIR / "stocks"
+PATTERN = "stock_*.csv"
+DEFAULT_BLOCK = 512
+"""Tickers per block: each block product holds `block^2` floats per sum."""
+MIN_PERIODS = 20
+"""Pairs sharing fewer returns than this get NaN rather than a noisy estimate."""
+
+
+@dataclass
+class Returns:
+    """Log returns of many tickers, aligned on date (rows) and ticker (columns)."""
+
+    dates: np.ndarray
+    """Date each return ends on, ascending (`datetime64[D]`)."""
+    tickers: list[str]
+    values: np.ndarray
+    """`len(dates) x len(tickers)` log returns; NaN where either price is missing."""
+
+
+@dataclass
+class Moments:
+    """Pairwise covariance and correlation of every ticker with every other."""
+
+    tickers: list[str]
+    cov: np.ndarray
+    corr: np.ndarray
+    periods: np.ndarray
+    """Returns each pair had in common."""
+
+
+def prices(data_dir: Path = STOCKS_DIR, column: str = "Close") -> pl.DataFrame:
+    """Return one `column` per ticker, aligned on an ascending `Date`."""
+    sources = sorted(data_dir.glob(PATTERN))
+    if not sources:
+        msg = f"No {PATTERN} files in {data_dir}"
+        raise FileNotFoundError(msg)
+    long = pl.concat(
+        [
+            schemas.scan(source).select(
+                "Date", "Ticker", pl.col(column).cast(pl.Float64)
+            )
+            for source in sources
+        ]
+    ).collect()
+    return long.pivot(values=column, index="Date", columns="Ticker").sort("Date")
+
+
+def log_returns(frame: pl.DataFrame) -> Returns:
+    """Return the log returns of a `prices` frame (Date, then one column per ticker).
+
+    >>> frame = pl.DataFrame({"Date": [1, 2, 3], "a": [1.0, 2.0, 4.0]})
+    >>> log_returns(frame).values.round(4).ravel().tolist()
+    [0.6931, 0.6931]
+    """
+    values = frame.drop("Date").to_numpy().astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logs = np.log(np.where(values > 0, values, np.nan))
+    return Returns(
+        dates=frame["Date"].to_numpy()[1:],
+        tickers=[c for c in frame.columns if c != "Date"],
+        values=np.diff(logs, axis=0),
+    )
+
+
+def load(data_dir: Path = STOCKS_DIR, column: str = "Close") -> Returns:
+    """Return the aligned log returns of every ticker in `data_dir`."""
+    return log_returns(prices(data_dir, column))
+
+
+def _block_moments(
+    x_i: np.ndarray,
+    m_i: np.ndarray,
+    x_j: np.ndarray,
+    m_j: np.ndarray,
+    min_periods: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return covariance, correlation and shared periods of two column blocks."""
+    n = m_i.T @ m_j
+    sum_i, sum_j = x_i.T @ m_j, m_i.T @ x_j
+    sum_ij = x_i.T @ x_j
+    sum_ii, sum_jj = (x_i * x_i).T @ m_j, m_i.T @ (x_j * x_j)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        co = n * sum_ij - sum_i * sum_j  # n^2 x the (biased) covariance
+        cov = co / (n * (n - 1))
+        corr = co / np.sqrt((n * sum_ii - sum_i**2) * (n * sum_jj - sum_j**2))
+    too_few = n < max(min_periods, 2)
+    cov[too_few] = np.nan
+    corr[too_few] = np.nan
+    return cov, np.clip(corr, -1.0, 1.0), n
+
+
+def moments(
+    values: np.ndarray,
+    tickers: list[str],
+    *,
+    block: int = DEFAULT_BLOCK,
+    min_periods: int = MIN_PERIODS,
+) -> Moments:
+    """Return the pairwise covariance and correlation of `values`' columns.
+
+    >>> rng = np.random.default_rng(0)
+    >>> x = rng.normal(size=(500, 3))
+    >>> result = moments(x, ["a", "b", "c"], block=2)
+    >>> bool(np.allclose(result.corr, np.corrcoef(x, rowvar=False)))
+    True
+    """
+    mask = ~np.isnan(values)
+    filled = np.where(mask, values, 0.0)
+    mask = mask.astype(np.float64)
+    width = values.shape[1]
+    cov = np.empty((width, width))
+    corr = np.empty((width, width))
+    periods = np.empty((width, width), dtype=np.int64)
+    for start_i in range(0, width, block):
+        i = slice(start_i, start_i + block)
+        for start_j in range(start_i, width, block):  # upper triangle, mirrored
+            j = slice(start_j, start_j + block)
+            block_cov, block_corr, n = _block_moments(
+                filled[:, i], mask[:, i], filled[:, j], mask[:, j], min_periods
+            )
+            cov[i, j], corr[i, j], periods[i, j] = block_cov, block_corr, n
+            cov[j, i], corr[j, i], periods[j, i] = block_cov.T, block_corr.T, n.T
+    return Moments(tickers=tickers, cov=cov, corr=corr, periods=periods)
+
+
+def rolling(
+    returns: Returns,
+    window: int,
+    *,
+    step: int = 1,
+    block: int = DEFAULT_BLOCK,
+    min_periods: int | None = None,
+) -> Iterator[tuple[np.datetime64, Moments]]:
+    """Yield `(end date, moments)` over each `window` returns, every `step` days.
+
+    The last window (ending on the latest date) is always included.
+    """
+    if window < 2:  # noqa: PLR2004
+        msg = f"window must be at least 2 returns, not {window}"
+        raise ValueError(msg)
+    min_periods = min(window, MIN_PERIODS) if min_periods is None else min_periods
+    last = len(returns.dates)
+    ends = list(range(last, window - 1, -step))[::-1]
+    for end in ends:
+        yield (
+            returns.dates[end - 1],
+            moments(
+                returns.values[end - window : end],
+                returns.tickers,
+                block=block,
+                min_periods=min_periods,
+            ),
+        )
+
+
+def matrix_frame(
+    matrix: np.ndarray, tickers: list[str], decimals: int = 3
+) -> pl.DataFrame:
+    """Return a square matrix as a frame: a `ticker` column, then one per ticker."""
+    return pl.DataFrame(
+        {"ticker": tickers}
+        | {ticker: matrix[:, k].round(decimals) for k, ticker in enumerate(tickers)}
+    )
+
+
+def long_frame(result: Moments, date: np.datetime64 | None = None) -> pl.DataFrame:
+    """Return every pair (each once, `a <= b`) as a row: periods, cov and corr."""
+    upper_i, upper_j = np.triu_indices(len(result.tickers))
+    tickers = np.asarray(result.tickers, dtype=object)
+    frame = pl.DataFrame(
+        {
+            "a": tickers[upper_i].tolist(),
+            "b": tickers[upper_j].tolist(),
+            "periods": result.periods[upper_i, upper_j],
+            "cov": result.cov[upper_i, upper_j],
+            "corr": result.corr[upper_i, upper_j],
+        }
+    ).fill_nan(None)
+    if date is not None:
+        frame.insert_column(0, pl.Series("date", np.full(len(frame), date)))
+    return frame
+
+
+def synthetic(tickers: int, days: int = 252, seed: int = 0) -> np.ndarray:
+    """Return `days x tickers` random returns sharing one market factor, ~1% missing."""
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 0.01, size=(days, 1))
+    beta = rng.uniform(0.5, 1.5, size=(1, tickers))
+    values = market * beta + rng.normal(0, 0.01, size=(days, tickers))
+    values[rng.random((days, tickers)) < 0.01] = np.nan  # noqa: PLR2004
+    return values
+
+
+def _pairwise_loop(values: np.ndarray, pairs: list[tuple[int, int]]) -> None:
+    """Correlate each pair on its shared days with a Python loop (the baseline)."""
+    for i, j in pairs:
+        shared = ~np.isnan(values[:, i]) & ~np.isnan(values[:, j])
+        np.corrcoef(values[shared, i], values[shared, j])
+
+
+def benchmark(
+    tickers: int = 2_000, days: int = 252, baseline_pairs: int = 2_000
+) -> pl.DataFrame:
+    """Time every pair's correlation: blocked matrix products vs one pair at a time.
+
+    The per-pair loop runs on `baseline_pairs` pairs only and is extrapolated.
+    """
+    values = synthetic(tickers, days)
+    names = [f"t{k}" for k in range(tickers)]
+    pairs_total = tickers * (tickers + 1) // 2
+    timings: list[dict[str, Any]] = []
+
+    def timed(method: str, pairs: int, run: Callable[[], object]) -> None:
+        started = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - started
+        timings.append(
+            {
+                "method": method,
+                "pairs": pairs,
+                "seconds": seconds,
+                "pairs_per_s": pairs / seconds,
+            }
+        )
+
+    for block in (DEFAULT_BLOCK, 128):
+        timed(
+            f"matrix products, block {block}",
+            pairs_total,
+            lambda block=block: moments(values, names, block=block),
+        )
+    rng = np.random.default_rng(1)
+    sample = [
+        tuple(sorted(pair))
+        for pair in rng.integers(0, tickers, size=(baseline_pairs, 2)).tolist()
+    ]
+    timed("np.corrcoef per pair", len(sample), lambda: _pairwise_loop(values, sample))
+    baseline = timings[-1]["pairs_per_s"]
+    return pl.DataFrame(timings).with_columns(
+        (pairs_total / pl.col("pairs_per_s")).round(3).alias("all_pairs_s"),
+        (pl.col("pairs_per_s") / baseline).round(1).alias("speedup"),
+        pl.col("seconds").round(4),
+        pl.col("pairs_per_s").round(0),
+    )
@@ -0,0 +1,484 @@
+"""Local store of Zenq tickets, kept current by incremental (delta) syncs.
+
+Layout under `data/no_sync/zenq/`:
+
+- `rows/<n>.arrow`: the tickets, as uncompressed (memory-mappable) Arrow IPC
+  segments. Each sync appends one segment holding only the rows it changed,
+  with `rows/<n>.dead.npy`: the row ids (in earlier segments) of the versions
+  it supersedes. The current table is every row not superseded, and row ids
+  are positions in the segments taken in order.
+  Segments are merged into one once there are more than `COMPACT_SEGMENTS_AFTER`.
+- `indexes/<column>/<n>/`: secondary indexes over segment `n`'s rows (see
+  `indexes`): a hash index per `HASH_INDEX_COLUMNS` column (and the ticket id)
+  for lookups by value, a sorted index per `SORTED_INDEX_COLUMNS` column for
+  time ranges. A sync indexes only its own segment; a lookup consults every
+  segment's indexes and drops superseded rows, touching only the rows it returns.
+- `history/*.parquet`: append-only deltas; each sync adds only the rows it changed
+  (periodically merged into a single file so history stays compact).
+- `state.json`: the watermark (latest modification time stored, in UTC), the ids
+  stored at exactly that time, and sync stats.
+- `search/`: full-text index over `SEARCH_FIELDS` (see `search`), updated with
+  each sync's changed tickets only.
+
+A sync asks Zenq only for tickets modified since the watermark, then upserts them
+by ticket id. Zenq's filter is inclusive (`>=`), so the tickets at the watermark
+itself come back each time; the ids already stored there are dropped on arrival.
+Modification times are compared as UTC instants, whatever offset they are
+written with. Tickets closed upstream arrive as ordinary modifications.
+An optional reconcile pass also closes out any locally-open ticket that is no
+longer in Zenq's open queue (e.g. deleted, or closed without a modification).
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import polars as pl
+
+from . import catalog, paths, progress, timeutil, zenq
+from .indexes import HashIndex, SortedIndex
+from .search import SearchIndex
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+    import httpx
+
+ID_COLUMN = "id"
+MODIFIED_COLUMN = "last_modified_date"
+STATUS_COLUMN = "status"
+OPEN_STATUS = "Open"
+CLOSED_STATUS = "Closed"
+SYNCED_AT_COLUMN = "synced_at"
+SEARCH_FIELDS = ("subject", "description", "latest_customer_comment")
+EMAIL_COLUMN = "user_email"
+HASH_INDEX_COLUMNS = (EMAIL_COLUMN,)
+SORTED_INDEX_COLUMNS = (MODIFIED_COLUMN,)
+
+STORE_DIR = paths.NO_SYNC_DIR / "zenq"
+COMPACT_HISTORY_AFTER = 24
+"""Merge history deltas into one file once there are more than this many."""
+COMPACT_SEGMENTS_AFTER = 24
+"""Merge row segments (and their indexes) into one once there are more than this."""
+
+
+@dataclass
+class SyncResult:
+    """What one sync (or close-out) did to the store."""
+
+    fetched: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    closed: int = 0
+    watermark: str | None = None
+    at_watermark: list[str] = field(default_factory=list)
+    """Ids of the stored tickets modified exactly at the watermark."""
+
+
+class TicketStore:
+    """Tickets on disk: current state, compact change history, sync watermark."""
+
+    def __init__(self, root: Path = STORE_DIR) -> None:
+        """Open (or prepare) the store rooted at `root`."""
+        self.root = root
+        self.rows_dir = root / "rows"
+        self.index_dir = root / "indexes"
+        self.history_dir = root / "history"
+        self.state_path = root / "state.json"
+        self.search_index = SearchIndex(root / "search", ID_COLUMN, SEARCH_FIELDS)
+
+    @property
+    def state(self) -> dict[str, Any]:
+        """Watermark and stats of the last sync (empty before the first)."""
+        return (
+            json.loads(self.state_path.read_text()) if self.state_path.exists() else {}
+        )
+
+    @property
+    def watermark(self) -> str | None:
+        """Latest ticket modification time stored (UTC); syncs fetch from here on."""
+        return self.state.get("watermark")
+
+    def segments(self) -> list[Path]:
+        """Return the row segments, oldest first."""
+        return sorted(self.rows_dir.glob("*.arrow")) if self.rows_dir.exists() else []
+
+    def load(self) -> pl.DataFrame:
+        """Return the current version of every stored ticket."""
+        return _read_current(self.segments())
+
+    def open_tickets(self) -> pl.DataFrame:
+        """Return the tickets whose latest known status is open."""
+        current = self.load()
+        if current.is_empty():
+            return current
+        return current.filter(pl.col(STATUS_COLUMN) == OPEN_STATUS)
+
+    def history(self) -> pl.LazyFrame:
+        """Every stored version of every ticket, tagged with when it was synced."""
+        return pl.scan_parquet(self.history_dir / "*.parquet")
+
+    def upsert(self, records: list[dict[str, Any]] | pl.DataFrame) -> SyncResult:
+        """Insert new tickets and replace changed ones (matched by id).
+
+        A ticket whose modification time matches the stored version is unchanged
+        and is neither rewritten nor added to history; one stored at exactly the
+        watermark is dropped before it is even compared.
+        """
+        incoming = (
+            records
+            if isinstance(records, pl.DataFrame)
+            else pl.DataFrame(records, infer_schema_length=None)
+        )
+        state = self.state
+        result = SyncResult(
+            fetched=incoming.height,
+            watermark=state.get("watermark"),
+            at_watermark=state.get("at_watermark", []),
+        )
+        if incoming.is_empty():
+            self._save_state(result)
+            return result
+
+        incoming = incoming.with_columns(
+            timeutil.column_to_utc(incoming, MODIFIED_COLUMN).alias("_modified")
+        )
+        if result.watermark is not None:
+            seen = (pl.col("_modified") == _instant(result.watermark)) & pl.col(
+                ID_COLUMN
+            ).cast(pl.Utf8).is_in(result.at_watermark)
+            incoming = incoming.filter(~seen)
+        incoming = incoming.sort("_modified").unique(ID_COLUMN, keep="last")
+        existing = self._rows()[self._current_rows(incoming[ID_COLUMN])]
+        if existing.is_empty():
+            changed = incoming
+            result.inserted = incoming.height
+        else:
+            previous = existing.select(
+                ID_COLUMN,
+                timeutil.column_to_utc(existing, MODIFIED_COLUMN).alias("_previous"),
+            )
+            joined = incoming.join(previous, on=ID_COLUMN, how="left", coalesce=True)
+            is_new = pl.col("_previous").is_null()
+            is_changed = is_new | pl.col("_previous").ne_missing(pl.col("_modified"))
+            result.inserted = joined.filter(is_new).height
+            changed = joined.filter(is_changed).drop("_previous")
+            result.updated = changed.height - result.inserted
+        result.unchanged = result.fetched - changed.height
+
+        if not changed.is_empty():
+            self._replace(changed.drop("_modified"))
+        newest = incoming["_modified"].max()
+        if isinstance(newest, datetime):
+            at_newest = (
+                incoming.filter(pl.col("_modified") == newest)[ID_COLUMN]
+                .cast(pl.Utf8)
+                .to_list()
+            )
+            previous = None if result.watermark is None else _instant(result.watermark)
+            if previous is None or newest > previous:
+                result.watermark, result.at_watermark = _stamp(newest), at_newest
+            elif newest == previous:
+                result.watermark = _stamp(newest)
+                result.at_watermark = sorted({*result.at_watermark, *at_newest})
+        self._save_state(result)
+        return result
+
+    def close_out(self, open_ids: Iterable[str]) -> SyncResult:
+        """Mark stored open tickets that are absent from `open_ids` as closed."""
+        existing = self.load()
+        state = self.state
+        result = SyncResult(
+            watermark=state.get("watermark"),
+            at_watermark=state.get("at_watermark", []),
+        )
+        if existing.is_empty():
+            return result
+        gone = (pl.col(STATUS_COLUMN) == OPEN_STATUS) & ~pl.col(ID_COLUMN).is_in(
+            list(open_ids)
+        )
+        closed = existing.filter(gone).with_columns(
+            pl.lit(CLOSED_STATUS).alias(STATUS_COLUMN)
+        )
+        result.closed = closed.height
+        if result.closed:
+            self._replace(closed)
+        self._save_state(result)
+        return result
+
+    def search(self, query: str, limit: int = 10) -> pl.DataFrame:
+        """Return the best `limit` tickets matching `query`, ranked, with a `score`."""
+        hits = self.search_index.search(query, limit)
+        ranked = pl.DataFrame(
+            {ID_COLUMN: [h.doc_id for h in hits], "score": [h.score for h in hits]},
+            schema={ID_COLUMN: pl.Utf8, "score": pl.Float64},
+        )
+        if ranked.is_empty():
+            return ranked
+        matches = self._rows()[self._current_rows(ranked[ID_COLUMN])].with_columns(
+            pl.col(ID_COLUMN).cast(pl.Utf8)
+        )
+        return ranked.join(matches, on=ID_COLUMN, how="left", coalesce=True)
+
+    def lookup(
+        self,
+        emails: Iterable[str] = (),
+        *,
+        since: str | None = None,
+        until: str | None = None,
+    ) -> pl.DataFrame:
+        """Return tickets by `EMAIL_COLUMN` and/or modified in `[since, until)`.
+
+        Answered from the secondary indexes: each email is a hash lookup per
+        segment, the time range a binary search, and only the matching rows are
+        read. With no criteria at all, every ticket is returned.
+        """
+        emails = list(emails)
+        if not emails and since is None and until is None:
+            return self.load()
+        segments = self._indexed_segments()
+        found = [np.array([], dtype=np.int64)]
+        for segment, start in zip(segments, _starts(segments), strict=True):
+            rows: np.ndarray | None = None
+            if emails:
+                rows = self._hash_index(EMAIL_COLUMN, segment).lookup_many(emails)
+            if since is not None or until is not None:
+                in_range = self._sorted_index(MODIFIED_COLUMN, segment).between(
+                    since, until
+                )
+                rows = in_range if rows is None else np.intersect1d(rows, in_range)
+            found.append(rows + start)
+        return self._rows()[np.setdiff1d(np.concatenate(found), _dead(segments))]
+
+    def reindex(self) -> int:
+        """Rebuild the search and secondary indexes; return how many tickets."""
+        current = self.load()
+        self.search_index.rebuild(current)
+        self._compact(current)
+        return current.height
+
+    def _rows(self) -> pl.DataFrame:
+        """Every stored row version (memory-mapped), by row id."""
+        return _concat(self._indexed_segments())
+
+    def _current_rows(self, ids: Iterable[object]) -> np.ndarray:
+        """Return the row ids of the current versions of tickets `ids`."""
+        keys = [str(i) for i in ids]
+        segments = self._indexed_segments()
+        found = [np.array([], dtype=np.int64)] + [
+            self._hash_index(ID_COLUMN, segment).lookup_many(keys) + start
+            for segment, start in zip(segments, _starts(segments), strict=True)
+        ]
+        return np.setdiff1d(np.concatenate(found), _dead(segments))
+
+    def _hash_index(self, column: str, segment: Path) -> HashIndex:
+        return HashIndex(self.index_dir / column / segment.stem)
+
+    def _sorted_index(self, column: str, segment: Path) -> SortedIndex:
+        return SortedIndex(self.index_dir / column / segment.stem)
+
+    def _segment_indexes(self, segment: Path) -> dict[str, HashIndex | SortedIndex]:
+        return {
+            **{
+                c: self._hash_index(c, segment)
+                for c in (ID_COLUMN, *HASH_INDEX_COLUMNS)
+            },
+            **{c: self._sorted_index(c, segment) for c in SORTED_INDEX_COLUMNS},
+        }
+
+    def _indexed_segments(self) -> list[Path]:
+        """Return the segments, indexing them all first if any index is missing."""
+        segments = self.segments()
+        if not all(
+            index.exists()
+            for segment in segments
+            for index in self._segment_indexes(segment).values()
+        ):
+            self._compact()
+            segments = self.segments()
+        return segments
+
+    def _replace(self, changed: pl.DataFrame) -> None:
+        """Append `changed` rows as a new segment and log them to history.
+
+        Only the new segment is written and indexed; the versions it replaces
+        are marked superseded, not rewritten.
+        """
+        dead = self._current_rows(changed[ID_COLUMN])
+        segments = self.segments()
+        number = int(segments[-1].stem) + 1 if segments else 0
+        self._write_segment(changed, number, dead)
+        self._append_history(changed)
+        self.search_index.update(changed)
+        if len(segments) + 1 > COMPACT_SEGMENTS_AFTER:
+            self._compact()
+
+    def _write_segment(self, rows: pl.DataFrame, number: int, dead: np.ndarray) -> None:
+        """Index `rows`, then write them as segment `number` superseding `dead`.
+
+        The segment file is written last: until it exists, nothing else is read.
+        """
+        segment = self.rows_dir / f"{number:06d}.arrow"
+        for column, index in self._segment_indexes(segment).items():
+            index.build(
+                rows[column]
+                if column in rows.columns
+                else pl.Series(column, [None] * rows.height, dtype=pl.Utf8)
+            )
+        self.rows_dir.mkdir(parents=True, exist_ok=True)
+        np.save(_dead_path(segment), dead.astype(np.int64))
+        tmp = segment.with_suffix(".tmp")
+        rows.write_ipc(tmp, compression="uncompressed")
+        tmp.replace(segment)
+
+    def _compact(self, current: pl.DataFrame | None = None) -> None:
+        """Merge every segment into one, without superseded rows, and index it.
+
+        The merged segment is built aside and swapped in (like `ArrayIndex`).
+        """
+        current = self.load() if current is None else current
+        staging = TicketStore(self.root / "compacting")
+        shutil.rmtree(staging.root, ignore_errors=True)
+        if not current.is_empty():
+            staging._write_segment(current, 0, np.array([], dtype=np.int64))
+        for directory in (self.rows_dir, self.index_dir):
+            shutil.rmtree(directory, ignore_errors=True)
+        for built, directory in (
+            (staging.rows_dir, self.rows_dir),
+            (staging.index_dir, self.index_dir),
+        ):
+            if built.exists():
+                built.rename(directory)
+        shutil.rmtree(staging.root, ignore_errors=True)
+
+    def _append_history(self, changed: pl.DataFrame) -> None:
+        now = datetime.now(UTC)
+        self.history_dir.mkdir(parents=True, exist_ok=True)
+        changed.with_columns(pl.lit(now).alias(SYNCED_AT_COLUMN)).write_parquet(
+            self.history_dir / f"{now:%Y%m%dT%H%M%S%fZ}.parquet"
+        )
+        deltas = sorted(self.history_dir.glob("*.parquet"))
+        if len(deltas) > COMPACT_HISTORY_AFTER:
+            merged = pl.concat(
+                [pl.read_parquet(delta) for delta in deltas], how="diagonal_relaxed"
+            )
+            # named after the newest delta so files keep sorting chronologically
+            tmp = self.history_dir / "compacting.tmp"
+            merged.write_parquet(tmp, compression="zstd", compression_level=10)
+            for delta in deltas:
+                delta.unlink()
+            tmp.replace(deltas[-1])
+
+    def _save_state(self, result: SyncResult) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        state = {
+            **asdict(result),
+            "last_sync": datetime.now(UTC).isoformat(),
+        }
+        self.state_path.write_text(json.dumps(state, indent=2))
+
+
+def sync(
+    store: TicketStore,
+    credentials: zenq.Credentials,
+    *,
+    reconcile: bool = False,
+    transport: httpx.AsyncBaseTransport | None = None,
+    reporter: progress.Reporter | None = None,
+) -> SyncResult:
+    """Fetch tickets modified since the store's watermark and upsert them.
+
+    The very first sync (no watermark yet) pulls the open queue as a baseline.
+    With `reconcile`, the open queue's ids are also fetched to close out
+    tickets that left it without a modification we could see.
+    Each pull reports its progress as a task of `reporter`, if given.
+    """
+
+    def task(name: str) -> progress.Task | None:
+        return None if reporter is None else reporter.task(name, unit="tickets")
+
+    watermark = store.watermark
+    records = zenq.pull(
+        credentials,
+        modified_since=watermark,
+        open_only=watermark is None,
+        transport=transport,
+        task=task("tickets"),
+    )
+    result = store.upsert(records)
+    if reconcile:
+        open_now = zenq.pull(
+            credentials, open_only=True, transport=transport, task=task("open tickets")
+        )
+        result.closed = store.close_out(r[ID_COLUMN] for r in open_now).closed
+        store._save_state(result)  # noqa: SLF001 -- one record for the whole sync
+    return result
+
+
+def _dead_path(segment: Path) -> Path:
+    return segment.with_suffix(".dead.npy")
+
+
+def _dead(segments: list[Path]) -> np.ndarray:
+    """Return the row ids superseded by later versions."""
+    return np.concatenate(
+        [np.array([], dtype=np.int64)] + [np.load(_dead_path(s)) for s in segments]
+    )
+
+
+def _starts(segments: list[Path]) -> np.ndarray:
+    """Return the row id of each segment's first row."""
+    heights = [pl.read_ipc(s, memory_map=True).height for s in segments]
+    return np.cumsum([0, *heights], dtype=np.int64)[:-1]
+
+
+def _concat(segments: list[Path]) -> pl.DataFrame:
+    """Stack segments (memory-mapped, not copied) into one frame of every row."""
+    if not segments:
+        return pl.DataFrame()
+    return pl.concat(
+        [pl.read_ipc(s, memory_map=True) for s in segments],
+        how="diagonal_relaxed",
+        rechunk=False,
+    )
+
+
+def _read_current(segments: list[Path]) -> pl.DataFrame:
+    """Return the rows of `segments` that no later segment supersedes."""
+    table = _concat(segments)
+    if table.is_empty():
+        return table
+    live = np.ones(table.height, dtype=bool)
+    live[_dead(segments)] = False
+    return table.filter(pl.Series(live))
+
+
+def _instant(stamp: str) -> datetime:
+    """Parse a stored watermark (or any ISO-8601 time) to an aware UTC datetime."""
+    return timeutil.parse_arg(stamp)
+
+
+def _stamp(instant: datetime) -> str:
+    """Format a UTC instant as a fixed-width watermark.
+
+    >>> _stamp(datetime(2024, 1, 2, 3, 4, 5, tzinfo=UTC))
+    '2024-01-02T03:04:05.000000Z'
+    """
+    return f"{instant.astimezone(UTC):%Y-%m-%dT%H:%M:%S.%fZ}"
+
+
+catalog.register(
+    catalog.Dataset(
+        "tickets",
+        ("no_sync/zenq/rows/*.arrow",),
+        loader=lambda segments: _read_current(segments).lazy(),
+        description="Zenq tickets (synced store)",
+    )
+)
@@ -0,0 +1,247 @@
+"""Timestamps: parse, normalise to UTC and convert time zones, a column at a time.
+
+API payloads (PagerDuty, Zenq) carry ISO-8601 strings in a handful of shapes.
+Rather than parsing them row by row (`arrow.get` per value), a column's format is
+detected once from a small sample and the whole column is parsed by a single
+vectorised polars expression with that explicit format.
+Detected formats are cached by the *shape* of the sampled strings (digits
+masked), so every later column in the same shape skips the trial parses.
+The column is parsed once, whole, in the sample's format, and that parse is the
+check: values it left null (a different shape further down) get their own
+format, detected from them, and parsed in turn; a value no format parses raises.
+So a column in one format costs a single parse.
+
+`arrow` stays the tool for scalar input, such as CLI arguments
+(`parse_arg`, `window`), where one value is parsed once.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Any
+
+import arrow
+import numpy as np
+import polars as pl
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from datetime import datetime
+
+UTC = "UTC"
+TIME_UNIT = "us"
+UTC_DTYPE = pl.Datetime(TIME_UNIT, UTC)
+SAMPLE_SIZE = 100
+
+FORMATS = (
+    "%Y-%m-%dT%H:%M:%S%.f%#z",  # PagerDuty: 2024-01-01T00:00:00Z, ...+05:30
+    "%Y-%m-%dT%H:%M:%S%.f",
+    "%Y-%m-%d %H:%M:%S%.f%#z",
+    "%Y-%m-%d %H:%M:%S%.f",
+    "%Y-%m-%dT%H:%M",
+    "%Y-%m-%d",
+    "%m/%d/%Y",  # the stock CSVs
+)
+"""Candidate formats, most specific first (`%.f` also matches no fraction)."""
+
+_formats_by_shape: dict[frozenset[str], str] = {}
+
+
+def has_offset(fmt: str) -> bool:
+    """Whether strings in `fmt` carry their own UTC offset.
+
+    >>> has_offset(FORMATS[0]), has_offset("%Y-%m-%d")
+    (True, False)
+    """
+    return "%z" in fmt or "%#z" in fmt or "%:z" in fmt
+
+
+def detect_format(values: pl.Series) -> str:
+    """Return the first of `FORMATS` that parses a sample of `values`.
+
+    >>> detect_format(pl.Series(["2024-01-01T00:00:00Z", "2024-01-02T10:30:00.5Z"]))
+    '%Y-%m-%dT%H:%M:%S%.f%#z'
+    """
+    sample = values.drop_nulls().head(SAMPLE_SIZE).unique()
+    examples = pl.DataFrame(
+        {"value": sample, "shape": sample.str.replace_all(r"\d", "9")}
+    ).unique("shape")
+    shapes = frozenset(examples["shape"].to_list())
+    if shapes in _formats_by_shape:
+        return _formats_by_shape[shapes]
+    for fmt in FORMATS:
+        parsed = examples["value"].str.to_datetime(
+            fmt, time_unit=TIME_UNIT, strict=False
+        )
+        if parsed.null_count() == 0:
+            _formats_by_shape[shapes] = fmt
+            return fmt
+    msg = f"No known timestamp format parses {examples['value'].head(3).to_list()}"
+    raise ValueError(msg)
+
+
+def parse_all(values: pl.Series, assume_tz: str = UTC) -> pl.Series:
+    """Parse every one of `values` to UTC, in as many formats as they take.
+
+    Each format found parses only the values earlier ones left unparsed.
+
+    >>> parse_all(pl.Series(["2024-01-01", None, "01/03/2024"])).dt.day().to_list()
+    [1, None, 3]
+    """
+    frame = values.to_frame("value")
+    parsed = pl.repeat(None, len(values), dtype=UTC_DTYPE, eager=True)
+    pending = values.is_not_null()
+    while pending.any():
+        remaining = values.filter(pending)
+        try:
+            fmt = detect_format(remaining)
+        except ValueError:  # a mixed sample; one shape at a time (raises if none fits)
+            fmt = detect_format(remaining.head(1))
+        attempt = frame.select(
+            pl.when(pending).then(parse("value", fmt, assume_tz))
+        ).to_series()
+        parsed = parsed.zip_with(parsed.is_not_null(), attempt)
+        pending = pending & parsed.is_null()
+    return parsed.alias(values.name)
+
+
+def parse(column: str | pl.Expr, fmt: str, assume_tz: str = UTC) -> pl.Expr:
+    """Parse strings in `fmt` to UTC timestamps (naive ones are in `assume_tz`).
+
+    Strings not in `fmt` become null; `parse_all` makes sure there are none.
+    """
+    expr = pl.col(column) if isinstance(column, str) else column
+    parsed = expr.str.to_datetime(fmt, time_unit=TIME_UNIT, strict=False)
+    if has_offset(fmt):
+        return parsed.dt.convert_time_zone(UTC)
+    return parsed.dt.replace_time_zone(
+        assume_tz, ambiguous="earliest"
+    ).dt.convert_time_zone(UTC)
+
+
+def column_to_utc(frame: pl.DataFrame, column: str, assume_tz: str = UTC) -> pl.Expr:
+    """Return an expression normalising `frame[column]` to UTC, whatever its dtype.
+
+    Strings are parsed here and now (see `parse_all`), naive datetimes are taken
+    to be in `assume_tz`, aware ones converted, and dates taken as midnight.
+    """
+    dtype = frame.schema[column]
+    expr = pl.col(column)
+    if dtype == pl.Utf8:
+        return pl.lit(parse_all(frame[column], assume_tz))
+    if dtype == pl.Date:
+        expr, dtype = expr.cast(pl.Datetime(TIME_UNIT)), pl.Datetime(TIME_UNIT)
+    if isinstance(dtype, pl.Datetime):
+        if dtype.time_zone is None:
+            expr = expr.dt.replace_time_zone(assume_tz, ambiguous="earliest")
+        return expr.dt.convert_time_zone(UTC).dt.cast_time_unit(TIME_UNIT)
+    if dtype == pl.Null:
+        return expr.cast(UTC_DTYPE)
+    msg = f"Column {column!r} ({dtype}) is not a timestamp"
+    raise TypeError(msg)
+
+
+def to_utc(
+    frame: pl.DataFrame, columns: list[str] | tuple[str, ...], assume_tz: str = UTC
+) -> pl.DataFrame:
+    """Normalise every one of `columns` in `frame` to UTC timestamps."""
+    return frame.with_columns(
+        column_to_utc(frame, c, assume_tz).alias(c) for c in columns
+    )
+
+
+def convert(column: str | pl.Expr, tz: str) -> pl.Expr:
+    """Show (aware) timestamps in time zone `tz`; the instants are unchanged."""
+    expr = pl.col(column) if isinstance(column, str) else column
+    return expr.dt.convert_time_zone(tz)
+
+
+def parse_arg(value: str, tz: str = UTC) -> datetime:
+    """Parse one CLI timestamp (ISO-8601; naive ones are in `tz`) to aware UTC.
+
+    >>> parse_arg("2024-01-01T09:00", tz="Europe/Paris").isoformat()
+    '2024-01-01T08:00:00+00:00'
+    >>> parse_arg("2024-01-01T09:00-05:00", tz="Europe/Paris").isoformat()
+    '2024-01-01T14:00:00+00:00'
+    """
+    parsed = arrow.parser.DateTimeParser().parse_iso(value)
+    return arrow.get(parsed, tzinfo=parsed.tzinfo or tz).to(UTC).datetime
+
+
+def window(
+    since: str | None, until: str | None, **default_span: float
+) -> tuple[datetime, datetime]:
+    """Resolve `--since` / `--until` (default: `default_span` back from now) in UTC.
+
+    >>> start, end = window("2024-01-10", None, days=3)
+    >>> start.isoformat()
+    '2024-01-10T00:00:00+00:00'
+    >>> start, end = window(None, "2024-01-10", days=3)
+    >>> start.isoformat()
+    '2024-01-07T00:00:00+00:00'
+    """
+    end = arrow.get(parse_arg(until)) if until else arrow.utcnow()
+    start = (
+        arrow.get(parse_arg(since))
+        if since
+        else end.shift(**{k: -v for k, v in default_span.items()})
+    )
+    return start.datetime, end.datetime
+
+
+def synthetic_timestamps(rows: int, seed: int = 0) -> pl.Series:
+    """Return `rows` random PagerDuty-style ISO-8601 strings (for benchmarks)."""
+    rng = np.random.default_rng(seed)
+    micros = rng.integers(1_500_000_000, 1_800_000_000, rows) * 1_000_000
+    return (
+        pl.Series("at", micros)
+        .cast(pl.Datetime(TIME_UNIT))
+        .dt.to_string("%Y-%m-%dT%H:%M:%S%.3fZ")
+    )
+
+
+def benchmark(rows: int = 1_000_000, baseline_rows: int = 20_000) -> pl.DataFrame:
+    """Time parsing `rows` ISO-8601 strings to UTC, vectorised vs row by row.
+
+    The row-by-row `arrow.get` baseline runs on `baseline_rows` only and is
+    extrapolated, since a million calls would take a while.
+    """
+    values = synthetic_timestamps(rows)
+    frame = values.to_frame()
+    _formats_by_shape.clear()
+    timings: list[dict[str, Any]] = []
+
+    def timed(method: str, n: int, run: Callable[[], object]) -> None:
+        started = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - started
+        timings.append(
+            {"method": method, "rows": n, "seconds": seconds, "rows_per_s": n / seconds}
+        )
+
+    timed(
+        "detect + parse (cold)", rows, lambda: frame.select(column_to_utc(frame, "at"))
+    )
+    timed(
+        "detect + parse (cached)",
+        rows,
+        lambda: frame.select(column_to_utc(frame, "at")),
+    )
+    timed("polars inferred format", rows, lambda: values.str.to_datetime(time_zone=UTC))
+    timed(
+        "parse + convert to America/New_York",
+        rows,
+        lambda: frame.select(convert(column_to_utc(frame, "at"), "America/New_York")),
+    )
+    sample = values.head(baseline_rows).to_list()
+    timed(
+        "arrow.get per row",
+        len(sample),
+        lambda: [arrow.get(v).to(UTC).datetime for v in sample],
+    )
+    baseline = timings[-1]["rows_per_s"]
+    return pl.DataFrame(timings).with_columns(
+        (pl.col("rows_per_s") / baseline).round(1).alias("speedup"),
+        pl.col("seconds").round(4),
+        pl.col("rows_per_s").round(0),
+    )
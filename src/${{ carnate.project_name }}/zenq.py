@@ -0,0 +1,143 @@
+"""Zenq (Salesforce support-ticket) API client, authenticated through Okta.
+
+Mirrors the calls made in `notebooks/okta_zenq.ju.py`, but asks only for what
+changed: tickets modified since a watermark (the latest modification time
+already stored locally), whatever their status, so closures are seen too.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+import dotenv
+import httpx
+
+from . import api, paths, progress
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+OKTA_TOKEN_URL = "https://pagerduty.okta.com/oauth2/aus1qp12a6efGHJRQ0h8/v1/token"  # noqa: S105
+ZENQ_BASE_URL = "http://pagerduty-zenq--api.us-e2.cloudhub.io/api/v2"
+OPEN_STATUS_FILTER = "'Open'"
+MODIFIED_SINCE_PARAM = "last_modified_date"
+"""Zenq filter on modification time; takes a `>=`-prefixed ISO-8601 timestamp.
+
+Inclusive, so tickets modified exactly at the watermark are sent again;
+the store drops the ones it already holds (see `tickets`).
+"""
+
+DEFAULT_RATE_PER_SECOND = 5.0
+
+
+@dataclass(frozen=True)
+class Credentials:
+    """Okta client credentials (and session cookie) for the Zenq API."""
+
+    client_id: str
+    client_secret: str = field(repr=False)
+    cookie: str = field(repr=False)
+
+    @classmethod
+    def from_env(cls, env_file: Path = paths.ENV_FILE) -> Credentials:
+        """Read credentials from `.env`; raise if any are missing."""
+        values = dotenv.dotenv_values(env_file)
+        keys = (
+            "PAGERDUTY_SUPPORT_OKTA_CLIENT_ID",
+            "PAGERDUTY_SUPPORT_OKTA_CLIENT_SECRET",
+            "PAGERDUTY_SUPPORT_OKTA_COOKIE",
+        )
+        missing = [key for key in keys if not values.get(key)]
+        if missing:
+            msg = f"{', '.join(missing)} not found. Check whether declared in `{env_file}`"
+            raise OSError(msg)
+        return cls(*(str(values[key]) for key in keys))
+
+
+async def bearer_token(
+    credentials: Credentials,
+    transport: httpx.AsyncBaseTransport | None = None,
+    token_url: str = OKTA_TOKEN_URL,
+) -> str:
+    """Exchange the Okta client credentials for a Zenq bearer token."""
+    deadline = api.deadline_for(token_url)
+    async with (
+        asyncio.timeout(deadline.total),
+        httpx.AsyncClient(timeout=deadline.timeout, transport=transport) as client,
+    ):
+        response = await client.post(
+            token_url,
+            headers={
+                "Cookie": credentials.cookie,
+                "Content-Type": "application/x-www-form-urlencoded",
+            },
+            params={
+                "client_id": credentials.client_id,
+                "client_secret": credentials.client_secret,
+                "grant_type": "client_credentials",
+                "scope": "zenq-api",
+            },
+        )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def fetch_tickets(  # noqa: PLR0913
+    credentials: Credentials,
+    *,
+    modified_since: str | None = None,
+    open_only: bool = False,
+    base_url: str = ZENQ_BASE_URL,
+    token_url: str = OKTA_TOKEN_URL,
+    transport: httpx.AsyncBaseTransport | None = None,
+    task: progress.Task | None = None,
+) -> list[dict[str, Any]]:
+    """GET tickets, optionally only those modified since a watermark / still open.
+
+    Tickets and bytes are counted towards `task`, if given.
+    """
+    token = await bearer_token(credentials, transport, token_url)
+    params: dict[str, str] = {}
+    if open_only:
+        params["status"] = OPEN_STATUS_FILTER
+    if modified_since is not None:
+        params[MODIFIED_SINCE_PARAM] = f">={modified_since}"
+    async with api.make_client(
+        base_url, {"Authorization": token}, transport=transport
+    ) as client:
+        records = await api.get_json(
+            client,
+            "/tickets",
+            api.RateBudget(DEFAULT_RATE_PER_SECOND),
+            params=params,
+            task=task,
+        )
+    if task is not None:
+        task.advance(len(records))
+    return records
+
+
+def pull(  # noqa: PLR0913
+    credentials: Credentials,
+    *,
+    modified_since: str | None = None,
+    open_only: bool = False,
+    base_url: str = ZENQ_BASE_URL,
+    token_url: str = OKTA_TOKEN_URL,
+    transport: httpx.AsyncBaseTransport | None = None,
+    task: progress.Task | None = None,
+) -> list[dict[str, Any]]:
+    """Blocking wrapper around `fetch_tickets`."""
+    return asyncio.run(
+        fetch_tickets(
+            credentials,
+            modified_since=modified_since,
+            open_only=open_only,
+            base_url=base_url,
+            token_url=token_url,
+            transport=transport,
+            task=task,
+        )
+    )
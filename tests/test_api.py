@@ -0,0 +1,105 @@
+"""Unit Tests for `api.py`."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from ${{ carnate.project_name }} import api
+
+
+def test_rate_budget_spaces_requests_after_burst() -> None:
+    """Test: beyond the burst, requests are admitted at `rate` per second."""
+    budget = api.RateBudget(rate=50.0, burst=2)
+
+    async def spend(n: int) -> float:
+        started = time.perf_counter()
+        for _ in range(n):
+            await budget.acquire()
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(spend(7))
+    assert elapsed == pytest.approx(5 / 50.0, abs=0.05)
+
+
+def test_get_json_retries_when_rate_limited() -> None:
+    """Test: a 429 is retried after `Retry-After`, then the body returned."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        return httpx.Response(200, json={"ok": True})
+
+    async def fetch() -> dict:
+        async with api.make_client(
+            "https://x", {}, transport=httpx.MockTransport(handler)
+        ) as client:
+            return await api.get_json(client, "/thing", api.RateBudget(100.0))
+
+    assert asyncio.run(fetch()) == {"ok": True}
+    assert len(calls) == 2
+
+
+def test_get_json_raises_on_errors() -> None:
+    """Test: non-retryable errors surface as `HTTPStatusError`."""
+
+    async def fetch() -> None:
+        transport = httpx.MockTransport(lambda _: httpx.Response(401))
+        async with api.make_client("https://x", {}, transport=transport) as client:
+            await api.get_json(client, "/thing", api.RateBudget(100.0))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(fetch())
+
+
+def test_hedged_get_takes_the_faster_response() -> None:
+    """Test: once p95 is known, a stalled GET is hedged and the hedge wins."""
+    calls = 0
+
+    async def handler(_: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        stall = calls == api.MIN_LATENCY_SAMPLES + 1
+        await asyncio.sleep(5.0 if stall else 0.001)
+        return httpx.Response(200, json={"call": calls})
+
+    async def fetch() -> float:
+        async with api.make_client(
+            "https://x", {}, transport=httpx.MockTransport(handler)
+        ) as client:
+            for _ in range(api.MIN_LATENCY_SAMPLES):
+                await api.get_json(client, "/users", api.RateBudget(1e6))
+            started = time.perf_counter()
+            await api.get_json(client, "/users", api.RateBudget(1e6))
+            return time.perf_counter() - started
+
+    api.LATENCIES.clear()
+    assert asyncio.run(fetch()) < 1.0
+    assert list(api.LATENCIES) == ["x/users"]
+    window = api.LATENCIES["x/users"]
+    assert (window.hedged, window.hedge_wins) == (1, 1)
+    # the cancelled loser is recorded too, at (at least) the time it ran
+    assert len(window.seconds) == api.MIN_LATENCY_SAMPLES + 2
+    assert max(window.seconds) >= min(window.seconds) * 10
+
+
+def test_get_json_deadline_bounds_the_call() -> None:
+    """Test: a call that outlives its total deadline raises `TimeoutError`."""
+
+    async def handler(_: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(5.0)
+        return httpx.Response(200, json={})
+
+    async def fetch() -> None:
+        async with api.make_client(
+            "https://x", {}, transport=httpx.MockTransport(handler)
+        ) as client:
+            await api.get_json(
+                client, "/slow", api.RateBudget(100.0), deadline=api.Deadline(total=0.1)
+            )
+
+    with pytest.raises(TimeoutError, match="deadline"):
+        asyncio.run(fetch())
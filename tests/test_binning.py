@@ -0,0 +1,114 @@
+"""Unit Tests for `binning.py`."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import polars as pl
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from ${{ carnate.project_name }} import binning, memory
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@given(
+    st.lists(st.tuples(st.floats(0, 10), st.floats(-5, 5)), min_size=1, max_size=200)
+)
+def test_bin2d_matches_histogram2d(points: list[tuple[float, float]]) -> None:
+    """Test: bincount-based grid agrees with NumPy's own 2D histogram."""
+    frame = pl.DataFrame(points, schema=["x", "y"], orient="row")
+    grid = binning.bin2d(frame, "x", "y", bins=(7, 5), x_range=(0, 10), y_range=(-5, 5))
+    expected, _, _ = np.histogram2d(
+        frame["y"].to_numpy(),
+        frame["x"].to_numpy(),
+        bins=(5, 7),
+        range=((-5, 5), (0, 10)),
+    )
+    assert (grid.counts[0] == expected).all()
+
+
+def test_bin2d_by_category_across_chunks() -> None:
+    """Test: categories first seen in later chunks grow the grid consistently."""
+    chunks = [
+        pl.DataFrame({"x": [0.0, 1.0], "y": [0.0, 1.0], "k": ["a", "a"]}),
+        pl.DataFrame({"x": [0.0, 1.0], "y": [1.0, 1.0], "k": ["b", "a"]}),
+    ]
+    grid = binning.bin2d(
+        chunks, "x", "y", by="k", bins=2, x_range=(0, 1), y_range=(0, 1)
+    )
+    assert grid.categories == ["a", "b"]
+    assert grid.counts.sum(axis=(1, 2)).tolist() == [3, 1]
+    assert grid.counts[1, 1, 0] == 1
+
+
+def test_bin2d_by_category_under_a_global_string_cache() -> None:
+    """Test: categories map by name even when their physical codes are global."""
+    with pl.StringCache():
+        pl.Series(["zzz", "yyy", "xxx"], dtype=pl.Categorical)  # take the low codes
+        frame = pl.DataFrame(
+            {"x": [0.0, 1.0, 1.0], "y": [0.0, 1.0, 1.0], "kind": ["a", "b", "b"]},
+            schema_overrides={"kind": pl.Categorical},
+        )
+        grid = binning.bin2d(frame, "x", "y", by="kind", bins=2)
+    assert grid.categories == ["a", "b"]
+    assert grid.counts.sum(axis=(1, 2)).tolist() == [1, 2]
+
+
+def test_bin2d_mean_and_lazy_source() -> None:
+    """Test: lazy frames bin in slices and per-cell means ignore null values."""
+    lazy = pl.LazyFrame(
+        {"x": [0.0, 0.0, 1.0], "y": [0.0, 0.0, 1.0], "v": [1.0, None, 4.0]}
+    )
+    grid = binning.bin2d(lazy, "x", "y", value="v", bins=1, chunk_rows=1)
+    assert grid.counts[0, 0, 0] == 3
+    assert grid.mean()[0, 0, 0] == pytest.approx(2.5)
+    frame = grid.to_frame()
+    assert frame.columns == ["x", "y", "count", "mean_v"]
+
+
+def test_lazy_sources_are_run_once_then_chunked(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test: a scanned file is collected once (projected), then split into chunks."""
+    path = tmp_path / "points.csv"
+    pl.DataFrame({"x": range(10), "y": range(10), "z": range(10)}).write_csv(path)
+    runs: list[pl.LazyFrame] = []
+    collect = memory.collect
+
+    def counting_collect(plan: pl.LazyFrame) -> pl.DataFrame:
+        runs.append(plan)
+        return collect(plan)
+
+    monkeypatch.setattr(memory, "collect", counting_collect)
+    chunks = list(binning._chunks(pl.scan_csv(path), ["x", "y"], 4))  # noqa: SLF001
+    assert len(runs) == 1
+    assert [chunk.height for chunk in chunks] == [4, 4, 2]
+    assert chunks[0].columns == ["x", "y"]
+    assert pl.concat(chunks)["x"].to_list() == list(range(10))
+
+
+def test_unordered_lazy_plans_bin_like_eager_ones() -> None:
+    """Test: a plan without a fixed row order still counts every row exactly once."""
+    rng = np.random.default_rng(0)
+    frame = pl.DataFrame(
+        {"key": rng.integers(0, 20_000, 50_000), "v": rng.random(50_000)}
+    )
+    plan = frame.lazy().group_by("key").agg(
+        pl.col("v").mean().alias("x"), pl.col("v").max().alias("y")
+    )
+    ranges = {"x_range": (0.0, 1.0), "y_range": (0.0, 1.0)}
+    lazy = binning.bin2d(plan, "x", "y", bins=20, chunk_rows=1_000, **ranges)
+    eager = binning.bin2d(plan.collect(), "x", "y", bins=20, **ranges)
+    assert (lazy.counts == eager.counts).all()
+    assert lazy.counts.sum() == plan.select(pl.len()).collect().item()
+
+
+def test_bin2d_requires_ranges_for_iterables() -> None:
+    """Test: iterables of chunks cannot have their extent inferred."""
+    with pytest.raises(ValueError, match="required"):
+        binning.bin2d(iter([]), "x", "y")
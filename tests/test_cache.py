@@ -0,0 +1,111 @@
+"""Unit Tests for `cache.py`."""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import TYPE_CHECKING
+
+import polars as pl
+
+from ${{ carnate.project_name }} import cache, memory
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+
+def _plan(source: Path) -> pl.LazyFrame:
+    return pl.scan_csv(source).group_by("k").agg(pl.col("v").sum()).sort("k")
+
+
+def test_hit_after_miss_and_invalidation_on_change(tmp_path: Path) -> None:
+    """Test: identical plans hit; touching an input changes the key."""
+    source = tmp_path / "in.csv"
+    source.write_text("k,v\na,1\na,2\nb,3\n")
+    results = cache.ResultCache(tmp_path / "cache")
+
+    first = results.collect(_plan(source))
+    second = results.collect(_plan(source))
+    assert first.equals(second)
+    assert (results.stats().hits, results.stats().misses) == (1, 1)
+
+    source.write_text("k,v\na,10\n")
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert results.collect(_plan(source)).rows() == [("a", 10)]
+    assert results.stats().misses == 2
+
+
+def test_key_tells_elided_literals_apart(tmp_path: Path) -> None:
+    """Test: plans that print alike (`is_in([Series])`) still get their own keys."""
+    source = tmp_path / "in.csv"
+    source.write_text("k,v\na,1\nb,2\n")
+    results = cache.ResultCache(tmp_path / "cache")
+    for key in "ab":
+        plan = pl.scan_csv(source).filter(pl.col("k").is_in([key]))
+        assert results.collect(plan)["k"].to_list() == [key]
+    assert results.stats().hits == 0
+
+
+def test_lru_eviction_to_budget(tmp_path: Path) -> None:
+    """Test: once over budget the least recently used result is evicted first."""
+    sources = {}
+    for name in "abcd":
+        sources[name] = tmp_path / f"{name}.csv"
+        sources[name].write_text(
+            "k,v\n" + "".join(f"{name}{i},{i}\n" for i in range(200))
+        )
+    results = cache.ResultCache(tmp_path / "cache")
+    for name in "abc":
+        results.collect(_plan(sources[name]))
+    entry_bytes = results.stats().size_bytes // 3
+    results.budget_bytes = entry_bytes * 3 + entry_bytes // 2
+
+    results.collect(_plan(sources["a"]))  # refresh `a`; `b` is now least recently used
+    results.collect(_plan(sources["d"]))  # over budget: evicts `b` only
+    stats = results.stats()
+    assert (stats.entries, stats.evictions) == (3, 1)
+    assert cache.plan_key(_plan(sources["b"])) not in results._load_index()["entries"]  # noqa: SLF001
+    results.collect(_plan(sources["c"]))
+    assert results.stats().hits == 2
+
+
+def test_in_memory_plans_are_not_cached(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test: plans over in-memory frames bypass the cache, but not the budget."""
+    collected: list[pl.LazyFrame] = []
+    collect = memory.collect
+
+    def counting_collect(plan: pl.LazyFrame) -> pl.DataFrame:
+        collected.append(plan)
+        return collect(plan)
+
+    monkeypatch.setattr(memory, "collect", counting_collect)
+    results = cache.ResultCache(tmp_path / "cache")
+    results.collect(pl.LazyFrame({"a": [1]}))
+    assert len(collected) == 1
+    assert results.stats().uncacheable == 1
+    assert results.stats().entries == 0
+
+
+def test_concurrent_caches_keep_every_entry(tmp_path: Path) -> None:
+    """Test: caches sharing a directory don't lose each other's index updates."""
+    sources = []
+    for i in range(8):
+        sources.append(tmp_path / f"{i}.csv")
+        sources[-1].write_text(f"k,v\nk{i},{i}\n")
+    threads = [
+        threading.Thread(
+            target=cache.ResultCache(tmp_path / "cache").collect, args=(_plan(source),)
+        )
+        for source in sources
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = cache.ResultCache(tmp_path / "cache").stats()
+    assert (stats.entries, stats.misses) == (8, 8)
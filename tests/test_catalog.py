@@ -0,0 +1,50 @@
+"""Unit Tests for `catalog.py`."""
+
+import os
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from ${{ carnate.project_name }} import catalog
+
+
+@pytest.fixture
+def data_dir(tmp_path: Path) -> Path:
+    """Minimal data dir holding one registered dataset."""
+    (tmp_path / "iris.csv").write_text("sepal.length,variety\n5.1,Setosa\n4.9,Setosa\n")
+    return tmp_path
+
+
+def test_open_builds_then_memory_maps(data_dir: Path) -> None:
+    """Test: first open builds the IPC file; listing reflects it."""
+    assert catalog.is_stale("iris", data_dir)
+    frame = catalog.open("iris", data_dir)
+    assert frame.height == 2
+    assert (data_dir / catalog.STORE_SUBDIR / "iris.arrow").exists()
+    assert not catalog.is_stale("iris", data_dir)
+    store = sorted(p.name for p in (data_dir / catalog.STORE_SUBDIR).iterdir())
+    assert store == ["iris.arrow", "iris.json"]  # temporaries swapped in
+
+    listing = catalog.ls(data_dir).filter(pl.col("name") == "iris").row(0, named=True)
+    assert listing["rows"] == 2
+    assert listing["stale"] is False
+
+
+def test_source_change_triggers_rebuild(data_dir: Path) -> None:
+    """Test: a newer source makes the dataset stale and `open` picks up the change."""
+    catalog.open("iris", data_dir)
+    source = data_dir / "iris.csv"
+    source.write_text("sepal.length,variety\n5.1,Setosa\n")
+    ipc_mtime = (data_dir / catalog.STORE_SUBDIR / "iris.arrow").stat().st_mtime_ns
+    os.utime(source, ns=(ipc_mtime + 10**9, ipc_mtime + 10**9))
+    assert catalog.is_stale("iris", data_dir)
+    assert catalog.scan("iris", data_dir).collect().height == 1
+
+
+def test_unknown_and_missing_datasets(data_dir: Path) -> None:
+    """Test: unknown names and datasets without sources fail clearly."""
+    with pytest.raises(KeyError, match="Unknown dataset"):
+        catalog.open("nope", data_dir)
+    with pytest.raises(FileNotFoundError):
+        catalog.open("stocks", data_dir)
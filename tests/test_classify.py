@@ -0,0 +1,80 @@
+"""Unit Tests for `classify.py`."""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+import pytest
+
+from ${{ carnate.project_name }} import classify
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+@pytest.mark.parametrize(
+    ("count", "leaf_size"), [(1, 1), (3, 1), (500, 4), (2_000, 32)]
+)
+def test_tree_matches_brute_force(count: int, leaf_size: int) -> None:
+    """Test: the KD-tree finds the same neighbours as the full distance matrix."""
+    rng = np.random.default_rng(count)
+    points = rng.normal(size=(count, 3))
+    points[: count // 4] = points[count // 4 : 2 * (count // 4)]  # duplicates
+    queries = rng.normal(scale=1.5, size=(200, 3))
+    k = min(5, count)
+    tree = classify.build_tree(points, leaf_size)
+    distances, rows = classify.query_tree(tree, queries, k, chunk=64)
+    expected, _ = classify.brute_force(points, queries, k)
+    np.testing.assert_allclose(distances, expected, atol=1e-9)
+    found = np.linalg.norm(points[rows] - queries[:, None], axis=2)
+    np.testing.assert_allclose(found, distances)
+
+
+def test_query_rejects_k_beyond_reference() -> None:
+    """Test: asking for more neighbours than points is an error."""
+    tree = classify.build_tree(np.zeros((3, 2)), 2)
+    with pytest.raises(ValueError, match="between 1 and the 3"):
+        classify.query_tree(tree, np.zeros((1, 2)), 4)
+
+
+def test_classifier_persists_and_rebuilds(tmp_path: Path) -> None:
+    """Test: the index is built once, reused, and rebuilt when its source changes."""
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    source = data_dir / "penguins.csv"
+    source.write_bytes((DATA_DIR / "penguins.csv").read_bytes())
+    reference = classify.REFERENCES["penguins"]
+
+    classifier, indexed = classify.load(reference, data_dir, tmp_path / "store")
+    assert indexed == 342  # two penguins have no measurements
+    _, indexed = classify.load(reference, data_dir, tmp_path / "store")
+    assert indexed is None
+    _, indexed = classify.load(reference, data_dir, tmp_path / "store", leaf_size=8)
+    assert indexed == 342  # built with other parameters
+    _, indexed = classify.load(reference, data_dir, tmp_path / "store", leaf_size=8)
+    assert indexed is None
+    later = classifier.built_at() + 10
+    os.utime(source, (later, later))
+    _, indexed = classify.load(reference, data_dir, tmp_path / "store")
+    assert indexed == 342
+
+    frame = pl.read_csv(source, null_values="NA")
+    result = classify.Classifier(tmp_path / "store" / "penguins").predict(frame)
+    assert result["predicted"].null_count() == 2
+    known = frame.hstack(result).drop_nulls("predicted")
+    assert (known["species"] == known["predicted"]).mean() > 0.95
+
+
+def test_leave_one_out_ignores_self_matches(tmp_path: Path) -> None:
+    """Test: scoring on the reference set doesn't count a row as its own neighbour."""
+    reference = classify.Reference("pairs", "pairs.csv", ("x",), "label")
+    frame = pl.DataFrame(
+        {"x": [0.0, 0.1, 5.0, 5.1, None], "label": ["a", "b", "a", "b", "a"]}
+    )
+    classifier = classify.Classifier(tmp_path / "pairs")
+    classifier.fit(frame, reference, leaf_size=1)
+    plain = classifier.predict(frame, k=1)
+    assert plain["predicted"].to_list() == ["a", "b", "a", "b", None]
+    left_out = classifier.predict(frame, k=1, leave_one_out=True)
+    assert left_out["predicted"].to_list() == ["b", "a", "b", "a", None]
+    assert left_out["distance"].drop_nulls().min() > 0
@@ -1,12 +1,16 @@
 """Unit Tests for `commands.py`."""
 
+from pathlib import Path
+
+import polars as pl
+import pyarrow as pa
 import pytest
 import typer
 from hypothesis import given
 from hypothesis import strategies as st
 from typer.testing import CliRunner
 
-from ${{ carnate.project_name }} import commands
+from ${{ carnate.project_name }} import commands, pagerduty
 
 runner = CliRunner()
 
@@ -34,17 +38,23 @@ def test_numeric_intake(x: int, y: int) -> None:
     assert commands.numeric_intake(x, y) == x + y
 
 
-# This will take innordinantely long with Hypothesis.
-# @given(st.integers(min_value=1, max_value=36))
 def test_spin_function() -> None:
-    """Test acceptance of variable number of Spinners."""
-    assert commands.spin(0) is None
+    """Test: spin with no jobs runs nothing and returns."""
+    assert commands.spin([], None, 2, processes=False, list_tasks=False) is None
 
 
-def test_spin_command() -> None:
-    """Test: that spin command returns a healthy exit code."""
-    result = runner.invoke(commands.app, ["spin", "0"])
+def test_spin_command(tmp_path: Path) -> None:
+    """Test: spin runs command-line and file jobs, and fails if any job does."""
+    (tmp_path / "jobs.txt").write_text("# refresh\ntrue\n")
+    result = runner.invoke(
+        commands.app, ["spin", "true", "-f", str(tmp_path / "jobs.txt")]
+    )
     assert result.exit_code == 0
+    assert "2 job(s)" in result.output
+    result = runner.invoke(commands.app, ["spin", "true", "exit 3"])
+    assert result.exit_code == 1
+    result = runner.invoke(commands.app, ["spin", "@no-such-task"])
+    assert result.exit_code == 1
 
 
 # This will take innordinantely long with Hypothesis.
@@ -56,3 +66,133 @@ def test_progbar(
     """Test inputs accepted for progress bars."""
     assert commands.progbar(0, plain_bar) is None
 
+
+def test_count_lines(tmp_path: Path) -> None:
+    """Test: count-lines counts lines and reports progress as NDJSON off a terminal."""
+    (tmp_path / "a.csv").write_text("x\n1\n2\n")
+    assert commands.count_lines(tmp_path, "*.csv", ndjson=True, chunk_size=2) is None
+    result = runner.invoke(commands.app, ["count-lines", str(tmp_path)])
+    assert result.exit_code == 0
+    assert '"task": "a.csv"' in result.output
+
+
+def test_ingest_command(tmp_path: Path) -> None:
+    """Test: ingest converts a directory and exits cleanly."""
+    (tmp_path / "iris.csv").write_text("variety,x\nSetosa,1\n")
+    result = runner.invoke(
+        commands.app,
+        ["ingest", str(tmp_path), "--out", str(tmp_path / "out"), "--workers", "1"],
+    )
+    assert result.exit_code == 0
+    assert (tmp_path / "out" / "dataset=iris" / "iris.parquet").exists()
+
+
+def test_memory_budget_option(tmp_path: Path) -> None:
+    """Test: a global memory budget is accepted and peak RSS reported at exit."""
+    (tmp_path / "a.csv").write_text("x\n1\n")
+    result = runner.invoke(
+        commands.app, ["--memory-budget", "64M", "count-lines", str(tmp_path)]
+    )
+    assert result.exit_code == 0
+    assert "peak RSS" in result.output
+    result = runner.invoke(commands.app, ["--memory-budget", "lots", "count-lines"])
+    assert result.exit_code != 0
+
+
+def test_stocks_corr(tmp_path: Path) -> None:
+    """Test: `stocks corr` prints the matrix and writes every rolling window."""
+    output = tmp_path / "corr.parquet"
+    data_dir = Path(__file__).parents[1] / "data" / "stocks"
+    result = runner.invoke(
+        commands.app,
+        [
+            *("stocks", "corr", "--data-dir", str(data_dir)),
+            *("--window", "60", "--step", "60", "-o", str(output)),
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    assert "Correlation of log returns" in result.output
+    frame = pl.read_parquet(output)
+    assert frame["date"].n_unique() == 4
+    assert frame.columns == ["date", "a", "b", "periods", "cov", "corr"]
+
+
+def test_format_ndjson_streams_query_rows() -> None:
+    """Test: `--format ndjson` writes every row (not a preview) to stdout."""
+    result = runner.invoke(
+        commands.app, ["--format", "ndjson", "query", "SELECT * FROM iris"]
+    )
+    assert result.exit_code == 0, result.output
+    frame = pl.read_ndjson(result.stdout_bytes)
+    assert frame.height == 150
+
+
+def test_format_arrow_streams_corr_windows() -> None:
+    """Test: `stocks corr --format arrow` streams every window's pairs."""
+    data_dir = Path(__file__).parents[1] / "data" / "stocks"
+    result = runner.invoke(
+        commands.app,
+        [
+            *("--format", "arrow", "stocks", "corr", "--data-dir", str(data_dir)),
+            *("--window", "60", "--step", "60"),
+        ],
+    )
+    assert result.exit_code == 0
+    frame = pl.from_arrow(pa.ipc.open_stream(result.stdout_bytes).read_all())
+    assert frame["date"].n_unique() == 4
+
+
+def test_pd_diff_without_shared_endpoints(tmp_path: Path) -> None:
+    """Test: `pd diff` reports snapshots with nothing in common, or a missing endpoint."""
+    frame = pl.DataFrame({"account": ["a"], "id": ["1"]})
+    pagerduty.save_snapshot({"users": frame}, tmp_path)
+    pagerduty.save_snapshot({"licenses": frame}, tmp_path)
+    args = ["pd", "diff", "--snapshots", str(tmp_path)]
+    result = runner.invoke(commands.app, args)
+    assert result.exit_code == 0, result.output
+    assert "No endpoints stored in both" in result.output
+    result = runner.invoke(commands.app, [*args, "--endpoint", "users"])
+    assert result.exit_code == 1
+    assert "not stored in both snapshots: users" in result.output
+
+
+def test_classify(tmp_path: Path) -> None:
+    """Test: `classify` builds the iris index and labels every measurement."""
+    measurements = tmp_path / "new.csv"
+    measurements.write_text(
+        "sepal.length,sepal.width,petal.length,petal.width\n5.0,3.4,1.5,0.2\n"
+        "6.7,3.0,5.6,2.3\n"
+    )
+    args = ["--format", "ndjson", "classify", "iris", str(measurements)]
+    separate = CliRunner(mix_stderr=False)  # messages go to stderr
+    result = separate.invoke(commands.app, [*args, "--store", str(tmp_path)])
+    assert result.exit_code == 0, result.stderr
+    assert "Indexed 150 iris rows" in result.stderr
+    frame = pl.read_ndjson(result.stdout_bytes)
+    assert frame["predicted"].to_list() == ["Setosa", "Virginica"]
+    assert (tmp_path / "iris" / "leaf_points.npy").exists()
+
+
+def test_stocks_indicators(tmp_path: Path) -> None:
+    """Test: a second run adds no rows, and `--verify` passes."""
+    data_dir = Path(__file__).parents[1] / "data" / "stocks"
+    args = ["stocks", "indicators", "--data-dir", str(data_dir)]
+    args += ["--store", str(tmp_path)]
+    assert runner.invoke(commands.app, args).exit_code == 0
+    assert runner.invoke(commands.app, args).exit_code == 0
+    assert len(list((tmp_path / "zoom" / "parts").iterdir())) == 1
+    assert runner.invoke(commands.app, [*args, "--verify"]).exit_code == 0
+
+
+def test_notebooks_run(tmp_path: Path) -> None:
+    """Test: notebooks run in worker processes; a failing one fails the command."""
+    (tmp_path / "ok.ju.py").write_text("# %%\nx = 1\n\n# %%\nx + 1\n")
+    (tmp_path / "bad.ju.py").write_text("# %%\n1 / 0\n")
+    args = ["notebooks", "run", "--out", str(tmp_path / "out")]
+    args += ["--cache-dir", str(tmp_path / "cache")]
+    result = runner.invoke(commands.app, [*args, str(tmp_path / "ok.ju.py")])
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / "out" / "ok.ipynb").exists()
+    result = runner.invoke(commands.app, [*args, str(tmp_path / "bad.ju.py")])
+    assert result.exit_code == 1
+    assert "ZeroDivisionError" in result.output
@@ -0,0 +1,76 @@
+"""Unit Tests for `completion.py`."""
+
+from __future__ import annotations
+
+import json
+import shutil
+import subprocess
+from typing import TYPE_CHECKING
+
+import pytest
+
+from ${{ carnate.project_name }} import commands, completion
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+ROOT = completion.app_tree(commands.app)
+
+
+def complete_bash(script: str, words: list[str]) -> list[str]:
+    """Run the generated bash completion for `words` (the last one being typed)."""
+    line = " ".join(f"'{w}'" for w in words)
+    program = f"""{script}
+COMP_WORDS=({line}); COMP_CWORD={len(words) - 1}
+_prog_completion
+printf '%s\\n' "${{COMPREPLY[@]}}"
+"""
+    argv = ["bash", "-c", program]
+    result = subprocess.run(argv, capture_output=True, text=True, check=True)  # noqa: S603
+    return result.stdout.split()
+
+
+def test_tree_has_groups_panels_and_options() -> None:
+    """Test: the tree records subcommands, their panels, and option metadata."""
+    assert ROOT.commands["pd"].panel == "PagerDuty"
+    assert "licenses" in ROOT.commands["pd"].commands
+    names = [n for o in ROOT.commands["ingest"].options for n in o.names]
+    assert "--workers" in names
+    assert "--memory-budget" in [n for o in ROOT.options for n in o.names]
+    table = json.loads(completion.to_json(ROOT))
+    assert "/pd/licenses/report" in table
+
+
+@pytest.mark.skipif(shutil.which("bash") is None, reason="needs bash")
+def test_bash_completes_without_python() -> None:
+    """Test: the bash script completes commands, nested commands and options."""
+    script = completion.bash(ROOT, "prog")
+    assert "pd" in complete_bash(script, ["prog", "p"])
+    assert "licenses" in complete_bash(
+        script, ["prog", "--memory-budget", "1G", "pd", ""]
+    )
+    assert complete_bash(script, ["prog", "ingest", "--wo"]) == ["--workers"]
+
+
+@pytest.mark.parametrize("shell", ["zsh", "fish"])
+def test_other_shells_parse(shell: str, tmp_path: Path) -> None:
+    """Test: zsh / fish scripts are generated (and parse, where the shell exists)."""
+    path = completion.install(shell, ROOT, "prog", tmp_path / f"prog.{shell}")
+    text = path.read_text()
+    assert "PagerDuty" in text
+    if shutil.which(shell) is None:
+        pytest.skip(f"{shell} not installed")
+    subprocess.run([shell, "-n", str(path)], check=True)  # noqa: S603
+
+
+def test_zsh_completes_when_autoloaded() -> None:
+    """Test: the autoloaded `_prog` body calls the completer, not just `compdef`."""
+    script = completion.script("zsh", ROOT, "prog")
+    assert '_prog_completion "$@"' in script
+    assert "compdef _prog_completion prog" in script
+
+
+def test_unknown_shell() -> None:
+    """Test: unsupported shells are rejected."""
+    with pytest.raises(ValueError, match="Unsupported shell"):
+        completion.script("tcsh", ROOT, "prog")
@@ -0,0 +1,103 @@
+"""Unit Tests for `diff.py`."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import polars as pl
+import pytest
+
+from ${{ carnate.project_name }} import diff, pagerduty
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_diff_frames_finds_added_removed_and_changed_columns() -> None:
+    """Test: rows match by (account, id); changes name exactly the differing columns."""
+    old = pl.LazyFrame(
+        {
+            "account": ["a", "a", "a", "b"],
+            "id": ["1", "2", "3", "1"],
+            "name": ["Ada", "Bo", "Cy", "Di"],
+            "role": ["admin", "user", "user", "user"],
+            "teams": [["x"], [], ["y"], None],
+        }
+    )
+    new = pl.LazyFrame(
+        {
+            "account": ["a", "a", "b", "b"],
+            "id": ["1", "2", "1", "2"],
+            "name": ["Ada", "Bob", "Di", "Ed"],
+            "role": ["admin", "admin", "user", "user"],
+            "teams": [["x", "z"], [], None, []],
+        }
+    )
+    result = diff.diff_frames(old, new)
+    assert result.counts == {"added": 1, "removed": 1, "changed": 2}
+    assert result.added["name"].to_list() == ["Ed"]
+    assert result.removed["name"].to_list() == ["Cy"]
+    changed = dict(
+        result.changed.select("id", diff.CHANGED_COLUMNS_COLUMN).sort("id").rows()
+    )
+    assert changed == {"1": ["teams"], "2": ["name", "role"]}
+    assert result.changes()[diff.CHANGE_COLUMN].value_counts().height == 3
+
+
+def test_diff_frames_compares_retyped_columns() -> None:
+    """Test: a column retyped from Null to String is reported, and its values diffed."""
+    old = pl.LazyFrame({"account": ["a", "a"], "id": ["1", "2"], "note": [None, None]})
+    new = pl.LazyFrame({"account": ["a", "a"], "id": ["1", "2"], "note": [None, "hi"]})
+    result = diff.diff_frames(old, new)
+    assert result.columns_retyped == ["note"]
+    assert result.changed["id"].to_list() == ["2"]
+    assert result.changed[diff.CHANGED_COLUMNS_COLUMN].to_list() == [["note"]]
+
+
+def test_diff_frames_compares_widened_columns_by_value() -> None:
+    """Test: an Int -> Float retype only reports the values that actually changed."""
+    old = pl.LazyFrame({"account": ["a", "a"], "id": ["1", "2"], "n": [1, 2]})
+    new = pl.LazyFrame({"account": ["a", "a"], "id": ["1", "2"], "n": [1.0, 2.5]})
+    result = diff.diff_frames(old, new)
+    assert result.columns_retyped == ["n"]
+    assert result.changed["id"].to_list() == ["2"]
+
+
+def test_diff_snapshots_rejects_endpoints_not_in_both(tmp_path: Path) -> None:
+    """Test: asking for an endpoint one snapshot lacks raises `FileNotFoundError`."""
+    frame = pl.DataFrame({"account": ["a"], "id": ["1"]})
+    old = pagerduty.save_snapshot({"users": frame}, tmp_path)
+    new = pagerduty.save_snapshot({"users": frame, "licenses": frame}, tmp_path)
+    assert diff.diff_snapshots(old, new, ("users",))[0].counts["changed"] == 0
+    with pytest.raises(FileNotFoundError, match="licenses"):
+        diff.diff_snapshots(old, new, ("licenses",))
+
+
+def test_diff_snapshots_keys_allocations_by_struct_ids(tmp_path: Path) -> None:
+    """Test: allocations are keyed by license and user ids; schema changes reported."""
+
+    def allocations(users: list[str]) -> pl.DataFrame:
+        return pl.DataFrame(
+            {
+                "license": [{"id": "L1"}] * len(users),
+                "user": [{"id": u} for u in users],
+                "account": "a",
+            }
+        )
+
+    old = pagerduty.save_snapshot(
+        {"license_allocations": allocations(["U1", "U2"])}, tmp_path / "old"
+    )
+    new = pagerduty.save_snapshot(
+        {
+            "license_allocations": allocations(["U2", "U3"]).with_columns(
+                pl.lit("2024").alias("allocated_at")
+            )
+        },
+        tmp_path / "new",
+    )
+    (result,) = diff.diff_snapshots(old, new)
+    assert result.endpoint == "license_allocations"
+    assert result.counts == {"added": 1, "removed": 1, "changed": 0}
+    assert result.added["user_id"].to_list() == ["U3"]
+    assert result.columns_added == ["allocated_at"]
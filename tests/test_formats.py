@@ -0,0 +1,70 @@
+"""Unit Tests for `formats.py`."""
+
+import io
+from collections.abc import Callable
+
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from ${{ carnate.project_name }} import formats
+
+FRAME = pl.DataFrame({"k": [1, 2, 3, 4, 5], "v": ["a", "b", "c", "d", "e"]})
+
+
+def test_configure_rejects_unknown_format() -> None:
+    """Test: only the listed formats can be configured."""
+    with pytest.raises(ValueError, match="format must be one of"):
+        formats.configure("xlsx")
+    assert formats.is_table()
+
+
+def test_csv_writes_one_header_across_batches() -> None:
+    """Test: batches of a CSV stream share the first batch's header."""
+    stream = io.BytesIO()
+    assert formats.write(FRAME, "csv", stream=stream, batch_rows=2) == 5
+    assert stream.getvalue().decode().splitlines() == [
+        "k,v",
+        "1,a",
+        "2,b",
+        "3,c",
+        "4,d",
+        "5,e",
+    ]
+
+
+def test_arrow_stream_round_trips_in_batches() -> None:
+    """Test: pieces and batches come back as one table, batch by batch."""
+    stream = io.BytesIO()
+    pieces = (FRAME.slice(0, 3), FRAME.slice(3))
+    formats.write(pieces, "arrow", stream=stream, batch_rows=2)
+    reader = pa.ipc.open_stream(stream.getvalue())
+    batches = list(reader)
+    assert [batch.num_rows for batch in batches] == [2, 1, 2]
+    assert pl.from_arrow(pa.Table.from_batches(batches)).equals(FRAME)
+
+
+def test_parquet_writes_a_row_group_per_batch() -> None:
+    """Test: a Parquet stream to a non-seekable target reads back whole."""
+    stream = io.BytesIO()
+    formats.write(FRAME, "parquet", stream=stream, batch_rows=2)
+    stream.seek(0)
+    assert pq.ParquetFile(stream).num_row_groups == 3
+    assert pl.read_parquet(io.BytesIO(stream.getvalue())).equals(FRAME)
+
+
+@pytest.mark.parametrize(
+    ("fmt", "read"),
+    [
+        ("csv", lambda data: pl.read_csv(io.BytesIO(data)).columns),
+        ("ndjson", lambda data: data.decode().splitlines()),
+        ("parquet", lambda data: pl.read_parquet(io.BytesIO(data)).columns),
+        ("arrow", lambda data: pa.ipc.open_stream(data).read_all().column_names),
+    ],
+)
+def test_empty_results_still_carry_the_schema(fmt: str, read: Callable) -> None:
+    """Test: a result with no rows is still a valid stream, with its columns."""
+    stream = io.BytesIO()
+    assert formats.write(FRAME.clear(), fmt, stream=stream) == 0
+    assert read(stream.getvalue()) == ([] if fmt == "ndjson" else ["k", "v"])
@@ -0,0 +1,62 @@
+"""Unit Tests for `indexes.py`."""
+
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from ${{ carnate.project_name }} import indexes
+
+
+def test_hash_index_point_lookups(tmp_path: Path) -> None:
+    """Test: every key finds exactly its rows, across probes and after reloading."""
+    emails = [f"user{i % 300}@example.com" for i in range(1_000)] + [None]
+    index = indexes.HashIndex(tmp_path / "email")
+    index.build(pl.Series(emails))
+
+    reopened = indexes.HashIndex(tmp_path / "email")
+    for key in ("user0@example.com", "user299@example.com", "user7@example.com"):
+        expected = [i for i, e in enumerate(emails) if e == key]
+        assert reopened.lookup(key).tolist() == expected
+    assert reopened.lookup("nobody@example.com").tolist() == []
+    both = reopened.lookup_many(["user1@example.com", "user2@example.com"])
+    assert both.tolist() == sorted(
+        i
+        for i, e in enumerate(emails)
+        if e in {"user1@example.com", "user2@example.com"}
+    )
+
+
+def test_sorted_index_ranges(tmp_path: Path) -> None:
+    """Test: half-open ranges on ISO timestamps, with open ends."""
+    stamps = ["2024-01-03", "2024-01-01", None, "2024-01-02", "2024-01-02"]
+    index = indexes.SortedIndex(tmp_path / "modified")
+    index.build(pl.Series(stamps))
+    assert index.between("2024-01-02", "2024-01-03").tolist() == [3, 4]
+    assert index.between("2024-01-02").tolist() == [0, 3, 4]
+    assert index.between(None, "2024-01-02").tolist() == [1]
+    assert index.between().tolist() == [0, 1, 3, 4]
+
+
+def test_array_index_subclasses_must_say_what_empty_holds(tmp_path: Path) -> None:
+    """Test: the base class is abstract until `empty` is defined."""
+
+    class Incomplete(indexes.ArrayIndex):
+        names = ("values",)
+
+    with pytest.raises(TypeError, match="empty"):
+        Incomplete(tmp_path)
+
+
+def test_sorted_index_orders_instants_not_strings(tmp_path: Path) -> None:
+    """Test: timestamps with different UTC offsets are ranged as instants."""
+    stamps = [
+        "2024-01-01T01:00:00+02:00",  # 2023-12-31T23:00Z
+        "2024-01-01T00:30:00Z",
+        "2023-12-31T20:00:00-05:00",  # 2024-01-01T01:00Z
+    ]
+    index = indexes.SortedIndex(tmp_path / "modified")
+    index.build(pl.Series(stamps))
+    assert index.between("2024-01-01T00:00:00Z").tolist() == [1, 2]
+    assert index.between(None, "2024-01-01T00:45:00+00:00").tolist() == [0, 1]
+    assert index.between("2024-01-01T00:00:00+01:00", "2024-01-01").tolist() == [0]
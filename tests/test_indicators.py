@@ -0,0 +1,59 @@
+"""Unit Tests for `indicators.py`."""
+
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from ${{ carnate.project_name }} import indicators
+
+STOCKS_DIR = Path(__file__).parents[1] / "data" / "stocks"
+
+
+def _write_tail(source: Path, target: Path, skip: int) -> None:
+    """Copy a newest-first stocks file without its newest `skip` days."""
+    lines = source.read_text().splitlines(keepends=True)
+    target.write_text(lines[0] + "".join(lines[1 + skip :]))
+
+
+@pytest.mark.parametrize(
+    "name", ["stock_zoom.csv", "stock_sp_industrial_composite_index.csv"]
+)
+def test_incremental_matches_full_recompute(tmp_path: Path, name: str) -> None:
+    """Test: days added in several updates give the same rows as one recompute."""
+    target = tmp_path / name
+    store = indicators.IndicatorStore(tmp_path / "store")
+    for skip in (120, 60, 59, 10, 0):
+        _write_tail(STOCKS_DIR / name, target, skip)
+        result = store.update(target)
+    assert (result.new_rows, result.recomputed) == (10, False)
+    gaps = store.verify(target)
+    assert max(gaps.values()) < indicators.TOLERANCE
+    history = store.history(indicators.ticker_of(target))
+    assert history["Date"].is_sorted()
+    assert history.height == pl.read_csv(target).height
+
+
+def test_only_new_days_are_read() -> None:
+    """Test: rows come back oldest first, from the last folded-in day on."""
+    frame = indicators.read_since(STOCKS_DIR / "stock_zoom.csv")
+    assert frame["Date"].is_sorted()
+    since = frame["Date"][-3]
+    recent = indicators.read_since(STOCKS_DIR / "stock_zoom.csv", since)
+    assert recent["Date"].to_list() == frame["Date"][-3:].to_list()
+
+
+def test_changed_history_recomputes(tmp_path: Path) -> None:
+    """Test: a rewritten close for the last folded-in day triggers a full recompute."""
+    target = tmp_path / "stock_zoom.csv"
+    _write_tail(STOCKS_DIR / "stock_zoom.csv", target, 5)
+    store = indicators.IndicatorStore(tmp_path / "store")
+    store.update(target)
+    lines = (STOCKS_DIR / "stock_zoom.csv").read_text().splitlines(keepends=True)
+    fields = lines[6].split('","')
+    fields[3] = "1.00"  # the close of the last day already folded in
+    lines[6] = '","'.join(fields)
+    target.write_text("".join(lines))
+    result = store.update(target)
+    assert (result.recomputed, result.new_rows) == (True, len(lines) - 1)
+    assert max(store.verify(target).values()) < indicators.TOLERANCE
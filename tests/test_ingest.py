@@ -0,0 +1,55 @@
+"""Unit Tests for `ingest.py`."""
+
+from pathlib import Path
+
+import polars as pl
+
+from ${{ carnate.project_name }} import ingest
+
+
+def _write_stock(path: Path, volume: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        f'Date,Open,High,Low,Close,Volume\n01/10/2024,"1.0","2.0","0.5","1.5","{volume}"\n'
+    )
+
+
+def test_ingest_dir_partitions_and_resumes(tmp_path: Path) -> None:
+    """Test: files land partitioned by dataset; unchanged files are skipped on rerun."""
+    src, out = tmp_path / "src", tmp_path / "out"
+    _write_stock(src / "stock_aaa.csv", "1,000")
+    _write_stock(src / "nested" / "stock_bbb.csv", "2,000")
+    (src / "things.csv").write_text("a,b\n1,x\n2,y\n")
+
+    first = ingest.ingest_dir(src, out, workers=2)
+    assert sorted(r.status for r in first) == ["converted"] * 3
+    stocks = pl.read_parquet(out / "dataset=stocks" / "*.parquet")
+    assert sorted(stocks["Volume"].to_list()) == [1000, 2000]
+    assert pl.read_parquet(out / "dataset=things" / "things.parquet").height == 2
+
+    _write_stock(src / "stock_aaa.csv", "3,000,000")
+    second = {Path(r.source).name: r.status for r in ingest.ingest_dir(src, out)}
+    assert second == {
+        "stock_aaa.csv": "converted",
+        "stock_bbb.csv": "skipped",
+        "things.csv": "skipped",
+    }
+
+
+def test_same_named_files_in_subdirectories_dont_collide(tmp_path: Path) -> None:
+    """Test: `a/x.csv` and `b/x.csv` get separate outputs, both kept."""
+    src, out = tmp_path / "src", tmp_path / "out"
+    _write_stock(src / "a" / "stock_zoom.csv", "1,000")
+    _write_stock(src / "b" / "stock_zoom.csv", "2,000")
+    results = ingest.ingest_dir(src, out, workers=1)
+    assert len({r.output for r in results}) == 2
+    stocks = pl.read_parquet(out / "dataset=stocks" / "*.parquet")
+    assert sorted(stocks["Volume"].to_list()) == [1000, 2000]
+
+
+def test_ingest_dir_reports_failures(tmp_path: Path) -> None:
+    """Test: a file that can't be converted fails alone and isn't marked done."""
+    _write_stock(tmp_path / "stock_bad.csv", "not a number")
+    (result,) = ingest.ingest_dir(tmp_path, tmp_path / "out", workers=1)
+    assert result.status == "failed"
+    assert not Path(result.output).exists()
@@ -0,0 +1,97 @@
+"""Unit Tests for `jobs.py`."""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+
+import pytest
+
+from ${{ carnate.project_name }} import catalog, jobs
+
+
+def test_jobs_run_concurrently_in_order() -> None:
+    """Test: jobs overlap in time and results come back in job order."""
+    started = time.perf_counter()
+    results = jobs.run(["sleep 0.3", "sleep 0.3", "echo hi; exit 2"], workers=3)
+    assert time.perf_counter() - started < 0.55
+    assert [r.status for r in results] == ["ok", "ok", "failed"]
+    assert results[2].returncode == 2
+    assert results[2].output == "hi"
+    assert jobs.timings(results).height == 3
+
+
+def test_python_tasks(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test: registered Python tasks run as `@name`; their exceptions fail the job."""
+    calls: list[str] = []
+
+    def boom() -> None:
+        msg = "boom"
+        raise RuntimeError(msg)
+
+    monkeypatch.setattr(jobs, "TASKS", {})
+    jobs.register(jobs.PythonTask("ok", lambda: calls.append("ok")))
+    jobs.register(jobs.PythonTask("boom", boom))
+    results = jobs.run(["@ok", "@boom"], workers=2)
+    assert calls == ["ok"]
+    assert [r.status for r in results] == ["ok", "failed"]
+    assert "RuntimeError: boom" in results[1].output
+    with pytest.raises(KeyError, match="Unknown task"):
+        jobs.parse_jobs(["@missing"])
+
+
+def test_cancel_stops_running_and_pending_jobs() -> None:
+    """Test: cancelling terminates running commands and skips pending ones."""
+    runner = jobs.Runner(workers=1)
+    threading.Timer(0.3, runner.cancel).start()
+    started = time.perf_counter()
+    results = runner.run(jobs.parse_jobs(["sleep 5; true", "true"]))
+    assert time.perf_counter() - started < 2
+    assert runner.cancelled
+    assert [r.status for r in results] == ["cancelled", "cancelled"]
+
+
+def test_builtin_tasks_are_registered(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test: every catalog dataset, even one registered later, can be rebuilt as a job."""
+    assert "catalog:penguins" in jobs.tasks()
+    assert "ingest" in jobs.tasks()
+    monkeypatch.setattr(catalog, "DATASETS", dict(catalog.DATASETS))
+    catalog.register(catalog.Dataset("late", ("late.csv",)))
+    assert jobs.Job("@catalog:late").task is not None
+
+
+def _noisy_failure() -> None:
+    print("about to fail")  # noqa: T201
+    msg = "boom"
+    raise RuntimeError(msg)
+
+
+def test_python_task_output_is_captured(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Test: in-thread tasks' prints and exits are the job's, not the terminal's."""
+    monkeypatch.setattr(jobs, "TASKS", {})
+    jobs.register(jobs.PythonTask("noisy", _noisy_failure))
+    jobs.register(jobs.PythonTask("exit", lambda: sys.exit(3)))
+    jobs.register(jobs.PythonTask("quiet", lambda: sys.exit(0)))
+    results = jobs.run(["@noisy", "@exit", "@quiet"], workers=3)
+    assert [r.status for r in results] == ["failed", "failed", "ok"]
+    assert "about to fail" in results[0].output
+    assert "RuntimeError: boom" in results[0].output
+    assert results[1].returncode == 3
+    assert capsys.readouterr().out == ""
+
+
+def test_process_tasks_keep_output_and_start_failures(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test: a task process's traceback is kept; an unpicklable task fails its job."""
+    monkeypatch.setattr(jobs, "TASKS", {})
+    jobs.register(jobs.PythonTask("noisy", _noisy_failure))
+    jobs.register(jobs.PythonTask("lambda", lambda: None))
+    results = jobs.run(["@noisy", "@lambda"], workers=2, processes=True)
+    assert [r.status for r in results] == ["failed", "failed"]
+    assert "about to fail" in results[0].output
+    assert "RuntimeError: boom" in results[0].output
+    assert "pickle" in results[1].output.lower()
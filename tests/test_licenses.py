@@ -0,0 +1,68 @@
+"""Unit Tests for `licenses.py`."""
+
+from pathlib import Path
+
+import polars as pl
+
+from ${{ carnate.project_name }} import licenses, pagerduty
+
+
+def _snapshot(root: Path) -> Path:
+    license_ref = {"id": "L1", "name": "Full User", "role_group": "FullUser"}
+    return pagerduty.save_snapshot(
+        {
+            "users": pl.DataFrame(
+                {
+                    "id": ["U1", "U2", "U3"],
+                    "name": ["Ada", "Bo", "Cy"],
+                    "email": ["ada@x.io", "bo@x.io", "cy@x.io"],
+                    "role": ["admin", "user", "observer"],
+                    "account": "acme",
+                }
+            ),
+            "licenses": pl.DataFrame(
+                {
+                    "id": ["L1", "L2"],
+                    "name": ["Full User", "Stakeholder"],
+                    "role_group": ["FullUser", "Stakeholder"],
+                    "allocations_available": [2, None],
+                    "account": "acme",
+                }
+            ),
+            "license_allocations": pl.DataFrame(
+                {
+                    "license": [
+                        license_ref,
+                        license_ref,
+                        {
+                            "id": "L2",
+                            "name": "Stakeholder",
+                            "role_group": "Stakeholder",
+                        },
+                    ],
+                    "user": [
+                        {"id": "U1", "summary": "Ada"},
+                        {"id": "U2", "summary": "Bo"},
+                        {"id": "U9", "summary": "Gone"},
+                    ],
+                    "account": "acme",
+                }
+            ),
+        },
+        root,
+    )
+
+
+def test_allocations_unnest_and_join_users(tmp_path: Path) -> None:
+    """Test: struct fields become columns; unknown users keep null details."""
+    flat = licenses.allocations(_snapshot(tmp_path)).collect().sort("user_id")
+    assert flat["license_name"].to_list() == ["Full User", "Full User", "Stakeholder"]
+    assert flat["user_email"].to_list() == ["ada@x.io", "bo@x.io", None]
+
+
+def test_report_utilisation_per_license(tmp_path: Path) -> None:
+    """Test: allocated vs capacity per license; unlimited licenses have no ratio."""
+    report = licenses.report(_snapshot(tmp_path)).collect()
+    assert report.select(
+        "license_id", "allocated", "available", "capacity", "utilisation"
+    ).rows() == [("L1", 2, 2, 4, 0.5), ("L2", 1, None, None, None)]
@@ -0,0 +1,72 @@
+"""Unit Tests for `memory.py`."""
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from ${{ carnate.project_name }} import memory
+
+
+@pytest.fixture
+def _budget() -> Iterator[None]:
+    """Set a 1 MiB budget for the test, and clear it afterwards."""
+    memory.configure(1024**2)
+    yield
+    memory.configure(None)
+
+
+def test_estimates_from_file_metadata(tmp_path: Path) -> None:
+    """Test: Parquet is sized from its footer, text files from their size on disk."""
+    frame = pl.DataFrame({"x": range(10_000), "y": ["abc"] * 10_000})
+    frame.write_parquet(tmp_path / "a.parquet")
+    frame.write_csv(tmp_path / "a.csv")
+    parquet = memory.estimate_bytes([tmp_path / "a.parquet"])
+    assert parquet > (tmp_path / "a.parquet").stat().st_size
+    csv = memory.estimate_bytes(pl.scan_csv(tmp_path / "a.csv"))
+    assert csv == int((tmp_path / "a.csv").stat().st_size * memory.TEXT_EXPANSION)
+
+
+@pytest.mark.usefixtures("_budget")
+def test_collect_picks_strategy_by_size(tmp_path: Path) -> None:
+    """Test: small inputs collect eagerly; inputs over budget spill to disk."""
+    small = tmp_path / "small.csv"
+    small.write_text("x\n1\n2\n")
+    assert memory.collect(pl.scan_csv(small))["x"].to_list() == [1, 2]
+    big = tmp_path / "big.csv"
+    pl.DataFrame({"x": range(200_000)}).write_csv(big)
+    assert memory.strategy(memory.estimate_bytes([big])) == memory.SPILL
+    spill_dir = tmp_path / "spill"
+    result = memory.spill(pl.scan_csv(big).filter(pl.col("x") % 2 == 0), spill_dir)
+    assert result.height == 100_000
+    assert result["x"].sum() == sum(range(0, 200_000, 2))
+    assert not any(spill_dir.iterdir())
+
+
+@pytest.mark.usefixtures("_budget")
+def test_chunk_rows_fit_budget() -> None:
+    """Test: batches are sized to a slice of the budget."""
+    rows = memory.chunk_rows(10)
+    assert rows * 10 <= 1024**2 * memory.CHUNK_FRACTION
+    assert memory.chunk_rows(10**9) == memory.MIN_CHUNK_ROWS
+    assert "budget 1 MiB" in memory.report()
+
+
+@pytest.mark.usefixtures("_budget")
+def test_plans_over_frames_in_memory_are_not_taken_for_small(tmp_path: Path) -> None:
+    """Test: frames are sized from their buffers; plans over them stream."""
+    frame = pl.DataFrame({"x": range(200_000)})
+    assert memory.estimate_bytes(frame) == frame.estimated_size()
+    assert memory.plan_strategy(frame.lazy()) == memory.STREAMING
+    frame.write_ipc(tmp_path / "x.arrow", compression="uncompressed")
+    scan = pl.scan_ipc(tmp_path / "x.arrow", memory_map=True)  # as `catalog.scan`
+    assert memory.estimate_bytes(scan) == (tmp_path / "x.arrow").stat().st_size
+    assert memory.plan_strategy(scan.head(10)) == memory.SPILL
+    assert memory.plan_strategy(scan, input_bytes=1) == memory.IN_MEMORY
+
+
+def test_parse_size_rejects_nonsense() -> None:
+    """Test: sizes must be a number with an optional unit."""
+    with pytest.raises(ValueError, match="Not a size"):
+        memory.parse_size("lots")
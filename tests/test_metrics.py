@@ -0,0 +1,114 @@
+"""Unit Tests for `metrics.py`."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
+
+import httpx
+
+from ${{ carnate.project_name }} import metrics, pagerduty
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+SINCE = datetime(2024, 1, 1, tzinfo=UTC)  # a Monday
+UNTIL = datetime(2024, 1, 15, tzinfo=UTC)
+
+
+def _log(incident: str, kind: str, at: str, service: str, teams: list[str]) -> dict:
+    return {
+        "type": kind,
+        "created_at": at,
+        "incident": {"id": incident},
+        "service": {"id": service, "summary": service},
+        "teams": [{"id": t, "summary": t} for t in teams],
+    }
+
+
+LOGS = [
+    _log("I1", metrics.TRIGGER, "2024-01-01T00:00:00Z", "api", ["core"]),
+    _log("I1", metrics.ACKNOWLEDGE, "2024-01-01T00:10:00Z", "api", ["core"]),
+    _log("I1", metrics.ACKNOWLEDGE, "2024-01-01T00:20:00Z", "api", ["core"]),
+    _log("I1", metrics.RESOLVE, "2024-01-01T01:00:00Z", "api", ["core"]),
+    _log("I2", metrics.TRIGGER, "2024-01-02T00:00:00Z", "api", ["core", "web"]),
+    _log("I2", metrics.RESOLVE, "2024-01-02T00:30:00Z", "api", ["core", "web"]),
+    _log("I3", metrics.TRIGGER, "2024-01-09T00:00:00Z", "db", []),
+    _log("I3", "notify_log_entry", "2024-01-09T00:01:00Z", "db", []),
+]
+
+
+def _fake(request: httpx.Request) -> httpx.Response:
+    """Serve LOGS within the requested window, two per page."""
+    since = datetime.fromisoformat(request.url.params["since"])
+    until = datetime.fromisoformat(request.url.params["until"])
+    logs = [
+        log
+        for log in LOGS
+        if since <= datetime.fromisoformat(log["created_at"]) < until
+    ]
+    offset = int(request.url.params["offset"])
+    return httpx.Response(
+        200,
+        json={"log_entries": logs[offset : offset + 2], "more": offset + 2 < len(logs)},
+    )
+
+
+def test_metrics_per_service_and_team(tmp_path: Path) -> None:
+    """Test: pages spool separately; TTA uses the first ack; teams split incidents."""
+    count, plan = metrics.collect(
+        pagerduty.Account("a", "key"),
+        SINCE,
+        UNTIL,
+        tmp_path,
+        transport=httpx.MockTransport(_fake),
+    )
+    assert count == len(LOGS)
+    assert len(list(tmp_path.glob("*.parquet"))) == 4  # 3 pages in week 1, 1 in 2
+
+    by_service = plan.collect(streaming=True)
+    assert by_service.select(
+        "service", "incidents", "acknowledged", "tta_mean", "ttr_mean"
+    ).rows() == [("api", 2, 1, 10.0, 45.0), ("db", 1, 0, None, None)]
+
+    by_team = metrics.report(tmp_path, ("team",)).collect(streaming=True)
+    assert by_team.select("team", "incidents").rows() == [
+        ("core", 2),
+        ("web", 1),
+        (None, 1),
+    ]
+
+
+def test_spool_writes_a_page_while_fetching_the_next(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test: the next page is requested before the previous one is written."""
+    events: list[str] = []
+    spool_page = metrics._spool_page  # noqa: SLF001
+
+    def slow_spool(records: list[dict], path: Path) -> None:
+        time.sleep(0.05)
+        spool_page(records, path)
+        events.append(f"wrote {path.stem}")
+
+    def fake(request: httpx.Request) -> httpx.Response:
+        events.append(f"get {request.url.params['offset']}")
+        return _fake(request)
+
+    monkeypatch.setattr(metrics, "_spool_page", slow_spool)
+    count = asyncio.run(
+        metrics.spool(
+            pagerduty.Account("a", "key"),
+            SINCE,
+            SINCE + metrics.WINDOW,
+            tmp_path,
+            transport=httpx.MockTransport(fake),
+        )
+    )
+    assert count == 6
+    assert events.index("get 2") < events.index("wrote page-000000")
+    assert events[-1] == "wrote page-000002"
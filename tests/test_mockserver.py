@@ -0,0 +1,81 @@
+"""Unit Tests for `mockserver.py` and `loadtest.py`."""
+
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+
+from ${{ carnate.project_name }} import loadtest, mockserver, pagerduty, progress, zenq
+
+
+def test_pagerduty_client_pages_through_mock() -> None:
+    """Test: the real pull code paginates the mock and retries its 429s."""
+    config = mockserver.MockConfig(
+        users=250, license_allocations=120, rate_limited=0.3, retry_after=0.0
+    )
+
+    async def pull() -> tuple[dict, mockserver.ServerStats]:
+        async with mockserver.MockServer(config) as server:
+            pulled = await pagerduty.pull_account(
+                pagerduty.Account("mock", "key"),
+                ("users", "licenses", "license_allocations"),
+                base_url=server.url,
+            )
+            return pulled, server.stats
+
+    pulled, stats = asyncio.run(pull())
+    assert [u["id"] for u in pulled["users"]][:2] == ["PU0000000", "PU0000001"]
+    assert len(pulled["users"]) == config.users
+    assert len(pulled["licenses"]) == config.licenses
+    assert stats.rate_limited > 0
+    assert stats.by_path["/users"] >= 3  # three pages, plus any retried ones
+
+
+def test_zenq_client_against_mock() -> None:
+    """Test: token exchange then ticket list, through the mock."""
+    config = mockserver.MockConfig(tickets=5)
+
+    async def fetch() -> list[dict]:
+        async with mockserver.MockServer(config) as server:
+            return await zenq.fetch_tickets(
+                zenq.Credentials("id", "secret", "cookie"),
+                base_url=server.url + mockserver.ZENQ_PREFIX,
+                token_url=server.url + "/oauth2/token",
+            )
+
+    assert [t["id"] for t in asyncio.run(fetch())][-1] == "ZQ0000004"
+
+
+def test_load_reports_throughput_and_latency() -> None:
+    """Test: every page is fetched once; 429s and hedges are counted as extra requests."""
+    config = mockserver.MockConfig(
+        users=50 * pagerduty.PAGE_LIMIT, rate_limited=0.1, retry_after=0.0
+    )
+
+    async def run() -> loadtest.LoadResult:
+        async with mockserver.MockServer(config) as server:
+            return await loadtest.load(
+                server.url, "users", 50, concurrency=8, task=task
+            )
+
+    task = progress.Task("users", total=50, unit="pages")
+    result = asyncio.run(run())
+    assert (result.pages, result.records) == (50, 50 * pagerduty.PAGE_LIMIT)
+    assert task.units == 50
+    assert task.nbytes > 0
+    # a hedge's loser is counted if it answered before it could be cancelled
+    extra = result.requests - 50 - result.rate_limited
+    assert 0 <= extra <= result.hedged
+    summary = result.summary()
+    assert summary["p99_ms"] >= summary["p50_ms"] > 0
+    assert summary["peak_rss_mib"] > 0
+
+
+def test_unknown_endpoint_is_404() -> None:
+    """Test: the mock refuses endpoints it doesn't emulate."""
+    server = mockserver.MockServer()
+    assert server.respond("GET", "/nope")[0] == httpx.codes.NOT_FOUND
+    status, _, body = server.respond("GET", "/licenses?limit=2&offset=2")
+    assert status == httpx.codes.OK
+    assert (len(body["licenses"]), body["more"]) == (2, False)
@@ -0,0 +1,110 @@
+"""Unit Tests for `notebooks.py`."""
+
+import json
+from pathlib import Path
+
+from ${{ carnate.project_name }} import notebooks
+
+NOTEBOOK = """# %% [markdown]
+# # Demo
+
+# %%
+rows = open("in.csv").read().splitlines()
+
+# %%
+total = sum(int(row) for row in rows)
+print("total", total)
+
+# %%
+total * 10
+"""
+
+
+def _run(tmp_path: Path) -> notebooks.NotebookResult:
+    return notebooks.run_notebook(
+        tmp_path / "demo.ju.py",
+        cache_root=tmp_path / "cache",
+        out_dir=tmp_path / "out",
+    )
+
+
+def test_keys_chain_and_follow_data(tmp_path: Path) -> None:
+    """Test: a data change re-keys the cell reading it and every cell below."""
+    (tmp_path / "in.csv").write_text("1\n2\n")
+    cells = notebooks.parse(NOTEBOOK)
+    notebooks.assign_keys(cells, tmp_path)
+    before = [cell.key for cell in cells if cell.kind == "code"]
+    (tmp_path / "in.csv").write_text("1\n2\n3\n")
+    notebooks.assign_keys(cells, tmp_path)
+    after = [cell.key for cell in cells if cell.kind == "code"]
+    assert len(set(before) | set(after)) == 6
+
+    cells[-1].source = "total * 100"
+    notebooks.assign_keys(cells, tmp_path)
+    assert [cell.key for cell in cells if cell.kind == "code"][:2] == after[:2]
+
+
+def test_only_changed_cells_run(tmp_path: Path) -> None:
+    """Test: reruns are served from cache; an edit runs that cell only."""
+    (tmp_path / "in.csv").write_text("1\n2\n")
+    (tmp_path / "demo.ju.py").write_text(NOTEBOOK)
+    first = _run(tmp_path)
+    assert (first.status, first.executed, first.cached) == ("ok", 3, 0)
+    second = _run(tmp_path)
+    assert (second.executed, second.cached) == (0, 3)
+
+    (tmp_path / "demo.ju.py").write_text(NOTEBOOK.replace("total * 10", "total * 100"))
+    third = _run(tmp_path)
+    assert (third.executed, third.cached, third.replayed) == (1, 2, 0)
+    written = json.loads((tmp_path / "out" / "demo.ipynb").read_text())
+    outputs = [cell.get("outputs") for cell in written["cells"]]
+    assert outputs[2] == [
+        {"output_type": "stream", "name": "stdout", "text": "total 3\n"}
+    ]
+    assert outputs[3][0]["data"]["text/plain"] == "300"
+
+
+def test_failed_cell_stops_the_notebook(tmp_path: Path) -> None:
+    """Test: an error is reported and not cached; later cells don't run."""
+    (tmp_path / "demo.ju.py").write_text(NOTEBOOK)  # no in.csv
+    result = _run(tmp_path)
+    assert (result.status, result.executed) == ("failed", 1)
+    assert "FileNotFoundError" in result.error
+    assert _run(tmp_path).cached == 0
+
+
+def test_sys_exit_is_a_cell_error() -> None:
+    """Test: a cell calling `sys.exit` fails instead of ending the worker."""
+    outputs, ok = notebooks.execute_cell("import sys\nsys.exit(2)", {})
+    assert not ok
+    assert outputs[-1]["ename"] == "SystemExit"
+
+
+def test_prune_drops_old_checkpoints_and_orphaned_blobs(tmp_path: Path) -> None:
+    """Test: within budget only orphans go; over budget, checkpoints go too."""
+    (tmp_path / "in.csv").write_text("1\n2\n")
+    (tmp_path / "demo.ju.py").write_text(NOTEBOOK)
+    _run(tmp_path)
+    cache = notebooks.CellCache(tmp_path / "cache")
+    orphan = cache.root / "blobs" / "orphan.pickle"
+    orphan.write_bytes(b"x")
+    blobs = len(list((cache.root / "blobs").iterdir()))
+
+    assert cache.prune() == 1
+    assert len(list((cache.root / "blobs").iterdir())) == blobs - 1
+    assert cache.prune(0) > 0
+    assert not any((cache.root / "blobs").iterdir())
+    assert not any((cache.root / "checkpoints").iterdir())
+    assert _run(tmp_path).cached == 3  # outputs are kept
+
+
+def test_a_dead_worker_fails_its_notebook(tmp_path: Path) -> None:
+    """Test: a notebook that kills its process is reported, not raised."""
+    (tmp_path / "dies.ju.py").write_text("# %%\nimport os\nos._exit(3)\n")
+    (result,) = notebooks.run(
+        [tmp_path / "dies.ju.py"],
+        cache_root=tmp_path / "cache",
+        out_dir=tmp_path / "out",
+    )
+    assert result.status == "failed"
+    assert "BrokenProcessPool" in result.error
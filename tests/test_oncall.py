@@ -0,0 +1,117 @@
+"""Unit Tests for `oncall.py`."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+
+import httpx
+import polars as pl
+
+from ${{ carnate.project_name }} import oncall, pagerduty, progress
+
+SINCE = datetime(2024, 1, 1, tzinfo=UTC)
+UNTIL = datetime(2024, 1, 2, tzinfo=UTC)
+
+
+def _entry(
+    user: str,
+    start: str | None,
+    end: str | None,
+    schedule: str = "S1",
+    schedule_name: str | None = None,
+) -> dict:
+    return {
+        "escalation_policy": {"id": "P1", "summary": "Ops"},
+        "escalation_level": 1,
+        "schedule": {"id": schedule, "summary": schedule_name or f"Sched {schedule}"},
+        "user": {"id": user, "summary": user.title()},
+        "start": start,
+        "end": end,
+    }
+
+
+RECORDS = [
+    _entry("ada", "2023-12-31T20:00:00Z", "2024-01-01T08:00:00Z"),
+    _entry("bo", "2024-01-01T08:00:00Z", "2024-01-01T12:00:00Z"),
+    _entry("cy", "2024-01-01T10:00:00Z", "2024-01-01T14:00:00Z"),  # overlaps bo
+    _entry("ada", "2024-01-01T18:00:00Z", "2024-01-02T08:00:00Z"),
+    _entry("di", None, None, schedule="S2"),  # always on call
+]
+
+
+def _at(hour: int) -> datetime:
+    return datetime(2024, 1, 1, hour, tzinfo=UTC)
+
+
+def test_point_range_and_gap_queries() -> None:
+    """Test: clipped entries, overlapping coverage, and the uncovered afternoon."""
+    coverage = oncall.Coverage.build(
+        oncall.entries(RECORDS, SINCE, UNTIL), SINCE, UNTIL
+    )
+    s1 = coverage.timelines["S1"]
+
+    assert s1.at(_at(0))["user_id"].to_list() == ["ada"]
+    assert sorted(s1.at(_at(11))["user_id"].to_list()) == ["bo", "cy"]
+    assert s1.at(_at(15)).is_empty()
+    assert sorted(s1.during(_at(7), _at(9))["user_id"].to_list()) == ["ada", "bo"]
+
+    assert s1.gaps() == [(oncall._micros(_at(14)), oncall._micros(_at(18)))]  # noqa: SLF001
+    assert s1.gaps(_at(15), _at(16)) == [
+        (oncall._micros(_at(15)), oncall._micros(_at(16)))  # noqa: SLF001
+    ]
+    assert s1.gaps(_at(0), _at(12)) == []
+    assert round(s1.covered, 4) == round(1 - 4 / 24, 4)
+    assert coverage.timelines["S2"].covered == 1.0
+
+    assert sorted(coverage.at(_at(15))["user_id"].to_list()) == ["di"]
+    gaps = coverage.gaps()
+    assert gaps["group"].to_list() == ["Sched S1"]
+    assert gaps["duration"].dt.total_hours().to_list() == [4]
+    assert coverage.summary().sort("group")["gaps"].to_list() == [1, 0]
+
+
+def test_schedules_sharing_a_name_stay_apart() -> None:
+    """Test: groups are keyed by id, so same-named schedules are not merged."""
+    records = [
+        _entry("ada", "2024-01-01T00:00:00Z", "2024-01-01T12:00:00Z", "S1", "Primary"),
+        _entry("bo", "2024-01-01T12:00:00Z", "2024-01-02T00:00:00Z", "S2", "Primary"),
+    ]
+    coverage = oncall.Coverage.build(
+        oncall.entries(records, SINCE, UNTIL), SINCE, UNTIL
+    )
+    assert sorted(coverage.timelines) == ["S1", "S2"]
+    summary = coverage.summary().sort("group_id")
+    assert summary["group"].to_list() == ["Primary", "Primary"]
+    assert summary["covered"].to_list() == [0.5, 0.5]
+
+
+def test_micros_is_exact() -> None:
+    """Test: datetimes convert without a float round trip."""
+    moment = datetime(2262, 4, 11, 23, 47, 16, 854_775, tzinfo=UTC)
+    assert oncall._micros(moment) == 9_223_372_036_854_775  # noqa: SLF001
+    assert oncall._micros(moment) == oncall._micros(pl.Series([moment]))[0]  # noqa: SLF001
+
+
+def test_pull_pages_through_oncalls() -> None:
+    """Test: the window is sent as params and every page is flattened."""
+
+    def fake(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/oncalls"
+        assert request.url.params["since"] == SINCE.isoformat()
+        offset = int(request.url.params["offset"])
+        page = RECORDS[offset : offset + 2]
+        return httpx.Response(
+            200, json={"oncalls": page, "more": offset + 2 < len(RECORDS)}
+        )
+
+    task = progress.Task("oncalls")
+    frame = oncall.pull(
+        pagerduty.Account("a", "key"),
+        SINCE,
+        UNTIL,
+        transport=httpx.MockTransport(fake),
+        task=task,
+    )
+    assert frame.height == len(RECORDS)
+    assert task.units == len(RECORDS)
+    assert dict(frame.schema) == oncall.ENTRY_SCHEMA
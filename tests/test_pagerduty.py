@@ -0,0 +1,83 @@
+"""Unit Tests for `pagerduty.py`."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import httpx
+import polars as pl
+
+from ${{ carnate.project_name }} import catalog, memory, pagerduty
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+
+def _fake_pagerduty(request: httpx.Request) -> httpx.Response:
+    """Two pages of records per account; the `broken` key is unauthorised."""
+    key = request.headers["Authorization"].removeprefix(pagerduty.TOKEN_REQUEST_PREFIX)
+    if key == "broken":
+        return httpx.Response(401, json={"error": "nope"})
+    endpoint = request.url.path.strip("/")
+    offset = int(request.url.params["offset"])
+    records = [{"id": f"{key}-{offset + i}", "name": endpoint} for i in range(2)]
+    return httpx.Response(200, json={endpoint: records, "more": offset == 0})
+
+
+def test_load_accounts(tmp_path: Path) -> None:
+    """Test: named keys and prefixed extra accounts load; empty keys are skipped."""
+    env = tmp_path / ".env"
+    env.write_text(
+        'PAGERDUTY_REST_API_KEY=""\nPAGERDUTY_API_CONCEPTS_EXAMPLE_KEY="ex"\nPAGERDUTY_REST_API_KEY_ACME="acme"\n'
+    )
+    accounts = pagerduty.load_accounts(env)
+    assert sorted(accounts) == ["acme", "example"]
+    assert accounts["acme"].headers["Authorization"] == "Token token=acme"
+
+
+def test_snapshot_merges_accounts_and_reports_failures(tmp_path: Path) -> None:
+    """Test: rows are tagged by account and merged; one bad account doesn't sink the rest."""
+    accounts = [
+        pagerduty.Account("a", "ka"),
+        pagerduty.Account("b", "kb"),
+        pagerduty.Account("bad", "broken"),
+    ]
+    result = pagerduty.snapshot(
+        accounts, ("users", "licenses"), transport=httpx.MockTransport(_fake_pagerduty)
+    )
+    assert set(result.errors) == {"bad"}
+    users = result.frames["users"]
+    assert users.group_by("account").len().sort("account").rows() == [
+        ("a", 4),
+        ("b", 4),
+    ]
+
+    directory = pagerduty.save_snapshot(result.frames, tmp_path)
+    assert pagerduty.list_snapshots(tmp_path) == [directory]
+    again = pagerduty.save_snapshot(result.frames, tmp_path)  # within the second
+    assert pagerduty.list_snapshots(tmp_path) == [directory, again]
+    assert pl.read_parquet(directory / "licenses.parquet").height == 8
+
+
+def test_snapshot_datasets_read_and_size_only_the_latest(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test: a pd_* dataset is built from, and sized by, its newest snapshot only."""
+    root = tmp_path / "no_sync" / "pagerduty" / "snapshots"
+    pagerduty.save_snapshot({"users": pl.DataFrame({"id": ["old1", "old2"]})}, root)
+    latest = pagerduty.save_snapshot({"users": pl.DataFrame({"id": ["new"]})}, root)
+    sized: list[list[Path]] = []
+    estimate_bytes = memory.estimate_bytes
+
+    def estimate(sources: list[Path]) -> int:
+        sized.append(list(sources))
+        return estimate_bytes(sources)
+
+    monkeypatch.setattr(catalog.memory, "estimate_bytes", estimate)
+    dataset = catalog.DATASETS["pd_users"]
+    assert len(dataset.sources(tmp_path)) == 2
+    assert dataset.read_sources(tmp_path) == [latest / "users.parquet"]
+    assert catalog.open("pd_users", tmp_path)["id"].to_list() == ["new"]
+    assert sized == [[latest / "users.parquet"]]
@@ -0,0 +1,55 @@
+"""Unit Tests for `progress.py`."""
+
+import io
+import json
+
+import pytest
+
+from ${{ carnate.project_name }} import progress
+
+
+def test_ndjson_reports_rates_and_eta() -> None:
+    """Test: NDJSON mode writes periodic and final lines with counters and rates."""
+    stream = io.StringIO()
+    with progress.Reporter("ndjson", stream=stream, ndjson_interval=0.05) as reporter:
+        task = reporter.task("pull", total=100, total_bytes=1000)
+        for _ in range(10):
+            task.advance(5, nbytes=50)
+        progress.time.sleep(0.12)
+        task.advance(50, nbytes=500)
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(lines) >= 2
+    final = lines[-1]
+    assert final["task"] == "pull"
+    assert final["done"]
+    assert (final["units"], final["bytes"]) == (100, 1000)
+    assert final["units_per_s"] > 0
+    assert final["eta_s"] == 0.0
+    assert any(not line["done"] and line["eta_s"] is not None for line in lines)
+
+
+def test_off_mode_is_silent_and_counts() -> None:
+    """Test: with reporting off, tasks still count and nothing is written."""
+    stream = io.StringIO()
+    with progress.Reporter("off", stream=stream) as reporter:
+        task = reporter.task("work", unit="files")
+        task.advance()
+        task.advance(2, nbytes=10)
+    assert stream.getvalue() == ""
+    assert reporter.snapshot()[0]["units"] == 3
+
+
+def test_tty_mode_renders_table() -> None:
+    """Test: the live table shows each task's progress."""
+    reporter = progress.Reporter("tty", stream=io.StringIO())
+    reporter.task("users", total=10).advance(4, nbytes=2048)
+    text = io.StringIO()
+    progress.Console(file=text, width=120).print(reporter.table())
+    assert "users" in text.getvalue()
+    assert "4/10 rows" in text.getvalue()
+
+
+def test_unknown_mode() -> None:
+    """Test: an unknown mode is rejected."""
+    with pytest.raises(ValueError, match="mode"):
+        progress.Reporter("fancy")
@@ -0,0 +1,49 @@
+"""Unit Tests for `query.py`."""
+
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from ${{ carnate.project_name }} import query
+
+
+@pytest.fixture
+def data_dir(tmp_path: Path) -> Path:
+    """Return a data dir with one CSV dataset and one ingested Parquet dataset."""
+    (tmp_path / "iris.csv").write_text(
+        "sepal.length,variety\n5.1,Setosa\n7.0,Versicolor\n6.3,Virginica\n"
+    )
+    partition = tmp_path / query.PARQUET_SUBDIR / "dataset=events"
+    partition.mkdir(parents=True)
+    pl.DataFrame(
+        {"id": [1, 2, 3], "kind": ["a", "b", "a"], "blob": ["x"] * 3}
+    ).write_parquet(partition / "part.parquet")
+    return tmp_path
+
+
+def test_run_over_catalog_and_parquet(data_dir: Path) -> None:
+    """Test: both catalog and ingested datasets are queryable by name."""
+    iris = query.run(
+        'SELECT variety FROM iris WHERE "sepal.length" > 6 ORDER BY variety', data_dir
+    )
+    assert iris["variety"].cast(pl.Utf8).to_list() == ["Versicolor", "Virginica"]
+    events = query.run(
+        "SELECT kind, COUNT(*) AS n FROM events GROUP BY kind ORDER BY kind", data_dir
+    )
+    assert events.rows() == [("a", 2), ("b", 1)]
+
+
+def test_compile_pushes_projection_into_scan(data_dir: Path) -> None:
+    """Test: only referenced columns are read and the filter runs inside the scan."""
+    plan = query.compile_sql("SELECT kind FROM events WHERE id > 1", data_dir).explain()
+    scan = plan[plan.index("Parquet SCAN") :]
+    assert "PROJECT 2/" in scan
+    assert "SELECTION" in scan
+
+
+def test_sink_writes_parquet(data_dir: Path, tmp_path: Path) -> None:
+    """Test: results can be streamed to a file instead of returned."""
+    out = tmp_path / "out.parquet"
+    query.sink("SELECT id FROM events WHERE kind = 'a'", out, data_dir)
+    assert pl.read_parquet(out)["id"].to_list() == [1, 3]
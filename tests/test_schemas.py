@@ -0,0 +1,28 @@
+"""Unit Tests for `schemas.py`."""
+
+from pathlib import Path
+
+import polars as pl
+
+from ${{ carnate.project_name }} import schemas
+
+
+def test_schema_for_stocks() -> None:
+    """Test: every stocks file resolves to the `stocks` schema."""
+    schema = schemas.schema_for(Path("data/stocks/stock_pagerduty.csv"))
+    assert schema is not None
+    assert schema.name == "stocks"
+    assert schemas.schema_for(Path("data/unregistered.csv")) is None
+
+
+def test_scan_cleans_stocks(tmp_path: Path) -> None:
+    """Test: pretty-printed numbers and dates are parsed; missing volume is null."""
+    index = tmp_path / "stock_index.csv"
+    index.write_text(
+        'Date,Open,High,Low,Close\n01/09/2024,"6,803.56","6,803.56","6,800.00","6,801.10"\n'
+    )
+    row = schemas.scan(index).collect().row(0, named=True)
+    assert row["Open"] == 6803.56
+    assert row["Volume"] is None
+    assert row["Ticker"] == "index"
+    assert schemas.scan(index).schema["Date"] == pl.Date
@@ -0,0 +1,61 @@
+"""Unit Tests for `search.py`."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import polars as pl
+
+from ${{ carnate.project_name }} import search
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _docs(rows: dict[str, str]) -> pl.DataFrame:
+    return pl.DataFrame({"id": list(rows), "subject": list(rows.values())})
+
+
+def test_search_ranks_by_bm25(tmp_path: Path) -> None:
+    """Test: rarer and more frequent matches rank first; stop words are ignored."""
+    index = search.SearchIndex(tmp_path, "id", ("subject", "description"))
+    index.rebuild(
+        _docs(
+            {
+                "1": "escalation policy is broken",
+                "2": "broken broken webhook",
+                "3": "the license count",
+            }
+        )
+    )
+    assert len(index) == 3
+    assert [h.doc_id for h in index.search("broken webhook")] == ["2", "1"]
+    assert index.search("the") == []
+    assert [h.doc_id for h in index.search("LICENSE")] == ["3"]
+    assert [h.doc_id for h in index.search("broken", limit=1)] == ["2"]
+
+
+def test_update_replaces_changed_documents_and_persists(tmp_path: Path) -> None:
+    """Test: a changed ticket loses its old terms; a fresh index reloads from disk."""
+    index = search.SearchIndex(tmp_path, "id", ("subject",))
+    index.update(_docs({"1": "pager outage", "2": "sso login"}))
+    index.update(_docs({"1": "billing question", "3": "pager storm"}))
+
+    reopened = search.SearchIndex(tmp_path, "id", ("subject",))
+    assert len(reopened) == 3
+    assert [h.doc_id for h in reopened.search("pager")] == ["3"]
+    assert [h.doc_id for h in reopened.search("billing")] == ["1"]
+    assert [h.doc_id for h in reopened.search("sso")] == ["2"]
+
+
+def test_update_matches_a_rebuild(tmp_path: Path) -> None:
+    """Test: merging changed postings in ranks like indexing everything afresh."""
+    texts = {str(i): f"term{i % 7} shared word{i % 3} extra{i}" for i in range(40)}
+    changes = {"3": "brand new words", "17": "term1 shared", "41": "late arrival"}
+    updated = search.SearchIndex(tmp_path / "updated", "id", ("subject",))
+    updated.rebuild(_docs(texts))
+    updated.update(_docs(changes))
+    rebuilt = search.SearchIndex(tmp_path / "rebuilt", "id", ("subject",))
+    rebuilt.rebuild(_docs(texts | changes))
+    for query in ["term1", "shared word2", "extra3", "brand", "arrival", "extra17"]:
+        assert updated.search(query, limit=50) == rebuilt.search(query, limit=50)
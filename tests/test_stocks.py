@@ -0,0 +1,74 @@
+"""Unit Tests for `stocks.py`."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+
+from ${{ carnate.project_name }} import stocks
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _write(directory: Path, ticker: str, rows: list[tuple[str, str]]) -> None:
+    """Write a newest-first stocks file (dates and closes only matter here)."""
+    lines = ["Date,Open,High,Low,Close,Volume"]
+    lines += [f'{date},"1","1","1","{close}","1,000"' for date, close in rows]
+    (directory / f"stock_{ticker}.csv").write_text("\n".join(lines) + "\n")
+
+
+def test_load_aligns_tickers_on_date(tmp_path: Path) -> None:
+    """Test: returns are ascending by date, NaN where a ticker has no price."""
+    _write(
+        tmp_path, "a", [("01/04/2024", "4"), ("01/03/2024", "2"), ("01/02/2024", "1")]
+    )
+    _write(tmp_path, "b", [("01/04/2024", "1,100.00"), ("01/03/2024", "1,000.00")])
+    returns = stocks.load(tmp_path)
+    assert returns.tickers == ["a", "b"]
+    assert returns.dates.astype(str).tolist() == ["2024-01-03", "2024-01-04"]
+    assert np.allclose(returns.values[:, 0], np.log(2))
+    assert np.isnan(returns.values[0, 1])
+    assert returns.values[1, 1] == pytest.approx(np.log(1.1))
+
+
+def test_moments_are_pairwise_complete() -> None:
+    """Test: with missing values, each pair uses only the days both have."""
+    rng = np.random.default_rng(3)
+    values = rng.normal(size=(300, 5))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    result = stocks.moments(values, list("abcde"), block=2)
+    for i, j in [(0, 1), (1, 4), (2, 3)]:
+        shared = ~np.isnan(values[:, i]) & ~np.isnan(values[:, j])
+        x, y = values[shared, i], values[shared, j]
+        assert result.periods[i, j] == shared.sum()
+        assert result.cov[i, j] == pytest.approx(np.cov(x, y)[0, 1])
+        assert result.corr[j, i] == pytest.approx(np.corrcoef(x, y)[0, 1])
+
+
+def test_moments_need_min_periods() -> None:
+    """Test: pairs sharing too few returns get NaN."""
+    values = np.array([[0.1, np.nan], [0.2, 0.1], [0.3, np.nan], [0.1, 0.2]])
+    result = stocks.moments(values, ["a", "b"], min_periods=3)
+    assert np.isnan(result.corr[0, 1])
+    assert result.corr[0, 0] == pytest.approx(1.0)
+
+
+def test_rolling_ends_on_latest_window() -> None:
+    """Test: windows step back from the last date; each matches a direct computation."""
+    values = np.random.default_rng(4).normal(size=(50, 3))
+    returns = stocks.Returns(
+        dates=np.datetime64("2024-01-01") + np.arange(50),
+        tickers=["a", "b", "c"],
+        values=values,
+    )
+    windows = list(stocks.rolling(returns, 20, step=10))
+    assert [str(date) for date, _ in windows] == [
+        "2024-01-20",
+        "2024-01-30",
+        "2024-02-09",
+        "2024-02-19",
+    ]
+    assert np.allclose(windows[-1][1].corr, np.corrcoef(values[-20:], rowvar=False))
@@ -0,0 +1,162 @@
+"""Unit Tests for `tickets.py`."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+import httpx
+import polars as pl
+
+from ${{ carnate.project_name }} import progress, tickets, zenq
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _ticket(ticket_id: str, modified: str, status: str = "Open", **extra: str) -> dict:
+    return {"id": ticket_id, "last_modified_date": modified, "status": status, **extra}
+
+
+def test_upsert_inserts_updates_and_skips_unchanged(tmp_path: Path) -> None:
+    """Test: only new or modified tickets are written; watermark advances."""
+    store = tickets.TicketStore(tmp_path)
+    first = store.upsert(
+        [_ticket("1", "2024-01-01T00:00"), _ticket("2", "2024-01-02T00:00")]
+    )
+    assert (first.inserted, first.updated, first.watermark) == (
+        2,
+        0,
+        "2024-01-02T00:00:00.000000Z",
+    )
+
+    second = store.upsert(
+        [
+            _ticket("2", "2024-01-02T00:00"),  # re-sent at the watermark: unchanged
+            _ticket("1", "2024-01-03T00:00", status="Closed"),
+            _ticket("3", "2024-01-03T00:00", subject="new column"),
+        ]
+    )
+    assert (second.inserted, second.updated, second.unchanged) == (1, 1, 1)
+    assert store.watermark == "2024-01-03T00:00:00.000000Z"
+    current = store.load().sort("id")
+    assert current["status"].to_list() == ["Closed", "Open", "Open"]
+    assert store.open_tickets()["id"].sort().to_list() == ["2", "3"]
+    assert store.history().collect().height == 4  # 2 + 2 changed rows, not 5
+
+
+def test_close_out_and_history_compaction(tmp_path: Path) -> None:
+    """Test: open tickets missing upstream are closed; history deltas get merged."""
+    store = tickets.TicketStore(tmp_path)
+    for i in range(tickets.COMPACT_HISTORY_AFTER + 1):
+        store.upsert([_ticket(str(i), f"2024-01-01T00:{i:02d}")])
+    assert len(list(store.history_dir.glob("*.parquet"))) == 1
+    assert store.history().collect().height == tickets.COMPACT_HISTORY_AFTER + 1
+
+    result = store.close_out(["0", "1"])
+    assert result.closed == tickets.COMPACT_HISTORY_AFTER - 1
+    assert store.open_tickets()["id"].sort().to_list() == ["0", "1"]
+
+
+def test_watermark_is_an_instant_and_drops_seen_boundary_ids(tmp_path: Path) -> None:
+    """Test: offsets order as instants; tickets re-sent at the watermark are skipped."""
+    store = tickets.TicketStore(tmp_path)
+    store.upsert(
+        [
+            _ticket("1", "2024-01-01T23:00:00-05:00"),  # 2024-01-02T04:00Z
+            _ticket("2", "2024-01-02T03:00:00Z"),
+        ]
+    )
+    assert store.watermark == "2024-01-02T04:00:00.000000Z"
+
+    resent = store.upsert(
+        [
+            _ticket("1", "2024-01-02T04:00:00Z"),  # the same instant, as UTC
+            _ticket("3", "2024-01-02T05:00:00+01:00"),  # also 04:00Z, but new
+        ]
+    )
+    assert (resent.fetched, resent.inserted, resent.unchanged) == (2, 1, 1)
+    assert store.state["at_watermark"] == ["1", "3"]
+    assert store.history().collect().height == 3
+
+
+def test_syncs_append_segments_instead_of_rewriting(tmp_path: Path) -> None:
+    """Test: a sync writes only its changed rows; old versions are superseded."""
+    store = tickets.TicketStore(tmp_path)
+    store.upsert([_ticket(str(i), "2024-01-01T00:00") for i in range(5)])
+    (first,) = store.segments()
+    written = first.stat().st_mtime_ns
+    store.upsert([_ticket("0", "2024-01-02T00:00", status="Closed")])
+
+    segments = store.segments()
+    assert len(segments) == 2
+    assert first.stat().st_mtime_ns == written
+    assert pl.read_ipc(segments[1])["id"].to_list() == ["0"]
+    assert store.load().height == 5
+    assert store.lookup(since="2024-01-02T00:00")["status"].to_list() == ["Closed"]
+
+    for i in range(tickets.COMPACT_SEGMENTS_AFTER - 1):  # the 25th segment merges
+        store.upsert([_ticket("1", f"2024-01-03T00:{i:02d}")])
+    assert len(store.segments()) == 1
+    assert pl.read_ipc(store.segments()[0]).height == 5
+    assert store.lookup(since="2024-01-03T00:00")["id"].to_list() == ["1"]
+
+
+def test_sync_requests_only_changes_after_baseline(tmp_path: Path) -> None:
+    """Test: first sync pulls the open queue; later syncs filter by watermark."""
+    seen: list[dict] = []
+
+    def fake(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/token"):
+            return httpx.Response(200, json={"access_token": "t"})
+        seen.append(dict(request.url.params))
+        return httpx.Response(200, json=[_ticket("1", "2024-01-05T00:00")])
+
+    store = tickets.TicketStore(tmp_path)
+    credentials = zenq.Credentials("id", "secret", "cookie")
+    transport = httpx.MockTransport(fake)
+    tickets.sync(store, credentials, transport=transport)
+    reporter = progress.Reporter("off")
+    result = tickets.sync(store, credentials, transport=transport, reporter=reporter)
+    assert seen[0] == {"status": zenq.OPEN_STATUS_FILTER}
+    assert seen[1] == {zenq.MODIFIED_SINCE_PARAM: ">=2024-01-05T00:00:00.000000Z"}
+    assert result.unchanged == 1
+    (task,) = reporter.tasks
+    assert (task.units, task.unit) == (1, "tickets")
+    assert task.nbytes > 0
+    state = json.loads(store.state_path.read_text())
+    assert state["watermark"] == "2024-01-05T00:00:00.000000Z"
+    assert state["at_watermark"] == ["1"]
+    assert isinstance(store.load(), pl.DataFrame)
+
+
+def test_store_search_follows_upserts(tmp_path: Path) -> None:
+    """Test: synced tickets are searchable, with their current fields attached."""
+    store = tickets.TicketStore(tmp_path)
+    store.upsert([_ticket("1", "2024-01-01T00:00", subject="Webhook retries")])
+    store.upsert([_ticket("2", "2024-01-02T00:00", subject="SSO webhook setup")])
+    assert store.search("webhook")["id"].sort().to_list() == ["1", "2"]
+    assert store.search("sso")["subject"].to_list() == ["SSO webhook setup"]
+    assert store.reindex() == 2
+
+
+def test_store_lookup_uses_secondary_indexes(tmp_path: Path) -> None:
+    """Test: email and time-range lookups agree with filtering the whole table."""
+    store = tickets.TicketStore(tmp_path)
+    store.upsert(
+        [
+            _ticket("1", "2024-01-01T00:00", user_email="a@example.com"),
+            _ticket("2", "2024-01-02T00:00", user_email="b@example.com"),
+            _ticket("3", "2024-01-03T00:00", user_email="a@example.com"),
+        ]
+    )
+    store.upsert([_ticket("2", "2024-01-04T00:00", user_email="a@example.com")])
+
+    by_email = store.lookup(["a@example.com"])
+    assert by_email["id"].sort().to_list() == ["1", "2", "3"]
+    assert store.lookup(["b@example.com"]).is_empty()
+    in_range = store.lookup(since="2024-01-02T00:00", until="2024-01-04T00:00")
+    assert in_range["id"].to_list() == ["3"]
+    both = store.lookup(["a@example.com"], since="2024-01-03T00:00")
+    assert both["id"].sort().to_list() == ["2", "3"]
+    assert store.lookup().height == 3
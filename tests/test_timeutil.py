@@ -0,0 +1,88 @@
+"""Unit Tests for `timeutil.py`."""
+
+from __future__ import annotations
+
+from datetime import UTC, date, datetime
+
+import polars as pl
+import pytest
+
+from ${{ carnate.project_name }} import timeutil
+
+
+def test_column_to_utc_for_each_dtype() -> None:
+    """Test: offsets, naive strings/datetimes in a zone, and dates all become UTC."""
+    frame = pl.DataFrame(
+        {
+            "iso": ["2024-01-01T12:00:00Z", "2024-01-01T12:00:00.5+02:00", None],
+            "naive": ["2024-07-01 12:00:00", "2024-01-01 12:00:00", None],
+            "stamp": [datetime(2024, 7, 1, 12), datetime(2024, 1, 1, 12), None],  # noqa: DTZ001 -- naive on purpose
+            "day": [date(2024, 1, 1), None, None],
+            "empty": [None, None, None],
+        }
+    )
+    utc = timeutil.to_utc(
+        frame, ["iso", "naive", "stamp", "day", "empty"], "America/New_York"
+    )
+    assert all(dtype == timeutil.UTC_DTYPE for dtype in utc.dtypes)
+    assert utc["iso"].to_list()[:2] == [
+        datetime(2024, 1, 1, 12, tzinfo=UTC),
+        datetime(2024, 1, 1, 10, 0, 0, 500_000, tzinfo=UTC),
+    ]
+    summer_and_winter = [
+        datetime(2024, 7, 1, 16, tzinfo=UTC),
+        datetime(2024, 1, 1, 17, tzinfo=UTC),
+        None,
+    ]
+    assert utc["naive"].to_list() == summer_and_winter
+    assert utc["stamp"].to_list() == summer_and_winter
+    assert utc["day"][0] == datetime(2024, 1, 1, 5, tzinfo=UTC)
+
+    local = utc.select(timeutil.convert("iso", "Asia/Tokyo"))["iso"]
+    assert local.dt.hour().to_list()[:1] == [21]
+
+
+def test_detect_format_caches_by_shape() -> None:
+    """Test: a second column of the same shape reuses the detected format."""
+    first = pl.Series(["01/02/2024", "12/31/2023"])
+    assert timeutil.detect_format(first) == "%m/%d/%Y"
+    shape = frozenset({"99/99/9999"})
+    assert timeutil._formats_by_shape[shape] == "%m/%d/%Y"  # noqa: SLF001
+    assert timeutil.detect_format(pl.Series(["03/04/2025"])) == "%m/%d/%Y"
+    with pytest.raises(ValueError, match="No known timestamp format"):
+        timeutil.detect_format(pl.Series(["yesterday"]))
+
+
+def test_column_to_utc_parses_formats_beyond_the_sample() -> None:
+    """Test: a value in another format past the sample is parsed, not nulled."""
+    values = ["2024-01-01T00:00:00Z"] * (timeutil.SAMPLE_SIZE + 50) + ["01/02/2024"]
+    frame = pl.DataFrame({"at": values})
+    parsed = timeutil.to_utc(frame, ["at"])["at"]
+    assert parsed.null_count() == 0
+    assert parsed[-1] == datetime(2024, 1, 2, tzinfo=UTC)
+
+    frame = pl.DataFrame({"at": [*values, "yesterday"]})
+    with pytest.raises(ValueError, match="yesterday"):
+        timeutil.to_utc(frame, ["at"])
+
+
+def test_column_in_one_format_is_parsed_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test: the whole-column parse doubles as the check; nothing is parsed twice."""
+    parses: list[str] = []
+    parse = timeutil.parse
+
+    def counting_parse(column: str | pl.Expr, fmt: str, assume_tz: str) -> pl.Expr:
+        parses.append(fmt)
+        return parse(column, fmt, assume_tz)
+
+    monkeypatch.setattr(timeutil, "parse", counting_parse)
+    frame = pl.DataFrame({"at": ["2024-01-01T00:00:00Z", None, "2024-01-02T00:00:00Z"]})
+    assert timeutil.to_utc(frame, ["at"])["at"].null_count() == 1
+    assert len(parses) == 1
+
+
+def test_benchmark_reports_every_method() -> None:
+    """Test: the benchmark runs (small) and compares against the arrow baseline."""
+    result = timeutil.benchmark(rows=1_000, baseline_rows=100)
+    assert result.height == 5
+    assert result.filter(pl.col("method") == "arrow.get per row")["speedup"][0] == 1.0